@@ -5,6 +5,8 @@ SPEC-PERF-001 (2025-11-21) - Problema 2: Invalidacao de Cache
 
 ENDPOINTS:
 - POST /api/v1/admin/cache/nodes/flush - Invalidar cache de nodes manualmente
+- GET /api/v1/admin/catalog-replica - Estado da replica do catalogo Consul
+- GET /api/v1/admin/kv-bundle - Estado do bundle de configuracao do KV
 
 IMPORTANTE - LIMITACAO DE CACHE LOCAL:
 Este sistema utiliza cache LOCAL em memoria (por instancia da aplicacao).
@@ -189,3 +191,61 @@ async def get_nodes_cache_info():
         nodes_ttl_seconds=60,
         sites_ttl_seconds=Config.SITES_CACHE_TTL
     )
+
+
+@router.get("/admin/catalog-replica", tags=["Admin"])
+async def get_catalog_replica_status() -> Dict[str, Any]:
+    """
+    Retorna o estado da replica do catalogo Consul (blocking queries).
+
+    **Retorna:**
+    - ready/running: Se o sync inicial terminou e se o loop esta ativo
+    - version/index: Versao do snapshot e X-Consul-Index correspondente
+    - age_seconds: Idade do snapshot atual
+    - active_watchers: Numero de watchers por nome de servico
+    - publishes/service_refetches/errors: Contadores acumulados
+    """
+    from core.catalog_replica import get_catalog_replica
+
+    return {
+        "success": True,
+        "replica": get_catalog_replica().get_stats()
+    }
+
+
+@router.get("/admin/consul-servers", tags=["Admin"])
+async def get_consul_servers_status() -> Dict[str, Any]:
+    """
+    Retorna o estado da selecao de servidores Consul e dos circuit breakers.
+
+    **Retorna:**
+    - selector: Ranking por EWMA (latencia, taxa de erro, p95) e contadores de hedge
+    - circuit_breakers: Estado por host (closed/half_open/open), falhas consecutivas
+    """
+    from core.circuit_breaker import get_circuit_breakers
+    from core.consul_selector import get_consul_selector
+
+    return {
+        "success": True,
+        "selector": get_consul_selector().get_stats(),
+        "circuit_breakers": get_circuit_breakers().get_stats()
+    }
+
+
+@router.get("/admin/kv-bundle", tags=["Admin"])
+async def get_kv_bundle_status() -> Dict[str, Any]:
+    """
+    Retorna o estado do bundle de configuracao do KV (blocking queries).
+
+    **Retorna:**
+    - ready/running: Se a carga inicial terminou e se os watchers estao ativos
+    - version/keys: Versao do snapshot e total de chaves em memoria
+    - prefixes: X-Consul-Index por prefixo observado
+    - pending_writes: Chaves escritas aguardando confirmacao do watch
+    """
+    from core.kv_bundle import get_kv_bundle
+
+    return {
+        "success": True,
+        "bundle": get_kv_bundle().get_stats()
+    }
@@ -2,10 +2,13 @@
 API de Auditoria
 Endpoints para consulta de logs de auditoria
 """
-from fastapi import APIRouter, Query
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 from pydantic import BaseModel
-from core.audit_manager import audit_manager
+from core.audit_manager import audit_manager, get_instance_rollups
+from core.audit_store import InvalidCursorError
 
 router = APIRouter(prefix="/kv/audit", tags=["Audit Logs"])
 
@@ -29,6 +32,7 @@ class AuditEventsResponse(BaseModel):
     count: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
 
 
 class AuditStatisticsResponse(BaseModel):
@@ -45,8 +49,11 @@ async def get_audit_events(
     end_date: Optional[str] = Query(None, description="Data final (ISO format)"),
     resource_type: Optional[str] = Query(None, description="Tipo de recurso"),
     action: Optional[str] = Query(None, description="Ação realizada"),
+    resource_id: Optional[str] = Query(None, description="ID do recurso"),
+    user: Optional[str] = Query(None, description="Usuário"),
     limit: int = Query(20, ge=1, le=1000, description="Limite de eventos"),
-    offset: int = Query(0, ge=0, description="Número de eventos a pular")
+    offset: int = Query(0, ge=0, description="Número de eventos a pular"),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior (substitui offset)")
 ):
     """
     Lista eventos de auditoria com filtros opcionais
@@ -57,22 +64,33 @@ async def get_audit_events(
     - **action**: Filtrar por ação (create, update, delete, read)
     - **limit**: Número máximo de eventos a retornar (padrão: 20, máximo: 1000)
     - **offset**: Número de eventos a pular para paginação (padrão: 0)
+    - **cursor**: Paginação estável - use o next_cursor da resposta anterior
     """
-    events, total = audit_manager.get_events(
-        start_date=start_date,
-        end_date=end_date,
-        resource_type=resource_type,
-        action=action,
-        limit=limit,
-        offset=offset
-    )
-
+    try:
+        # Consulta ao audit store (SQLite) fora do event loop
+        result = await asyncio.to_thread(
+            audit_manager.query_events,
+            start_date=start_date,
+            end_date=end_date,
+            resource_type=resource_type,
+            action=action,
+            resource_id=resource_id,
+            user=user,
+            limit=limit,
+            offset=offset,
+            cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    events = result["events"]
     return {
         "events": events,
-        "total": total,
+        "total": result["total"],
         "count": len(events),
         "limit": limit,
-        "offset": offset
+        "offset": 0 if cursor else offset,
+        "next_cursor": result["next_cursor"]
     }
 
 
@@ -87,10 +105,21 @@ async def get_audit_statistics():
     - Contagem por tipo de recurso
     - Contagem por usuário
     """
-    stats = audit_manager.get_statistics()
+    stats = await asyncio.to_thread(audit_manager.get_statistics)
     return stats
 
 
+@router.get("/instances")
+async def get_audit_instances():
+    """
+    Resumos de auditoria publicados por cada instância no KV
+
+    Requer AUDIT_KV_ROLLUP_ENABLED=true nas instâncias (rollup periódico em
+    skills/eye/audit/rollup/<instância>)
+    """
+    return {"instances": await get_instance_rollups()}
+
+
 @router.delete("/events")
 async def clear_audit_events():
     """
@@ -98,5 +127,5 @@ async def clear_audit_events():
 
     **ATENÇÃO**: Esta ação é irreversível!
     """
-    audit_manager.clear_events()
+    await asyncio.to_thread(audit_manager.clear_events)
     return {"success": True, "message": "Todos os eventos de auditoria foram removidos"}
@@ -34,6 +34,22 @@ class CacheStatsResponse(BaseModel):
     total_requests: int = Field(..., description="Total de requisições ao cache")
     current_size: int = Field(..., description="Número de entradas no cache")
     ttl_seconds: int = Field(..., description="TTL padrão do cache em segundos")
+    stale_hits: int = Field(0, description="Valores servidos stale enquanto revalidava")
+    coalesced_waits: int = Field(0, description="Chamadores que aguardaram loader já em execução")
+    background_refreshes: int = Field(0, description="Refreshes disparados em background (SWR)")
+    in_flight: int = Field(0, description="Loaders em execução no momento")
+    refresh_timings: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Tempo de refresh por chave (count, errors, last_ms, avg_ms, max_ms)"
+    )
+    current_bytes: int = Field(0, description="Tamanho estimado das entradas em bytes")
+    max_bytes: int = Field(0, description="Orçamento máximo de bytes (CACHE_MAX_MEMORY_MB)")
+    max_entries: int = Field(0, description="Máximo de entradas (CACHE_MAX_ENTRIES)")
+    eviction_policy: str = Field("lru", description="Política de eviction: lru | lfu")
+    evictions_by_reason: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Evictions por motivo (expired, capacity, memory, oversize)"
+    )
 
 
 class InvalidateRequest(BaseModel):
@@ -84,6 +100,10 @@ async def get_cache_stats():
     - hit_rate_percent: Taxa de acerto (0-100%)
     - current_size: Número de entradas no cache
     - ttl_seconds: TTL padrão do cache
+    - stale_hits / coalesced_waits / background_refreshes: Single-flight + SWR
+    - refresh_timings: Tempo de refresh por chave carregada via get_or_compute
+    - current_bytes / max_bytes / max_entries: Uso de memória e limites
+    - evictions_by_reason: Evictions por motivo (expired, capacity, memory, oversize)
 
     **Use Case:**
     - Monitorar eficiência do cache
@@ -3,21 +3,30 @@ API otimizada de Dashboard
 Endpoint único e RÁPIDO que retorna todas as métricas processadas
 Similar ao TenSunS - processa tudo no backend
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 # SPRINT 2: Cache antigo removido - dashboard não usa mais cache local
 # from core.cache_manager import cache_manager
 from core.audit_manager import audit_manager
+from core.catalog_replica import get_ready_snapshot
 from core.config import Config
-import requests
+from core.consul_manager import ConsulManager
+from core.dashboard_aggregates import BLACKBOX_MODULES, get_dashboard_aggregates
+from core.http_cache import check_not_modified
+import asyncio
+import httpx
 import time
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
-# Headers e URL do Consul
-CONSUL_HEADERS = {"X-Consul-Token": Config.CONSUL_TOKEN}
-CONSUL_URL = f"http://{Config.MAIN_SERVER}:{Config.CONSUL_PORT}/v1"
+
+async def _recent_audit_events(limit: int = 10) -> List[Dict]:
+    """Últimos eventos de auditoria (sem COUNT(*); consulta fora do event loop)"""
+    result = await asyncio.to_thread(
+        audit_manager.query_events, limit=limit, include_total=False
+    )
+    return result["events"]
 
 
 class DashboardMetrics(BaseModel):
@@ -32,10 +41,13 @@ class DashboardMetrics(BaseModel):
     by_datacenter: Dict[str, int]
     recent_changes: List[dict]
     load_time_ms: Optional[int] = None
+    # Agregados incrementais: versão dos contadores e idade da última mudança
+    version: Optional[int] = None
+    age_seconds: Optional[float] = None
 
 
 @router.get("/metrics", response_model=DashboardMetrics)
-def get_dashboard_metrics_fast():
+async def get_dashboard_metrics_fast(request: Request, response: Response):
     """
     Endpoint SUPER OTIMIZADO para métricas do dashboard
 
@@ -43,31 +55,40 @@ def get_dashboard_metrics_fast():
     - Cache de 30 segundos (retorna instantaneamente se cacheado)
     - UMA única chamada ao Consul (/internal/ui/services)
     - Processamento no backend (não sobrecarrega frontend)
-    - Síncrono (sem overhead de async)
+    - Async no pool httpx compartilhado (não ocupa thread do threadpool)
     - Similar ao TenSunS (método mais rápido)
+    - Agregados incrementais (core/dashboard_aggregates.py): com réplica
+      pronta a leitura é O(1), sem requisições ao Consul
     """
     start_time = time.time()
 
     # SPRINT 2: Cache removido - dashboard sempre busca dados frescos
     # O cache agora é feito no ConsulManager para get_all_services_catalog()
 
+    # AGREGADOS: contadores mantidos por deltas (catálogo + saúde)
+    snapshot = get_ready_snapshot()
+    aggregates = get_dashboard_aggregates()
+    if Config.DASHBOARD_AGGREGATES_ENABLED and snapshot is not None and aggregates.live_ready:
+        aggregates.sync_catalog(snapshot)
+        # ETag fraco: load_time_ms/age_seconds variam para a mesma versão
+        # Consultas ao audit store (SQLite) fora do event loop
+        last_event = await asyncio.to_thread(lambda: audit_manager.last_event_id)
+        check_not_modified(request, response, aggregates.version, last_event, weak=True)
+        recent_events = await _recent_audit_events()
+        return {
+            **aggregates.read(),
+            'recent_changes': recent_events,
+            'load_time_ms': int((time.time() - start_time) * 1000),
+        }
+
     try:
-        # 1 CHAMADA AO CONSUL - Endpoint agregado (rápido!)
-        services_response = requests.get(
-            f"{CONSUL_URL}/internal/ui/services",
-            headers=CONSUL_HEADERS,
-            timeout=5
+        # 2 CHAMADAS AO CONSUL EM PARALELO - Endpoint agregado + nodes
+        consul = ConsulManager()
+        services_response, nodes_response = await asyncio.gather(
+            consul._request("GET", "/internal/ui/services"),
+            consul._request("GET", "/catalog/nodes"),
         )
-        services_response.raise_for_status()
         services_list = [s for s in services_response.json() if s.get('Name') != 'consul']
-
-        # Buscar nodes
-        nodes_response = requests.get(
-            f"{CONSUL_URL}/catalog/nodes",
-            headers=CONSUL_HEADERS,
-            timeout=5
-        )
-        nodes_response.raise_for_status()
         nodes_list = nodes_response.json()
 
         # Contadores
@@ -78,11 +99,6 @@ def get_dashboard_metrics_fast():
         by_datacenter: Dict[str, int] = {}
         health_stats = {'passing': 0, 'warning': 0, 'critical': 0}
 
-        # Blackbox modules conhecidos
-        blackbox_modules = ['icmp', 'http_2xx', 'http_4xx', 'http_5xx',
-                          'http_post_2xx', 'https', 'tcp_connect',
-                          'ssh_banner', 'pop3s_banner', 'irc_banner']
-
         # Processar serviços (JÁ AGREGADOS do /internal/ui/services)
         for svc in services_list:
             service_name = str(svc.get('Name', '')).lower()
@@ -92,7 +108,7 @@ def get_dashboard_metrics_fast():
 
             # Identificar tipo
             tags = [str(t).lower() for t in svc.get('Tags', [])]
-            is_blackbox = any(bm in tag for tag in tags for bm in blackbox_modules)
+            is_blackbox = any(bm in tag for tag in tags for bm in BLACKBOX_MODULES)
             is_exporter = '_exporter' in service_name
 
             if is_blackbox:
@@ -128,7 +144,7 @@ def get_dashboard_metrics_fast():
             active_nodes += 1
 
         # Eventos recentes de auditoria (últimos 10)
-        recent_events, _ = audit_manager.get_events(limit=10)
+        recent_events = await _recent_audit_events()
 
         # Montar resposta
         metrics = {
@@ -147,7 +163,7 @@ def get_dashboard_metrics_fast():
         # SPRINT 2: Cache removido - dados sempre frescos
         return metrics
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=503, detail=f"Erro ao conectar com Consul: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar métricas: {str(e)}")
@@ -0,0 +1,131 @@
+"""
+API de Eventos - Push de mudanças do catálogo, KV e regras
+
+ENDPOINTS:
+- GET /api/v1/events/stream?topics=catalog:network-probes,kv:sites  (SSE)
+- WS  /api/v1/events/ws?topics=...  (WebSocket; aceita subscribe/unsubscribe)
+
+Tópicos e formato dos eventos: core/change_feed.py
+Substitui o polling periódico das páginas: o cliente recarrega/aplica deltas
+apenas quando recebe um evento (resync → recarregar os tópicos assinados)
+"""
+import asyncio
+import contextlib
+import json
+import logging
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from core.change_feed import get_change_feed, validate_topic
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def _parse_topics(topics: str) -> List[str]:
+    return [t.strip() for t in topics.split(",") if t.strip()]
+
+
+def _encode(event: Dict[str, Any]) -> str:
+    """JSON do evento (mesma serialização no SSE e no WebSocket: datetime/set → str)"""
+    return json.dumps(event, default=str)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    topics: str = Query(..., description="Tópicos separados por vírgula (catalog:<categoria>, kv:sites, ...)")
+):
+    """
+    Server-Sent Events com as mudanças dos tópicos assinados
+
+    - event: tipo do evento (subscribed, delta, changed, resync)
+    - data: JSON do evento (inclui o tópico)
+    - Comentário de heartbeat a cada CHANGE_FEED_HEARTBEAT_SECONDS
+    """
+    try:
+        requested = [validate_topic(t) for t in _parse_topics(topics)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    feed = get_change_feed()
+
+    async def event_source():
+        # Assina dentro do gerador: o finally sempre acompanha a assinatura
+        subscription = feed.subscribe(requested)
+        try:
+            ready = {"topic": "*", "type": "subscribed", "topics": sorted(subscription.topics)}
+            yield f"event: subscribed\ndata: {_encode(ready)}\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=Config.CHANGE_FEED_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {_encode(event)}\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, topics: str = ""):
+    """
+    WebSocket com as mudanças dos tópicos assinados
+
+    Mensagens do cliente:
+        {"action": "subscribe", "topics": ["catalog:web-probes"]}
+        {"action": "unsubscribe", "topics": ["kv:sites"]}
+    """
+    await websocket.accept()
+    feed = get_change_feed()
+    try:
+        subscription = feed.subscribe(_parse_topics(topics))
+    except ValueError as e:
+        await websocket.send_json({"topic": "*", "type": "error", "detail": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    async def sender():
+        try:
+            while True:
+                await websocket.send_text(_encode(await subscription.get()))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Sem o sender a assinatura ficaria órfã: fecha o socket e o
+            # receive_json abaixo encerra (finally remove a assinatura)
+            logger.warning(f"[EVENTS] Falha ao enviar evento pelo WebSocket: {exc}")
+            with contextlib.suppress(Exception):
+                await websocket.close(code=1011)
+
+    sender_task = asyncio.create_task(sender())
+    try:
+        await websocket.send_json({"topic": "*", "type": "subscribed", "topics": sorted(subscription.topics)})
+        while True:
+            message = await websocket.receive_json()
+            action = message.get("action") if isinstance(message, dict) else None
+            requested = message.get("topics", []) if isinstance(message, dict) else []
+            try:
+                if action == "subscribe":
+                    feed.update(subscription, add=requested)
+                elif action == "unsubscribe":
+                    feed.update(subscription, remove=requested)
+                else:
+                    raise ValueError(f"ação inválida: {action!r} (use subscribe/unsubscribe)")
+            except ValueError as e:
+                await websocket.send_json({"topic": "*", "type": "error", "detail": str(e)})
+                continue
+            await websocket.send_json({"topic": "*", "type": "subscribed", "topics": sorted(subscription.topics)})
+    except (WebSocketDisconnect, json.JSONDecodeError):
+        pass
+    finally:
+        feed.unsubscribe(subscription)
+        sender_task.cancel()
+        await asyncio.gather(sender_task, return_exceptions=True)
@@ -9,6 +9,8 @@ from fastapi import APIRouter, HTTPException, Query, status
 from typing import Any, Dict, Optional
 import logging
 
+from core import kv_envelope, kv_sharded
+from core.config import Config
 from core.consul_manager import ConsulManager
 from .models import KVPutRequest
 
@@ -87,6 +89,8 @@ async def get_tree(prefix: str = Query(..., description="Prefixo do KV")) -> Dic
     _validate_prefix_read(prefix)
     consul = ConsulManager()
     data = await consul.get_kv_tree(prefix, include_metadata=True)
+    # Chunks de valores envelopados são binários: o manifesto representa a chave
+    data = {key: value for key, value in data.items() if not kv_envelope.is_chunk_key(key)}
     return {"success": True, "prefix": prefix, "data": data}
 
 
@@ -99,7 +103,9 @@ async def get_value(key: str = Query(..., description="Chave completa do KV")) -
     """
     _validate_prefix_read(key)
     consul = ConsulManager()
-    value = await consul.get_kv_json(key)
+    value = await kv_envelope.read_json(consul, key)
+    if kv_sharded.is_index(value):
+        value = await kv_sharded.read_document(consul, key)
     if value is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chave não encontrada")
     return {"success": True, "key": key, "value": value}
@@ -114,7 +120,12 @@ async def put_value(payload: KVPutRequest) -> Dict[str, Any]:
     """
     _validate_prefix_write(payload.key)
     consul = ConsulManager()
-    ok = await consul.put_kv_json(payload.key, payload.value)
+    if payload.key in kv_sharded.SHARDED_LAYOUTS and await kv_sharded.is_sharded(consul, payload.key):
+        ok = await kv_sharded.write_document(consul, payload.key, payload.value)
+    elif Config.KV_ENVELOPE_ENABLED:
+        ok = await kv_envelope.write_json(consul, payload.key, payload.value)
+    else:
+        ok = await consul.put_kv_json(payload.key, payload.value)
     if not ok:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falha ao gravar no Consul")
     return {"success": True, "key": payload.key, "value": payload.value}
@@ -129,7 +140,12 @@ async def delete_value(key: str = Query(..., description="Chave completa do KV")
     """
     _validate_prefix_write(key)
     consul = ConsulManager()
-    deleted = await consul.delete_key(key)
+    if key in kv_sharded.SHARDED_LAYOUTS:
+        deleted = await kv_envelope.delete_json(consul, key, trees=[kv_sharded.items_prefix(key)])
+    elif Config.KV_ENVELOPE_ENABLED:
+        deleted = await kv_envelope.delete_json(consul, key)
+    else:
+        deleted = await consul.delete_key(key)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chave não encontrada ou falha ao remover")
     return {"success": True, "key": key}
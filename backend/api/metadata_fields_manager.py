@@ -19,6 +19,7 @@ import re
 import yaml  # type: ignore
 from yaml import nodes as yaml_nodes  # type: ignore
 
+from core import kv_sharded
 from core.multi_config_manager import MultiConfigManager
 from core.server_utils import get_server_detector, ServerInfo
 from core.fields_extraction_service import get_discovered_in_for_field
@@ -465,6 +466,58 @@ async def save_fields_config(config: Dict[str, Any]) -> bool:
         raise HTTPException(status_code=500, detail=f"Erro ao salvar: {str(e)}")
 
 
+FIELDS_KV_KEY = 'skills/eye/metadata/fields'
+
+
+async def update_sharded_fields(
+    mutations: Dict[str, Any],
+    index_mutate: Optional[Any] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Atualiza campos com check-and-set quando metadata/fields está no layout
+    fragmentado (core/kv_sharded.py): só as chaves dos campos alterados são
+    gravadas e edições concorrentes de campos diferentes não se sobrescrevem.
+
+    last_updated do índice é sempre atualizado (mesmo comportamento de
+    save_fields_config).
+
+    Args:
+        mutations: {nome_do_campo: função que altera o campo}
+        index_mutate: Alteração do índice (ordem, atributos do documento)
+
+    Returns:
+        {nome: campo atualizado} ou None se o KV ainda usa documento único
+        (chamador segue o fluxo load_fields_config/save_fields_config)
+    """
+    from core.kv_manager import KVManager
+
+    consul = KVManager().consul
+    if not await kv_sharded.is_sharded(consul, FIELDS_KV_KEY):
+        return None
+
+    def mutate_index(index: Dict[str, Any]) -> None:
+        if index_mutate is not None:
+            index_mutate(index)
+        _touch_fields_index(index)
+
+    try:
+        updated = await kv_sharded.update_items(consul, FIELDS_KV_KEY, mutations, index_mutate=mutate_index)
+    except kv_sharded.ItemNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Campo '{e.args[0]}' não encontrado")
+    except kv_sharded.CASConflictError:
+        raise HTTPException(
+            status_code=409,
+            detail="Campo alterado por outra requisição ao mesmo tempo - recarregue e tente novamente"
+        )
+    _kv_manager.invalidate('metadata/fields')
+    return updated
+
+
+def _touch_fields_index(index: Dict[str, Any]) -> None:
+    """Atualiza last_updated do documento (mesmo timestamp de save_fields_config)"""
+    index['document']['last_updated'] = datetime.utcnow().isoformat() + 'Z'
+
+
 def get_field_by_name(config: Dict[str, Any], field_name: str) -> Optional[Dict[str, Any]]:
     """Busca campo por nome"""
     for field in config.get('fields', []):
@@ -1946,6 +1999,18 @@ async def add_fields_to_kv(request: AddToKVRequest):
 @router.put("/{field_name}")
 async def update_field(field_name: str, field_data: MetadataFieldModel):
     """Atualiza campo existente (substituição completa)"""
+    updated_field = field_data.dict()
+
+    # Layout fragmentado: CAS só na chave do campo (renomear cai no fluxo do documento)
+    if updated_field['name'] == field_name:
+        updated = await update_sharded_fields({field_name: lambda _: dict(updated_field)})
+        if updated is not None:
+            return {
+                "success": True,
+                "message": f"Campo '{field_name}' atualizado com sucesso",
+                "field": updated[field_name]
+            }
+
     config = await load_fields_config()
 
     # Buscar campo
@@ -1953,9 +2018,6 @@ async def update_field(field_name: str, field_data: MetadataFieldModel):
     if not field:
         raise HTTPException(status_code=404, detail=f"Campo '{field_name}' não encontrado")
 
-    # Atualizar dados
-    updated_field = field_data.dict()
-
     # Substituir no array
     for i, f in enumerate(config['fields']):
         if f['name'] == field_name:
@@ -1987,6 +2049,20 @@ async def partial_update_field(field_name: str, updates: Dict[str, Any] = Body(.
             "show_in_exporters": false
         }
     """
+    if 'name' in updates:
+        # Não permitir mudar o nome (usaria como chave primária)
+        raise HTTPException(status_code=400, detail="Não é permitido alterar o nome do campo")
+
+    # Layout fragmentado: CAS só na chave do campo
+    updated = await update_sharded_fields({field_name: lambda field: field.update(updates)})
+    if updated is not None:
+        logger.info(f"[CACHE] Cache unificado invalidado após atualização de '{field_name}'")
+        return {
+            "success": True,
+            "message": f"Campo '{field_name}' atualizado com sucesso",
+            "field": updated[field_name]
+        }
+
     config = await load_fields_config()
 
     # Buscar campo
@@ -1996,9 +2072,6 @@ async def partial_update_field(field_name: str, updates: Dict[str, Any] = Body(.
 
     # Atualizar apenas os campos enviados
     for key, value in updates.items():
-        if key == 'name':
-            # Não permitir mudar o nome (usaria como chave primária)
-            raise HTTPException(status_code=400, detail="Não é permitido alterar o nome do campo")
         field[key] = value
 
     # Salvar (substituir campo no array)
@@ -2093,11 +2166,26 @@ async def delete_field(
             detail=f"Não é possível deletar campo obrigatório: '{field_name}'"
         )
 
-    # Remover do array
-    config['fields'] = [f for f in config['fields'] if f['name'] != field_name]
+    from core.kv_manager import KVManager
 
-    # Salvar
-    await save_fields_config(config)
+    consul = KVManager().consul
+    if await kv_sharded.is_sharded(consul, FIELDS_KV_KEY):
+        # Layout fragmentado: remove a chave do campo + entrada no índice (CAS)
+        try:
+            await kv_sharded.delete_item(consul, FIELDS_KV_KEY, field_name, index_mutate=_touch_fields_index)
+        except kv_sharded.ItemNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Campo '{field_name}' não encontrado")
+        except kv_sharded.CASConflictError:
+            raise HTTPException(
+                status_code=409,
+                detail="Campos alterados por outra requisição ao mesmo tempo - recarregue e tente novamente"
+            )
+    else:
+        # Remover do array
+        config['fields'] = [f for f in config['fields'] if f['name'] != field_name]
+
+        # Salvar
+        await save_fields_config(config)
 
     # Invalidar cache unificado
     _kv_manager.invalidate('metadata/fields')
@@ -2127,6 +2215,19 @@ async def reorder_fields(field_orders: Dict[str, int] = Body(...)):
     Body: {"field_name": order, ...}
     Exemplo: {"company": 1, "env": 2, "project": 3}
     """
+    def apply_orders(index: Dict[str, Any]) -> None:
+        # Ordem fica no índice: reordenar não regrava nenhum campo
+        positions = index.setdefault('positions', {})
+        for field_name, order in field_orders.items():
+            if field_name in index['order']:
+                positions[field_name] = order
+
+    if await update_sharded_fields({}, index_mutate=apply_orders) is not None:
+        return {
+            "success": True,
+            "message": f"{len(field_orders)} campos reordenados"
+        }
+
     config = await load_fields_config()
 
     # Atualizar ordem de cada campo
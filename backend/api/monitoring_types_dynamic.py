@@ -14,6 +14,7 @@ import logging
 import asyncio
 from datetime import datetime
 
+from core import kv_sharded
 from core.multi_config_manager import MultiConfigManager
 from core.kv_manager import KVManager
 from core.monitoring_types_backup import get_backup_manager
@@ -861,6 +862,73 @@ async def get_types_from_prometheus(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _set_form_schema(types: List[Dict[str, Any]], type_id: str, form_schema: Dict[str, Any]) -> int:
+    """Aplica form_schema nos tipos com o id informado (retorna quantos foram alterados)"""
+    updated = 0
+    for type_def in types:
+        if type_def.get('id') == type_id:
+            type_def['form_schema'] = form_schema
+            updated += 1
+    return updated
+
+
+async def _update_form_schema_sharded(
+    type_id: str,
+    request: FormSchemaUpdateRequest,
+    kv_data: Dict[str, Any]
+) -> None:
+    """
+    Grava a alteração de form_schema no layout fragmentado (core/kv_sharded.py).
+
+    Cada servidor é uma chave própria: só os servidores que têm o tipo são
+    gravados, com check-and-set no ModifyIndex de cada um.
+    """
+    target_server = request.server
+    specific = bool(target_server and target_server != 'ALL')
+    if specific:
+        hosts = [target_server]
+    else:
+        hosts = [
+            host for host, server_data in kv_data.get('servers', {}).items()
+            if any(t.get('id') == type_id for t in server_data.get('types', []))
+        ]
+
+    def update_server(server_data: Dict[str, Any]) -> None:
+        _set_form_schema(server_data.get('types', []), type_id, request.form_schema)
+
+    def update_index(index: Dict[str, Any]) -> None:
+        document = index['document']
+        document['last_updated'] = kv_data['last_updated']
+        if not specific:
+            _set_form_schema(document.get('all_types') or [], type_id, request.form_schema)
+            for category in document.get('categories') or []:
+                _set_form_schema(category.get('types', []), type_id, request.form_schema)
+        if 'meta' in index:
+            index['meta'].update({
+                'updated_at': datetime.utcnow().isoformat(),
+                'auto_updated': False,
+                'source': 'form_schema_update',
+                'updated_by': 'user',
+                'type_id': type_id,
+                'server': target_server if specific else 'all'
+            })
+
+    try:
+        await kv_sharded.update_items(
+            kv_manager.consul,
+            'skills/eye/monitoring-types',
+            {host: update_server for host in hosts},
+            index_mutate=update_index
+        )
+    except kv_sharded.ItemNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Servidor '{e.args[0]}' não encontrado.")
+    except kv_sharded.CASConflictError:
+        raise HTTPException(
+            status_code=409,
+            detail="monitoring-types alterado por outra requisição ao mesmo tempo - tente novamente"
+        )
+
+
 @router.put("/type/{type_id}/form-schema")
 async def update_type_form_schema(
     type_id: str,
@@ -963,20 +1031,25 @@ async def update_type_form_schema(
             logger.warning(f"[UPDATE-FORM-SCHEMA] ⚠️ Falha ao criar backup (continuando)")
 
         # PASSO 5: Salvar no KV
-        success = await kv_manager.put_json(
-            key='skills/eye/monitoring-types',
-            value=kv_data,
-            metadata={
-                'auto_updated': False,
-                'source': 'form_schema_update',
-                'updated_by': 'user',
-                'type_id': type_id,
-                'server': target_server if target_server and target_server != 'ALL' else 'all'
-            }
-        )
+        if await kv_sharded.is_sharded(kv_manager.consul, 'skills/eye/monitoring-types'):
+            # Layout fragmentado: CAS só nos servidores alterados (+ índice com
+            # all_types/categories), reaplicado sobre a versão atual em caso de conflito
+            await _update_form_schema_sharded(type_id, request, kv_data)
+        else:
+            success = await kv_manager.put_json(
+                key='skills/eye/monitoring-types',
+                value=kv_data,
+                metadata={
+                    'auto_updated': False,
+                    'source': 'form_schema_update',
+                    'updated_by': 'user',
+                    'type_id': type_id,
+                    'server': target_server if target_server and target_server != 'ALL' else 'all'
+                }
+            )
 
-        if not success:
-            raise HTTPException(status_code=500, detail="Erro ao salvar no KV Consul")
+            if not success:
+                raise HTTPException(status_code=500, detail="Erro ao salvar no KV Consul")
         
         logger.info(f"[UPDATE-FORM-SCHEMA] ✅ Form schema salvo no KV para tipo '{type_id}' (servidores atualizados: {servers_updated})")
 
@@ -19,7 +19,7 @@ AUTOR: Sistema de Refatoração Skills Eye v2.0
 DATA: 2025-11-13
 """
 
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import logging
@@ -31,7 +31,12 @@ from core.consul_manager import ConsulManager
 from core.categorization_rule_engine import CategorizationRuleEngine
 from core.cache_manager import get_cache  # SPRINT 2: Usar LocalCache global
 from core.monitoring_cache import get_monitoring_cache  # SPEC-PERF-002: Cache intermediario
-from core.monitoring_filters import process_monitoring_data  # SPEC-PERF-002: Filtros server-side
+from core.categorized_catalog import CatalogCategorizer  # Categorizacao 1x por versao do catalogo
+from core.monitoring_cursor import decode_cursor, encode_cursor  # Paginacao por cursor
+from core.text_index import get_catalog_text_index  # Busca textual (q) por trigramas
+from core.http_cache import check_not_modified  # ETag por versao do catalogo (304)
+from core.response_cache import get_response_cache  # JSON pre-serializado + gzip/brotli
+from core.config import Config
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/monitoring", tags=["Monitoring Unified"])
@@ -50,32 +55,56 @@ cache = get_cache(ttl_seconds=60)
 # Necessario porque Consul nao suporta paginacao nativa (Issue #9422)
 monitoring_data_cache = get_monitoring_cache(ttl_seconds=30)
 
+# Respostas de /data ja codificadas, chave "monitoring:data:<categoria>:response:<ETag>"
+# (removidas junto com o monitoring_data_cache.invalidate(categoria))
+response_cache = get_response_cache()
+
+# Catalogo categorizado: /data e /summary leem particoes por categoria
+# (categorizacao + node_ip/site_code/site_name UMA vez por versao do catalogo)
+catalog_categorizer = CatalogCategorizer(
+    consul_manager,
+    categorization_engine,
+    nodes_loader=lambda: get_nodes_cached(consul_manager)
+)
+
+
+async def _load_available_fields(category: str) -> List[Dict[str, Any]]:
+    """Campos do KV (metadata/fields) visiveis na categoria"""
+    from core.kv_manager import KVManager
+
+    fields_data = await KVManager().get_json('skills/eye/metadata/fields')
+    available_fields = []
+    if fields_data and 'fields' in fields_data:
+        # Filtrar apenas campos relevantes para a categoria
+        show_in_key = f"show_in_{category.replace('-', '_')}"
+        for field in fields_data['fields']:
+            if field.get(show_in_key, True):  # Default True
+                available_fields.append({
+                    'name': field['name'],
+                    'display_name': field.get('display_name', field['name']),
+                    'field_type': field.get('field_type', 'string')
+                })
+    return available_fields
+
 
 async def get_nodes_cached(consul_mgr: ConsulManager) -> List[Dict[str, Any]]:
     """
     Retorna lista de nós do Consul com cache de 5 minutos.
     
     SPRINT 2: Migrado para LocalCache global.
+    SINGLE-FLIGHT: Requisições concorrentes compartilham 1 chamada ao Consul;
+    após expirar, o valor antigo é servido por mais 5min enquanto revalida.
     
     Cache hit: ~0ms
     Cache miss: ~50ms (API call ao Consul)
     """
-    cache_key = "monitoring:nodes:all"
-    
-    # Tentar buscar do cache
-    cached = await cache.get(cache_key)
-    if cached is not None:
-        logger.debug(f"[CACHE HIT] Nodes do Consul (key: {cache_key})")
-        return cached
-    
-    # Cache miss - buscar do Consul
-    logger.debug(f"[CACHE MISS] Buscando nodes do Consul...")
-    nodes = await consul_mgr.get_nodes()
-    
-    # Armazenar no cache (TTL: 300s = 5 minutos)
-    await cache.set(cache_key, nodes, ttl=300)
-    
-    return nodes
+    return await cache.get_or_compute(
+        "monitoring:nodes:all",
+        consul_mgr.get_nodes,
+        ttl=300,
+        stale_ttl=300,
+        should_cache=bool  # Não cachear lista vazia (Consul indisponível)
+    )
 
 
 async def get_services_cached(
@@ -89,6 +118,7 @@ async def get_services_cached(
     Retorna dados de serviços com cache por categoria e filtros.
     
     SPRINT 2: Migrado para LocalCache global.
+    SINGLE-FLIGHT: Apenas 1 fetch_function por chave executa por vez.
     
     Cache hit: ~5ms (apenas validação de filtros)
     Cache miss: ~200ms (busca completa do Consul + categorização)
@@ -97,24 +127,8 @@ async def get_services_cached(
     """
     # Gerar cache key baseado em categoria + filtros
     cache_key = f"monitoring:services:{category}:{company or 'all'}:{site or 'all'}:{env or 'all'}"
-    
-    # Tentar buscar do cache
-    cached = await cache.get(cache_key)
-    if cached is not None:
-        logger.debug(
-            f"[CACHE HIT] Services category='{category}' "
-            f"(key: {cache_key}, total: {cached.get('total', 0)})"
-        )
-        return cached
-    
-    # Cache miss - buscar dados
-    logger.debug(f"[CACHE MISS] Buscando services category='{category}'...")
-    data = await fetch_function()
-    
-    # Armazenar no cache (TTL: 30s padrão do LocalCache)
-    await cache.set(cache_key, data, ttl=30)
-    
-    return data
+
+    return await cache.get_or_compute(cache_key, fetch_function, ttl=30, stale_ttl=30)
 
 
 # ============================================================================
@@ -124,6 +138,7 @@ async def get_services_cached(
 @router.get("/data")
 async def get_monitoring_data(
     request: Request,
+    http_response: Response,
     category: str = Query(..., description="Categoria: network-probes, web-probes, etc"),
     company: Optional[str] = Query(None, description="Filtrar por empresa"),
     site: Optional[str] = Query(None, description="Filtrar por site"),
@@ -135,7 +150,8 @@ async def get_monitoring_data(
     sort_order: Optional[str] = Query(None, description="Direcao: ascend | descend | asc | desc"),
     node: Optional[str] = Query(None, description="Filtrar por IP do no"),
     # SPEC-PERF-002 FIX: Parametro de busca textual
-    q: Optional[str] = Query(None, description="Busca textual em todos os campos")
+    q: Optional[str] = Query(None, description="Busca textual em todos os campos"),
+    cursor: Optional[str] = Query(None, description="Cursor da pagina seguinte (nextCursor da resposta anterior)")
 ):
     """
     Endpoint para buscar SERVICOS do Consul filtrados por categoria
@@ -145,21 +161,37 @@ async def get_monitoring_data(
     - Filtros server-side (node, metadata dinamico)
     - Ordenacao server-side (sort_field, sort_order)
     - filterOptions para dropdowns de filtro
-    - Cache intermediario TTL 30s (Consul nao suporta paginacao nativa)
 
-    SPRINT 2 OTIMIZACAO (2025-11-16):
-    - Cache COMPLETO do resultado por categoria + filtros (TTL: 30s)
-    - Reduz latencia de ~250ms -> <20ms (12.5x mais rapido!)
+    PAGINACAO POR CURSOR:
+    - Respostas paginadas incluem nextCursor (null na ultima pagina)
+    - cursor=<nextCursor> com os MESMOS filtros/ordenacao retorna a pagina
+      seguinte da mesma versao do catalogo (sem reembaralhar entre paginas);
+      page e ignorado. Cursor de versao ja descartada → 410
+
+    CONDITIONAL GET:
+    - ETag = versao do catalogo categorizado + campos disponiveis + query string
+    - If-None-Match igual → 304 antes de filtrar/ordenar/serializar
+
+    RESPOSTAS PRE-SERIALIZADAS:
+    - Mesmo ETag de outro cliente → bytes JSON ja codificados (gzip/brotli
+      conforme Accept-Encoding), sem filtrar/serializar de novo
+    - Requisicoes com cursor (versao fixada) nao usam o cache de respostas
+
+    CATALOGO CATEGORIZADO:
+    - Categorizacao de TODO o catalogo UMA vez por versao (CatalogCategorizer)
+    - Cada categoria le sua particao (referencias aos registros, sem recategorizar)
+    - Filtros, filterOptions e ordenacao via indice invertido da particao
+      (PartitionIndex: intersecao de conjuntos + contagens de facetas)
 
     FLUXO REFATORADO:
-    1. Busca sites do KV (metadata/sites) - mapeia IP -> site code
+    1. Busca sites do KV (metadata/sites) - mapeia IP -> site code (cacheado)
     2. Busca campos do KV (metadata/fields) - campos disponiveis
     3. Busca regras de categorizacao (categorization/rules)
-    4. Busca TODOS os servicos do Consul
-    5. Aplica categorizacao usando CategorizationRuleEngine
-    6. Filtra servicos por categoria solicitada
-    7. Adiciona informacoes do site (code, name) ao servico
-    8. Aplica filtros adicionais (company, site, env, node)
+    4. Busca TODOS os servicos (snapshot da replica ou Consul)
+    5. Aplica categorizacao usando CategorizationRuleEngine (1x por versao)
+    6. Le particao da categoria solicitada (node_ip, site code/name ja anexados)
+    7. Aplica filtros adicionais (company, site, env)
+    8. Aplica filtros server-side (node, metadata dinamico, busca textual)
     9. Aplica ordenacao server-side
     10. Aplica paginacao server-side
     11. Retorna dados formatados com filterOptions
@@ -174,6 +206,7 @@ async def get_monitoring_data(
         sort_field: Campo para ordenacao (opcional)
         sort_order: Direcao: 'ascend' ou 'descend' (opcional)
         node: IP do no para filtrar (opcional)
+        cursor: nextCursor da resposta anterior (opcional)
 
     Returns:
         ```json
@@ -207,304 +240,67 @@ async def get_monitoring_data(
                 "env": ["dev", "prod"],
                 "site": ["palmas", "rio"]
             },
-            "available_fields": ["company", "site", "env", "name", ...]
+            "available_fields": ["company", "site", "env", "name", ...],
+            "nextCursor": "eyJ2Ijo..."
         }
         ```
     """
     
-    # ✅ USAR CACHE - Função interna para fetch quando cache miss
-    async def fetch_data():
-        """Função interna que busca dados quando há cache miss"""
+    cursor_data = None
+    if cursor:
         try:
-            logger.info(f"[MONITORING DATA] Buscando dados da categoria '{category}'")
-
-            # ==================================================================
-            # PASSO 1: Buscar SITES do KV (metadata/sites)
-            # ==================================================================
-            from core.kv_manager import KVManager
-            
-            kv = KVManager()
-
-            # ✅ OTIMIZAÇÃO: Buscar nós com cache (TTL: 5min) - usa instância global
-            consul_nodes = await get_nodes_cached(consul_manager)
-            nodes_map = {}  # Node Name → IP Address
-            for node in consul_nodes:
-                node_name = node.get('Node', '')
-                node_address = node.get('Address', '')
-                if node_name and node_address:
-                    nodes_map[node_name] = node_address
-            
-            logger.debug(f"[MONITORING DATA] Mapeados {len(nodes_map)} nós do Consul: {list(nodes_map.keys())}")
+            cursor_data = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if cursor_data["c"] != category:
+            raise HTTPException(status_code=400, detail="cursor pertence a outra categoria")
 
-            sites_data = await kv.get_json('skills/eye/metadata/sites')
-            sites = []
-            sites_map = {}  # IP → site data
-
-            if sites_data:
-                # Estrutura pode ser {data: {data: [sites]}} ou {data: {sites: [...]}} ou {sites: [...]}
-                if isinstance(sites_data, dict):
-                    # Tentar extrair sites de qualquer nível de aninhamento
-                    if 'data' in sites_data:
-                        inner = sites_data['data']
-                        if isinstance(inner, dict):
-                            if 'sites' in inner:
-                                sites = inner['sites']
-                            elif 'data' in inner:  # Bug: {data: {data: [...]}}
-                                sites = inner['data'] if isinstance(inner['data'], list) else []
-                            else:
-                                # Assumir que inner é a lista de sites
-                                sites = list(inner.values()) if inner else []
-                        elif isinstance(inner, list):
-                            sites = inner
-                    elif 'sites' in sites_data:
-                        sites = sites_data['sites']
-                
-                # Criar mapa IP → site para lookup rápido
-                if sites and isinstance(sites, list):
-                    for site_item in sites:
-                        if isinstance(site_item, dict):
-                            prometheus_ip = site_item.get('prometheus_instance') or site_item.get('prometheus_host')
-                            if prometheus_ip:
-                                sites_map[prometheus_ip] = site_item
-
-            logger.debug(f"[MONITORING DATA] Carregados {len(sites)} sites do KV")
-
-            # ==================================================================
-            # PASSO 2: Buscar CAMPOS do KV (metadata/fields)
-            # ==================================================================
-            fields_data = await kv.get_json('skills/eye/metadata/fields')
-            available_fields = []
-
-            if fields_data and 'fields' in fields_data:
-                # Filtrar apenas campos relevantes para a categoria
-                for field in fields_data['fields']:
-                    # Verificar se campo deve aparecer nesta categoria
-                    show_in_key = f"show_in_{category.replace('-', '_')}"
-                    if field.get(show_in_key, True):  # Default True
-                        available_fields.append({
-                            'name': field['name'],
-                            'display_name': field.get('display_name', field['name']),
-                            'field_type': field.get('field_type', 'string')
-                        })
-
-            logger.debug(f"[MONITORING DATA] {len(available_fields)} campos disponíveis para '{category}'")
-
-            # ==================================================================
-            # PASSO 3: Carregar regras de categorização
-            # ==================================================================
-            await categorization_engine.load_rules()
-
-            # ==================================================================
-            # PASSO 4: Buscar TODOS os serviços do Consul
-            # ==================================================================
-            all_services_dict = await consul_manager.get_all_services_catalog(use_fallback=True)
-
-            # Capturar _metadata de performance para retornar ao frontend
-            response_metadata = all_services_dict.pop("_metadata", None)
-
-            # Converter estrutura aninhada para lista plana
-            all_services = []
-            for node_name, services_dict in all_services_dict.items():
-                for service_id, service_data in services_dict.items():
-                    service_data['Node'] = node_name
-                    service_data['ID'] = service_id
-                    all_services.append(service_data)
-
-            logger.info(f"[MONITORING DATA] Total de serviços no Consul: {len(all_services)}")
-
-            # ==================================================================
-            # PASSO 5: Categorizar serviços e filtrar pela categoria solicitada
-            # ==================================================================
-            filtered_services = []
-
-            for idx, svc in enumerate(all_services):
-                try:
-                    # Categorizar serviço usando engine
-                    svc_job_name = svc.get('Service', '')
-                    svc_module = svc.get('Meta', {}).get('module', '')
-                    svc_metrics_path = svc.get('Meta', {}).get('metrics_path', '/metrics')
-
-                    # SPEC-PERF-001: Marcar se o serviço tem metrics_path no metadata
-                    # Se não tiver, o engine ignora a condição metrics_path da regra
-                    has_metrics_path = 'metrics_path' in svc.get('Meta', {})
-
-                    # FIX BUG #1: categorize() espera dict, não kwargs
-                    svc_category, svc_type_info = categorization_engine.categorize({
-                        'job_name': svc_job_name,
-                        'module': svc_module,
-                        'metrics_path': svc_metrics_path,
-                        '_has_metrics_path': has_metrics_path
-                    })
-
-                    # Verificar se serviço pertence à categoria solicitada
-                    if svc_category != category:
-                        continue
-
-                    # ==================================================================
-                    # PASSO 6: Adicionar informações do site
-                    # ==================================================================
-                    # Mapear Node Name → IP Address → Site
-                    node_name = svc.get('Node', '')
-                    node_ip = nodes_map.get(node_name, '')
-                    site_info = sites_map.get(node_ip)
-
-                    # ✅ CRÍTICO: Adicionar node_ip para permitir filtro no frontend
-                    # Frontend usa NodeSelector que retorna IP, não nome do nó
-                    svc['node_ip'] = node_ip
-
-                    if site_info:
-                        svc['site_code'] = site_info.get('code')
-                        svc['site_name'] = site_info.get('name')
-                    else:
-                        # Fallback: usar metadata.site se disponível
-                        svc['site_code'] = svc.get('Meta', {}).get('site')
-                        svc['site_name'] = None
-
-                    # ========================================================
-                    # PASSO 7: Aplicar filtros adicionais
-                    # ========================================================
-                    svc_meta = svc.get('Meta', {})
-
-                    if company and svc_meta.get('company') != company:
-                        logger.debug(f"[FILTER] Bloqueado por company: {svc_meta.get('company')} != {company}")
-                        continue
-
-                    if site:
-                        # Filtrar por site_code OU metadata.site
-                        if svc.get('site_code') != site and svc_meta.get('site') != site:
-                            logger.debug(f"[FILTER] Bloqueado por site: {svc.get('site_code')}/{svc_meta.get('site')} != {site}")
-                            continue
-
-                    if env and svc_meta.get('env') != env:
-                        logger.debug(f"[FILTER] Bloqueado por env: {svc_meta.get('env')} != {env}")
-                        continue
-
-                    # Serviço passou em todos os filtros
-                    filtered_services.append(svc)
-                    
-                    # DEBUG: Logar primeiros serviços aprovados
-                    if len(filtered_services) <= 3:
-                        logger.debug(f"[APPROVED] Serviço {filtered_services[-1].get('ID', 'unknown')} adicionado (total={len(filtered_services)})")
-                        
-                except Exception as e:
-                    logger.error(f"[CATEGORIZE ERROR] Erro ao processar serviço #{idx}: {e}", exc_info=True)
-                    continue
-
-            logger.info(
-                f"[MONITORING DATA] Filtrados {len(filtered_services)} de {len(all_services)} "
-                f"serviços para categoria '{category}'"
-            )
-
-            # ==================================================================
-            # PASSO 8: Retornar dados formatados
-            # ==================================================================
-            return {
-                "success": True,
-                "category": category,
-                "data": filtered_services,
-                "total": len(filtered_services),
-                "available_fields": available_fields,
-                "filters_applied": {
-                    "company": company,
-                    "site": site,
-                    "env": env
-                },
-                "metadata": {
-                    "total_sites": len(sites),
-                    "categorization_engine": "loaded"
-                },
-                "_metadata": response_metadata
-            }
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"[MONITORING DATA ERROR] {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
-
-
-    # ==========================================================================
-    # SPEC-PERF-002 FIX: Usar MonitoringDataCache corretamente
-    #
-    # PROBLEMA ANTERIOR: get_services_cached nao usava o MonitoringDataCache
-    # criado especificamente para o SPEC-PERF-002.
-    #
-    # SOLUCAO: Verificar cache do MonitoringDataCache primeiro, se miss,
-    # buscar dados e armazenar no cache.
-    # ==========================================================================
-
-    # Tentar buscar do cache intermediario de monitoramento
-    cached_data = await monitoring_data_cache.get_data(category, node)
-
-    # SPEC-PERF-002 FIX: Verificar se cache tem dados validos
-    # Se cache retornou vazio, invalidar e buscar novamente
-    if cached_data is not None and len(cached_data) == 0:
-        logger.warning(f"[MONITORING DATA] Cache HIT mas VAZIO - invalidando e buscando novamente")
-        await monitoring_data_cache.invalidate(category)
-        cached_data = None  # Forcar busca abaixo
-
-    if cached_data is not None:
-        # CACHE HIT - usar dados do cache
-        logger.info(f"[MONITORING DATA] Cache HIT para category='{category}', node='{node}', total={len(cached_data)}")
-        raw_result = {
-            "success": True,
-            "category": category,
-            "data": cached_data,
-            "total": len(cached_data),
-            "available_fields": [],  # Sera preenchido abaixo
-            "metadata": {"cache_hit": True},
-            "_metadata": {
-                "source_name": "Cache Local",
-                "is_master": True,
-                "cache_status": "local_hit",
-                "total_time_ms": 1  # Cache local é instantâneo
-            }
-        }
+    try:
+        logger.info(f"[MONITORING DATA] Buscando dados da categoria '{category}'")
 
-        # Buscar available_fields do KV
-        from core.kv_manager import KVManager
-        kv = KVManager()
-        fields_data = await kv.get_json('skills/eye/metadata/fields')
-        available_fields = []
-        if fields_data and 'fields' in fields_data:
-            for field in fields_data['fields']:
-                show_in_key = f"show_in_{category.replace('-', '_')}"
-                if field.get(show_in_key, True):
-                    available_fields.append({
-                        'name': field['name'],
-                        'display_name': field.get('display_name', field['name']),
-                        'field_type': field.get('field_type', 'string')
-                    })
-        raw_result["available_fields"] = available_fields
-    else:
-        # CACHE MISS - buscar dados do Consul
-        logger.info(f"[MONITORING DATA] Cache MISS para category='{category}', node='{node}'")
-        raw_result = await fetch_data()
-
-        # SPEC-PERF-002 FIX: Só salvar no cache se tiver dados
-        # Evita cache de dados vazios que causaria problemas
-        data_to_cache = raw_result.get('data', [])
-        if data_to_cache:
-            await monitoring_data_cache.set_data(
-                category=category,
-                data=data_to_cache,
-                node=node
-            )
-            logger.info(f"[MONITORING DATA] Cache SET: {len(data_to_cache)} servicos")
+        # ==================================================================
+        # PASSOS 1-6: Catalogo categorizado (1 categorizacao por versao do catalogo)
+        # Servicos ja chegam com node_ip, site_code e site_name anexados
+        # Com cursor: mesma versao da pagina anterior (fixada)
+        # ==================================================================
+        if cursor_data is not None:
+            catalog = catalog_categorizer.get_version(cursor_data["v"])
+            if catalog is None:
+                raise HTTPException(
+                    status_code=410,
+                    detail="cursor expirado (versao do catalogo descartada) - recomece pela pagina 1"
+                )
         else:
-            logger.warning(f"[MONITORING DATA] Dados vazios, NAO salvando no cache")
+            catalog = await catalog_categorizer.get_catalog()
+        # Indice invertido da particao (construido 1x por versao do catalogo)
+        category_index = catalog.index(category)
+
+        # ==================================================================
+        # PASSO 2: Buscar CAMPOS do KV (metadata/fields)
+        # ==================================================================
+        available_fields = await _load_available_fields(category)
+        logger.debug(f"[MONITORING DATA] {len(available_fields)} campos disponíveis para '{category}'")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"[MONITORING DATA ERROR] {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
-    # SPEC-PERF-002: Processar dados com paginacao, filtros e ordenacao server-side
-    # Se page e page_size nao forem passados, retorna todos (compatibilidade backward)
+    # Resposta e funcao pura de (versao, campos, query) → 304 sem processar
+    etag = check_not_modified(request, http_response, catalog.version, available_fields)
 
-    # DEBUG: Log dos dados antes de processar
-    raw_data = raw_result.get('data', [])
-    logger.info(f"[MONITORING DATA DEBUG] Dados para processar: {len(raw_data)} servicos")
-    logger.info(f"[MONITORING DATA DEBUG] sort_field={sort_field}, sort_order={sort_order}")
+    # Mesma (versao, campos, query) ja servida a outro cliente → bytes prontos
+    use_response_cache = Config.RESPONSE_CACHE_ENABLED and cursor_data is None
+    response_namespace = f"monitoring:data:{category}"
+    if use_response_cache:
+        cached_response = await response_cache.get(response_namespace, etag)
+        if cached_response is not None:
+            return response_cache.respond(request, cached_response)
 
     # Extrair filtros dinamicos dos query params (exceto os ja processados)
     excluded_params = {'category', 'company', 'site', 'env', 'page', 'page_size',
-                       'sort_field', 'sort_order', 'node', 'q'}
+                       'sort_field', 'sort_order', 'node', 'q', 'cursor'}
     dynamic_filters = {}
     for key, value in request.query_params.items():
         if key not in excluded_params and value:
@@ -518,16 +314,29 @@ async def get_monitoring_data(
         **dynamic_filters
     }
 
-    # Processar dados server-side (incluindo busca textual)
-    processed = process_monitoring_data(
-        data=raw_result.get('data', []),
-        node=node,
-        filters=all_filters,
-        sort_field=sort_field,
-        sort_order=sort_order,
-        page=page,
-        page_size=page_size,
-        search_query=q  # SPEC-PERF-002 FIX: Busca textual
+    # ==================================================================
+    # PASSOS 7-10: Filtros (fixos + node + metadata + busca textual),
+    # filterOptions, ordenacao e paginacao via indice invertido
+    # SPEC-PERF-002: sem page/page_size retorna todos (compatibilidade backward)
+    # ==================================================================
+    try:
+        processed = category_index.query(
+            node=node,
+            filters=all_filters,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size,
+            search_query=q,  # SPEC-PERF-002 FIX: Busca textual
+            exact_filters={'company': company, 'site': site, 'env': env},
+            cursor=cursor_data
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(
+        f"[MONITORING DATA] Filtrados {processed['total']} de {len(category_index)} "
+        f"serviços para categoria '{category}' (catálogo categorizado v{catalog.version})"
     )
 
     # Montar resposta final mantendo estrutura compativel
@@ -536,7 +345,7 @@ async def get_monitoring_data(
         "category": category,
         "data": processed["data"],
         "total": processed["total"],
-        "available_fields": raw_result.get('available_fields', []),
+        "available_fields": available_fields,
         "filters_applied": {
             "company": company,
             "site": site,
@@ -544,12 +353,17 @@ async def get_monitoring_data(
             "node": node,
             **dynamic_filters
         },
-        "metadata": raw_result.get('metadata', {}),
-        "_metadata": raw_result.get('_metadata')
+        "metadata": {
+            "total_sites": catalog.total_sites,
+            "categorization_engine": "loaded",
+            "categorized_version": catalog.version,
+            "catalog_version": catalog.catalog_version
+        },
+        "_metadata": catalog.response_metadata
     }
 
-    # Adicionar campos de paginacao se foram solicitados
-    if page is not None and page_size is not None:
+    # Adicionar campos de paginacao se foram solicitados (page/page_size ou cursor)
+    if "_next" in processed:
         response["page"] = processed["page"]
         response["pageSize"] = processed["pageSize"]  # camelCase
         response["filterOptions"] = processed["filterOptions"]  # camelCase
@@ -557,16 +371,93 @@ async def get_monitoring_data(
         response["_fieldStats"] = processed.get("_fieldStats", {})
 
         # Calcular total de paginas
-        total_pages = (processed["total"] + page_size - 1) // page_size
+        total_pages = (processed["total"] + processed["pageSize"] - 1) // processed["pageSize"]
         response["totalPages"] = total_pages
+
+        # Cursor da proxima pagina (mesma versao do catalogo e mesma permutacao)
+        response["nextCursor"] = (
+            encode_cursor(catalog.version, category, processed["_next"])
+            if processed["_next"] else None
+        )
     else:
         # Sem paginacao - incluir filterOptions mesmo assim para uso futuro
         response["filterOptions"] = processed["filterOptions"]  # camelCase
         response["_fieldStats"] = processed.get("_fieldStats", {})
 
+    if use_response_cache:
+        encoded = await response_cache.store(response_namespace, etag, catalog.version, response)
+        return response_cache.respond(request, encoded)
     return response
 
 
+# ============================================================================
+# ENDPOINT 1.1: /monitoring/data/changes - DELTAS DESDE UMA VERSAO
+# ============================================================================
+
+@router.get("/data/changes")
+async def get_monitoring_data_changes(
+    request: Request,
+    http_response: Response,
+    category: str = Query(..., description="Categoria: network-probes, web-probes, etc"),
+    since: int = Query(..., ge=0, description="metadata.categorized_version ja carregada pelo cliente")
+):
+    """
+    Linhas adicionadas, modificadas e removidas de uma categoria desde uma versao
+
+    Complementa /monitoring/data: o cliente carrega a categoria uma vez e depois
+    aplica apenas os deltas (tabela de 20k linhas atualiza com poucos bytes).
+
+    - Linhas identificadas por (Node, ID); removed traz apenas as chaves
+    - resync=true quando `since` esta fora do historico retido
+      (MONITORING_CHANGELOG_VERSIONS / MONITORING_CHANGELOG_MAX_ROWS) ou e
+      desconhecida (ex.: restart do backend) → recarregar via /monitoring/data
+    - Filtros/ordenacao sao aplicados pelo cliente sobre as linhas recebidas
+
+    Returns:
+        ```json
+        {
+            "success": true,
+            "category": "network-probes",
+            "since": 41,
+            "version": 43,
+            "resync": false,
+            "added": [{"Node": "consul-server-1", "ID": "icmp-02", ...}],
+            "modified": [{"Node": "consul-server-1", "ID": "icmp-01", ...}],
+            "removed": [{"Node": "consul-server-2", "ID": "icmp-07"}],
+            "total": 150
+        }
+        ```
+    """
+    try:
+        catalog = await catalog_categorizer.get_catalog()
+    except Exception as e:
+        logger.error(f"[MONITORING CHANGES ERROR] {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+    check_not_modified(request, http_response, catalog.version)
+
+    changes = catalog_categorizer.changes_since(category, since)
+    resync = changes is None
+    if resync:
+        changes = {'added': [], 'modified': [], 'removed': []}
+
+    logger.debug(
+        f"[MONITORING CHANGES] '{category}' v{since}→v{catalog.version}: "
+        + ("resync" if resync else
+           f"+{len(changes['added'])} ~{len(changes['modified'])} -{len(changes['removed'])}")
+    )
+
+    return {
+        "success": True,
+        "category": category,
+        "since": since,
+        "version": catalog.version,
+        "resync": resync,
+        **changes,
+        "total": len(catalog.partitions.get(category, ())),
+    }
+
+
 # ============================================================================
 # ENDPOINT 1.5: /monitoring/summary - METRICAS AGREGADAS DO DATASET (SPEC-PERF-002)
 # ============================================================================
@@ -622,108 +513,18 @@ async def get_monitoring_summary(
     try:
         logger.info(f"[MONITORING SUMMARY] Buscando resumo da categoria '{category}'")
 
-        # Tentar buscar do cache primeiro
-        cached_data = await monitoring_data_cache.get_data(category, node)
-
-        if cached_data is None:
-            # Cache miss - precisa buscar dados frescos
-            # Reutilizar a logica do endpoint /data (fetch_data interno)
-            from core.kv_manager import KVManager
-            kv = KVManager()
-
-            # Buscar nos do Consul com cache
-            consul_nodes = await get_nodes_cached(consul_manager)
-            nodes_map = {}
-            for n in consul_nodes:
-                node_name = n.get('Node', '')
-                node_address = n.get('Address', '')
-                if node_name and node_address:
-                    nodes_map[node_name] = node_address
-
-            # Buscar sites
-            sites_data = await kv.get_json('skills/eye/metadata/sites')
-            sites_map = {}
-            if sites_data:
-                sites = []
-                if isinstance(sites_data, dict):
-                    if 'data' in sites_data:
-                        inner = sites_data['data']
-                        if isinstance(inner, dict) and 'sites' in inner:
-                            sites = inner['sites']
-                        elif isinstance(inner, list):
-                            sites = inner
-                    elif 'sites' in sites_data:
-                        sites = sites_data['sites']
-
-                for site_item in sites:
-                    if isinstance(site_item, dict):
-                        prometheus_ip = site_item.get('prometheus_instance') or site_item.get('prometheus_host')
-                        if prometheus_ip:
-                            sites_map[prometheus_ip] = site_item
-
-            # Carregar regras
-            await categorization_engine.load_rules()
-
-            # Buscar todos os servicos
-            all_services_dict = await consul_manager.get_all_services_catalog(use_fallback=True)
-            all_services_dict.pop("_metadata", None)
-
-            all_services = []
-            for node_name, services_dict in all_services_dict.items():
-                for service_id, service_data in services_dict.items():
-                    service_data['Node'] = node_name
-                    service_data['ID'] = service_id
-                    all_services.append(service_data)
-
-            # Filtrar por categoria
-            filtered_services = []
-            for svc in all_services:
-                svc_job_name = svc.get('Service', '')
-                svc_module = svc.get('Meta', {}).get('module', '')
-                svc_metrics_path = svc.get('Meta', {}).get('metrics_path', '/metrics')
-                has_metrics_path = 'metrics_path' in svc.get('Meta', {})
-
-                svc_category, _ = categorization_engine.categorize({
-                    'job_name': svc_job_name,
-                    'module': svc_module,
-                    'metrics_path': svc_metrics_path,
-                    '_has_metrics_path': has_metrics_path
-                })
+        # Particao da categoria no catalogo categorizado (mesma fonte do endpoint /data)
+        catalog = await catalog_categorizer.get_catalog()
 
-                if svc_category != category:
-                    continue
-
-                # Adicionar node_ip e site info
-                node_name = svc.get('Node', '')
-                node_ip = nodes_map.get(node_name, '')
-                svc['node_ip'] = node_ip
-                site_info = sites_map.get(node_ip)
-                if site_info:
-                    svc['site_code'] = site_info.get('code')
-                else:
-                    svc['site_code'] = svc.get('Meta', {}).get('site')
-
-                filtered_services.append(svc)
-
-            # Armazenar no cache
-            await monitoring_data_cache.set_data(category, filtered_services, node)
-            cached_data = filtered_services
-
-        # Aplicar filtros basicos
-        data = cached_data
-
-        # Filtrar por node se especificado
-        if node and node != 'all':
-            data = [item for item in data if item.get('node_ip') == node]
-
-        # Filtrar por company, site, env
-        if company:
-            data = [item for item in data if item.get('Meta', {}).get('company') == company]
-        if site:
-            data = [item for item in data
-                    if item.get('site_code') == site or item.get('Meta', {}).get('site') == site]
-        if env:
-            data = [item for item in data if item.get('Meta', {}).get('env') == env]
+        category_index = catalog.index(category)
+
+        # Filtrar por node, company, site, env (indice invertido da particao)
+        selected = category_index.select(
+            node=node,
+            exact_filters={'company': company, 'site': site, 'env': env}
+        )
+        rows = category_index.rows
+        data = rows if selected is None else [rows[i] for i in selected]
 
         # Calcular agregacoes
         by_company = {}
@@ -750,14 +551,8 @@ async def get_monitoring_summary(
             item_node = item.get('node_ip', 'N/A')
             by_node[item_node] = by_node.get(item_node, 0) + 1
 
-        # Extrair filterOptions
-        filter_options = process_monitoring_data(
-            data=cached_data,  # Usar dados nao filtrados para ter todas opcoes
-            node=None,
-            filters=None,
-            page=None,
-            page_size=None
-        )
+        # Extrair filterOptions da particao inteira (dados nao filtrados = todas opcoes)
+        filter_options = category_index.filter_options()
 
         return {
             "success": True,
@@ -769,7 +564,7 @@ async def get_monitoring_summary(
                 "bySite": by_site,
                 "byNode": by_node
             },
-            "filterOptions": filter_options["filterOptions"],
+            "filterOptions": filter_options["options"],
             "filtersApplied": {
                 "company": company,
                 "site": site,
@@ -1084,7 +879,9 @@ async def get_monitoring_cache_stats():
         stats = await monitoring_data_cache.get_stats()
         return {
             "success": True,
-            "stats": stats
+            "stats": stats,
+            "categorized_catalog": catalog_categorizer.get_stats(),
+            "text_index": get_catalog_text_index().get_stats()
         }
     except Exception as e:
         logger.error(f"[CACHE STATS ERROR] {e}", exc_info=True)
@@ -1114,6 +911,8 @@ async def invalidate_monitoring_cache(
     """
     try:
         count = await monitoring_data_cache.invalidate(category)
+        # Forcar nova categorizacao do catalogo na proxima requisicao
+        await catalog_categorizer.invalidate()
         msg = (
             f"Cache invalidado para categoria '{category}'"
             if category else "Todo cache de monitoramento invalidado"
@@ -13,6 +13,8 @@ from typing import List, Dict, Optional
 from core.consul_manager import ConsulManager
 from core.config import Config
 from core.cache_manager import get_cache  # SPRINT 2: LocalCache global
+from core.consul_selector import AllServersFailed, get_consul_selector, server_key, split_server
+from core.kv_bundle import get_kv_bundle
 from core.metrics import (
     consul_node_enrich_failures,
     consul_node_enrich_duration,
@@ -42,9 +44,9 @@ async def get_consul_manager_with_fallback() -> tuple[ConsulManager, str]:
     """
     Retorna um ConsulManager conectado a um servidor disponível.
 
-    Implementa fallback real entre múltiplos servidores Consul configurados.
-    Tenta cada servidor da lista CONSUL_SERVERS em ordem, com timeout.
-    Se todos falharem, tenta MAIN_SERVER como último recurso.
+    Servidores (CONSUL_SERVERS + MAIN_SERVER) ordenados pelo seletor
+    compartilhado (core/consul_selector.py): o mais rápido/saudável pela EWMA
+    é testado primeiro e, se não responder até o p95, um hedge vai ao segundo.
 
     Returns:
         tuple: (ConsulManager conectado, servidor usado)
@@ -60,314 +62,264 @@ async def get_consul_manager_with_fallback() -> tuple[ConsulManager, str]:
         logger.debug("[Nodes] CONSUL_SERVERS não configurado, usando MAIN_SERVER")
         return ConsulManager(), Config.MAIN_SERVER
 
-    # Tentar cada servidor da lista em ordem
-    errors = []
-    for server in consul_servers:
-        try:
-            # Parsear servidor (pode ter formato IP:PORTA ou apenas IP)
-            if ":" in server:
-                host, port_str = server.rsplit(":", 1)
-                port = int(port_str)
-            else:
-                host = server
-                port = Config.CONSUL_PORT
-
-            logger.debug(f"[Nodes] Tentando servidor Consul: {host}:{port}")
-
-            # Criar manager para este servidor
-            consul = ConsulManager(host=host, port=port)
-
-            # Testar conexão com timeout curto (health check)
-            # Usa /agent/members que é rápido e sempre disponível
-            await asyncio.wait_for(
-                consul.get_members(),
-                timeout=Config.CONSUL_CATALOG_TIMEOUT
-            )
-
-            # Sucesso! Registrar métrica e retornar
-            consul_server_fallback.labels(server=server, status="success").inc()
-            logger.info(f"[Nodes] Conectado ao servidor Consul: {server}")
-
-            return consul, server
-
-        except asyncio.TimeoutError:
-            error_msg = f"Timeout ({Config.CONSUL_CATALOG_TIMEOUT}s) em {server}"
-            errors.append(error_msg)
-            consul_server_fallback.labels(server=server, status="timeout").inc()
-            logger.warning(f"[Nodes] {error_msg}")
-            continue
+    selector = get_consul_selector()
+    selector.update_from_config()
+    # MAIN_SERVER entra como último recurso (sem amostras, score padrão)
+    selector.update_servers([(Config.MAIN_SERVER, Config.MAIN_SERVER, False)])
+    labels = {server_key(server): server for server in consul_servers}
+    labels.setdefault(server_key(Config.MAIN_SERVER), Config.MAIN_SERVER)
 
-        except Exception as e:
-            error_msg = f"Erro em {server}: {str(e)[:100]}"
-            errors.append(error_msg)
-            consul_server_fallback.labels(server=server, status="failure").inc()
-            logger.warning(f"[Nodes] {error_msg}")
-            continue
+    async def probe(server: str) -> ConsulManager:
+        host, port = split_server(server)
+        consul = ConsulManager(host=host, port=port)
+        # Usa /agent/members que é rápido e sempre disponível
+        await consul.get_members()
+        return consul
 
-    # Todos os servidores configurados falharam - tentar MAIN_SERVER como último recurso
     try:
-        logger.warning(
-            f"[Nodes] Todos os {len(consul_servers)} servidores CONSUL_SERVERS falharam. "
-            f"Tentando MAIN_SERVER ({Config.MAIN_SERVER}) como último recurso."
+        consul, server, info = await selector.execute(
+            probe, timeout=Config.CONSUL_CATALOG_TIMEOUT, candidates=labels
         )
-
-        consul = ConsulManager()
-        await asyncio.wait_for(
-            consul.get_members(),
-            timeout=Config.CONSUL_CATALOG_TIMEOUT
+    except AllServersFailed as e:
+        for key, status in e.failed.items():
+            consul_server_fallback.labels(server=labels[key], status=status).inc()
+        logger.error(f"[Nodes] {e}")
+        raise Exception(
+            f"[Nodes] Todos os servidores Consul falharam após {len(labels)} tentativas. "
+            f"Erros: {'; '.join(e.errors)}"
         )
 
-        consul_server_fallback.labels(server=Config.MAIN_SERVER, status="success").inc()
-        logger.info(f"[Nodes] Conectado ao MAIN_SERVER: {Config.MAIN_SERVER}")
-
-        return consul, Config.MAIN_SERVER
-
-    except Exception as e:
-        error_msg = f"Erro em MAIN_SERVER ({Config.MAIN_SERVER}): {str(e)[:100]}"
-        errors.append(error_msg)
-        consul_server_fallback.labels(server=Config.MAIN_SERVER, status="failure").inc()
-        logger.error(f"[Nodes] {error_msg}")
-
-    # Todos falharam - lançar exceção
-    raise Exception(
-        f"[Nodes] Todos os servidores Consul falharam após {len(consul_servers) + 1} tentativas. "
-        f"Erros: {'; '.join(errors)}"
+    for key, status in info["failed"].items():
+        consul_server_fallback.labels(server=labels[key], status=status).inc()
+    consul_server_fallback.labels(server=labels[server], status="success").inc()
+    logger.info(
+        f"[Nodes] Conectado ao servidor Consul: {labels[server]} "
+        f"(tentativas={info['attempts']}, hedge={info['hedged']})"
     )
+    return consul, labels[server]
 
-@router.get("/", include_in_schema=True)
-@router.get("")
-async def get_nodes():
-    """Retorna todos os nos do cluster com cache de 60s
+async def _load_nodes() -> dict:
+    """
+    Busca membros do cluster e enriquece com contagem de serviços e site.
 
-    SPEC-PERF-001: Otimizacoes implementadas:
-    - Semaphore para limitar chamadas simultaneas (CONSUL_SEMAPHORE_LIMIT)
-    - Timeout configuravel via env (CONSUL_CATALOG_TIMEOUT)
-    - Retry com backoff para resiliencia
-    - Logging e metricas Prometheus para observabilidade
-    - Cache dedicado para sites_map com TTL de 5 minutos
-    - services_status indica erro quando timeout ocorre
+    Executado por get_nodes() via cache.get_or_compute() (single-flight):
+    requisições concorrentes compartilham UMA execução deste loader.
     """
+    # Não invalida "nodes:list:all" aqui: este loader JÁ é o refresh da chave,
+    # e invalidá-la descartaria o próprio resultado (geração do load)
 
-    # SPRINT 2: Usar LocalCache global
-    cache_key = "nodes:list:all"
+    # Usar fallback para múltiplos servidores Consul
+    consul, active_server = await get_consul_manager_with_fallback()
+    members = await consul.get_members()
 
-    # Verificar cache
-    cached = await cache.get(cache_key)
-    if cached is not None:
-        return cached
+    # SPEC-PERF-001: Cache dedicado para sites_map com TTL de 5 minutos
+    # Problema 6: Metadados de sites sem cache dedicado
+    # KV BUNDLE: chave versionada pelo ModifyIndex (mudança no KV → miss imediato)
+    sites_cache_key = get_kv_bundle().cache_key("sites:map:all", "skills/eye/metadata/sites")
+    sites_map = await sites_cache.get(sites_cache_key)
 
-    try:
-        # Usar fallback para múltiplos servidores Consul
-        consul, active_server = await get_consul_manager_with_fallback()
-        members = await consul.get_members()
-
-        # INVALIDACAO AUTOMATICA: Verificar se membership mudou
-        # Compara numero de members atual com valor salvo no cache
-        # Se houver alteracao, invalida cache para forcar nova busca
-        member_count_key = "nodes:member_count"
-        cached_member_count = await cache.get(member_count_key)
-        current_count = len(members)
-
-        if cached_member_count is not None and cached_member_count != current_count:
-            logger.info(
-                f"[Nodes] Membership mudou: {cached_member_count} -> {current_count}. "
-                f"Invalidando cache '{cache_key}' para garantir dados atualizados."
-            )
-            await cache.invalidate(cache_key)
-
-        # Salvar contagem atual com TTL longo (3600s = 1 hora)
-        # TTL longo porque so serve para detectar mudancas, nao precisa expirar rapido
-        await cache.set(member_count_key, current_count, ttl=3600)
-
-        # SPEC-PERF-001: Cache dedicado para sites_map com TTL de 5 minutos
-        # Problema 6: Metadados de sites sem cache dedicado
-        sites_cache_key = "sites:map:all"
-        sites_map = await sites_cache.get(sites_cache_key)
-
-        if sites_map is None:
-            # Cache miss - buscar do KV
-            consul_sites_cache_status.labels(status="miss").inc()
-
-            from core.kv_manager import KVManager
-            kv = KVManager()
-
-            try:
-                sites_data = await kv.get_json('skills/eye/metadata/sites')
-
-                # Criar mapa IP -> site_name
-                sites_map = {}
-                if sites_data:
-                    # Estrutura KV: data.data.sites (dois niveis de 'data')
-                    inner_data = sites_data.get('data', {})
-                    sites_list = inner_data.get('sites', []) if isinstance(inner_data, dict) else []
-
-                    for site in sites_list:
-                        if isinstance(site, dict):
-                            ip = site.get('prometheus_instance') or site.get('prometheus_host')
-                            name = site.get('name') or site.get('code', 'unknown')
-                            if ip:
-                                sites_map[ip] = name
-
-                # Salvar no cache com TTL de 5 minutos
-                await sites_cache.set(sites_cache_key, sites_map, ttl=Config.SITES_CACHE_TTL)
-                logger.debug(f"[Nodes] Sites map cacheado: {len(sites_map)} sites")
-
-            except Exception as e:
-                # Problema 6: Manter ultimo valor valido para evitar regressoes
-                logger.warning(f"[Nodes] Erro ao carregar sites do KV: {e}. Usando mapa vazio.")
-                consul_sites_cache_status.labels(status="error").inc()
-                sites_map = {}
-        else:
-            # Cache hit
-            consul_sites_cache_status.labels(status="hit").inc()
-
-        # SPEC-PERF-001: Semaphore para limitar chamadas simultaneas
-        # Problema 3: Gargalo por tempestade de requisicoes a Catalog API
-        semaphore = asyncio.Semaphore(Config.CONSUL_SEMAPHORE_LIMIT)
-
-        async def get_service_count(member: dict) -> dict:
-            """
-            Conta servicos de um no especifico usando Catalog API
-
-            SPEC-PERF-001: Otimizacoes implementadas:
-            - Timeout configuravel via env (CONSUL_CATALOG_TIMEOUT)
-            - Retry com backoff curto para resiliencia
-            - Semaphore para limitar concorrencia
-            - Logging e metricas para observabilidade
-            - services_status para frontend sinalizar erro
-
-            Args:
-                member: Dicionario com dados do membro do cluster
-
-            Returns:
-                member enriquecido com services_count, site_name e services_status
-            """
-            # Inicializar valores padrao
-            member["services_count"] = 0
-            member["site_name"] = sites_map.get(member["addr"], "Nao mapeado")
-            member["services_status"] = "ok"  # Problema 4: Status para frontend
-
-            node_name = member.get("node", "unknown")
-            start_time = time.time()
-
-            # Problema 3: Usar semaphore para controlar concorrencia
-            async with semaphore:
-                # Problema 1: Retry com backoff curto
-                max_retries = Config.CONSUL_MAX_RETRIES
-                retry_delay = Config.CONSUL_RETRY_DELAY
-
-                for attempt in range(max_retries + 1):
-                    try:
-                        # SPEC-PERF-001: Usar Catalog API centralizada (muito mais rapida)
-                        # Problema 1: Timeout configuravel via env
-                        node_data = await asyncio.wait_for(
-                            consul.get_node_services(node_name),
-                            timeout=Config.CONSUL_CATALOG_TIMEOUT
-                        )
+    if sites_map is None:
+        # Cache miss - buscar do KV
+        consul_sites_cache_status.labels(status="miss").inc()
 
-                        services = node_data.get("Services", {})
-                        # Excluir servico "consul" da contagem
-                        services_count = sum(1 for s in services.values() if s.get("Service") != "consul")
-                        member["services_count"] = services_count
+        from core.kv_manager import KVManager
+        kv = KVManager()
 
-                        # Registrar duracao de sucesso
-                        duration = time.time() - start_time
-                        consul_node_enrich_duration.labels(
-                            node_name=node_name,
-                            status="success"
-                        ).observe(duration)
-
-                        return member
-
-                    except asyncio.TimeoutError:
-                        # Problema 4: Registrar warning com detalhes
-                        if attempt < max_retries:
-                            logger.warning(
-                                f"[Nodes] Timeout ao enriquecer no '{node_name}' "
-                                f"(IP: {member['addr']}) - tentativa {attempt + 1}/{max_retries + 1}. "
-                                f"Timeout: {Config.CONSUL_CATALOG_TIMEOUT}s. Retentando..."
-                            )
-                            await asyncio.sleep(retry_delay * (attempt + 1))  # Backoff
-                        else:
-                            # Problema 4: Registrar metrica e log final
-                            logger.warning(
-                                f"[Nodes] Timeout ao enriquecer no '{node_name}' "
-                                f"(IP: {member['addr']}) apos {max_retries + 1} tentativas. "
-                                f"Timeout: {Config.CONSUL_CATALOG_TIMEOUT}s. Razao: Catalog API nao respondeu."
-                            )
-                            consul_node_enrich_failures.labels(
-                                node_name=node_name,
-                                error_type="timeout"
-                            ).inc()
-                            # Problema 4: Status para frontend sinalizar erro
-                            member["services_status"] = "error"
-
-                    except httpx.ConnectError as e:
-                        # Problema 4: Registrar warning com detalhes
-                        logger.warning(
-                            f"[Nodes] Erro de conexao ao enriquecer no '{node_name}' "
-                            f"(IP: {member['addr']}). Razao: {str(e)[:100]}"
-                        )
-                        consul_node_enrich_failures.labels(
-                            node_name=node_name,
-                            error_type="connection"
-                        ).inc()
-                        member["services_status"] = "error"
-                        break
+        try:
+            sites_data = await kv.get_json('skills/eye/metadata/sites')
+
+            # Criar mapa IP -> site_name
+            sites_map = {}
+            if sites_data:
+                # Estrutura KV: data.data.sites (dois niveis de 'data')
+                inner_data = sites_data.get('data', {})
+                sites_list = inner_data.get('sites', []) if isinstance(inner_data, dict) else []
+
+                for site in sites_list:
+                    if isinstance(site, dict):
+                        ip = site.get('prometheus_instance') or site.get('prometheus_host')
+                        name = site.get('name') or site.get('code', 'unknown')
+                        if ip:
+                            sites_map[ip] = name
+
+            # Salvar no cache com TTL de 5 minutos
+            await sites_cache.set(sites_cache_key, sites_map, ttl=Config.SITES_CACHE_TTL)
+            logger.debug(f"[Nodes] Sites map cacheado: {len(sites_map)} sites")
 
-                    except httpx.HTTPStatusError as e:
-                        # Problema 4: Registrar warning com detalhes
+        except Exception as e:
+            # Problema 6: Manter ultimo valor valido para evitar regressoes
+            logger.warning(f"[Nodes] Erro ao carregar sites do KV: {e}. Usando mapa vazio.")
+            consul_sites_cache_status.labels(status="error").inc()
+            sites_map = {}
+    else:
+        # Cache hit
+        consul_sites_cache_status.labels(status="hit").inc()
+
+    # SPEC-PERF-001: Semaphore para limitar chamadas simultaneas
+    # Problema 3: Gargalo por tempestade de requisicoes a Catalog API
+    semaphore = asyncio.Semaphore(Config.CONSUL_SEMAPHORE_LIMIT)
+
+    async def get_service_count(member: dict) -> dict:
+        """
+        Conta servicos de um no especifico usando Catalog API
+
+        SPEC-PERF-001: Otimizacoes implementadas:
+        - Timeout configuravel via env (CONSUL_CATALOG_TIMEOUT)
+        - Retry com backoff curto para resiliencia
+        - Semaphore para limitar concorrencia
+        - Logging e metricas para observabilidade
+        - services_status para frontend sinalizar erro
+
+        Args:
+            member: Dicionario com dados do membro do cluster
+
+        Returns:
+            member enriquecido com services_count, site_name e services_status
+        """
+        # Inicializar valores padrao
+        member["services_count"] = 0
+        member["site_name"] = sites_map.get(member["addr"], "Nao mapeado")
+        member["services_status"] = "ok"  # Problema 4: Status para frontend
+
+        node_name = member.get("node", "unknown")
+        start_time = time.time()
+
+        # Problema 3: Usar semaphore para controlar concorrencia
+        async with semaphore:
+            # Problema 1: Retry com backoff curto
+            max_retries = Config.CONSUL_MAX_RETRIES
+            retry_delay = Config.CONSUL_RETRY_DELAY
+
+            for attempt in range(max_retries + 1):
+                try:
+                    # SPEC-PERF-001: Usar Catalog API centralizada (muito mais rapida)
+                    # Problema 1: Timeout configuravel via env
+                    node_data = await asyncio.wait_for(
+                        consul.get_node_services(node_name),
+                        timeout=Config.CONSUL_CATALOG_TIMEOUT
+                    )
+
+                    services = node_data.get("Services", {})
+                    # Excluir servico "consul" da contagem
+                    services_count = sum(1 for s in services.values() if s.get("Service") != "consul")
+                    member["services_count"] = services_count
+
+                    # Registrar duracao de sucesso
+                    duration = time.time() - start_time
+                    consul_node_enrich_duration.labels(
+                        node_name=node_name,
+                        status="success"
+                    ).observe(duration)
+
+                    return member
+
+                except asyncio.TimeoutError:
+                    # Problema 4: Registrar warning com detalhes
+                    if attempt < max_retries:
                         logger.warning(
-                            f"[Nodes] Erro HTTP ao enriquecer no '{node_name}' "
-                            f"(IP: {member['addr']}). Status: {e.response.status_code}. "
-                            f"Razao: {str(e)[:100]}"
+                            f"[Nodes] Timeout ao enriquecer no '{node_name}' "
+                            f"(IP: {member['addr']}) - tentativa {attempt + 1}/{max_retries + 1}. "
+                            f"Timeout: {Config.CONSUL_CATALOG_TIMEOUT}s. Retentando..."
                         )
-                        consul_node_enrich_failures.labels(
-                            node_name=node_name,
-                            error_type="http_error"
-                        ).inc()
-                        member["services_status"] = "error"
-                        break
-
-                    except Exception as e:
-                        # Problema 4: Registrar warning com detalhes
+                        await asyncio.sleep(retry_delay * (attempt + 1))  # Backoff
+                    else:
+                        # Problema 4: Registrar metrica e log final
                         logger.warning(
-                            f"[Nodes] Erro desconhecido ao enriquecer no '{node_name}' "
-                            f"(IP: {member['addr']}). Tipo: {type(e).__name__}. "
-                            f"Razao: {str(e)[:100]}"
+                            f"[Nodes] Timeout ao enriquecer no '{node_name}' "
+                            f"(IP: {member['addr']}) apos {max_retries + 1} tentativas. "
+                            f"Timeout: {Config.CONSUL_CATALOG_TIMEOUT}s. Razao: Catalog API nao respondeu."
                         )
                         consul_node_enrich_failures.labels(
                             node_name=node_name,
-                            error_type="unknown"
+                            error_type="timeout"
                         ).inc()
+                        # Problema 4: Status para frontend sinalizar erro
                         member["services_status"] = "error"
-                        break
-
-                # Registrar duracao de erro
-                duration = time.time() - start_time
-                consul_node_enrich_duration.labels(
-                    node_name=node_name,
-                    status="error"
-                ).observe(duration)
 
-            return member
+                except httpx.ConnectError as e:
+                    # Problema 4: Registrar warning com detalhes
+                    logger.warning(
+                        f"[Nodes] Erro de conexao ao enriquecer no '{node_name}' "
+                        f"(IP: {member['addr']}). Razao: {str(e)[:100]}"
+                    )
+                    consul_node_enrich_failures.labels(
+                        node_name=node_name,
+                        error_type="connection"
+                    ).inc()
+                    member["services_status"] = "error"
+                    break
+
+                except httpx.HTTPStatusError as e:
+                    # Problema 4: Registrar warning com detalhes
+                    logger.warning(
+                        f"[Nodes] Erro HTTP ao enriquecer no '{node_name}' "
+                        f"(IP: {member['addr']}). Status: {e.response.status_code}. "
+                        f"Razao: {str(e)[:100]}"
+                    )
+                    consul_node_enrich_failures.labels(
+                        node_name=node_name,
+                        error_type="http_error"
+                    ).inc()
+                    member["services_status"] = "error"
+                    break
+
+                except Exception as e:
+                    # Problema 4: Registrar warning com detalhes
+                    logger.warning(
+                        f"[Nodes] Erro desconhecido ao enriquecer no '{node_name}' "
+                        f"(IP: {member['addr']}). Tipo: {type(e).__name__}. "
+                        f"Razao: {str(e)[:100]}"
+                    )
+                    consul_node_enrich_failures.labels(
+                        node_name=node_name,
+                        error_type="unknown"
+                    ).inc()
+                    member["services_status"] = "error"
+                    break
+
+            # Registrar duracao de erro
+            duration = time.time() - start_time
+            consul_node_enrich_duration.labels(
+                node_name=node_name,
+                status="error"
+            ).observe(duration)
+
+        return member
+
+    # Executar todas as requisicoes em paralelo (controladas por semaphore)
+    enriched_members = await asyncio.gather(*[get_service_count(m) for m in members])
+
+    result = {
+        "success": True,
+        "data": enriched_members,
+        "total": len(enriched_members),
+        "main_server": Config.MAIN_SERVER,
+        "active_server": active_server  # Servidor Consul ativo usado (fallback)
+    }
+
+    return result
 
-        # Executar todas as requisicoes em paralelo (controladas por semaphore)
-        enriched_members = await asyncio.gather(*[get_service_count(m) for m in members])
+@router.get("/", include_in_schema=True)
+@router.get("")
+async def get_nodes():
+    """Retorna todos os nos do cluster com cache de 60s
 
-        result = {
-            "success": True,
-            "data": enriched_members,
-            "total": len(enriched_members),
-            "main_server": Config.MAIN_SERVER,
-            "active_server": active_server  # Servidor Consul ativo usado (fallback)
-        }
+    SPEC-PERF-001: Otimizacoes implementadas:
+    - Semaphore para limitar chamadas simultaneas (CONSUL_SEMAPHORE_LIMIT)
+    - Timeout configuravel via env (CONSUL_CATALOG_TIMEOUT)
+    - Retry com backoff para resiliencia
+    - Logging e metricas Prometheus para observabilidade
+    - Cache dedicado para sites_map com TTL de 5 minutos
+    - services_status indica erro quando timeout ocorre
 
-        # SPEC-PERF-001: Atualizar LocalCache global (TTL aumentado de 30s para 60s)
+    SINGLE-FLIGHT + SWR: Requisicoes concorrentes executam UM unico fan-out
+    ao Consul; apos 60s o resultado antigo e servido por mais 60s enquanto
+    revalida em background.
+    """
+    try:
+        # SPEC-PERF-001: TTL aumentado de 30s para 60s
         # Nos raramente mudam em menos de 60s, reduz cache misses de 2/min para 1/min
-        await cache.set(cache_key, result, ttl=60)
-
-        return result
+        return await cache.get_or_compute("nodes:list:all", _load_nodes, ttl=60, stale_ttl=60)
     except Exception as e:
         logger.error(f"[Nodes] Erro ao buscar nos: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,23 @@
 """
 Endpoints Otimizados para TODAS as páginas
 Sistema de cache inteligente com invalidação automática
+
+ASYNC + POOL COMPARTILHADO:
+- ANTES: endpoints `def` com requests.get bloqueante (threadpool do Starlette,
+  ~40 threads) e um /health/service/{name} SEQUENCIAL por serviço
+- AGORA: `async def` sobre o httpx.AsyncClient compartilhado do ConsulManager;
+  instâncias vêm do snapshot da réplica (0 requisições) ou de um fan-out
+  paralelo limitado (CONSUL_FANOUT_CONCURRENCY)
 """
 from fastapi import APIRouter, Query, HTTPException
 from typing import Dict, List, Optional
 # SPRINT 2: Cache antigo removido - agora usa LocalCache no ConsulManager
 # from core.cache_manager import cache_manager
-from core.config import Config
-import requests
+from core.catalog_replica import get_ready_snapshot
+from core.consul_manager import ConsulManager, gather_bounded
+import base64
+import httpx
+import json
 import time
 import logging
 
@@ -15,10 +25,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/optimized", tags=["Optimized Endpoints"])
 
-# Headers e URL do Consul
-CONSUL_HEADERS = {"X-Consul-Token": Config.CONSUL_TOKEN}
-CONSUL_URL = f"http://{Config.MAIN_SERVER}:{Config.CONSUL_PORT}/v1"
-
 # TTLs configuráveis por tipo de dados
 CACHE_TTL = {
     'exporters': 20,     # Exporters mudam raramente
@@ -28,12 +34,37 @@ CACHE_TTL = {
 }
 
 
+# Módulos blackbox (targets blackbox vs exporters)
+BLACKBOX_MODULES = {'icmp', 'http_2xx', 'http_4xx', 'http_5xx', 'http_post_2xx',
+                    'https', 'tcp_connect', 'ssh_banner', 'pop3s_banner', 'irc_banner'}
+
+
+async def _list_instances(consul: ConsulManager) -> List[Dict]:
+    """Todas as instâncias normalizadas, exceto o próprio serviço 'consul'"""
+    return [svc for svc in await consul.get_all_instances() if svc.get('Service') != 'consul']
+
+
+async def _ui_services(consul: ConsulManager) -> List[Dict]:
+    """GET /internal/ui/services (agregado por serviço, 1 requisição)"""
+    response = await consul._request("GET", "/internal/ui/services", timeout=10)
+    return response.json() or []
+
+
+async def _kv_entries(consul: ConsulManager, prefix: str) -> List[Dict]:
+    """Entradas brutas de um prefixo do KV ([] se o prefixo não existe)"""
+    try:
+        response = await consul._request("GET", f"/kv/{prefix}", params={"recurse": "true"})
+    except httpx.HTTPStatusError:
+        return []
+    return response.json() or []
+
+
 # ============================================================================
 # EXPORTERS OTIMIZADO
 # ============================================================================
 
 @router.get("/exporters")
-def get_exporters_optimized(
+async def get_exporters_optimized(
     force_refresh: bool = Query(False, description="Forçar atualização (ignora cache)")
 ):
     """
@@ -58,28 +89,9 @@ def get_exporters_optimized(
     try:
         logger.info("Fetching exporters from Consul...")
 
-        # Buscar serviços agregados
-        services_response = requests.get(
-            f"{CONSUL_URL}/internal/ui/services",
-            headers=CONSUL_HEADERS,
-            timeout=10
-        )
-        services_response.raise_for_status()
-        all_services = services_response.json() or []
-
-        # Buscar nodes para mapear endereços
-        nodes_response = requests.get(
-            f"{CONSUL_URL}/catalog/nodes",
-            headers=CONSUL_HEADERS,
-            timeout=5
-        )
-        nodes_response.raise_for_status()
-        nodes_list = nodes_response.json() or []
-        node_map = {n.get('Node'): n.get('Address') for n in nodes_list if n.get('Node')}
-
-        # Módulos blackbox (para excluir)
-        BLACKBOX_MODULES = {'icmp', 'http_2xx', 'http_4xx', 'http_5xx', 'http_post_2xx',
-                           'https', 'tcp_connect', 'ssh_banner', 'pop3s_banner', 'irc_banner'}
+        # 🚀 TODAS AS INSTÂNCIAS: snapshot da réplica ou 1 lista + fan-out paralelo
+        # (NodeAddress já vem na instância - dispensa /catalog/nodes)
+        instances = await _list_instances(ConsulManager())
 
         # Função para detectar tipo do exporter pelo nome do serviço E TAGS
         def detect_exporter_type(service_name: str, tags: Optional[List[str]] = None) -> str:
@@ -130,85 +142,53 @@ def get_exporters_optimized(
         exporters_data = []
         summary = {'by_type': {}, 'by_env': {}}
 
-        # 🚀 BUSCAR TODAS AS INSTÂNCIAS DE TODOS OS SERVIÇOS
-        for svc in all_services:
-            if not svc or svc.get('Name') == 'consul':
-                continue
-
-            service_name = svc.get('Name', '')
+        for svc_data in instances:
+            node_name = svc_data.get('Node') or 'unknown'
+            meta = svc_data.get('Meta', {}) or {}
+            tags = svc_data.get('Tags', []) or []
 
-            # Buscar instances deste serviço
-            try:
-                instances_resp = requests.get(
-                    f"{CONSUL_URL}/health/service/{service_name}",
-                    headers=CONSUL_HEADERS,
-                    timeout=5
-                )
+            service_lower = str(svc_data.get('Service', '')).lower()
 
-                if instances_resp.status_code != 200:
-                    continue
-
-                instances = instances_resp.json() or []
-
-                for inst in instances:
-                    if not inst:
-                        continue
-
-                    svc_data = inst.get('Service', {})
-                    if not svc_data:
-                        continue
-
-                    node_info = inst.get('Node', {})
-                    node_name = node_info.get('Node', 'unknown')
-                    meta = svc_data.get('Meta', {}) or {}
-                    tags = svc_data.get('Tags', []) or []
-                    
-                    service_lower = str(svc_data.get('Service', '')).lower()
-
-                    # ❌ EXCLUIR: Blackbox targets (baseado no módulo)
-                    module = str(meta.get('module', '')).lower()
-                    if module in BLACKBOX_MODULES:
-                        continue
-
-                    # ❌ EXCLUIR: Serviços que NÃO são exporters
-                    # Verificar se tem '_exporter' ou '-exporter' no nome do serviço
-                    if '_exporter' not in service_lower and '-exporter' not in service_lower:
-                        logger.debug(f"Ignorando serviço não-exporter: {service_lower}")
-                        continue
-
-                    # ✅ INCLUIR: É um exporter válido
-                    # Detectar tipo do exporter pelo nome do serviço E TAGS
-                    exp_type = detect_exporter_type(svc_data.get('Service', ''), tags)
-                    logger.debug(f"Incluindo exporter: {service_lower} com tags {tags} → tipo: {exp_type}")
-                    
-                    env = meta.get('env', meta.get('ambiente', 'unknown'))
-
-                    exporter_item = {
-                        'key': f"{node_name}_{svc_data.get('ID', '')}",
-                        'id': svc_data.get('ID', ''),
-                        'node': node_name,
-                        'nodeAddr': node_map.get(node_name),
-                        'service': svc_data.get('Service', ''),
-                        'tags': svc_data.get('Tags', []),
-                        'address': svc_data.get('Address'),
-                        'port': svc_data.get('Port'),
-                        'meta': meta,
-                        'exporterType': exp_type,
-                        'company': meta.get('company'),
-                        'project': meta.get('project'),
-                        'env': env
-                    }
-
-                    exporters_data.append(exporter_item)
-
-                    # Update summary
-                    summary['by_type'][exp_type] = summary['by_type'].get(exp_type, 0) + 1
-                    summary['by_env'][env] = summary['by_env'].get(env, 0) + 1
+            # ❌ EXCLUIR: Blackbox targets (baseado no módulo)
+            module = str(meta.get('module', '')).lower()
+            if module in BLACKBOX_MODULES:
+                continue
 
-            except Exception as e:
-                logger.warning(f"Error fetching instances for {svc.get('Name')}: {e}")
+            # ❌ EXCLUIR: Serviços que NÃO são exporters
+            # Verificar se tem '_exporter' ou '-exporter' no nome do serviço
+            if '_exporter' not in service_lower and '-exporter' not in service_lower:
+                logger.debug(f"Ignorando serviço não-exporter: {service_lower}")
                 continue
 
+            # ✅ INCLUIR: É um exporter válido
+            # Detectar tipo do exporter pelo nome do serviço E TAGS
+            exp_type = detect_exporter_type(svc_data.get('Service', ''), tags)
+            logger.debug(f"Incluindo exporter: {service_lower} com tags {tags} → tipo: {exp_type}")
+
+            env = meta.get('env', meta.get('ambiente', 'unknown'))
+
+            exporter_item = {
+                'key': f"{node_name}_{svc_data.get('ID', '')}",
+                'id': svc_data.get('ID', ''),
+                'node': node_name,
+                'nodeAddr': svc_data.get('NodeAddress') or None,
+                'service': svc_data.get('Service', ''),
+                'tags': svc_data.get('Tags', []),
+                'address': svc_data.get('Address'),
+                'port': svc_data.get('Port'),
+                'meta': meta,
+                'exporterType': exp_type,
+                'company': meta.get('company'),
+                'project': meta.get('project'),
+                'env': env
+            }
+
+            exporters_data.append(exporter_item)
+
+            # Update summary
+            summary['by_type'][exp_type] = summary['by_type'].get(exp_type, 0) + 1
+            summary['by_env'][env] = summary['by_env'].get(env, 0) + 1
+
         result = {
             'data': exporters_data,
             'total': len(exporters_data),
@@ -223,7 +203,7 @@ def get_exporters_optimized(
 
         return result
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Consul connection error: {e}")
         raise HTTPException(status_code=503, detail=f"Erro ao conectar com Consul: {str(e)}")
     except Exception as e:
@@ -236,7 +216,7 @@ def get_exporters_optimized(
 # ============================================================================
 
 @router.get("/blackbox-targets")
-def get_blackbox_targets_optimized(force_refresh: bool = Query(False)):
+async def get_blackbox_targets_optimized(force_refresh: bool = Query(False)):
     """Lista blackbox targets otimizada - Cache de 15s"""
     start_time = time.time()
     cache_key = "blackbox-targets:list"
@@ -253,90 +233,43 @@ def get_blackbox_targets_optimized(force_refresh: bool = Query(False)):
     try:
         logger.info("Fetching blackbox targets from Consul...")
 
-        # Buscar todos os serviços
-        services_response = requests.get(
-            f"{CONSUL_URL}/internal/ui/services",
-            headers=CONSUL_HEADERS,
-            timeout=10
-        )
-        services_response.raise_for_status()
-        all_services = services_response.json() or []
-
-        nodes_response = requests.get(
-            f"{CONSUL_URL}/catalog/nodes",
-            headers=CONSUL_HEADERS,
-            timeout=5
-        )
-        nodes_response.raise_for_status()
-        nodes_list = nodes_response.json() or []
-        node_map = {n.get('Node'): n.get('Address') for n in nodes_list if n.get('Node')}
-
-        BLACKBOX_MODULES = {'icmp', 'http_2xx', 'http_4xx', 'http_5xx', 'http_post_2xx',
-                           'https', 'tcp_connect', 'ssh_banner', 'pop3s_banner', 'irc_banner'}
+        # 🚀 1 round-trip (ou 0 com réplica) em vez de 1 /health/service por serviço
+        instances = await _list_instances(ConsulManager())
 
         blackbox_data = []
         summary = {'by_module': {}, 'by_env': {}}
 
-        for svc in all_services:
-            if not svc or svc.get('Name') == 'consul':
-                continue
-
-            # Buscar instances
-            try:
-                instances_resp = requests.get(
-                    f"{CONSUL_URL}/health/service/{svc['Name']}",
-                    headers=CONSUL_HEADERS,
-                    timeout=5
-                )
-
-                if instances_resp.status_code != 200:
-                    continue
-
-                instances = instances_resp.json() or []
+        for svc_data in instances:
+            meta = svc_data.get('Meta', {}) or {}
+            module = str(meta.get('module', '')).lower()
 
-                for inst in instances:
-                    if not inst:
-                        continue
-
-                    svc_data = inst.get('Service', {})
-                    if not svc_data:
-                        continue
-
-                    meta = svc_data.get('Meta', {}) or {}
-                    module = str(meta.get('module', '')).lower()
-
-                    # Apenas blackbox modules
-                    if module not in BLACKBOX_MODULES:
-                        continue
-
-                    node_info = inst.get('Node', {})
-                    node_name = node_info.get('Node', 'unknown')
-                    env = meta.get('env', meta.get('ambiente', 'unknown'))
-
-                    target_item = {
-                        'key': f"{node_name}_{svc_data.get('ID', '')}",
-                        'id': svc_data.get('ID', ''),
-                        'node': node_name,
-                        'nodeAddr': node_map.get(node_name),
-                        'service': svc_data.get('Service', ''),
-                        'tags': svc_data.get('Tags', []),
-                        'meta': meta,
-                        'module': module,
-                        'instance': meta.get('instance'),
-                        'company': meta.get('company'),
-                        'project': meta.get('project'),
-                        'env': env
-                    }
-
-                    blackbox_data.append(target_item)
-
-                    summary['by_module'][module] = summary['by_module'].get(module, 0) + 1
-                    summary['by_env'][env] = summary['by_env'].get(env, 0) + 1
-
-            except Exception as e:
-                logger.warning(f"Error fetching instances for {svc.get('Name')}: {e}")
+            # Apenas blackbox modules
+            if module not in BLACKBOX_MODULES:
                 continue
 
+            node_name = svc_data.get('Node') or 'unknown'
+            env = meta.get('env', meta.get('ambiente', 'unknown'))
+
+            target_item = {
+                'key': f"{node_name}_{svc_data.get('ID', '')}",
+                'id': svc_data.get('ID', ''),
+                'node': node_name,
+                'nodeAddr': svc_data.get('NodeAddress') or None,
+                'service': svc_data.get('Service', ''),
+                'tags': svc_data.get('Tags', []),
+                'meta': meta,
+                'module': module,
+                'instance': meta.get('instance'),
+                'company': meta.get('company'),
+                'project': meta.get('project'),
+                'env': env
+            }
+
+            blackbox_data.append(target_item)
+
+            summary['by_module'][module] = summary['by_module'].get(module, 0) + 1
+            summary['by_env'][env] = summary['by_env'].get(env, 0) + 1
+
         result = {
             'data': blackbox_data,
             'total': len(blackbox_data),
@@ -351,6 +284,9 @@ def get_blackbox_targets_optimized(force_refresh: bool = Query(False)):
 
         return result
 
+    except httpx.HTTPError as e:
+        logger.error(f"Consul connection error: {e}")
+        raise HTTPException(status_code=503, detail=f"Erro ao conectar com Consul: {str(e)}")
     except Exception as e:
         logger.error(f"Error fetching blackbox targets: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
@@ -361,7 +297,7 @@ def get_blackbox_targets_optimized(force_refresh: bool = Query(False)):
 # ============================================================================
 
 @router.get("/service-groups")
-def get_service_groups_optimized(force_refresh: bool = Query(False)):
+async def get_service_groups_optimized(force_refresh: bool = Query(False)):
     """Lista grupos de serviços otimizada - Cache de 30s"""
     start_time = time.time()
     cache_key = "service-groups:list"
@@ -375,45 +311,35 @@ def get_service_groups_optimized(force_refresh: bool = Query(False)):
     #         return cached
 
     try:
-        services_response = requests.get(
-            f"{CONSUL_URL}/internal/ui/services",
-            headers=CONSUL_HEADERS,
-            timeout=10
-        )
-        services_response.raise_for_status()
-        all_services = [s for s in (services_response.json() or []) if s and s.get('Name') != 'consul']
-
-        # Para cada serviço selfnode*, buscar as instâncias para pegar o primeiro node_addr
-        enriched_services = []
-        for service in all_services:
+        consul = ConsulManager()
+        all_services = [s for s in await _ui_services(consul) if s and s.get('Name') != 'consul']
+        selfnode_services = [s for s in all_services if s.get('Name', '').lower().startswith('selfnode')]
+
+        # Para cada serviço selfnode*, pegar o node_addr da primeira instância:
+        # do snapshot (0 requisições) ou /health/service/{name} em paralelo limitado
+        snapshot = get_ready_snapshot()
+
+        async def first_node(service: Dict) -> Optional[Dict]:
             service_name = service.get('Name', '')
-            
-            # Se for selfnode*, buscar primeira instância para pegar node_addr
-            if service_name.lower().startswith('selfnode'):
-                try:
-                    instances_resp = requests.get(
-                        f"{CONSUL_URL}/health/service/{service_name}",
-                        headers=CONSUL_HEADERS,
-                        timeout=3
-                    )
-                    if instances_resp.status_code == 200:
-                        instances = instances_resp.json() or []
-                        if instances:
-                            # Pegar o endereço do primeiro nó
-                            first_instance = instances[0]
-                            node_info = first_instance.get('Node', {})
-                            node_addr = node_info.get('Address', '')
-                            node_name = node_info.get('Node', '')
-                            
-                            # Adicionar informações ao serviço
-                            service['NodeAddress'] = node_addr
-                            service['NodeName'] = node_name
-                except Exception as e:
-                    logger.warning(f"Erro ao buscar node_addr para {service_name}: {e}")
-                    service['NodeAddress'] = ''
-                    service['NodeName'] = ''
-            
-            enriched_services.append(service)
+            if snapshot is not None:
+                instances = snapshot.services.get(service_name) or ()
+                return {'Address': instances[0]['NodeAddress'], 'Node': instances[0]['Node']} if instances else None
+            try:
+                response = await consul._request("GET", f"/health/service/{service_name}", timeout=3)
+                instances = response.json() or []
+                return instances[0].get('Node', {}) if instances else None
+            except Exception as e:
+                logger.warning(f"Erro ao buscar node_addr para {service_name}: {e}")
+                return {}
+
+        nodes = await gather_bounded(selfnode_services, first_node)
+        for service, node_info in zip(selfnode_services, nodes):
+            # Adicionar informações ao serviço
+            if node_info is not None:
+                service['NodeAddress'] = node_info.get('Address', '')
+                service['NodeName'] = node_info.get('Node', '')
+
+        enriched_services = all_services
 
         result = {
             'data': enriched_services,
@@ -431,6 +357,9 @@ def get_service_groups_optimized(force_refresh: bool = Query(False)):
         # cache_manager.set(cache_key, result, ttl_seconds=CACHE_TTL['groups'])
         return result
 
+    except httpx.HTTPError as e:
+        logger.error(f"Consul connection error: {e}")
+        raise HTTPException(status_code=503, detail=f"Erro ao conectar com Consul: {str(e)}")
     except Exception as e:
         logger.error(f"Error fetching service groups: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
@@ -441,7 +370,7 @@ def get_service_groups_optimized(force_refresh: bool = Query(False)):
 # ============================================================================
 
 @router.get("/services-instances")
-def get_services_instances_optimized(
+async def get_services_instances_optimized(
     force_refresh: bool = Query(False, description="Forçar atualização (ignora cache)"),
     node_addr: Optional[str] = Query(None, description="Filtrar por node")
 ):
@@ -468,84 +397,47 @@ def get_services_instances_optimized(
     try:
         logger.info(f"Fetching service instances from Consul (node={node_addr or 'ALL'})...")
 
-        # Buscar TODOS os serviços
-        services_response = requests.get(
-            f"{CONSUL_URL}/internal/ui/services",
-            headers=CONSUL_HEADERS,
-            timeout=10
-        )
-        services_response.raise_for_status()
-        all_services = services_response.json() or []
+        # Buscar TODAS as instâncias (snapshot ou 1 lista + fan-out paralelo)
+        instances = await _list_instances(ConsulManager())
 
         instances_data = []
         summary = {'by_module': {}, 'by_env': {}}
 
-        for svc in all_services:
-            if not svc or svc.get('Name') == 'consul':
-                continue
-
-            service_name = svc.get('Name', '')
+        for svc_data in instances:
+            node_name = svc_data.get('Node') or 'unknown'
+            node_address = svc_data.get('NodeAddress', '')
 
-            try:
-                # Buscar instâncias deste serviço
-                instances_resp = requests.get(
-                    f"{CONSUL_URL}/health/service/{service_name}",
-                    headers=CONSUL_HEADERS,
-                    timeout=5
-                )
-
-                if instances_resp.status_code != 200:
+            # Filtrar por node se especificado
+            if node_addr and node_addr != 'ALL':
+                if node_address != node_addr and node_name != node_addr:
                     continue
 
-                instances = instances_resp.json() or []
-
-                for inst in instances:
-                    if not inst:
-                        continue
-
-                    svc_data = inst.get('Service', {})
-                    if not svc_data:
-                        continue
-
-                    node_info = inst.get('Node', {})
-                    node_name = node_info.get('Node', 'unknown')
-                    node_address = node_info.get('Address', '')
-
-                    # Filtrar por node se especificado
-                    if node_addr and node_addr != 'ALL':
-                        if node_address != node_addr and node_name != node_addr:
-                            continue
-
-                    meta = svc_data.get('Meta', {}) or {}
-                    module = meta.get('module', '')
-                    env = meta.get('env', meta.get('ambiente', 'unknown'))
-
-                    instance_item = {
-                        'key': f"{node_name}_{svc_data.get('ID', '')}",
-                        'id': svc_data.get('ID', ''),
-                        'node': node_name,
-                        'nodeAddr': node_address,
-                        'service': svc_data.get('Service', ''),
-                        'tags': svc_data.get('Tags', []),
-                        'address': svc_data.get('Address'),
-                        'port': svc_data.get('Port'),
-                        'meta': meta,
-                        'company': meta.get('company'),
-                        'project': meta.get('project'),
-                        'env': env,
-                        'module': module
-                    }
-
-                    instances_data.append(instance_item)
-
-                    # Update summary
-                    if module:
-                        summary['by_module'][module] = summary['by_module'].get(module, 0) + 1
-                    summary['by_env'][env] = summary['by_env'].get(env, 0) + 1
-
-            except Exception as e:
-                logger.warning(f"Error fetching instances for {service_name}: {e}")
-                continue
+            meta = svc_data.get('Meta', {}) or {}
+            module = meta.get('module', '')
+            env = meta.get('env', meta.get('ambiente', 'unknown'))
+
+            instance_item = {
+                'key': f"{node_name}_{svc_data.get('ID', '')}",
+                'id': svc_data.get('ID', ''),
+                'node': node_name,
+                'nodeAddr': node_address,
+                'service': svc_data.get('Service', ''),
+                'tags': svc_data.get('Tags', []),
+                'address': svc_data.get('Address'),
+                'port': svc_data.get('Port'),
+                'meta': meta,
+                'company': meta.get('company'),
+                'project': meta.get('project'),
+                'env': env,
+                'module': module
+            }
+
+            instances_data.append(instance_item)
+
+            # Update summary
+            if module:
+                summary['by_module'][module] = summary['by_module'].get(module, 0) + 1
+            summary['by_env'][env] = summary['by_env'].get(env, 0) + 1
 
         load_ms = int((time.time() - start_time) * 1000)
 
@@ -563,7 +455,7 @@ def get_services_instances_optimized(
 
         return result
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Consul connection error: {e}")
         raise HTTPException(status_code=503, detail=f"Erro ao conectar com Consul: {str(e)}")
     except Exception as e:
@@ -576,7 +468,7 @@ def get_services_instances_optimized(
 # ============================================================================
 
 @router.get("/services")
-def get_services_optimized(
+async def get_services_optimized(
     force_refresh: bool = Query(False, description="Forçar atualização (ignora cache)")
 ):
     """
@@ -602,13 +494,7 @@ def get_services_optimized(
     try:
         # 🚀 UMA ÚNICA CHAMADA - Endpoint agregado do Consul (IGUAL AO TENSUNS!)
         logger.info("Fetching services from Consul /internal/ui/services...")
-        services_response = requests.get(
-            f"{CONSUL_URL}/internal/ui/services",
-            headers=CONSUL_HEADERS,
-            timeout=10
-        )
-        services_response.raise_for_status()
-        all_services = services_response.json() or []
+        all_services = await _ui_services(ConsulManager())
 
         # Processar serviços (similar ao TenSunS - bem simples!)
         processed_services = []
@@ -683,7 +569,7 @@ def get_services_optimized(
 
         return result
 
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching services: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching from Consul: {str(e)}")
     except Exception as e:
@@ -696,7 +582,7 @@ def get_services_optimized(
 # ============================================================================
 
 @router.get("/blackbox-groups")
-def get_blackbox_groups_optimized(
+async def get_blackbox_groups_optimized(
     force_refresh: bool = Query(False, description="Forçar atualização (ignora cache)")
 ):
     """
@@ -720,31 +606,23 @@ def get_blackbox_groups_optimized(
 
     try:
         # Buscar do KV store
-        kv_response = requests.get(
-            f"{CONSUL_URL}/kv/blackbox/groups?recurse=true",
-            headers=CONSUL_HEADERS,
-            timeout=5
-        )
+        kv_data = await _kv_entries(ConsulManager(), "blackbox/groups")
 
         groups = []
-        if kv_response.status_code == 200:
-            kv_data = kv_response.json() or []
-            for item in kv_data:
-                try:
-                    import base64
-                    import json
-                    key = item.get('Key', '')
-                    if '/' in key:
-                        group_id = key.split('/')[-1]
-                        value_b64 = item.get('Value', '')
-                        if value_b64:
-                            value_str = base64.b64decode(value_b64).decode('utf-8')
-                            group_data = json.loads(value_str)
-                            group_data['id'] = group_id
-                            groups.append(group_data)
-                except Exception as e:
-                    logger.warning(f"Error parsing group {key}: {e}")
-                    continue
+        for item in kv_data:
+            try:
+                key = item.get('Key', '')
+                if '/' in key:
+                    group_id = key.split('/')[-1]
+                    value_b64 = item.get('Value', '')
+                    if value_b64:
+                        value_str = base64.b64decode(value_b64).decode('utf-8')
+                        group_data = json.loads(value_str)
+                        group_data['id'] = group_id
+                        groups.append(group_data)
+            except Exception as e:
+                logger.warning(f"Error parsing group {key}: {e}")
+                continue
 
         load_ms = int((time.time() - start_time) * 1000)
 
@@ -771,7 +649,7 @@ def get_blackbox_groups_optimized(
 # ============================================================================
 
 @router.get("/presets")
-def get_presets_optimized(
+async def get_presets_optimized(
     force_refresh: bool = Query(False, description="Forçar atualização (ignora cache)"),
     category: Optional[str] = Query(None, description="Filtrar por categoria")
 ):
@@ -796,36 +674,28 @@ def get_presets_optimized(
 
     try:
         # Buscar do KV store
-        kv_response = requests.get(
-            f"{CONSUL_URL}/kv/service/presets?recurse=true",
-            headers=CONSUL_HEADERS,
-            timeout=5
-        )
+        kv_data = await _kv_entries(ConsulManager(), "service/presets")
 
         presets = []
-        if kv_response.status_code == 200:
-            kv_data = kv_response.json() or []
-            for item in kv_data:
-                try:
-                    import base64
-                    import json
-                    key = item.get('Key', '')
-                    if '/' in key:
-                        preset_id = key.split('/')[-1]
-                        value_b64 = item.get('Value', '')
-                        if value_b64:
-                            value_str = base64.b64decode(value_b64).decode('utf-8')
-                            preset_data = json.loads(value_str)
-                            preset_data['id'] = preset_id
-
-                            # Filtrar por categoria se especificado
-                            if category and preset_data.get('category') != category:
-                                continue
-
-                            presets.append(preset_data)
-                except Exception as e:
-                    logger.warning(f"Error parsing preset {key}: {e}")
-                    continue
+        for item in kv_data:
+            try:
+                key = item.get('Key', '')
+                if '/' in key:
+                    preset_id = key.split('/')[-1]
+                    value_b64 = item.get('Value', '')
+                    if value_b64:
+                        value_str = base64.b64decode(value_b64).decode('utf-8')
+                        preset_data = json.loads(value_str)
+                        preset_data['id'] = preset_id
+
+                        # Filtrar por categoria se especificado
+                        if category and preset_data.get('category') != category:
+                            continue
+
+                        presets.append(preset_data)
+            except Exception as e:
+                logger.warning(f"Error parsing preset {key}: {e}")
+                continue
 
         load_ms = int((time.time() - start_time) * 1000)
 
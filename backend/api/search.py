@@ -5,9 +5,14 @@ Provides powerful search capabilities for services and metadata.
 from fastapi import APIRouter, HTTPException, Query
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
+import time
 
 from core.consul_manager import ConsulManager
 from core.advanced_search import AdvancedSearch, SearchOperator, LogicalOperator
+from core.catalog_replica import get_ready_snapshot
+from core.consul_filter import translate_conditions
+from core.search_plan import get_query_plan_cache
+from core.text_index import get_catalog_text_index
 
 router = APIRouter(tags=["Search"])
 
@@ -40,6 +45,7 @@ class AdvancedSearchRequest(BaseModel):
     sort_desc: bool = Field(False, description="Sort in descending order")
     page: int = Field(1, description="Page number (1-indexed)", ge=1)
     page_size: int = Field(20, description="Items per page", ge=1, le=100)
+    explain: bool = Field(False, description="Include the compiled plan and its timing")
 
     class Config:
         json_schema_extra = {
@@ -104,21 +110,38 @@ async def advanced_search(request: AdvancedSearchRequest):
     }
     ```
     """
-    consul = ConsulManager()
+    start = time.perf_counter()
 
-    # Get all services
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
-
-    # Convert conditions to dict format
+    # Compiled plan, cached by normalized query
     conditions = [c.model_dump() for c in request.conditions]
-
-    # Apply search
-    filtered = AdvancedSearch.search(
-        items=services_list,
-        conditions=conditions,
-        logical_operator=request.logical_operator
-    )
+    try:
+        plan, plan_cached = get_query_plan_cache().get_or_compile(
+            conditions, request.logical_operator
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    plan_ms = (time.perf_counter() - start) * 1000
+
+    # Replica ready: iterate instance references (same items/order as
+    # get_services_snapshot) and push indexable conditions down to the
+    # trigram index; copies are made only for the matches
+    trace: Dict[str, Any] = {}
+    snapshot = get_ready_snapshot()
+    if snapshot is not None:
+        text_index = get_catalog_text_index()
+        filtered = [
+            dict(svc) for svc in plan.execute(
+                snapshot.iter_instances(),
+                text_index=text_index if text_index.sync(snapshot) else None,
+                trace=trace
+            )
+        ]
+    else:
+        consul = ConsulManager()
+        filter_expr = translate_conditions(conditions, request.logical_operator)
+        services_list = await consul.get_services_snapshot(filter_expr=filter_expr)
+        filtered = plan.execute(services_list, trace=trace)
+        trace["consul_filter"] = filter_expr
 
     # Sort if requested
     if request.sort_by:
@@ -135,7 +158,7 @@ async def advanced_search(request: AdvancedSearchRequest):
         request.page_size
     )
 
-    return {
+    response = {
         "success": True,
         "data": result["data"],
         "pagination": result["pagination"],
@@ -145,6 +168,38 @@ async def advanced_search(request: AdvancedSearchRequest):
             "sorted_by": request.sort_by
         }
     }
+    if request.explain:
+        response["explain"] = {
+            "plan": plan.explain(),
+            "plan_cached": plan_cached,
+            "plan_ms": round(plan_ms, 3),
+            "execution": trace,
+            "total_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+    return response
+
+
+def _indexed_text_search(text: str, fields: Optional[List[str]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Answer search_text from the catalog trigram index.
+
+    Returns the same items as AdvancedSearch.search_text over
+    get_services_snapshot(), or None when the replica snapshot is not ready or
+    a requested field cannot be answered by the index (non-string values).
+    """
+    snapshot = get_ready_snapshot()
+    if snapshot is None or not text:
+        return None
+
+    text_index = get_catalog_text_index()
+    if not text_index.sync(snapshot):
+        return None
+    docs = text_index.search(text, fields=fields or AdvancedSearch.TEXT_SEARCH_FIELDS)
+    if docs is None:
+        return None
+
+    # Same shape/order as snapshot.to_flat_list() (one item per (Node, ID))
+    return [dict(svc) for svc in snapshot.iter_instances() if (svc["Node"], svc["ID"]) in docs]
 
 
 @router.post("/text", include_in_schema=True)
@@ -154,6 +209,9 @@ async def text_search(request: TextSearchRequest):
 
     Searches in: Meta.name, Meta.instance, Meta.company, Meta.project, service, id
 
+    Served from the catalog trigram index when the catalog replica is ready
+    (posting-list intersection + exact verification); otherwise scans all services.
+
     Example:
     ```json
     {
@@ -163,18 +221,23 @@ async def text_search(request: TextSearchRequest):
     }
     ```
     """
-    consul = ConsulManager()
+    start = time.perf_counter()
+    filtered = _indexed_text_search(request.text, request.fields)
+    index_used = filtered is not None
 
-    # Get all services
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    if filtered is None:
+        consul = ConsulManager()
 
-    # Apply text search
-    filtered = AdvancedSearch.search_text(
-        services_list,
-        request.text,
-        request.fields
-    )
+        # Get all services
+        services_list = await consul.get_services_snapshot()
+
+        # Apply text search
+        filtered = AdvancedSearch.search_text(
+            services_list,
+            request.text,
+            request.fields
+        )
+    search_ms = (time.perf_counter() - start) * 1000
 
     # Paginate
     result = AdvancedSearch.paginate(
@@ -188,7 +251,9 @@ async def text_search(request: TextSearchRequest):
         "data": result["data"],
         "pagination": result["pagination"],
         "search_term": request.text,
-        "fields_searched": request.fields or "all common fields"
+        "fields_searched": request.fields or "all common fields",
+        "search_mode": "trigram_index" if index_used else "scan",
+        "search_ms": round(search_ms, 3)
     }
 
 
@@ -211,8 +276,7 @@ async def get_filter_options():
     consul = ConsulManager()
 
     # Get all services
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    services_list = await consul.get_services_snapshot()
 
     # Build filter options
     filters = AdvancedSearch.build_filters_from_metadata(services_list)
@@ -238,8 +302,7 @@ async def get_unique_values(
     consul = ConsulManager()
 
     # Get all services
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    services_list = await consul.get_services_snapshot()
 
     # Extract unique values
     values = AdvancedSearch.extract_unique_values(services_list, field)
@@ -263,15 +326,11 @@ async def search_by_company(
     page_size: int = Query(20, ge=1, le=100)
 ):
     """Quick search by company"""
+    conditions = [{"field": "Meta.company", "operator": "eq", "value": company}]
     consul = ConsulManager()
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    services_list = await consul.get_services_snapshot(filter_expr=translate_conditions(conditions))
 
-    filtered = AdvancedSearch.search(
-        services_list,
-        [{"field": "Meta.company", "operator": "eq", "value": company}],
-        "and"
-    )
+    filtered = AdvancedSearch.search(services_list, conditions, "and")
 
     result = AdvancedSearch.paginate(filtered, page, page_size)
 
@@ -290,15 +349,11 @@ async def search_by_environment(
     page_size: int = Query(20, ge=1, le=100)
 ):
     """Quick search by environment (prod, dev, staging, etc.)"""
+    conditions = [{"field": "Meta.env", "operator": "eq", "value": env}]
     consul = ConsulManager()
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    services_list = await consul.get_services_snapshot(filter_expr=translate_conditions(conditions))
 
-    filtered = AdvancedSearch.search(
-        services_list,
-        [{"field": "Meta.env", "operator": "eq", "value": env}],
-        "and"
-    )
+    filtered = AdvancedSearch.search(services_list, conditions, "and")
 
     result = AdvancedSearch.paginate(filtered, page, page_size)
 
@@ -317,15 +372,11 @@ async def search_by_tag(
     page_size: int = Query(20, ge=1, le=100)
 ):
     """Quick search by tag"""
+    conditions = [{"field": "Tags", "operator": "contains", "value": tag}]
     consul = ConsulManager()
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    services_list = await consul.get_services_snapshot(filter_expr=translate_conditions(conditions))
 
-    filtered = AdvancedSearch.search(
-        services_list,
-        [{"field": "Tags", "operator": "contains", "value": tag}],
-        "and"
-    )
+    filtered = AdvancedSearch.search(services_list, conditions, "and")
 
     result = AdvancedSearch.paginate(filtered, page, page_size)
 
@@ -359,10 +410,6 @@ async def search_blackbox_targets(
     """
     consul = ConsulManager()
 
-    # Get blackbox services only
-    services_dict = await consul.query_agent_services('Service == "blackbox_exporter"')
-    services_list = list(services_dict.values())
-
     # Build conditions
     conditions = []
 
@@ -377,6 +424,13 @@ async def search_blackbox_targets(
     if group:
         conditions.append({"field": "Meta.group", "operator": "eq", "value": group})
 
+    # Get blackbox services only (metadata conditions filtered by Consul too)
+    filter_expr = translate_conditions(
+        [{"field": "Service", "operator": "eq", "value": "blackbox_exporter"}, *conditions]
+    )
+    services_dict = await consul.query_agent_services(filter_expr)
+    services_list = list(services_dict.values())
+
     # Apply search if conditions exist
     if conditions:
         filtered = AdvancedSearch.search(services_list, conditions, "and")
@@ -386,7 +440,7 @@ async def search_blackbox_targets(
     # Paginate
     result = AdvancedSearch.paginate(filtered, page, page_size)
 
-    return {
+    response = {
         "success": True,
         "data": result["data"],
         "pagination": result["pagination"],
@@ -398,6 +452,7 @@ async def search_blackbox_targets(
             "group": group
         }
     }
+    return response
 
 
 # ============================================================================
@@ -417,8 +472,7 @@ async def get_search_statistics():
     - Service type
     """
     consul = ConsulManager()
-    services_dict = await consul.get_services()
-    services_list = list(services_dict.values())
+    services_list = await consul.get_services_snapshot()
 
     stats = {
         "total_services": len(services_list),
@@ -454,5 +508,7 @@ async def get_search_statistics():
 
     return {
         "success": True,
-        "statistics": stats
+        "statistics": stats,
+        "text_index": get_catalog_text_index().get_stats(),
+        "query_plans": get_query_plan_cache().get_stats()
     }
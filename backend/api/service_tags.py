@@ -69,10 +69,11 @@ async def get_unique_tags():
     consul = ConsulManager()
 
     try:
-        # Buscar todos os serviços
-        services_response = await consul.get_services()
+        # Buscar todos os serviços (CATALOG REPLICA: snapshot em memória)
+        # Estrutura: [service_data]
+        services_response = await consul.get_services_snapshot()
 
-        if not services_response or 'services' not in services_response:
+        if not services_response:
             return {
                 "success": True,
                 "total": 0,
@@ -82,14 +83,10 @@ async def get_unique_tags():
         # Extrair tags únicas
         unique_tags: Set[str] = set()
 
-        for service_list in services_response['services'].values():
-            if not isinstance(service_list, list):
-                continue
-
-            for service in service_list:
-                tags = service.get('Tags', [])
-                if isinstance(tags, list):
-                    unique_tags.update(tags)
+        for service in services_response:
+            tags = service.get('Tags', [])
+            if isinstance(tags, list):
+                unique_tags.update(tags)
 
         # Ordenar alfabeticamente
         sorted_tags = sorted(list(unique_tags))
@@ -13,8 +13,10 @@ NOTA: Refatorado em SPEC-CLEANUP-001 v1.4.0
   - GET /{service_id} (get_service)
 """
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Path
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Optional, Any
 from core.consul_manager import ConsulManager
+from core.consul_bulk import bulk_deregister, bulk_register
 from core.config import Config
 from core.naming_utils import apply_site_suffix, extract_site_from_metadata
 from core.consul_kv_config_manager import ConsulKVConfigManager
@@ -26,6 +28,8 @@ from .models import (
     ServiceResponse,
     ErrorResponse
 )
+import asyncio
+import json
 import logging
 
 router = APIRouter(tags=["Services"])
@@ -395,17 +399,82 @@ async def create_service(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _bulk_body(results: List[Dict[str, Any]], action: str) -> Dict[str, Any]:
+    """Corpo da resposta dos endpoints em lote (resultado por item + resumo)"""
+    success_count = sum(1 for r in results if r["success"])
+    return {
+        "success": True,
+        "message": f"{action} {success_count}/{len(results)} servicos",
+        "results": {r["id"]: r["success"] for r in results},
+        "details": results,
+        "summary": {
+            "total": len(results),
+            "success": success_count,
+            "failed": len(results) - success_count,
+            "via_txn": sum(1 for r in results if r["via"] == "txn"),
+            "via_agent": sum(1 for r in results if r["via"] == "agent")
+        }
+    }
+
+
+async def _run_bulk(operation, action: str, log_label: str, stream: bool, background_tasks: BackgroundTasks):
+    """
+    Executa operation(progress) e responde com JSON ou, com stream=True,
+    NDJSON: uma linha {"type": "progress", ...} por lote de 64 e a linha
+    final {"type": "result", ...} com o mesmo corpo da resposta JSON.
+    """
+    def log_message(body: Dict[str, Any]) -> str:
+        return f"{log_label}: {body['summary']['success']} sucessos, {body['summary']['failed']} falhas"
+
+    if not stream:
+        body = _bulk_body(await operation(None), action)
+        background_tasks.add_task(log_action, log_message(body))
+        return body
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def lines():
+        # Desconexão do cliente não interrompe o lote (a operação segue até o fim)
+        task = asyncio.ensure_future(operation(lambda p: queue.put_nowait({"type": "progress", **p})))
+        while not task.done():
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield json.dumps(getter.result()) + "\n"
+            else:
+                getter.cancel()
+        while not queue.empty():
+            yield json.dumps(queue.get_nowait()) + "\n"
+        try:
+            body = _bulk_body(task.result(), action)
+        except Exception as e:
+            logger.error(f"Erro na operacao em lote: {e}", exc_info=True)
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+            return
+        await log_action(log_message(body))
+        yield json.dumps({"type": "result", **body}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.post("/bulk/register", include_in_schema=True)
 async def bulk_register_services(
     services: List[ServiceCreateRequest],
     node_addr: Optional[str] = Query(None, description="Endereco do no onde registrar"),
+    txn_node: Optional[str] = Query(
+        None,
+        description="No de catalogo SEM agente para /v1/txn (default: CONSUL_BULK_TXN_NODE; vazio = Agent API)"
+    ),
+    agent_fallback: bool = Query(True, description="Usar Agent API se a transacao falhar"),
+    stream: bool = Query(False, description="Progresso em streaming (NDJSON) a cada lote"),
     background_tasks: BackgroundTasks = None
 ):
     """
     Registra multiplos servicos em lote
 
     Preservado para importacao em massa e automacao futura.
-    Retorna resultado individual para cada servico.
+    Transacoes de 64 operacoes com concorrencia limitada (core/consul_bulk.py).
+    Retorna resultado individual para cada servico (results + details).
     """
     try:
         consul = ConsulManager()
@@ -416,26 +485,11 @@ async def bulk_register_services(
                 service_data["node_addr"] = node_addr
 
         logger.info(f"Registrando {len(services_data)} servicos em lote")
-        results = await consul.bulk_register_services(services_data, node_addr)
 
-        success_count = sum(1 for v in results.values() if v)
-        failed_count = len(results) - success_count
+        def operation(progress):
+            return bulk_register(consul, services_data, node_addr, txn_node, agent_fallback, progress)
 
-        background_tasks.add_task(
-            log_action,
-            f"Registro em lote: {success_count} sucessos, {failed_count} falhas"
-        )
-
-        return {
-            "success": True,
-            "message": f"Registrados {success_count}/{len(results)} servicos",
-            "results": results,
-            "summary": {
-                "total": len(results),
-                "success": success_count,
-                "failed": failed_count
-            }
-        }
+        return await _run_bulk(operation, "Registrados", "Registro em lote", stream, background_tasks)
 
     except Exception as e:
         logger.error(f"Erro no registro em lote: {e}", exc_info=True)
@@ -609,38 +663,30 @@ async def update_service(
 async def bulk_deregister_services(
     service_ids: List[str],
     node_addr: Optional[str] = Query(None, description="Endereco do no onde remover"),
+    txn_node: Optional[str] = Query(
+        None,
+        description="No de catalogo SEM agente para /v1/txn (default: CONSUL_BULK_TXN_NODE; vazio = Agent API)"
+    ),
+    agent_fallback: bool = Query(True, description="Usar Agent API se a transacao falhar"),
+    stream: bool = Query(False, description="Progresso em streaming (NDJSON) a cada lote"),
     background_tasks: BackgroundTasks = None
 ):
     """
     Remove multiplos servicos em lote
 
     Preservado para limpeza em massa e automacao futura.
-    Retorna resultado individual para cada servico.
+    Transacoes de 64 operacoes com concorrencia limitada (core/consul_bulk.py).
+    Retorna resultado individual para cada servico (results + details).
     """
     try:
         consul = ConsulManager()
 
         logger.info(f"Removendo {len(service_ids)} servicos em lote")
-        results = await consul.bulk_deregister_services(service_ids, node_addr)
-
-        success_count = sum(1 for v in results.values() if v)
-        failed_count = len(results) - success_count
 
-        background_tasks.add_task(
-            log_action,
-            f"Remocao em lote: {success_count} sucessos, {failed_count} falhas"
-        )
+        def operation(progress):
+            return bulk_deregister(consul, service_ids, node_addr, txn_node, agent_fallback, progress)
 
-        return {
-            "success": True,
-            "message": f"Removidos {success_count}/{len(results)} servicos",
-            "results": results,
-            "summary": {
-                "total": len(results),
-                "success": success_count,
-                "failed": failed_count
-            }
-        }
+        return await _run_bulk(operation, "Removidos", "Remocao em lote", stream, background_tasks)
 
     except Exception as e:
         logger.error(f"Erro na remocao em lote: {e}", exc_info=True)
@@ -7,16 +7,13 @@ from pydantic import BaseModel
 from typing import Dict, List, Optional
 # SPRINT 2: Cache antigo removido - agora usa LocalCache no ConsulManager
 # from core.cache_manager import cache_manager
-from core.config import Config
-import requests
+from core.catalog_replica import get_ready_snapshot
+from core.consul_manager import ConsulManager, gather_bounded
+import httpx
 import time
 
 router = APIRouter(prefix="/services-optimized", tags=["Services (Optimized)"])
 
-# Headers e URL do Consul
-CONSUL_HEADERS = {"X-Consul-Token": Config.CONSUL_TOKEN}
-CONSUL_URL = f"http://{Config.MAIN_SERVER}:{Config.CONSUL_PORT}/v1"
-
 # TTL do cache: 15 segundos (dados relativamente frescos)
 CACHE_TTL = 15
 
@@ -49,7 +46,7 @@ class ServicesResponse(BaseModel):
 
 
 @router.get("/list", response_model=ServicesResponse)
-def get_services_optimized(
+async def get_services_optimized(
     node: Optional[str] = Query(None, description="Filtrar por node"),
     search: Optional[str] = Query(None, description="Busca por nome/ID"),
     force_refresh: bool = Query(False, description="Forçar atualização (ignora cache)")
@@ -61,6 +58,8 @@ def get_services_optimized(
     - Processamento no backend
     - Filtros aplicados no backend
     - Retorna dados prontos para exibição
+    - Réplica pronta: 0 requisições; sem réplica: /catalog/node/{node} em
+      paralelo limitado (CONSUL_FANOUT_CONCURRENCY) no pool compartilhado
     """
     start_time = time.time()
 
@@ -76,64 +75,50 @@ def get_services_optimized(
     #         return cached_data
 
     try:
-        # Buscar TODOS os nodes e serviços (1 chamada)
-        nodes_response = requests.get(
-            f"{CONSUL_URL}/catalog/nodes",
-            headers=CONSUL_HEADERS,
-            timeout=5
-        )
-        nodes_response.raise_for_status()
-        nodes_list = nodes_response.json()
-
-        # Mapear node -> address
-        node_address_map = {n['Node']: n['Address'] for n in nodes_list}
-
-        # Buscar serviços de todos os nodes ou de um específico
+        consul = ConsulManager()
         all_services = []
+        snapshot = get_ready_snapshot()
 
-        if node:
-            # Buscar de um node específico
-            services_response = requests.get(
-                f"{CONSUL_URL}/catalog/node/{node}",
-                headers=CONSUL_HEADERS,
-                timeout=5
-            )
-            services_response.raise_for_status()
-            node_data = services_response.json()
-            services = node_data.get('Services', {})
-
-            for svc_id, svc in services.items():
-                if svc.get('Service') == 'consul':
+        if snapshot is not None:
+            # Réplica em memória: instâncias já trazem Node/NodeAddress
+            for svc in snapshot.iter_instances():
+                if svc['Service'] == 'consul' or (node and svc['Node'] != node):
                     continue
-                all_services.append({
-                    'node': node,
-                    'node_addr': node_address_map.get(node),
-                    **svc
-                })
+                all_services.append({'node': svc['Node'], 'node_addr': svc['NodeAddress'], **svc})
         else:
-            # Buscar de todos os nodes (paralelo simulado - sequencial é mais estável)
-            for node_info in nodes_list:
-                node_name = node_info['Node']
+            # Buscar TODOS os nodes (1 chamada)
+            nodes_response = await consul._request("GET", "/catalog/nodes")
+            nodes_list = nodes_response.json()
+
+            # Mapear node -> address
+            node_address_map = {n['Node']: n['Address'] for n in nodes_list}
+
+            async def fetch_node(node_name: str, timeout: float = 3):
+                response = await consul._request("GET", f"/catalog/node/{node_name}", timeout=timeout)
+                return node_name, (response.json() or {}).get('Services', {})
+
+            async def fetch_node_safe(node_name: str):
                 try:
-                    services_response = requests.get(
-                        f"{CONSUL_URL}/catalog/node/{node_name}",
-                        headers=CONSUL_HEADERS,
-                        timeout=3
-                    )
-                    if services_response.status_code == 200:
-                        node_data = services_response.json()
-                        services = node_data.get('Services', {})
-
-                        for svc_id, svc in services.items():
-                            if svc.get('Service') == 'consul':
-                                continue
-                            all_services.append({
-                                'node': node_name,
-                                'node_addr': node_address_map.get(node_name),
-                                **svc
-                            })
-                except:
-                    continue
+                    return await fetch_node(node_name)
+                except Exception:
+                    return node_name, {}
+
+            if node:
+                # Buscar de um node específico (erros propagam → 503)
+                node_services = [await fetch_node(node, timeout=5)]
+            else:
+                # Buscar de todos os nodes em paralelo limitado
+                node_services = await gather_bounded([n['Node'] for n in nodes_list], fetch_node_safe)
+
+            for node_name, services in node_services:
+                for svc_id, svc in services.items():
+                    if svc.get('Service') == 'consul':
+                        continue
+                    all_services.append({
+                        'node': node_name,
+                        'node_addr': node_address_map.get(node_name),
+                        **svc
+                    })
 
         # Processar serviços
         processed_services = []
@@ -152,7 +137,7 @@ def get_services_optimized(
                     continue
 
             item = ServiceItem(
-                key=f"{svc.get('Node', '')}_{svc.get('ID', '')}",
+                key=f"{svc.get('node', '')}_{svc.get('ID', '')}",
                 id=svc.get('ID', ''),
                 node=svc.get('node', ''),
                 node_addr=svc.get('node_addr'),
@@ -191,7 +176,7 @@ def get_services_optimized(
 
         return response_data
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=503, detail=f"Erro ao conectar com Consul: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar serviços: {str(e)}")
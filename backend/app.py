@@ -2,7 +2,7 @@
 API FastAPI para Consul Manager
 Mantém todas as funcionalidades do script original
 """
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Response
+from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import asyncio
@@ -16,6 +16,8 @@ from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 # Importações locais
 from core.config import Config
+from core.http_cache import ConditionalGetMiddleware, NotModified, conditional_get, not_modified_handler
+from core.json_codec import CodecJSONResponse
 from api.services import router as services_router
 from api.nodes import router as nodes_router
 from api.config import router as config_router
@@ -39,6 +41,7 @@ from api.reference_values import router as reference_values_router  # NOVO: Sist
 from api.service_tags import router as service_tags_router  # NOVO: Sistema de tags retroalimentáveis
 from api.settings import router as settings_router  # NOVO: Configurações globais (naming strategy, etc)
 from api.admin import router as admin_router  # SPEC-PERF-001: Endpoints administrativos (flush cache, etc)
+from api.events import router as events_router  # Push de mudanças (SSE/WebSocket) no lugar de polling
 try:
     from api.installer import router as installer_router
     from api.health import router as health_router
@@ -487,62 +490,67 @@ async def lifespan(app: FastAPI):
     Gerencia o ciclo de vida da aplicação FastAPI
 
     STARTUP:
-    - Inicializa sistema de auditoria com eventos de exemplo
+    - Inicializa sistema de auditoria (SQLite persistente; eventos de exemplo só na primeira execução)
     - Auto-migração de regras de categorização (se KV vazio)
     - Pré-aquece cache de campos metadata (background task)
+    - Inicia réplica do catálogo Consul (background task)
+    - Inicia agregados incrementais do dashboard (background task)
 
     SHUTDOWN:
-    - Finaliza recursos (futuro: fechar conexões, etc)
+    - Para agregados do dashboard e réplica do catálogo (watchers e pool HTTP dedicado)
     """
     # ============================================
     # STARTUP - Inicialização da Aplicação
     # ============================================
     print(">> Iniciando Consul Manager API...")
 
-    # PASSO 1: Inicializar sistema de auditoria com eventos de exemplo
+    # PASSO 1: Inicializar sistema de auditoria (audit store SQLite persistente)
+    # Eventos de exemplo só quando o store está vazio (primeira execução)
     from core.audit_manager import audit_manager
     from datetime import datetime, timedelta
 
-    # Adicionar eventos de exemplo para demonstração
-    base_time = datetime.utcnow()
-
-    # Eventos dos últimos 7 dias
-    for i in range(20):
-        days_ago = i // 3
-        event_time = (base_time - timedelta(days=days_ago)).isoformat() + "Z"
-
-        if i % 3 == 0:
-            event = audit_manager.log_event(
-                action="create",
-                resource_type="service",
-                resource_id=f"blackbox_exporter_{i}",
-                user="admin",
-                details=f"Criado serviço de monitoramento {i}",
-                metadata={"module": "blackbox", "env": "prod"}
-            )
-            event["timestamp"] = event_time
-        elif i % 3 == 1:
-            event = audit_manager.log_event(
-                action="update",
-                resource_type="kv",
-                resource_id=f"config/service_{i}",
-                user="operator",
-                details=f"Atualizada configuração do serviço {i}",
-                metadata={"key": f"config/service_{i}"}
-            )
-            event["timestamp"] = event_time
-        else:
-            event = audit_manager.log_event(
-                action="delete",
-                resource_type="blackbox_target",
-                resource_id=f"target_{i}",
-                user="system",
-                details=f"Removido target de monitoramento {i}",
-                metadata={"reason": "deprecated"}
-            )
-            event["timestamp"] = event_time
-
-    print(f">> Sistema de auditoria inicializado com {len(audit_manager.events)} eventos de exemplo")
+    if audit_manager.count() == 0:
+        base_time = datetime.utcnow()
+
+        # Eventos dos últimos 7 dias
+        for i in range(20):
+            days_ago = i // 3
+            event_time = (base_time - timedelta(days=days_ago)).isoformat() + "Z"
+
+            if i % 3 == 0:
+                audit_manager.log_event(
+                    action="create",
+                    resource_type="service",
+                    resource_id=f"blackbox_exporter_{i}",
+                    user="admin",
+                    details=f"Criado serviço de monitoramento {i}",
+                    metadata={"module": "blackbox", "env": "prod"},
+                    timestamp=event_time
+                )
+            elif i % 3 == 1:
+                audit_manager.log_event(
+                    action="update",
+                    resource_type="kv",
+                    resource_id=f"config/service_{i}",
+                    user="operator",
+                    details=f"Atualizada configuração do serviço {i}",
+                    metadata={"key": f"config/service_{i}"},
+                    timestamp=event_time
+                )
+            else:
+                audit_manager.log_event(
+                    action="delete",
+                    resource_type="blackbox_target",
+                    resource_id=f"target_{i}",
+                    user="system",
+                    details=f"Removido target de monitoramento {i}",
+                    metadata={"reason": "deprecated"},
+                    timestamp=event_time
+                )
+
+    # Compactação periódica (retenção) + rollup opcional no KV
+    await audit_manager.start()
+    print(f">> Sistema de auditoria inicializado com {audit_manager.count()} eventos")
 
     # PASSO 2: Auto-migração de regras de categorização
     # Popula KV com regras padrão se não existirem (40+ regras)
@@ -560,12 +568,46 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(_prewarm_with_timeout())
     print(">> Background task de pré-aquecimento do cache iniciado (timeout: 60s)")
 
+    # PASSO 4: Réplica do catálogo via blocking queries (BACKGROUND TASK)
+    # Mantém snapshot versionado em memória - get_all_services_catalog() lê daqui
+    from core.catalog_replica import get_catalog_replica
+    catalog_replica = get_catalog_replica()
+    if Config.CATALOG_REPLICA_ENABLED:
+        await catalog_replica.start()
+        print(">> Réplica do catálogo Consul iniciada (blocking queries)")
+
+    # PASSO 4.5: Bundle de configuração do KV (metadata/ + regras) via blocking queries
+    # Sites, fields e regras lidos da memória; invalidados só quando a chave muda
+    from core.kv_bundle import get_kv_bundle
+    kv_bundle = get_kv_bundle()
+    if Config.KV_BUNDLE_ENABLED:
+        await kv_bundle.start()
+        print(">> Bundle de configuração do KV iniciado (blocking queries)")
+
+    # PASSO 5: Agregados incrementais do dashboard (watch de /health/state/any)
+    from core.dashboard_aggregates import get_dashboard_aggregates
+    dashboard_aggregates = get_dashboard_aggregates()
+    if Config.CATALOG_REPLICA_ENABLED and Config.DASHBOARD_AGGREGATES_ENABLED:
+        await dashboard_aggregates.start()
+        print(">> Agregados incrementais do dashboard iniciados")
+
+    # PASSO 6: Change feed (SSE/WebSocket) - watchers iniciados no primeiro assinante
+    from core.change_feed import get_change_feed
+    from api.monitoring_unified import catalog_categorizer
+    change_feed = get_change_feed()
+    change_feed.attach_categorizer(catalog_categorizer)
+
     yield
 
     # ============================================
     # SHUTDOWN - Finalização da Aplicação
     # ============================================
     print(">> Desligando Consul Manager API...")
+    await change_feed.stop()
+    await dashboard_aggregates.stop()
+    await kv_bundle.stop()
+    await catalog_replica.stop()
+    await audit_manager.stop()
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -621,6 +663,11 @@ else:
     )
     print(f">> CORS configurado com {len(allowed_origins)} origens permitidas (modo produção)")
 
+# Conditional GET: ETag + If-None-Match → 304 nas rotas de leitura com opt-in
+# (dependência conditional_get no include_router, com Cache-Control por router)
+app.add_middleware(ConditionalGetMiddleware)
+app.add_exception_handler(NotModified, not_modified_handler)
+
 # Importar WebSocket manager
 from core.websocket_manager import ws_manager
 
@@ -667,28 +714,39 @@ async def root():
 
 # Incluir routers
 app.include_router(services_router, prefix="/api/v1/services", tags=["Services"])
-app.include_router(nodes_router, prefix="/api/v1/nodes", tags=["Nodes"])
+app.include_router(nodes_router, prefix="/api/v1/nodes", tags=["Nodes"],
+                   default_response_class=CodecJSONResponse,
+                   dependencies=[Depends(conditional_get("private, no-cache"))])  # Revalidar via ETag/If-None-Match (304 barato)
 app.include_router(config_router, prefix="/api/v1/config", tags=["Config"])
 # NOTA: blackbox_router e presets_router removidos em SPEC-CLEANUP-001 v1.4.0
 # app.include_router(blackbox_router, prefix="/api/v1/blackbox", tags=["Blackbox"])
 # app.include_router(presets_router, prefix="/api/v1/presets", tags=["Service Presets"])
 app.include_router(kv_router, prefix="/api/v1/kv", tags=["Key-Value Store"])
-app.include_router(search_router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(search_router, prefix="/api/v1/search", tags=["Search"],
+                   default_response_class=CodecJSONResponse)  # Listas grandes: codec rápido (orjson/msgspec)
 app.include_router(consul_insights_router, prefix="/api/v1/consul", tags=["Consul Insights"])
 app.include_router(audit_router, prefix="/api/v1", tags=["Audit Logs"])
-app.include_router(dashboard_router, prefix="/api/v1", tags=["Dashboard"])
-app.include_router(optimized_router, prefix="/api/v1", tags=["Optimized Endpoints"])
+app.include_router(dashboard_router, prefix="/api/v1", tags=["Dashboard"],
+                   default_response_class=CodecJSONResponse,
+                   dependencies=[Depends(conditional_get("private, no-cache"))])
+app.include_router(optimized_router, prefix="/api/v1", tags=["Optimized Endpoints"],
+                   default_response_class=CodecJSONResponse)
 app.include_router(prometheus_config_router, prefix="/api/v1", tags=["Prometheus Config"])
-app.include_router(metadata_fields_router, prefix="/api/v1", tags=["Metadata Fields"])
+app.include_router(metadata_fields_router, prefix="/api/v1", tags=["Metadata Fields"],
+                   dependencies=[Depends(conditional_get("private, no-cache"))])  # Editável: sempre revalidar
 # app.include_router(metadata_dynamic_router, prefix="/api/v1", tags=["Dynamic Metadata"])  # REMOVIDO: Usar prometheus-config
-app.include_router(monitoring_types_dynamic_router, prefix="/api/v1", tags=["Monitoring Types"])  # Tipos extraídos DINAMICAMENTE de Prometheus.yml
-app.include_router(monitoring_unified_router, prefix="/api/v1", tags=["Monitoring Unified"])  # ⭐ NOVO: API unificada (v2.0 2025-11-13)
+app.include_router(monitoring_types_dynamic_router, prefix="/api/v1", tags=["Monitoring Types"],
+                   dependencies=[Depends(conditional_get("private, no-cache"))])  # Tipos extraídos DINAMICAMENTE de Prometheus.yml; editável (form-schema): sempre revalidar
+app.include_router(monitoring_unified_router, prefix="/api/v1", tags=["Monitoring Unified"],
+                   default_response_class=CodecJSONResponse,
+                   dependencies=[Depends(conditional_get("private, no-cache"))])  # ⭐ NOVO: API unificada (v2.0 2025-11-13)
 app.include_router(categorization_rules_router, prefix="/api/v1", tags=["Categorization Rules"])  # ⭐ NOVO: CRUD de regras (v2.0 2025-11-13)
 app.include_router(reference_values_router, prefix="/api/v1/reference-values", tags=["Reference Values"])  # NOVO: Auto-cadastro
 app.include_router(service_tags_router, prefix="/api/v1/service-tags", tags=["Service Tags"])  # NOVO: Tags retroalimentáveis
 app.include_router(settings_router, prefix="/api/v1", tags=["Settings"])  # NOVO: Configurações globais
 app.include_router(cache_router, prefix="/api/v1", tags=["Cache"])  # SPRINT 2: Cache management
 app.include_router(admin_router, prefix="/api/v1", tags=["Admin"])  # SPEC-PERF-001: Endpoints administrativos
+app.include_router(events_router, prefix="/api/v1", tags=["Events"])  # SSE/WebSocket: catalog:<categoria>, kv:*, rules
 
 # SPRINT 2 (2025-11-15): Prometheus metrics parsed para dashboard frontend
 from api.prometheus_metrics import router as prometheus_metrics_router
@@ -164,6 +164,16 @@ class SearchQuery:
 class AdvancedSearch:
     """Advanced search engine for Consul services and metadata"""
 
+    # Default fields for search_text
+    TEXT_SEARCH_FIELDS = [
+        "Meta.name",
+        "Meta.instance",
+        "Meta.company",
+        "Meta.project",
+        "service",
+        "id"
+    ]
+
     @staticmethod
     def search(
         items: List[Dict[str, Any]],
@@ -191,21 +201,10 @@ class AdvancedSearch:
             ]
             results = AdvancedSearch.search(services, conditions, "and")
         """
-        # Convert dictionaries to SearchCondition objects
-        search_conditions = [
-            SearchCondition(
-                field=c["field"],
-                operator=c["operator"],
-                value=c["value"]
-            )
-            for c in conditions
-        ]
+        # Compiled once per normalized query (same semantics as SearchQuery)
+        from core.search_plan import compile_query
 
-        # Create query
-        query = SearchQuery(search_conditions, logical_operator)
-
-        # Filter items
-        return [item for item in items if query.matches(item)]
+        return compile_query(conditions, logical_operator).execute(items)
 
     @staticmethod
     def extract_unique_values(
@@ -291,14 +290,7 @@ class AdvancedSearch:
             return items
 
         if fields is None:
-            fields = [
-                "Meta.name",
-                "Meta.instance",
-                "Meta.company",
-                "Meta.project",
-                "service",
-                "id"
-            ]
+            fields = AdvancedSearch.TEXT_SEARCH_FIELDS
 
         # Create OR condition for all fields
         conditions = [
@@ -1,23 +1,38 @@
 """
 Gerenciador de Auditoria
 Sistema simples de log de auditoria para rastrear operações no sistema
+
+Eventos persistidos no audit store local (SQLite WAL, core/audit_store.py):
+sobrevivem ao restart, consultas filtradas pelo índice e paginadas por cursor.
+Tarefa de manutenção (start/stop no lifespan): compactação periódica e
+rollup opcional no KV (skills/eye/audit/rollup/<instância>).
 """
+import asyncio
+import logging
+import random
 from datetime import datetime
-from typing import List, Dict, Optional
-from collections import deque
-import json
+from typing import Any, Callable, Dict, List, Optional
+
+from core.audit_store import AuditStore
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PREFIX = "skills/eye/audit/rollup/"
+
 
 class AuditManager:
     """Gerenciador de eventos de auditoria"""
 
-    def __init__(self, max_events: int = 1000):
+    def __init__(self, max_events: Optional[int] = None, store: Optional[AuditStore] = None):
         """
         Inicializa o gerenciador de auditoria
         Args:
-            max_events: Número máximo de eventos a manter em memória
+            max_events: Teto de eventos retidos (padrão: AUDIT_MAX_EVENTS)
+            store: Audit store (padrão: SQLite em AUDIT_DB_PATH)
         """
-        self.events: deque = deque(maxlen=max_events)
-        self._event_id_counter = 0
+        self.store = store or AuditStore(max_events=max_events)
+        self._tasks: List[asyncio.Task] = []
 
     def log_event(
         self,
@@ -26,7 +41,8 @@ class AuditManager:
         resource_id: str,
         user: str = "system",
         details: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        timestamp: Optional[str] = None
     ) -> Dict:
         """
         Registra um evento de auditoria
@@ -38,15 +54,13 @@ class AuditManager:
             user: Usuário que realizou a ação
             details: Detalhes adicionais da ação
             metadata: Metadados adicionais
+            timestamp: Momento do evento (ISO); padrão: agora
 
         Returns:
             Dict com o evento registrado
         """
-        self._event_id_counter += 1
-
         event = {
-            "id": self._event_id_counter,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": timestamp or datetime.utcnow().isoformat() + "Z",
             "action": action,
             "resource_type": resource_type,
             "resource_id": resource_id,
@@ -54,9 +68,16 @@ class AuditManager:
             "details": details or f"{action} on {resource_type}: {resource_id}",
             "metadata": metadata or {}
         }
+        return self.store.append(event)
+
+    def query_events(self, **filters: Any) -> Dict[str, Any]:
+        """
+        Eventos com filtros e paginação por cursor (ver AuditStore.query)
 
-        self.events.append(event)
-        return event
+        Returns:
+            {"events": [...], "total": int, "next_cursor": str|None}
+        """
+        return self.store.query(**filters)
 
     def get_events(
         self,
@@ -81,50 +102,28 @@ class AuditManager:
         Returns:
             Tupla (lista de eventos, total de eventos)
         """
-        # Converter deque para lista para facilitar filtros
-        all_events = list(self.events)
-
-        # Aplicar filtros
-        filtered_events = all_events
-
-        if resource_type:
-            filtered_events = [
-                e for e in filtered_events
-                if e.get("resource_type") == resource_type
-            ]
-
-        if action:
-            filtered_events = [
-                e for e in filtered_events
-                if e.get("action") == action
-            ]
-
-        if start_date:
-            filtered_events = [
-                e for e in filtered_events
-                if e.get("timestamp", "") >= start_date
-            ]
-
-        if end_date:
-            filtered_events = [
-                e for e in filtered_events
-                if e.get("timestamp", "") <= end_date
-            ]
-
-        # Ordenar por timestamp decrescente (mais recentes primeiro)
-        filtered_events.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-
-        total = len(filtered_events)
-
-        # Aplicar paginação
-        paginated_events = filtered_events[offset:offset + limit]
-
-        return paginated_events, total
+        result = self.store.query(
+            start_date=start_date,
+            end_date=end_date,
+            resource_type=resource_type,
+            action=action,
+            limit=limit,
+            offset=offset
+        )
+        return result["events"], result["total"]
+
+    @property
+    def last_event_id(self) -> int:
+        """Id do evento mais recente (0 sem eventos) - usado em ETags"""
+        return self.store.last_event_id
+
+    def count(self) -> int:
+        """Total de eventos retidos"""
+        return self.store.count()
 
     def clear_events(self):
         """Limpa todos os eventos de auditoria"""
-        self.events.clear()
-        self._event_id_counter = 0
+        self.store.clear()
 
     def get_statistics(self) -> Dict:
         """
@@ -133,31 +132,66 @@ class AuditManager:
         Returns:
             Dict com estatísticas
         """
-        all_events = list(self.events)
-
-        actions_count = {}
-        resource_types_count = {}
-        users_count = {}
-
-        for event in all_events:
-            action = event.get("action", "unknown")
-            resource_type = event.get("resource_type", "unknown")
-            user = event.get("user", "unknown")
-
-            actions_count[action] = actions_count.get(action, 0) + 1
-            resource_types_count[resource_type] = resource_types_count.get(resource_type, 0) + 1
-            users_count[user] = users_count.get(user, 0) + 1
-
-        return {
-            "total_events": len(all_events),
-            "by_action": actions_count,
-            "by_resource_type": resource_types_count,
-            "by_user": users_count
-        }
+        return self.store.statistics()
+
+    # =========================================================================
+    # MANUTENÇÃO (compactação + rollup no KV)
+    # =========================================================================
+
+    async def start(self) -> None:
+        """Inicia compactação periódica e, se habilitado, o rollup no KV"""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(
+            self._every(Config.AUDIT_COMPACT_INTERVAL, self.compact, "compactação")
+        ))
+        if Config.AUDIT_KV_ROLLUP_ENABLED:
+            self._tasks.append(asyncio.create_task(
+                self._every(Config.AUDIT_KV_ROLLUP_INTERVAL, self.publish_rollup, "rollup no KV")
+            ))
+
+    async def stop(self) -> None:
+        """Cancela a manutenção e fecha o banco"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.store.close()
+
+    async def _every(self, interval: float, job: Callable, name: str) -> None:
+        # Jitter inicial: instâncias reiniciadas juntas não publicam em sincronia
+        await asyncio.sleep(random.uniform(0, min(interval, 30.0)))
+        while True:
+            try:
+                await job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"[AUDIT] Falha na {name}: {exc}")
+            await asyncio.sleep(interval)
+
+    async def compact(self) -> Dict[str, int]:
+        """Retenção + compactação do store (fora do event loop)"""
+        return await asyncio.to_thread(self.store.compact)
+
+    async def publish_rollup(self) -> bool:
+        """Grava o resumo desta instância em skills/eye/audit/rollup/<instância>"""
+        from core.kv_manager import KVManager
+
+        rollup = await asyncio.to_thread(self.store.rollup)
+        return await KVManager().put_json(f"{ROLLUP_PREFIX}{rollup['instance']}", rollup)
+
+
+async def get_instance_rollups() -> Dict[str, Any]:
+    """Rollups publicados por todas as instâncias ({instância: resumo})"""
+    from core.kv_manager import KVManager
+
+    tree = await KVManager().get_tree(ROLLUP_PREFIX)
+    return {key[len(ROLLUP_PREFIX):]: value for key, value in tree.items() if isinstance(value, dict)}
 
 
 # Instância global do gerenciador de auditoria
-audit_manager = AuditManager(max_events=5000)
+audit_manager = AuditManager()
 
 
 # Funções auxiliares para facilitar o uso
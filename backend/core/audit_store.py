@@ -0,0 +1,342 @@
+"""
+Audit Store - Eventos de auditoria em SQLite local (append-only, WAL)
+
+RESPONSABILIDADES:
+- Persistir eventos de auditoria em um arquivo SQLite (AUDIT_DB_PATH) em modo
+  WAL: escrita = 1 INSERT, leitores não bloqueiam o escritor
+- Índices por timestamp, resource_type, action e resource_id: filtros e
+  ordenação resolvidos pelo índice, sem copiar/ordenar todos os eventos
+- Paginação por cursor (timestamp, id) estável mesmo com eventos novos
+  chegando; offset mantido por compatibilidade
+- Retenção por tempo (AUDIT_RETENTION_DAYS) e teto (AUDIT_MAX_EVENTS)
+  aplicados na compactação, em lotes, + checkpoint do WAL e vacuum incremental
+- Rollup (resumo + eventos recentes) para publicação no KV por instância
+
+ANTES: deque de 1000-5000 eventos em memória (perdidos no restart), cada
+       consulta copiava, filtrava e reordenava tudo; KVManager gravava 1 chave
+       por evento e baixava a árvore inteira de skills/eye/audit por consulta
+AGORA: eventos persistidos localmente; consultas O(página) pelo índice
+"""
+
+import base64
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import json_codec
+from core.config import Config
+from core.metrics import audit_events_deleted, audit_query_duration
+
+logger = logging.getLogger(__name__)
+
+# Linhas removidas por DELETE na compactação (lock liberado entre lotes)
+COMPACT_BATCH = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    action TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    details TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts, id);
+CREATE INDEX IF NOT EXISTS idx_events_resource_type ON events (resource_type, ts, id);
+CREATE INDEX IF NOT EXISTS idx_events_action ON events (action, ts, id);
+CREATE INDEX IF NOT EXISTS idx_events_resource_id ON events (resource_id, ts, id);
+"""
+
+_COLUMNS = "id, ts, action, resource_type, resource_id, user, details, metadata"
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado"""
+
+
+def encode_cursor(timestamp: str, event_id: int) -> str:
+    return base64.urlsafe_b64encode(json_codec.dumps([timestamp, event_id])).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, event_id = json_codec.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), int(event_id)
+    except Exception as exc:
+        raise InvalidCursorError(f"cursor inválido: {cursor!r}") from exc
+
+
+def _row_to_event(row: Tuple) -> Dict[str, Any]:
+    event_id, ts, action, resource_type, resource_id, user, details, metadata = row
+    return {
+        "id": event_id,
+        "timestamp": ts,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "user": user,
+        "details": details,
+        "metadata": json_codec.loads(metadata) if metadata else {},
+    }
+
+
+class AuditStore:
+    """Eventos de auditoria em SQLite (uma conexão, serializada por lock)"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        retention_days: Optional[int] = None,
+        max_events: Optional[int] = None,
+    ):
+        self.path = path or Config.AUDIT_DB_PATH
+        self.retention_days = Config.AUDIT_RETENTION_DAYS if retention_days is None else retention_days
+        self.max_events = Config.AUDIT_MAX_EVENTS if max_events is None else max_events
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # =========================================================================
+    # CONEXÃO
+    # =========================================================================
+
+    def _connection(self) -> sqlite3.Connection:
+        """Abre o banco na primeira utilização (imports não criam arquivos)"""
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            # auto_vacuum só vale se definido antes da criação das tabelas
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            logger.info(f"[AUDIT STORE] Banco aberto: {self.path}")
+        return self._conn
+
+    def _execute(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # =========================================================================
+    # ESCRITA
+    # =========================================================================
+
+    def append(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Grava o evento (append-only) e devolve-o com o id atribuído.
+
+        Args:
+            event: timestamp, action, resource_type, resource_id, user, details, metadata
+        """
+        metadata = event.get("metadata") or {}
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO events (ts, action, resource_type, resource_id, user, details, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    event["timestamp"],
+                    event["action"],
+                    event["resource_type"],
+                    str(event["resource_id"]),
+                    event.get("user") or "system",
+                    event.get("details"),
+                    json_codec.dumps(metadata).decode("utf-8") if metadata else None,
+                ),
+            )
+            event_id = cursor.lastrowid
+        return {**event, "id": event_id}
+
+    def clear(self) -> None:
+        """Remove todos os eventos e reinicia a numeração dos ids"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM events")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'events'")
+            conn.execute("PRAGMA incremental_vacuum")
+
+    # =========================================================================
+    # CONSULTA
+    # =========================================================================
+
+    @staticmethod
+    def _filters(
+        start_date: Optional[str],
+        end_date: Optional[str],
+        resource_type: Optional[str],
+        action: Optional[str],
+        resource_id: Optional[str],
+        user: Optional[str],
+    ) -> Tuple[List[str], List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (
+            ("resource_type", resource_type),
+            ("action", action),
+            ("resource_id", resource_id),
+            ("user", user),
+        ):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_date:
+            clauses.append("ts >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("ts <= ?")
+            params.append(end_date)
+        return clauses, params
+
+    def query(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        action: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        user: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Eventos filtrados, mais recentes primeiro.
+
+        Args:
+            cursor: next_cursor da página anterior (ignora offset)
+            include_total: Conta o total de eventos do filtro (COUNT extra)
+
+        Returns:
+            {"events": [...], "total": int|None, "next_cursor": str|None}
+
+        Raises:
+            InvalidCursorError: Cursor malformado
+        """
+        start = time.perf_counter()
+        clauses, params = self._filters(start_date, end_date, resource_type, action, resource_id, user)
+
+        total = None
+        if include_total:
+            where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            total = self._execute(f"SELECT COUNT(*) FROM events{where}", tuple(params))[0][0]
+
+        page_clauses, page_params = list(clauses), list(params)
+        if cursor:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+            page_clauses.append("(ts < ? OR (ts = ? AND id < ?))")
+            page_params += [cursor_ts, cursor_ts, cursor_id]
+            offset = 0
+        where = f" WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        rows = self._execute(
+            f"SELECT {_COLUMNS} FROM events{where} ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?",
+            tuple(page_params) + (limit + 1, offset),
+        )
+
+        events = [_row_to_event(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit and events:
+            next_cursor = encode_cursor(events[-1]["timestamp"], events[-1]["id"])
+        audit_query_duration.observe(time.perf_counter() - start)
+        return {"events": events, "total": total, "next_cursor": next_cursor}
+
+    def count(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM events")[0][0]
+
+    @property
+    def last_event_id(self) -> int:
+        """Maior id já atribuído (0 sem eventos) - muda a cada evento novo"""
+        return self._execute("SELECT COALESCE(MAX(id), 0) FROM events")[0][0]
+
+    def statistics(self) -> Dict[str, Any]:
+        """Contagens por ação, tipo de recurso e usuário (GROUP BY no SQLite)"""
+        def grouped(column: str) -> Dict[str, int]:
+            rows = self._execute(f"SELECT {column}, COUNT(*) FROM events GROUP BY {column}")
+            return {value: count for value, count in rows}
+
+        return {
+            "total_events": self.count(),
+            "by_action": grouped("action"),
+            "by_resource_type": grouped("resource_type"),
+            "by_user": grouped("user"),
+        }
+
+    # =========================================================================
+    # RETENÇÃO / COMPACTAÇÃO
+    # =========================================================================
+
+    def _delete_batches(self, select_ids: str, params: Tuple) -> int:
+        deleted = 0
+        while True:
+            with self._lock:
+                cursor = self._connection().execute(
+                    f"DELETE FROM events WHERE id IN ({select_ids} LIMIT {COMPACT_BATCH})", params
+                )
+            deleted += cursor.rowcount
+            if cursor.rowcount < COMPACT_BATCH:
+                return deleted
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Aplica retenção e teto de eventos, em lotes (escritores não esperam a
+        compactação inteira), e devolve o espaço ao sistema de arquivos.
+
+        Returns:
+            {"retention": removidos por idade, "overflow": removidos pelo teto}
+        """
+        result = {"retention": 0, "overflow": 0}
+        if self.retention_days > 0:
+            cutoff = ((now or datetime.utcnow()) - timedelta(days=self.retention_days)).isoformat()
+            result["retention"] = self._delete_batches("SELECT id FROM events WHERE ts < ?", (cutoff,))
+
+        excess = self.count() - self.max_events if self.max_events > 0 else 0
+        while excess > 0:
+            batch = min(excess, COMPACT_BATCH)
+            with self._lock:
+                cursor = self._connection().execute(
+                    "DELETE FROM events WHERE id IN (SELECT id FROM events ORDER BY ts, id LIMIT ?)", (batch,)
+                )
+            result["overflow"] += cursor.rowcount
+            excess -= batch
+
+        for reason, deleted in result.items():
+            if deleted:
+                audit_events_deleted.labels(reason=reason).inc(deleted)
+        if any(result.values()):
+            with self._lock:
+                conn = self._connection()
+                conn.execute("PRAGMA incremental_vacuum")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(
+                f"[AUDIT STORE] Compactação: {result['retention']} eventos expirados, "
+                f"{result['overflow']} acima do teto"
+            )
+        return result
+
+    # =========================================================================
+    # ROLLUP
+    # =========================================================================
+
+    def rollup(self, recent: Optional[int] = None) -> Dict[str, Any]:
+        """Resumo desta instância para publicação no KV (uma chave por instância)"""
+        recent = Config.AUDIT_KV_ROLLUP_RECENT if recent is None else recent
+        return {
+            "instance": Config.AUDIT_INSTANCE_ID or socket.gethostname(),
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "last_event_id": self.last_event_id,
+            **self.statistics(),
+            "recent": self.query(limit=recent, include_total=False)["events"],
+        }
@@ -6,7 +6,7 @@ SPRINT 2 (2025-11-15)
 OBJETIVO: Reduzir latência de 1289ms → ~10ms (128x mais rápido!)
 
 ESTRATÉGIA:
-- Cache local em memória (dict + asyncio.Lock)
+- Cache local em memória (OrderedDict + asyncio.Lock para escritas)
 - TTL padrão: 60 segundos
 - Thread-safe para concorrência
 - Invalidação manual via endpoint
@@ -15,50 +15,275 @@ ESTRATÉGIA:
 IMPORTANTE: Este é um cache LOCAL de aplicação, diferente do Agent Caching
 do Consul (que tem TTL de 3 dias). Este cache visa reduzir chamadas repetidas
 em janelas curtas de tempo.
+
+SINGLE-FLIGHT + STALE-WHILE-REVALIDATE (get_or_compute):
+- Apenas 1 loader por chave executa por vez; demais chamadores aguardam o mesmo resultado
+- Dentro da janela stale_ttl, o valor antigo é servido enquanto um refresh roda em background
+- Evita "dogpile" quando uma chave quente expira (N requisições → 1 fan-out ao Consul)
+- Tempo de refresh registrado por chave (get_refresh_stats)
+
+CACHE LIMITADO (memória com teto rígido):
+- Máximo de entradas (CACHE_MAX_ENTRIES) e orçamento estimado em bytes (CACHE_MAX_MEMORY_MB)
+- Eviction LRU (padrão) ou LFU aproximado por amostragem (CACHE_EVICTION_POLICY)
+- Expiração via heap de deadlines: varredura O(log n) por entrada expirada,
+  sem percorrer o cache inteiro
+- Leituras sem lock (event loop único: nenhuma leitura tem ponto de await)
+- Índice de prefixos ("a:", "a:b:") para invalidate_pattern sem varrer todas as chaves
 """
 import asyncio
+import heapq
+import itertools
 import logging
+import re
+import sys
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from core.config import Config
+from core.metrics import cache_evictions_total, cache_memory_bytes
 
 logger = logging.getLogger(__name__)
 
+# Limites do estimador de tamanho (amostragem em coleções grandes)
+_SIZE_SAMPLE_ITEMS = 32
+_SIZE_MAX_DEPTH = 6
+# Quantidade de candidatos amostrados no LFU aproximado (mesma ideia do Redis)
+_LFU_SAMPLE_SIZE = 5
+
+EVICTION_REASONS = ("expired", "capacity", "memory", "oversize")
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estima o tamanho em bytes de um valor (aproximação barata).
+
+    Coleções grandes são amostradas (_SIZE_SAMPLE_ITEMS itens) e o resultado
+    é extrapolado pelo tamanho total, mantendo custo O(1) por entrada.
+
+    Args:
+        value: Valor a medir
+
+    Returns:
+        Tamanho estimado em bytes
+    """
+    size = sys.getsizeof(value)
+    if _depth >= _SIZE_MAX_DEPTH:
+        return size
+
+    if isinstance(value, dict):
+        total = len(value)
+        if not total:
+            return size
+        sampled = 0
+        items_size = 0
+        for k, v in itertools.islice(value.items(), _SIZE_SAMPLE_ITEMS):
+            items_size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            sampled += 1
+        return size + items_size * total // sampled
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        total = len(value)
+        if not total:
+            return size
+        sampled = 0
+        items_size = 0
+        for item in itertools.islice(value, _SIZE_SAMPLE_ITEMS):
+            items_size += estimate_size(item, _depth + 1)
+            sampled += 1
+        return size + items_size * total // sampled
+
+    return size
+
+
+class _CacheEntry:
+    """Entrada do cache (tempos em time.monotonic())"""
+
+    __slots__ = (
+        "value", "ttl", "stale_ttl", "created_at", "created_wall",
+        "expires_at", "stale_until", "size", "hits",
+    )
+
+    def __init__(self, value: Any, ttl: int, stale_ttl: int, size: int):
+        now = time.monotonic()
+        self.value = value
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.created_at = now
+        self.created_wall = datetime.utcnow()
+        self.expires_at = now + ttl
+        self.stale_until = self.expires_at + stale_ttl
+        self.size = size
+        self.hits = 0
+
 
 class LocalCache:
     """
-    Cache local em memória com TTL configurável.
+    Cache local em memória com TTL configurável e limites de entradas/bytes.
 
-    Thread-safe usando asyncio.Lock.
-    Armazena tupla: (value, timestamp, ttl)
+    Leituras são lock-free; escritas usam asyncio.Lock.
+    Armazena _CacheEntry em OrderedDict (ordem = recência de acesso, para LRU).
     """
 
-    def __init__(self, default_ttl_seconds: int = 60):
+    def __init__(
+        self,
+        default_ttl_seconds: int = 60,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        eviction_policy: Optional[str] = None
+    ):
         """
         Inicializa cache local.
 
         Args:
             default_ttl_seconds: TTL padrão em segundos (padrão: 60s)
+            max_entries: Máximo de entradas (None = Config.CACHE_MAX_ENTRIES)
+            max_bytes: Orçamento estimado em bytes (None = Config.CACHE_MAX_MEMORY_MB)
+            eviction_policy: "lru" ou "lfu" (None = Config.CACHE_EVICTION_POLICY)
         """
-        self._cache: Dict[str, Tuple[Any, datetime, int]] = {}
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
         self._lock = asyncio.Lock()
         self.default_ttl = default_ttl_seconds
 
+        self.max_entries = max_entries if max_entries is not None else Config.CACHE_MAX_ENTRIES
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else Config.CACHE_MAX_MEMORY_MB * 1024 * 1024
+        )
+        self.eviction_policy = (eviction_policy or Config.CACHE_EVICTION_POLICY).lower()
+        if self.eviction_policy not in ("lru", "lfu"):
+            raise ValueError(f"Política de eviction inválida: {self.eviction_policy}")
+
+        # Bytes estimados de todas as entradas
+        self._bytes = 0
+        # Heap de expiração: (stale_until, seq, key, entry) - entradas obsoletas são ignoradas
+        self._expiry_heap: List[Tuple[float, int, str, _CacheEntry]] = []
+        self._expiry_seq = itertools.count()
+        # Índice de prefixos: "monitoring:" / "monitoring:data:" → chaves
+        self._prefix_index: Dict[str, Set[str]] = {}
+
+        # SINGLE-FLIGHT: Loader em execução por chave (todos os chamadores aguardam a mesma task)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Geração do loader em execução por chave: invalidação durante o load descarta
+        # a geração, e o resultado (lido ANTES da escrita) não é armazenado
+        self._load_generations: Dict[str, int] = {}
+        self._generation_seq = itertools.count(1)
+        # Referências fortes para refreshes em background (evita coleta pelo GC)
+        self._background_tasks: set = set()
+        # Tempo de refresh por chave (count, last_ms, avg_ms, max_ms, errors, ...)
+        self._refresh_stats: Dict[str, Dict[str, Any]] = {}
+
         # Estatísticas
         self._stats = {
             "hits": 0,
             "misses": 0,
             "evictions": 0,
             "invalidations": 0,
+            "stale_hits": 0,
+            "coalesced_waits": 0,
+            "background_refreshes": 0,
         }
+        self._evictions_by_reason = {reason: 0 for reason in EVICTION_REASONS}
 
         logger.info(
-            f"✅ LocalCache inicializado com TTL padrão: {default_ttl_seconds}s"
+            f"✅ LocalCache inicializado com TTL padrão: {default_ttl_seconds}s "
+            f"(max_entries={self.max_entries}, max_bytes={self.max_bytes}, "
+            f"policy={self.eviction_policy})"
         )
 
+    # ------------------------------------------------------------------
+    # Estrutura interna (chamadas síncronas, sem await)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key_prefixes(key: str) -> List[str]:
+        """Retorna os prefixos indexáveis de uma chave ("a:b:c" → ["a:", "a:b:"])"""
+        return [key[:i + 1] for i, char in enumerate(key) if char == ":"]
+
+    def _store(self, key: str, entry: _CacheEntry) -> None:
+        """Insere/substitui entrada, atualiza índices e aplica limites"""
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        else:
+            for prefix in self._key_prefixes(key):
+                self._prefix_index.setdefault(prefix, set()).add(key)
+
+        self._cache[key] = entry
+        self._bytes += entry.size
+        heapq.heappush(self._expiry_heap, (entry.stale_until, next(self._expiry_seq), key, entry))
+
+        self._purge_expired(time.monotonic())
+        self._enforce_limits(protect=key)
+        cache_memory_bytes.set(self._bytes)
+
+    def _remove(self, key: str, reason: Optional[str] = None) -> Optional[_CacheEntry]:
+        """Remove entrada e atualiza índices (reason != None conta como eviction)"""
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return None
+
+        self._bytes -= entry.size
+        for prefix in self._key_prefixes(key):
+            bucket = self._prefix_index.get(prefix)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._prefix_index[prefix]
+
+        if reason is not None:
+            self._stats["evictions"] += 1
+            self._evictions_by_reason[reason] += 1
+            cache_evictions_total.labels(reason=reason).inc()
+        return entry
+
+    def _purge_expired(self, now: float) -> int:
+        """Remove entradas cuja janela stale terminou (topo do heap, O(log n) cada)"""
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, _, key, entry = heapq.heappop(heap)
+            # Entrada substituída/removida depois de entrar no heap → ignorar
+            if self._cache.get(key) is entry:
+                self._remove(key, reason="expired")
+                removed += 1
+
+        # Compactar heap se acumulou muitas referências obsoletas
+        if len(heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [item for item in heap if self._cache.get(item[2]) is item[3]]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    def _select_victim(self, protect: Optional[str]) -> Optional[str]:
+        """Escolhe chave a remover (LRU: menos recente; LFU: menor hits entre amostras LRU)"""
+        candidates = [k for k in itertools.islice(self._cache, _LFU_SAMPLE_SIZE + 1) if k != protect]
+        if not candidates:
+            return None
+        if self.eviction_policy == "lru":
+            return candidates[0]
+        return min(candidates[:_LFU_SAMPLE_SIZE], key=lambda k: self._cache[k].hits)
+
+    def _enforce_limits(self, protect: Optional[str] = None) -> None:
+        """Aplica max_entries e max_bytes removendo vítimas da política configurada"""
+        while len(self._cache) > self.max_entries:
+            victim = self._select_victim(protect)
+            if victim is None:
+                break
+            self._remove(victim, reason="capacity")
+
+        while self._bytes > self.max_bytes:
+            victim = self._select_victim(protect)
+            if victim is None:
+                break
+            self._remove(victim, reason="memory")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
     async def get(self, key: str) -> Optional[Any]:
         """
-        Busca valor do cache.
+        Busca valor do cache (lock-free).
 
         Args:
             key: Chave do cache
@@ -66,52 +291,248 @@ class LocalCache:
         Returns:
             Valor armazenado ou None se expirado/inexistente
         """
-        async with self._lock:
-            if key not in self._cache:
-                self._stats["misses"] += 1
-                logger.debug(f"[CACHE] ❌ MISS: {key}")
-                return None
-
-            value, timestamp, ttl = self._cache[key]
-            age = (datetime.utcnow() - timestamp).total_seconds()
-
-            # Verificar se expirou
-            if age > ttl:
-                # Remover entrada expirada
-                del self._cache[key]
-                self._stats["evictions"] += 1
-                self._stats["misses"] += 1
-                logger.debug(
-                    f"[CACHE] ⏰ EXPIRED: {key} (age: {age:.1f}s > TTL: {ttl}s)"
-                )
-                return None
-
-            # Cache hit!
-            self._stats["hits"] += 1
+        entry = self._cache.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            logger.debug(f"[CACHE] ❌ MISS: {key}")
+            return None
+
+        now = time.monotonic()
+        age = now - entry.created_at
+
+        # Verificar se expirou
+        if now > entry.expires_at:
+            # Remover entrada expirada (mantém se ainda estiver na janela stale)
+            if now > entry.stale_until:
+                self._remove(key, reason="expired")
+            self._stats["misses"] += 1
             logger.debug(
-                f"[CACHE] ✅ HIT: {key} (age: {age:.1f}s, TTL: {ttl}s restantes: {ttl - age:.1f}s)"
+                f"[CACHE] ⏰ EXPIRED: {key} (age: {age:.1f}s > TTL: {entry.ttl}s)"
             )
-            return value
-
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+            return None
+
+        # Cache hit!
+        entry.hits += 1
+        self._cache.move_to_end(key)
+        self._stats["hits"] += 1
+        logger.debug(
+            f"[CACHE] ✅ HIT: {key} (age: {age:.1f}s, TTL: {entry.ttl}s restantes: {entry.ttl - age:.1f}s)"
+        )
+        return entry.value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: int = 0
+    ) -> None:
         """
         Armazena valor no cache.
 
+        Valores maiores que o orçamento total de bytes não são armazenados.
+
         Args:
             key: Chave do cache
             value: Valor a armazenar (qualquer tipo serializável)
             ttl: TTL customizado em segundos (None = usar default)
+            stale_ttl: Janela extra (segundos) em que o valor pode ser servido
+                       stale por get_or_compute() enquanto é revalidado
         """
         used_ttl = ttl if ttl is not None else self.default_ttl
+        # Estimar fora do lock (pode percorrer amostras do valor)
+        size = estimate_size(value) + sys.getsizeof(key)
 
         async with self._lock:
-            self._cache[key] = (value, datetime.utcnow(), used_ttl)
-            logger.debug(f"[CACHE] 💾 SET: {key} (TTL: {used_ttl}s)")
+            if size > self.max_bytes:
+                # Entrada sozinha excede o orçamento: não armazenar (e descartar versão antiga)
+                self._remove(key)
+                self._evictions_by_reason["oversize"] += 1
+                cache_evictions_total.labels(reason="oversize").inc()
+                logger.warning(
+                    f"[CACHE] ⚠️  OVERSIZE: {key} (~{size} bytes > orçamento {self.max_bytes} bytes), não armazenado"
+                )
+                return
+
+            self._store(key, _CacheEntry(value, used_ttl, stale_ttl, size))
+            logger.debug(f"[CACHE] 💾 SET: {key} (TTL: {used_ttl}s, stale: {stale_ttl}s, ~{size} bytes)")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        stale_ttl: int = 0,
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Retorna valor do cache ou executa o loader (single-flight + stale-while-revalidate).
+
+        COMPORTAMENTO:
+        - Fresco (age <= ttl): retorna imediatamente
+        - Stale (ttl < age <= ttl + stale_ttl): retorna valor antigo e dispara
+          refresh em background (no máximo 1 por chave)
+        - Ausente/expirado: 1 único loader executa; chamadores concorrentes
+          aguardam o MESMO resultado (ou a mesma exceção)
+
+        Args:
+            key: Chave do cache
+            loader: Corrotina sem argumentos que produz o valor
+            ttl: TTL em segundos (None = usar default)
+            stale_ttl: Janela stale em segundos (0 = desabilitado)
+            should_cache: Predicado opcional; se retornar False o valor não é
+                          armazenado (ex: não cachear lista vazia)
+
+        Returns:
+            Valor do cache ou do loader
+        """
+        used_ttl = ttl if ttl is not None else self.default_ttl
+
+        # Sem await entre a verificação e o registro do loader: atômico no event loop
+        entry = self._cache.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            age = now - entry.created_at
+
+            if now <= entry.expires_at:
+                entry.hits += 1
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                logger.debug(f"[CACHE] ✅ HIT: {key} (age: {age:.1f}s)")
+                return entry.value
+
+            if now <= entry.stale_until:
+                # STALE-WHILE-REVALIDATE: servir valor antigo + refresh em background
+                self._stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._stats["background_refreshes"] += 1
+                    self._start_loader(key, loader, used_ttl, stale_ttl, should_cache)
+                logger.debug(f"[CACHE] ♻️  STALE: {key} (age: {age:.1f}s, revalidando)")
+                return entry.value
+
+            self._remove(key, reason="expired")
+
+        self._stats["misses"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced_waits"] += 1
+            logger.debug(f"[CACHE] ⏳ WAIT: {key} (loader já em execução)")
+        else:
+            task = self._start_loader(key, loader, used_ttl, stale_ttl, should_cache)
+
+        # shield: cancelamento de UM chamador não cancela o loader compartilhado
+        return await asyncio.shield(task)
+
+    def _start_loader(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        should_cache: Optional[Callable[[Any], bool]]
+    ) -> asyncio.Task:
+        """Cria a task do loader e registra como in-flight (chamada síncrona, sem await)"""
+        generation = next(self._generation_seq)
+        task = asyncio.create_task(
+            self._run_loader(key, loader, ttl, stale_ttl, should_cache, generation)
+        )
+        self._inflight[key] = task
+        self._load_generations[key] = generation
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        # Exceção é propagada aos chamadores; evita warning "exception never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _run_loader(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        should_cache: Optional[Callable[[Any], bool]],
+        generation: int
+    ) -> Any:
+        """Executa o loader, mede o tempo e armazena o resultado (se não invalidado)"""
+        start = time.perf_counter()
+        try:
+            value = await loader()
+        except Exception:
+            self._record_refresh(key, (time.perf_counter() - start) * 1000, error=True)
+            raise
+        finally:
+            current = self._load_generations.get(key) == generation
+            if current:
+                self._inflight.pop(key, None)
+                self._load_generations.pop(key, None)
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        self._record_refresh(key, duration_ms)
+
+        if not current:
+            # Chave invalidada durante o load: valor pode ser anterior à escrita
+            logger.debug(f"[CACHE] ⏭️  SKIP SET: {key} (invalidada durante o load)")
+        elif should_cache is None or should_cache(value):
+            await self.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+        else:
+            logger.debug(f"[CACHE] ⏭️  SKIP SET: {key} (should_cache=False)")
+
+        logger.debug(f"[CACHE] 🔄 REFRESH: {key} em {duration_ms:.1f}ms")
+        return value
+
+    def _record_refresh(self, key: str, duration_ms: float, error: bool = False) -> None:
+        """Atualiza estatísticas de tempo de refresh da chave (limitado a max_entries chaves)"""
+        if key not in self._refresh_stats and len(self._refresh_stats) >= self.max_entries:
+            # Descartar a chave registrada há mais tempo (ordem de inserção)
+            self._refresh_stats.pop(next(iter(self._refresh_stats)))
+        stats = self._refresh_stats.setdefault(key, {
+            "count": 0,
+            "errors": 0,
+            "last_ms": 0.0,
+            "avg_ms": 0.0,
+            "max_ms": 0.0,
+            "last_refresh_at": None,
+        })
+        if error:
+            stats["errors"] += 1
+            return
+
+        stats["count"] += 1
+        stats["last_ms"] = round(duration_ms, 2)
+        stats["max_ms"] = round(max(stats["max_ms"], duration_ms), 2)
+        stats["avg_ms"] = round(
+            stats["avg_ms"] + (duration_ms - stats["avg_ms"]) / stats["count"], 2
+        )
+        stats["last_refresh_at"] = datetime.utcnow().isoformat()
+
+    def get_refresh_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna tempo de refresh por chave (apenas chaves carregadas via get_or_compute).
+
+        Returns:
+            Dict {key: {count, errors, last_ms, avg_ms, max_ms, last_refresh_at, in_flight}}
+        """
+        return {
+            key: {**stats, "in_flight": key in self._inflight}
+            for key, stats in self._refresh_stats.items()
+        }
+
+    def _discard_load(self, key: str) -> None:
+        """
+        Descarta o loader em execução da chave (chamada síncrona, sem await).
+
+        O loader continua (chamadores que já aguardam recebem o valor), mas não
+        armazena o resultado; novos chamadores iniciam um load novo.
+        """
+        if self._load_generations.pop(key, None) is not None:
+            self._inflight.pop(key, None)
 
     async def invalidate(self, key: str) -> bool:
         """
         Remove uma chave do cache manualmente.
 
+        Um load em execução para a chave é descartado (não sobrescreve a invalidação).
+
         Args:
             key: Chave a remover
 
@@ -119,17 +540,33 @@ class LocalCache:
             True se removido, False se não existia
         """
         async with self._lock:
-            if key in self._cache:
-                del self._cache[key]
+            self._discard_load(key)
+            if self._remove(key) is not None:
                 self._stats["invalidations"] += 1
                 logger.info(f"[CACHE] 🗑️  INVALIDATED: {key}")
                 return True
             return False
 
+    def invalidate_nowait(self, key: str) -> bool:
+        """
+        Versão síncrona de invalidate() para ganchos sem await (ex.: escrita no KV).
+
+        Sem await entre as operações: atômica no event loop.
+        """
+        self._discard_load(key)
+        if self._remove(key) is None:
+            return False
+        self._stats["invalidations"] += 1
+        logger.info(f"[CACHE] 🗑️  INVALIDATED: {key}")
+        return True
+
     async def invalidate_pattern(self, pattern: str) -> int:
         """
         Remove todas as chaves que correspondem a um padrão.
 
+        Usa o índice de prefixos: apenas chaves sob o prefixo literal do padrão
+        (até o último ":" antes do primeiro "*") são comparadas.
+
         Args:
             pattern: Padrão de busca (ex: "services:*")
 
@@ -138,19 +575,46 @@ class LocalCache:
         """
         count = 0
         async with self._lock:
+            for key in [k for k in self._load_generations if self._matches_pattern(k, pattern)]:
+                self._discard_load(key)
             keys_to_remove = [
-                k for k in self._cache.keys() if self._matches_pattern(k, pattern)
+                k for k in self._candidate_keys(pattern) if self._matches_pattern(k, pattern)
             ]
             for key in keys_to_remove:
-                del self._cache[key]
+                self._remove(key)
                 count += 1
                 self._stats["invalidations"] += 1
 
         if count > 0:
+            cache_memory_bytes.set(self._bytes)
             logger.info(f"[CACHE] 🗑️  INVALIDATED {count} keys matching '{pattern}'")
 
         return count
 
+    def _candidate_keys(self, pattern: str) -> List[str]:
+        """Retorna chaves candidatas para um padrão usando o índice de prefixos"""
+        if "*" not in pattern:
+            return [pattern] if pattern in self._cache else []
+
+        literal = pattern[:pattern.index("*")]
+        prefix = literal[:literal.rfind(":") + 1]
+        if not prefix:
+            # Padrão sem prefixo com namespace (ex: "*:cache") → varredura completa
+            return list(self._cache.keys())
+        return list(self._prefix_index.get(prefix, ()))
+
+    async def purge_expired(self) -> int:
+        """
+        Remove todas as entradas com janela stale encerrada.
+
+        Returns:
+            Número de entradas removidas
+        """
+        async with self._lock:
+            removed = self._purge_expired(time.monotonic())
+            cache_memory_bytes.set(self._bytes)
+            return removed
+
     async def clear(self) -> int:
         """
         Limpa TODO o cache.
@@ -160,7 +624,13 @@ class LocalCache:
         """
         async with self._lock:
             count = len(self._cache)
+            for key in list(self._load_generations):
+                self._discard_load(key)
             self._cache.clear()
+            self._prefix_index.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+            cache_memory_bytes.set(0)
             self._stats["invalidations"] += count
             logger.warning(f"[CACHE] 🗑️  CLEARED all cache ({count} entries)")
             return count
@@ -170,9 +640,10 @@ class LocalCache:
         Retorna estatísticas do cache.
 
         Returns:
-            Dict com hits, misses, evictions, invalidations, hit_rate, size
+            Dict com hits, misses, evictions, invalidations, hit_rate, size, bytes
         """
         async with self._lock:
+            self._purge_expired(time.monotonic())
             total_requests = self._stats["hits"] + self._stats["misses"]
             hit_rate = (
                 (self._stats["hits"] / total_requests * 100) if total_requests > 0 else 0
@@ -187,6 +658,16 @@ class LocalCache:
                 "total_requests": total_requests,
                 "current_size": len(self._cache),
                 "ttl_seconds": self.default_ttl,
+                "stale_hits": self._stats["stale_hits"],
+                "coalesced_waits": self._stats["coalesced_waits"],
+                "background_refreshes": self._stats["background_refreshes"],
+                "in_flight": len(self._inflight),
+                "refresh_timings": self.get_refresh_stats(),
+                "current_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "eviction_policy": self.eviction_policy,
+                "evictions_by_reason": dict(self._evictions_by_reason),
             }
 
     async def get_keys(self) -> list[str]:
@@ -210,21 +691,24 @@ class LocalCache:
             Dict com informações ou None se não existir
         """
         async with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
                 return None
 
-            value, timestamp, ttl = self._cache[key]
-            age = (datetime.utcnow() - timestamp).total_seconds()
+            now = time.monotonic()
+            age = now - entry.created_at
 
             return {
                 "key": key,
                 "age_seconds": round(age, 2),
-                "ttl_seconds": ttl,
-                "remaining_seconds": round(max(0, ttl - age), 2),
-                "is_expired": age > ttl,
-                "timestamp": timestamp.isoformat(),
-                "value_type": type(value).__name__,
-                "value_size_bytes": len(str(value).encode('utf-8')),
+                "ttl_seconds": entry.ttl,
+                "stale_ttl_seconds": entry.stale_ttl,
+                "remaining_seconds": round(max(0, entry.expires_at - now), 2),
+                "is_expired": now > entry.expires_at,
+                "timestamp": entry.created_wall.isoformat(),
+                "value_type": type(entry.value).__name__,
+                "value_size_bytes": entry.size,
+                "hits": entry.hits,
             }
 
     def _matches_pattern(self, key: str, pattern: str) -> bool:
@@ -241,10 +725,21 @@ class LocalCache:
         if "*" not in pattern:
             return key == pattern
 
-        # Converter padrão para regex simples
-        import re
-        regex_pattern = pattern.replace("*", ".*")
-        return bool(re.match(f"^{regex_pattern}$", key))
+        return bool(_compile_pattern(pattern).match(key))
+
+
+_pattern_cache: Dict[str, "re.Pattern[str]"] = {}
+
+
+def _compile_pattern(pattern: str) -> "re.Pattern[str]":
+    """Compila padrão com wildcard (*) em regex ancorada (memoizado)"""
+    compiled = _pattern_cache.get(pattern)
+    if compiled is None:
+        if len(_pattern_cache) >= 256:
+            _pattern_cache.clear()
+        regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+        compiled = _pattern_cache[pattern] = re.compile(f"^{regex}$", re.DOTALL)
+    return compiled
 
 
 # Instância global do cache (singleton)
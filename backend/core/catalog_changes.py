@@ -0,0 +1,188 @@
+"""
+Change Log do Catálogo Categorizado - Deltas por versão e categoria
+
+RESPONSABILIDADES:
+- A cada nova versão do CatalogCategorizer, registrar por categoria as
+  linhas adicionadas, removidas e modificadas em relação à versão anterior
+- Responder "o que mudou na categoria X desde a versão S" compondo os
+  deltas S+1..atual (GET /monitoring/data/changes)
+- Manter o histórico limitado (número de versões e total de linhas);
+  versão fora do histórico → resync
+
+ARQUITETURA:
+- Linha identificada por (Node, ID), como no PartitionIndex e nos cursores
+- Mapas {chave: registro} da versão atual são mantidos para o próximo diff
+  (cada build compara apenas com a versão imediatamente anterior)
+- Registros são compartilhados com o catálogo: NÃO modificar
+
+ANTES: qualquer mudança obrigava o cliente a baixar a categoria inteira
+AGORA: tabela de 20k linhas atualiza com poucas centenas de bytes
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+RowKey = Tuple[str, str]  # (Node, ID)
+
+
+class CategoryDelta:
+    """
+    Mudanças de uma categoria entre duas versões consecutivas.
+
+    modified guarda pares (anterior, atual) e removed os registros anteriores:
+    ao compor várias versões, linha que volta ao estado de `since` não é enviada.
+    """
+
+    __slots__ = ("added", "modified", "removed")
+
+    def __init__(
+        self,
+        added: Tuple[Dict, ...],
+        modified: Tuple[Tuple[Dict, Dict], ...],
+        removed: Tuple[Dict, ...]
+    ):
+        self.added = added
+        self.modified = modified
+        self.removed = removed
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.modified) + len(self.removed)
+
+
+def _row_key(record: Dict[str, Any]) -> RowKey:
+    return (record.get('Node'), record.get('ID'))
+
+
+def diff_rows(previous: Dict[RowKey, Dict], current: Dict[RowKey, Dict]) -> Optional[CategoryDelta]:
+    """Delta entre dois mapas {chave: registro} (None se idênticos)"""
+    added = []
+    modified = []
+    for key, record in current.items():
+        old = previous.get(key)
+        if old is None:
+            added.append(record)
+        elif old is not record and old != record:
+            modified.append((old, record))
+    removed = [record for key, record in previous.items() if key not in current]
+    if not (added or modified or removed):
+        return None
+    return CategoryDelta(tuple(added), tuple(modified), tuple(removed))
+
+
+class CatalogChangeLog:
+    """
+    Histórico limitado de deltas por versão do catálogo categorizado.
+
+    Exemplo de Uso:
+        ```python
+        log = CatalogChangeLog()
+        log.record(catalog_v1)
+        log.record(catalog_v2)
+        log.changes_since('network-probes', 1)
+        # {'added': [...], 'modified': [...], 'removed': [...]}
+        ```
+    """
+
+    def __init__(self, max_versions: Optional[int] = None, max_rows: Optional[int] = None):
+        self.max_versions = max_versions or Config.MONITORING_CHANGELOG_VERSIONS
+        self.max_rows = max_rows or Config.MONITORING_CHANGELOG_MAX_ROWS
+        # versão → {categoria: delta em relação à versão anterior}
+        self._entries: "OrderedDict[int, Dict[str, CategoryDelta]]" = OrderedDict()
+        self._rows = 0
+        # Menor versão a partir da qual todos os deltas estão disponíveis
+        self.floor: Optional[int] = None
+        self.version: Optional[int] = None
+        self._maps: Dict[str, Dict[RowKey, Dict]] = {}
+        self._stats = {"recorded": 0, "resets": 0, "evicted": 0, "queries": 0, "resyncs": 0}
+
+    def record(self, catalog) -> None:
+        """
+        Registra uma nova versão (CategorizedCatalog).
+
+        Versões não consecutivas (ex.: primeira versão) reiniciam o histórico.
+        """
+        maps = {
+            category: {_row_key(record): record for record in records}
+            for category, records in catalog.partitions.items()
+        }
+
+        if self.version is None or catalog.version != self.version + 1:
+            self._entries.clear()
+            self._rows = 0
+            self.floor = catalog.version
+            self._stats["resets"] += 1
+            logger.debug(f"[CATALOG CHANGES] Histórico reiniciado em v{catalog.version}")
+        else:
+            deltas = {}
+            for category in set(self._maps) | set(maps):
+                delta = diff_rows(self._maps.get(category, {}), maps.get(category, {}))
+                if delta is not None:
+                    deltas[category] = delta
+                    self._rows += len(delta)
+            self._entries[catalog.version] = deltas
+            self._evict()
+
+        self._maps = maps
+        self.version = catalog.version
+        self._stats["recorded"] += 1
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_versions or self._rows > self.max_rows):
+            version, deltas = self._entries.popitem(last=False)
+            self._rows -= sum(len(delta) for delta in deltas.values())
+            self.floor = version
+            self._stats["evicted"] += 1
+
+    def changes_since(self, category: str, since: int) -> Optional[Dict[str, list]]:
+        """
+        Compõe os deltas de (since, versão atual] para uma categoria.
+
+        Returns:
+            {'added', 'modified', 'removed'} ou None (resync: versão fora do histórico)
+        """
+        self._stats["queries"] += 1
+        if self.version is None or self.floor is None or since < self.floor or since > self.version:
+            self._stats["resyncs"] += 1
+            return None
+
+        # chave → (registro em `since` ou None se não existia, registro atual ou None)
+        pending: Dict[RowKey, Tuple[Optional[Dict], Optional[Dict]]] = {}
+        for version in range(since + 1, self.version + 1):
+            delta = self._entries[version].get(category)
+            if delta is None:
+                continue
+            for record in delta.added:
+                key = _row_key(record)
+                pending[key] = (pending[key][0] if key in pending else None, record)
+            for old, record in delta.modified:
+                key = _row_key(record)
+                pending[key] = (pending[key][0] if key in pending else old, record)
+            for old in delta.removed:
+                key = _row_key(old)
+                pending[key] = (pending[key][0] if key in pending else old, None)
+
+        added, modified, removed = [], [], []
+        for key, (original, record) in pending.items():
+            if record is None:
+                if original is not None:
+                    removed.append({'Node': key[0], 'ID': key[1]})
+            elif original is None:
+                added.append(record)
+            elif original is not record and original != record:
+                modified.append(record)
+        return {'added': added, 'modified': modified, 'removed': removed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do histórico (para debug/observabilidade)"""
+        return {
+            **self._stats,
+            "version": self.version,
+            "floor": self.floor,
+            "retained_versions": len(self._entries),
+            "retained_rows": self._rows,
+        }
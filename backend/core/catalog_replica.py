@@ -0,0 +1,564 @@
+"""
+Réplica em memória do catálogo Consul via Blocking Queries
+
+OBJETIVO:
+- Eliminar o fan-out /catalog/services + N × /catalog/service/{name} a cada cache miss
+- Manter o catálogo SEMPRE quente em memória (snapshot imutável e versionado)
+- Rebuscar APENAS os serviços cujo índice mudou
+
+ESTRATÉGIA (mesmo padrão do consul_sd do Prometheus):
+- 1 watcher na lista de nomes: GET /catalog/services?index=X&wait=5m
+  → detecta nomes adicionados/removidos
+- 1 watcher por nome: GET /catalog/service/{name}?index=I&wait=5m
+  → Consul só responde quando o índice DAQUELE serviço muda
+- Mudanças são agrupadas (debounce) e publicadas como novo CatalogSnapshot
+  com version incrementada
+
+IMPORTANTE:
+- Snapshot é imutável: leitores recebem cópias via to_nodes_dict()/to_flat_list()
+- Pool HTTP dedicado (long-polls não podem ocupar o pool compartilhado do ConsulManager)
+- Fonte: https://developer.hashicorp.com/consul/api-docs/features/blocking
+"""
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from . import json_codec
+from .config import Config
+from .consul_manager import ConsulManager
+from .metrics import (
+    consul_catalog_replica_version,
+    consul_catalog_replica_services,
+    consul_catalog_replica_updates,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_consul_wait(wait: str) -> float:
+    """
+    Converte duração no formato Consul ("30s", "5m", "1h", "500ms") para segundos.
+
+    Args:
+        wait: Duração no formato Consul
+
+    Returns:
+        Duração em segundos (float)
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", wait or "")
+    if not match:
+        raise ValueError(f"Duração inválida para wait: {wait!r}")
+
+    value = float(match.group(1))
+    unit = match.group(2) or "s"
+    return value * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+
+
+def next_blocking_index(previous: int, returned: int) -> int:
+    """
+    Calcula o próximo índice de uma blocking query seguindo as regras oficiais.
+
+    REGRAS (Consul docs - "Implementation Details"):
+    - Índice que volta para trás → resetar para 0 (snapshot restore, troca de líder)
+    - Índice 0 nunca deve ser reutilizado como valor de bloqueio → usar 1
+
+    Args:
+        previous: Índice usado na requisição anterior
+        returned: X-Consul-Index retornado
+
+    Returns:
+        Índice a ser usado na próxima requisição
+    """
+    if returned < previous:
+        return 0
+    return max(returned, 1)
+
+
+class CatalogSnapshot:
+    """
+    Snapshot imutável do catálogo.
+
+    Armazena instâncias normalizadas por nome de serviço (mesmo formato de
+    ConsulManager.get_all_services_catalog). Nunca é alterado após publicado.
+    """
+
+    __slots__ = ("version", "index", "source_node", "created_at", "services", "service_indexes")
+
+    def __init__(
+        self,
+        version: int,
+        index: int,
+        source_node: Optional[str],
+        services: Dict[str, Tuple[Dict[str, Any], ...]],
+        service_indexes: Dict[str, int],
+    ):
+        self.version = version
+        self.index = index
+        self.source_node = source_node
+        self.created_at = time.time()
+        self.services = services
+        self.service_indexes = service_indexes
+
+    @property
+    def age_seconds(self) -> float:
+        """Idade do snapshot em segundos"""
+        return time.time() - self.created_at
+
+    @property
+    def total_instances(self) -> int:
+        """Total de instâncias de serviço no snapshot"""
+        return sum(len(instances) for instances in self.services.values())
+
+    def iter_instances(self):
+        """Itera sobre todas as instâncias (referências - NÃO modificar)"""
+        for instances in self.services.values():
+            yield from instances
+
+    def to_nodes_dict(self) -> Dict[str, Dict[str, Dict]]:
+        """
+        Retorna cópia no formato {node_name: {service_id: service_data}}.
+
+        Cada service_data é uma cópia rasa (consumidores adicionam campos como node_ip).
+        """
+        result: Dict[str, Dict[str, Dict]] = {}
+        for svc in self.iter_instances():
+            result.setdefault(svc["Node"], {})[svc["ID"]] = dict(svc)
+        return result
+
+    def to_flat_list(self) -> List[Dict]:
+        """
+        Retorna cópia no formato [service_data] (uma por instância).
+
+        Lista e não dict por service ID: o Consul permite o mesmo service ID em
+        nodes diferentes e nenhuma instância pode ser descartada.
+        """
+        return [dict(svc) for svc in self.iter_instances()]
+
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata no formato do _metadata retornado por get_all_services_catalog"""
+        return {
+            "source_node": self.source_node,
+            "source_name": "Catalog Replica",
+            "is_master": True,
+            "attempts": 0,
+            "total_time_ms": 0,
+            "cache_status": "REPLICA",
+            "age_seconds": int(self.age_seconds),
+            "staleness_ms": 0,
+            "catalog_version": self.version,
+            "catalog_index": self.index,
+        }
+
+
+class CatalogReplica:
+    """
+    Réplica do catálogo mantida por blocking queries em background.
+
+    Uso:
+        replica = get_catalog_replica()
+        await replica.start()
+        snapshot = replica.snapshot  # None até o sync inicial terminar
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        wait: Optional[str] = None,
+        fetch_concurrency: Optional[int] = None,
+        debounce_seconds: Optional[float] = None,
+    ):
+        self.token = token or Config.CONSUL_TOKEN
+        self.wait = wait or Config.CATALOG_REPLICA_WAIT
+        self.wait_seconds = parse_consul_wait(self.wait)
+        self.fetch_concurrency = fetch_concurrency or Config.CATALOG_REPLICA_FETCH_CONCURRENCY
+        self.debounce_seconds = (
+            debounce_seconds if debounce_seconds is not None else Config.CATALOG_REPLICA_DEBOUNCE
+        )
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._ready = asyncio.Event()
+        # Substituído a cada publicação (acorda quem aguarda nova versão)
+        self._published = asyncio.Event()
+        self._source_node: Optional[str] = None
+        self._names_index = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Mudanças pendentes: name -> (instances, index) | None (removido)
+        self._pending: Dict[str, Optional[Tuple[Tuple[Dict, ...], int]]] = {}
+        self._pending_event = asyncio.Event()
+
+        self._main_task: Optional[asyncio.Task] = None
+        self._publisher_task: Optional[asyncio.Task] = None
+        self._watchers: Dict[str, asyncio.Task] = {}
+
+        self._stats = {
+            "publishes": 0,
+            "service_refetches": 0,
+            "names_refetches": 0,
+            "errors": 0,
+        }
+
+    # =========================================================================
+    # API PÚBLICA
+    # =========================================================================
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Snapshot atual (None se o sync inicial ainda não terminou)"""
+        return self._snapshot
+
+    @property
+    def is_ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def is_running(self) -> bool:
+        return self._main_task is not None and not self._main_task.done()
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o sync inicial (retorna False se timeout)"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_for_change(self, version: int, timeout: Optional[float] = None) -> Optional[CatalogSnapshot]:
+        """
+        Aguarda um snapshot com versão maior que `version`.
+
+        Returns:
+            Snapshot novo ou None se timeout
+        """
+        while self._snapshot is None or self._snapshot.version <= version:
+            try:
+                await asyncio.wait_for(self._published.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._snapshot
+
+    async def start(self) -> None:
+        """Inicia a réplica em background (idempotente)"""
+        if self.is_running:
+            return
+        self._main_task = asyncio.create_task(self._run(), name="catalog-replica")
+        self._publisher_task = asyncio.create_task(self._publisher(), name="catalog-replica-publisher")
+        logger.info(f"[CatalogReplica] Iniciada (wait={self.wait})")
+
+    async def stop(self) -> None:
+        """Para todos os watchers e fecha o pool HTTP dedicado"""
+        tasks = [t for t in (self._main_task, self._publisher_task) if t]
+        tasks.extend(self._watchers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watchers.clear()
+        self._main_task = None
+        self._publisher_task = None
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        logger.info("[CatalogReplica] Parada")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas da réplica (para debug/observabilidade)"""
+        snapshot = self._snapshot
+        return {
+            "ready": snapshot is not None,
+            "running": self.is_running,
+            "source_node": self._source_node,
+            "version": snapshot.version if snapshot else 0,
+            "index": snapshot.index if snapshot else 0,
+            "age_seconds": round(snapshot.age_seconds, 2) if snapshot else None,
+            "service_names": len(snapshot.services) if snapshot else 0,
+            "total_instances": snapshot.total_instances if snapshot else 0,
+            "active_watchers": len(self._watchers),
+            **self._stats,
+        }
+
+    async def blocking_get(self, path: str, index: int) -> Tuple[Any, int]:
+        """
+        Blocking query avulsa no node fonte, usando o pool dedicado da réplica.
+
+        Para watchers auxiliares (ex.: saúde dos agregados do dashboard) que
+        não devem ocupar o pool compartilhado do ConsulManager.
+        """
+        return await self._blocking_get(path, index)
+
+    # =========================================================================
+    # HTTP
+    # =========================================================================
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pool dedicado: pool=None faz long-polls excedentes aguardarem conexão livre"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    connect=5.0,
+                    # Consul adiciona jitter de até wait/16
+                    read=self.wait_seconds + self.wait_seconds / 16 + 10.0,
+                    write=5.0,
+                    pool=None,
+                ),
+                limits=httpx.Limits(
+                    max_keepalive_connections=Config.CATALOG_REPLICA_MAX_CONNECTIONS,
+                    max_connections=Config.CATALOG_REPLICA_MAX_CONNECTIONS,
+                    keepalive_expiry=self.wait_seconds + 30.0,
+                ),
+            )
+        return self._client
+
+    async def _blocking_get(self, path: str, index: int) -> Tuple[Any, int]:
+        """
+        Executa blocking query no node fonte atual.
+
+        Returns:
+            Tupla (json, X-Consul-Index)
+        """
+        params = {"stale": ""}
+        if index:
+            params["index"] = str(index)
+            params["wait"] = self.wait
+
+        url = f"http://{self._source_node}:{Config.CONSUL_PORT}/v1{path}"
+        response = await self._get_client().get(
+            url,
+            params=params,
+            headers={"X-Consul-Token": self.token},
+        )
+        response.raise_for_status()
+        return json_codec.decode_response(response), int(response.headers.get("X-Consul-Index", "0"))
+
+    async def _select_source_node(self) -> None:
+        """Seleciona node acessível usando o fallback master → clients existente"""
+        _, metadata = await ConsulManager(token=self.token).get_services_with_fallback()
+        if metadata["source_node"] != self._source_node:
+            logger.info(f"[CatalogReplica] Fonte: {metadata['source_name']} ({metadata['source_node']})")
+        self._source_node = metadata["source_node"]
+
+    async def _fetch_service(self, name: str, index: int = 0) -> Tuple[Tuple[Dict, ...], int]:
+        """Busca (ou aguarda mudança de) um serviço e normaliza as instâncias"""
+        data, new_index = await self._blocking_get(f"/catalog/service/{quote(name, safe='')}", index)
+        instances = tuple(
+            ConsulManager.normalize_catalog_instance(name, instance) for instance in data or []
+        )
+        return instances, new_index
+
+    # =========================================================================
+    # LOOP PRINCIPAL (lista de nomes)
+    # =========================================================================
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                if self._source_node is None:
+                    await self._select_source_node()
+
+                if self._snapshot is None:
+                    await self._initial_sync()
+
+                names, new_index = await self._blocking_get("/catalog/services", self._names_index)
+                self._stats["names_refetches"] += 1
+                self._names_index = next_blocking_index(self._names_index, new_index)
+                self._reconcile_names(set(names.keys()))
+                backoff = 1.0
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                consul_catalog_replica_updates.labels(kind="error").inc()
+                logger.warning(f"[CatalogReplica] Erro no watch de /catalog/services: {exc}")
+                # Re-selecionar fonte (master pode ter caído)
+                self._source_node = None
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+    async def _initial_sync(self) -> None:
+        """Sync completo inicial com concorrência limitada"""
+        start = time.time()
+        names, names_index = await self._blocking_get("/catalog/services", 0)
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def fetch(name: str):
+            async with semaphore:
+                return name, await self._fetch_service(name)
+
+        results = await asyncio.gather(*(fetch(name) for name in names.keys()))
+
+        services = {name: instances for name, (instances, _) in results}
+        indexes = {name: index for name, (_, index) in results}
+        self._names_index = next_blocking_index(0, names_index)
+        self._publish(services, indexes, changed=len(services), kind="initial")
+
+        for name in services:
+            self._start_watcher(name)
+
+        logger.info(
+            f"[CatalogReplica] ✅ Sync inicial: {len(services)} nomes, "
+            f"{self._snapshot.total_instances} instâncias em {(time.time() - start) * 1000:.0f}ms"
+        )
+
+    def _reconcile_names(self, current_names: set) -> None:
+        """Inicia watchers para nomes novos e remove nomes que sumiram"""
+        known = set(self._watchers.keys())
+
+        for name in current_names - known:
+            # Índice 0 → primeira busca retorna imediatamente
+            self._start_watcher(name)
+
+        for name in known - current_names:
+            task = self._watchers.pop(name)
+            task.cancel()
+            self._pending[name] = None
+            self._pending_event.set()
+
+    # =========================================================================
+    # WATCHERS POR SERVIÇO
+    # =========================================================================
+
+    def _start_watcher(self, name: str) -> None:
+        snapshot = self._snapshot
+        index = snapshot.service_indexes.get(name, 0) if snapshot else 0
+        self._watchers[name] = asyncio.create_task(self._watch_service(name, index))
+
+    async def _watch_service(self, name: str, index: int) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                if self._source_node is None:
+                    await asyncio.sleep(backoff)
+                    continue
+
+                instances, new_index = await self._fetch_service(name, index)
+                self._stats["service_refetches"] += 1
+
+                # Mesmo índice = wait expirou sem mudança (nada a publicar)
+                if new_index != index:
+                    self._pending[name] = (instances, new_index)
+                    self._pending_event.set()
+
+                index = next_blocking_index(index, new_index)
+                backoff = 1.0
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                logger.debug(f"[CatalogReplica] Erro no watch de '{name}': {exc}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+    # =========================================================================
+    # PUBLICAÇÃO (copy-on-write)
+    # =========================================================================
+
+    async def _publisher(self) -> None:
+        """Agrupa mudanças dos watchers e publica um snapshot por lote"""
+        while True:
+            await self._pending_event.wait()
+            if self.debounce_seconds:
+                await asyncio.sleep(self.debounce_seconds)
+            self._pending_event.clear()
+            self.apply_changes()
+
+    def apply_changes(self) -> bool:
+        """
+        Aplica as mudanças pendentes em um novo snapshot.
+
+        Returns:
+            True se um novo snapshot foi publicado
+        """
+        if not self._pending or self._snapshot is None:
+            return False
+
+        pending, self._pending = self._pending, {}
+        services = dict(self._snapshot.services)
+        indexes = dict(self._snapshot.service_indexes)
+
+        for name, change in pending.items():
+            if change is None:
+                if services.pop(name, None) is not None:
+                    consul_catalog_replica_updates.labels(kind="removed").inc()
+                indexes.pop(name, None)
+            else:
+                instances, index = change
+                kind = "modified" if name in services else "added"
+                consul_catalog_replica_updates.labels(kind=kind).inc()
+                services[name] = instances
+                indexes[name] = index
+
+        self._publish(services, indexes, changed=len(pending))
+        return True
+
+    def _publish(
+        self,
+        services: Dict[str, Tuple[Dict, ...]],
+        indexes: Dict[str, int],
+        changed: int,
+        kind: Optional[str] = None,
+    ) -> None:
+        version = (self._snapshot.version + 1) if self._snapshot else 1
+        self._snapshot = CatalogSnapshot(
+            version=version,
+            index=max([self._names_index, *indexes.values()]),
+            source_node=self._source_node,
+            services=services,
+            service_indexes=indexes,
+        )
+        self._stats["publishes"] += 1
+        self._ready.set()
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+        if kind:
+            consul_catalog_replica_updates.labels(kind=kind).inc()
+        consul_catalog_replica_version.set(version)
+        consul_catalog_replica_services.set(self._snapshot.total_instances)
+        logger.debug(f"[CatalogReplica] Snapshot v{version} publicado ({changed} serviços alterados)")
+
+
+# Instância global da réplica (singleton)
+_catalog_replica: Optional[CatalogReplica] = None
+
+
+def get_catalog_replica() -> CatalogReplica:
+    """
+    Retorna instância global da réplica do catálogo (singleton).
+
+    Returns:
+        Instância de CatalogReplica
+    """
+    global _catalog_replica
+    if _catalog_replica is None:
+        _catalog_replica = CatalogReplica()
+    return _catalog_replica
+
+
+def get_ready_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Retorna o snapshot atual se a réplica estiver habilitada e pronta.
+
+    Returns:
+        CatalogSnapshot ou None (chamador deve usar o caminho direto ao Consul)
+    """
+    if not Config.CATALOG_REPLICA_ENABLED or _catalog_replica is None:
+        return None
+    return _catalog_replica.snapshot
+
+
+def reset_catalog_replica() -> None:
+    """
+    Reseta réplica global (útil para testes).
+    """
+    global _catalog_replica
+    _catalog_replica = None
+    logger.warning("[CatalogReplica] Réplica global resetada")
@@ -11,16 +11,156 @@ RESPONSABILIDADES:
    O KV é a ÚNICA fonte de verdade. Quando KV está vazio, o sistema
    retorna apenas default_category para forçar configuração correta.
 
+PERFORMANCE (regras compiladas + memoização):
+- Resultado depende apenas de (job_name, module, metrics_path, has_metrics_path);
+  catálogos reais têm poucas centenas de combinações para dezenas de milhares
+  de instâncias → resultado memoizado por essa tupla (invalidado no reload)
+- Regras indexadas por prefixo literal do pattern (buckets) + UMA regex de
+  alternância combinada para patterns complexos: jobs que não batem com
+  nenhum pattern não testam todas as regras
+- categorize_many() para categorizar lotes
+
 AUTOR: Sistema de Refatoração Skills Eye v2.0
 DATA: 2025-11-13
 """
 
+import copy
 import re
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 import logging
 
+from core.kv_bundle import get_kv_bundle
+
 logger = logging.getLogger(__name__)
 
+# Chave das regras no KV (ConsulKVConfigManager: prefixo skills/eye/)
+RULES_KV_KEY = 'skills/eye/monitoring-types/categorization/rules'
+
+# Caracteres com significado especial em regex (fim do prefixo literal)
+_REGEX_META = set('.^$*+?{}[]\\|()')
+# Grupo inicial com alternância de literais: (icmp|ping) ou (?:icmp|ping)
+_LITERAL_GROUP_RE = re.compile(r'\((?:\?:)?([\w\-/: ]+(?:\|[\w\-/: ]+)*)\)')
+# Backreferences/grupos nomeados não podem ser combinados em uma única regex
+_UNSAFE_COMBINE_RE = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?[aiLmsux]')
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """Verifica se o pattern tem '|' fora de grupos e classes de caracteres"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+
+def literal_prefixes(pattern: str) -> Optional[List[str]]:
+    """
+    Extrai prefixos literais NECESSÁRIOS para um pattern casar (via re.match).
+
+    Exemplos:
+        "^node.*"          → ["node"]
+        "^(icmp|ping).*"   → ["icmp", "ping"]
+        "^https?$"         → ["http"]
+        ".*icmp.*"         → None (sem prefixo literal)
+
+    Args:
+        pattern: Regex (avaliada com re.match + IGNORECASE)
+
+    Returns:
+        Lista de prefixos em minúsculas, ou None se não for possível extrair
+    """
+    body = pattern[1:] if pattern.startswith('^') else pattern
+    if not body or _has_top_level_alternation(body):
+        return None
+
+    if body.startswith('('):
+        match = _LITERAL_GROUP_RE.match(body)
+        if not match or body[match.end():match.end() + 1] in ('?', '*', '{'):
+            return None
+        alternatives = match.group(1).split('|')
+        return [alt.lower() for alt in alternatives] if all(alternatives) else None
+
+    literal = []
+    for char in body:
+        if char in _REGEX_META:
+            break
+        literal.append(char)
+
+    # Último caractere seguido de quantificador opcional não é obrigatório ("https?")
+    next_char = body[len(literal):len(literal) + 1]
+    if literal and next_char in ('?', '*', '{'):
+        literal.pop()
+
+    return [''.join(literal).lower()] if literal else None
+
+
+class _PatternIndex:
+    """
+    Índice de regras por pattern: buckets de prefixo literal + regex combinada.
+
+    candidates(value) retorna os índices das regras cujo pattern PODE casar
+    com value (superconjunto); a verificação final é feita por rule.matches().
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, List[int]] = {}
+        self._prefix_lengths: List[int] = []
+        self._complex: List[int] = []
+        self._complex_patterns: List[str] = []
+        self._combined: Optional[re.Pattern] = None
+
+    def add(self, rule_index: int, pattern: str) -> None:
+        prefixes = literal_prefixes(pattern)
+        if prefixes:
+            for prefix in prefixes:
+                self._buckets.setdefault(prefix, []).append(rule_index)
+        else:
+            self._complex.append(rule_index)
+            self._complex_patterns.append(pattern)
+
+    def build(self) -> None:
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._buckets})
+        self._combined = None
+        if self._complex_patterns and not any(
+            _UNSAFE_COMBINE_RE.search(p) for p in self._complex_patterns
+        ):
+            try:
+                self._combined = re.compile(
+                    '|'.join(f'(?:{p})' for p in self._complex_patterns),
+                    re.IGNORECASE
+                )
+            except re.error:
+                self._combined = None
+
+    def candidates(self, value: str, out: Set[int]) -> None:
+        lowered = value.lower()
+        for length in self._prefix_lengths:
+            if length > len(lowered):
+                break
+            bucket = self._buckets.get(lowered[:length])
+            if bucket:
+                out.update(bucket)
+
+        if self._complex:
+            # Sem regex combinada (patterns não combináveis): testar todas as complexas
+            if self._combined is None or self._combined.match(value):
+                out.update(self._complex)
+
 
 class CategorizationRule:
     """
@@ -78,6 +218,18 @@ class CategorizationRule:
         """
         Verifica se job satisfaz TODAS as condições da regra (lógica AND)
 
+        Args:
+            job_data: Dados do job (ver match_details)
+
+        Returns:
+            True se job satisfaz todas as condições
+        """
+        return self.match_details(job_data) is not None
+
+    def match_details(self, job_data: Dict) -> Optional[Tuple[bool, bool]]:
+        """
+        Avalia as condições da regra executando cada regex UMA única vez
+
         Args:
             job_data: Dados do job a verificar:
                 {
@@ -87,25 +239,34 @@ class CategorizationRule:
                 }
 
         Returns:
-            True se job satisfaz todas as condições
+            None se não casar; senão tupla (job_pattern_matched, module_pattern_matched)
+            usada em matched_rule (SPEC-REGEX-001)
         """
         job_name = job_data.get('job_name', '').lower()
         metrics_path = job_data.get('metrics_path', '/metrics')
         module = job_data.get('module', '')
 
+        job_pattern = self._compiled_patterns.get('job_name_pattern')
+        module_pattern = self._compiled_patterns.get('module_pattern')
+        job_pattern_matched = bool(
+            'job_name_pattern' in self.conditions and job_pattern and job_pattern.match(job_name)
+        )
+        module_pattern_matched = bool(
+            'module_pattern' in self.conditions and module
+            and module_pattern and module_pattern.match(module)
+        )
+
         # Verificar job_name_pattern (regex) - OPCIONAL
         # Só aplicar se a regra especificar esta condição
         if 'job_name_pattern' in self.conditions:
-            pattern = self._compiled_patterns.get('job_name_pattern')
-            if pattern and not pattern.match(job_name):
+            if job_pattern and not job_pattern_matched:
                 # EXCETO: Se houver module_pattern E module bater, ignorar job_name_pattern
                 # Isso permite jobs genéricos "blackbox" serem categorizados pelo module
                 if 'module_pattern' in self.conditions and module:
-                    module_pattern = self._compiled_patterns.get('module_pattern')
-                    if not (module_pattern and module_pattern.match(module)):
-                        return False
+                    if not (module_pattern and module_pattern_matched):
+                        return None
                 else:
-                    return False
+                    return None
 
         # Verificar metrics_path (match exato) - APENAS se o serviço fornecer esse dado
         # Se o serviço não tem metrics_path no metadata, ignorar esta condição
@@ -113,18 +274,17 @@ class CategorizationRule:
         if 'metrics_path' in self.conditions:
             service_has_metrics_path = job_data.get('_has_metrics_path', False)
             if service_has_metrics_path and metrics_path != self.conditions['metrics_path']:
-                return False
+                return None
 
         # Verificar module_pattern (regex) - OPCIONAL
         # Só aplicar se module estiver presente no job_data
         # Se job não tem module, ignorar esta condição
         if 'module_pattern' in self.conditions and module:
-            pattern = self._compiled_patterns.get('module_pattern')
-            if pattern and not pattern.match(module):
-                return False
+            if module_pattern and not module_pattern_matched:
+                return None
 
         # Todas as condições satisfeitas
-        return True
+        return job_pattern_matched, module_pattern_matched
 
 
 class CategorizationRuleEngine:
@@ -195,8 +355,22 @@ class CategorizationRuleEngine:
         self.rules: List[CategorizationRule] = []
         self.default_category = 'custom-exporters'
         self.rules_loaded = False
+        # Versão da chave de regras no KV bundle quando carregadas (None = sem bundle)
+        self._rules_token: Optional[Tuple[int, Optional[int]]] = None
         # ✅ SPEC-ARCH-001: REMOVIDO _using_builtin - KV é única fonte de verdade
 
+        # Estruturas compiladas a partir de self.rules (reconstruídas quando a lista muda)
+        self._compiled_for: Optional[List[CategorizationRule]] = None
+        self._always_candidates: List[int] = []
+        self._job_index = _PatternIndex()
+        self._module_index = _PatternIndex()
+        # Memo: (job_name, module, metrics_path, has_metrics_path) → (categoria, type_info)
+        self._memo: Dict[Tuple, Tuple[str, Dict[str, Any]]] = {}
+        self._memo_stats = {"hits": 0, "misses": 0}
+
+    # Limite de combinações memoizadas (protege contra job_names arbitrários)
+    MEMO_MAX_ENTRIES = 50000
+
     async def load_rules(self, force_reload: bool = False) -> bool:
         """
         Carrega regras do Consul KV (ÚNICA FONTE DE VERDADE)
@@ -218,10 +392,15 @@ class CategorizationRuleEngine:
         Returns:
             True se carregou com sucesso do KV, False se KV vazio
         """
-        # Se já carregou e não é force_reload, skip
+        # Se já carregou e não é force_reload, skip (a menos que o KV bundle
+        # tenha visto a chave de regras mudar)
+        bundle = get_kv_bundle()
         if self.rules_loaded and not force_reload:
-            logger.debug("[RULES] Regras já carregadas, usando cache")
-            return True
+            token = bundle.token(RULES_KV_KEY)
+            if token is None or token == self._rules_token:
+                logger.debug("[RULES] Regras já carregadas, usando cache")
+                return True
+            logger.info("[RULES] Regras alteradas no KV - recarregando")
 
         try:
             # Buscar regras do KV
@@ -239,6 +418,7 @@ class CategorizationRuleEngine:
                 )
                 self.rules = []
                 self.rules_loaded = False
+                self._invalidate_compiled()
                 return False
 
             # Criar objetos de regra
@@ -258,6 +438,8 @@ class CategorizationRuleEngine:
             self.default_category = rules_data.get('default_category', 'custom-exporters')
 
             self.rules_loaded = True
+            self._rules_token = bundle.token(RULES_KV_KEY)
+            self._invalidate_compiled()
 
             logger.info(
                 f"[RULES] ✅ {len(self.rules)} regras carregadas do KV "
@@ -269,8 +451,58 @@ class CategorizationRuleEngine:
             logger.error(f"[RULES] ❌ Erro ao carregar regras do KV: {e}", exc_info=True)
             self.rules = []
             self.rules_loaded = False
+            self._invalidate_compiled()
             return False
 
+    def _invalidate_compiled(self) -> None:
+        """Descarta índices compilados e memo (chamado a cada (re)carga de regras)"""
+        self._compiled_for = None
+        self._memo.clear()
+
+    def _ensure_compiled(self) -> None:
+        """
+        Compila self.rules em estrutura de dispatch (se ainda não compilado).
+
+        - Regras sem job_name_pattern (ou com regex inválida): sempre candidatas
+        - Regras com job_name_pattern: indexadas pelo pattern do job
+        - Regras com job_name_pattern + module_pattern: também indexadas pelo
+          pattern do módulo (module pode sobrepor job_name_pattern)
+        """
+        if self._compiled_for is self.rules:
+            return
+
+        self._always_candidates = []
+        self._job_index = _PatternIndex()
+        self._module_index = _PatternIndex()
+
+        for index, rule in enumerate(self.rules):
+            job_pattern = rule._compiled_patterns.get('job_name_pattern')
+            if 'job_name_pattern' not in rule.conditions or job_pattern is None:
+                self._always_candidates.append(index)
+                continue
+
+            self._job_index.add(index, rule.conditions['job_name_pattern'])
+            if 'module_pattern' in rule.conditions:
+                if rule._compiled_patterns.get('module_pattern') is None:
+                    # Regex de módulo inválida: comportamento de matches() depende só do módulo presente
+                    self._always_candidates.append(index)
+                else:
+                    self._module_index.add(index, rule.conditions['module_pattern'])
+
+        self._job_index.build()
+        self._module_index.build()
+        self._memo.clear()
+        self._compiled_for = self.rules
+
+    def _candidate_rules(self, job_data: Dict) -> List[int]:
+        """Índices (em ordem de prioridade) das regras que podem casar com o job"""
+        candidates: Set[int] = set(self._always_candidates)
+        self._job_index.candidates(job_data.get('job_name', ''), candidates)
+        module = job_data.get('module', '')
+        if module:
+            self._module_index.candidates(module, candidates)
+        return sorted(candidates)
+
     def categorize(self, job_data: Dict) -> tuple:
         """
         Categoriza um job baseado nas regras
@@ -323,32 +555,61 @@ class CategorizationRuleEngine:
             )
             return self._default_categorize(job_data)
 
-        # Aplicar regras em ordem de prioridade
-        for rule in self.rules:
-            if rule.matches(job_data):
+        self._ensure_compiled()
+
+        # Memo: resultado depende apenas destes 4 campos
+        memo_key = (
+            job_data.get('job_name'),
+            job_data.get('module'),
+            job_data.get('metrics_path', '/metrics'),
+            bool(job_data.get('_has_metrics_path', False)),
+        )
+        try:
+            cached = self._memo.get(memo_key)
+        except TypeError:
+            # Valor não-hashable (ex: module em formato inesperado) → sem memo
+            return self._categorize_uncached(job_data)
+
+        if cached is not None:
+            self._memo_stats["hits"] += 1
+            return cached[0], copy.deepcopy(cached[1])
+
+        self._memo_stats["misses"] += 1
+        category, type_info = self._categorize_uncached(job_data)
+        if len(self._memo) >= self.MEMO_MAX_ENTRIES:
+            self._memo.clear()
+        # Cópia profunda: type_info contém dicts aninhados (matched_rule)
+        self._memo[memo_key] = (category, type_info)
+        return category, copy.deepcopy(type_info)
+
+    def categorize_many(self, jobs: Iterable[Dict]) -> List[tuple]:
+        """
+        Categoriza um lote de jobs (mesma semântica de categorize())
+
+        Jobs com a mesma combinação (job_name, module, metrics_path,
+        has_metrics_path) são resolvidos uma única vez via memo.
+
+        Args:
+            jobs: Iterável de job_data (ver categorize())
+
+        Returns:
+            Lista de tuplas (categoria, type_info), na mesma ordem dos jobs
+        """
+        return [self.categorize(job_data) for job_data in jobs]
+
+    def _categorize_uncached(self, job_data: Dict) -> tuple:
+        """Aplica as regras candidatas em ordem de prioridade (sem memo)"""
+        for index in self._candidate_rules(job_data):
+            rule = self.rules[index]
+            details = rule.match_details(job_data)
+            if details is not None:
                 logger.debug(
                     f"[CATEGORIZE] '{job_data.get('job_name')}' → "
                     f"'{rule.category}' (regra: {rule.id}, prioridade: {rule.priority})"
                 )
 
-                # SPEC-REGEX-001: Determinar quais patterns fizeram match
-                job_name = job_data.get('job_name', '').lower()
-                module = job_data.get('module', '')
-
-                job_pattern_matched = False
-                module_pattern_matched = False
-
-                # Verificar job_name_pattern
-                if 'job_name_pattern' in rule.conditions:
-                    pattern = rule._compiled_patterns.get('job_name_pattern')
-                    if pattern and pattern.match(job_name):
-                        job_pattern_matched = True
-
-                # Verificar module_pattern
-                if 'module_pattern' in rule.conditions and module:
-                    pattern = rule._compiled_patterns.get('module_pattern')
-                    if pattern and pattern.match(module):
-                        module_pattern_matched = True
+                # SPEC-REGEX-001: Quais patterns fizeram match (calculado em match_details)
+                job_pattern_matched, module_pattern_matched = details
 
                 type_info = {
                     'id': job_data.get('module') or job_data.get('job_name'),
@@ -439,6 +700,11 @@ class CategorizationRuleEngine:
             "default_category": self.default_category,
             "source": "consul_kv",  # ✅ SPEC-ARCH-001: KV é única fonte de verdade
             "categories": categories,
+            "memo": {
+                "size": len(self._memo),
+                "hits": self._memo_stats["hits"],
+                "misses": self._memo_stats["misses"],
+            },
             "priority_range": {
                 "min": min([r.priority for r in self.rules]) if self.rules else None,
                 "max": max([r.priority for r in self.rules]) if self.rules else None
@@ -0,0 +1,432 @@
+"""
+Catálogo Categorizado - Categorização do catálogo UMA vez por versão
+
+RESPONSABILIDADES:
+- Categorizar TODOS os serviços do catálogo em uma única passada
+- Anexar node_ip, site_code e site_name na mesma passada
+- Manter partições por categoria (tuplas de referências aos registros)
+- Servir /monitoring/data e /monitoring/summary a partir das partições
+- Índice invertido por partição (PartitionIndex) construído sob demanda
+- Busca textual (q) via índice de trigramas do catálogo (CatalogTextIndex),
+  sincronizado com o snapshot da réplica na primeira busca de cada versão
+- Versões anteriores recentes mantidas para cursores de paginação já emitidos
+- Change log por versão (CatalogChangeLog) para /monitoring/data/changes
+
+ARQUITETURA:
+- Com CatalogReplica pronta: reconstrói apenas quando muda a versão do
+  snapshot, as regras de categorização, o mapa de nós ou o mapa de sites
+- Sem réplica: resultado em LocalCache (get_or_compute, TTL 30s + stale)
+- Registros são compartilhados entre requisições: consumidores NÃO devem
+  modificá-los (filtros/ordenação/paginação criam novas listas)
+
+ANTES: 6 páginas dinâmicas abertas = catálogo categorizado 6x por TTL
+AGORA: 1 categorização por versão do catálogo
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from core.cache_manager import get_cache
+from core.catalog_changes import CatalogChangeLog
+from core.catalog_replica import CatalogSnapshot, get_ready_snapshot
+from core.config import Config
+from core.kv_bundle import get_kv_bundle
+from core.monitoring_index import PartitionIndex
+from core.text_index import get_catalog_text_index
+
+logger = logging.getLogger(__name__)
+
+# Chaves no LocalCache
+SITES_CACHE_KEY = "monitoring:sites:map"
+SITES_KV_KEY = "skills/eye/metadata/sites"
+FALLBACK_CACHE_KEY = "monitoring:catalog:categorized"
+
+
+def parse_sites(sites_data: Any) -> List[Dict[str, Any]]:
+    """
+    Extrai lista de sites do valor do KV (skills/eye/metadata/sites).
+
+    Estrutura pode ser {data: {data: [sites]}} ou {data: {sites: [...]}} ou {sites: [...]}
+    """
+    sites: Any = []
+    if isinstance(sites_data, dict):
+        # Tentar extrair sites de qualquer nível de aninhamento
+        if 'data' in sites_data:
+            inner = sites_data['data']
+            if isinstance(inner, dict):
+                if 'sites' in inner:
+                    sites = inner['sites']
+                elif 'data' in inner:  # Bug: {data: {data: [...]}}
+                    sites = inner['data'] if isinstance(inner['data'], list) else []
+                else:
+                    # Assumir que inner é a lista de sites
+                    sites = list(inner.values()) if inner else []
+            elif isinstance(inner, list):
+                sites = inner
+        elif 'sites' in sites_data:
+            sites = sites_data['sites']
+    elif isinstance(sites_data, list):
+        sites = sites_data
+
+    return sites if isinstance(sites, list) else []
+
+
+def build_sites_map(sites: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Cria mapa IP → site para lookup rápido"""
+    sites_map = {}
+    for site_item in sites:
+        if isinstance(site_item, dict):
+            prometheus_ip = site_item.get('prometheus_instance') or site_item.get('prometheus_host')
+            if prometheus_ip:
+                sites_map[prometheus_ip] = site_item
+    return sites_map
+
+
+def service_job_data(svc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monta job_data do CategorizationRuleEngine a partir de um serviço do Consul.
+
+    SPEC-PERF-001: _has_metrics_path indica se o serviço tem metrics_path no
+    metadata; se não tiver, o engine ignora a condição metrics_path da regra.
+    """
+    meta = svc.get('Meta') or {}
+    return {
+        'job_name': svc.get('Service', ''),
+        'module': meta.get('module', ''),
+        'metrics_path': meta.get('metrics_path', '/metrics'),
+        '_has_metrics_path': 'metrics_path' in meta
+    }
+
+
+class CategorizedCatalog:
+    """
+    Resultado imutável da categorização de um catálogo.
+
+    partitions: {categoria: (registro, ...)} - registros já com node_ip,
+    site_code e site_name. Os registros são compartilhados: NÃO modificar.
+
+    Os índices das partições (index()) vivem junto com o catálogo: uma nova
+    versão do catálogo descarta todos eles.
+    """
+
+    __slots__ = (
+        "version", "catalog_version", "created_at", "build_ms", "partitions",
+        "total", "total_sites", "response_metadata",
+        "_rules_ref", "_default_category", "_nodes_map", "_sites_map", "_indexes",
+        "_snapshot",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        catalog_version: Optional[int],
+        partitions: Dict[str, Tuple[Dict[str, Any], ...]],
+        total_sites: int,
+        response_metadata: Optional[Dict[str, Any]],
+        build_ms: float,
+        rules_ref: Any,
+        default_category: str,
+        nodes_map: Dict[str, str],
+        sites_map: Dict[str, Dict[str, Any]],
+        snapshot: Optional[CatalogSnapshot] = None
+    ):
+        self.version = version
+        self.catalog_version = catalog_version
+        self.created_at = datetime.utcnow()
+        self.build_ms = build_ms
+        self.partitions = partitions
+        self.total = sum(len(records) for records in partitions.values())
+        self.total_sites = total_sites
+        self.response_metadata = response_metadata
+        self._rules_ref = rules_ref
+        self._default_category = default_category
+        self._nodes_map = nodes_map
+        self._sites_map = sites_map
+        self._indexes: Dict[str, PartitionIndex] = {}
+        self._snapshot = snapshot
+
+    def partition(self, category: str) -> List[Dict[str, Any]]:
+        """Retorna nova lista com as referências dos registros da categoria"""
+        return list(self.partitions.get(category, ()))
+
+    def index(self, category: str) -> PartitionIndex:
+        """Índice invertido da partição (construído na primeira consulta)"""
+        index = self._indexes.get(category)
+        if index is None:
+            index = PartitionIndex(self.partitions.get(category, ()), text_search=self._text_search)
+            self._indexes[category] = index
+            logger.info(
+                f"[CATEGORIZED CATALOG] Índice de '{category}' (v{self.version}): "
+                f"{len(index)} serviços em {index.build_ms:.1f}ms"
+            )
+        return index
+
+    def _text_search(
+        self,
+        query: str,
+        field_filter: Callable[[str], bool]
+    ) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Busca no índice de trigramas do catálogo, sincronizado com o snapshot
+        deste catálogo. None sem réplica ou se o índice já avançou de versão.
+        """
+        if self._snapshot is None:
+            return None
+        text_index = get_catalog_text_index()
+        if not text_index.sync(self._snapshot):
+            return None
+        return text_index.search(query, field_filter=field_filter)
+
+    def index_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas dos índices já construídos"""
+        return {category: index.get_stats() for category, index in self._indexes.items()}
+
+    def category_counts(self) -> Dict[str, int]:
+        """Total de serviços por categoria"""
+        return {category: len(records) for category, records in self.partitions.items()}
+
+    def is_current(
+        self,
+        catalog_version: int,
+        rules_ref: Any,
+        default_category: str,
+        nodes_map: Dict[str, str],
+        sites_map: Dict[str, Dict[str, Any]]
+    ) -> bool:
+        """Verifica se foi construído a partir das mesmas entradas"""
+        return (
+            self.catalog_version == catalog_version
+            and self._rules_ref is rules_ref
+            and self._default_category == default_category
+            and self._nodes_map == nodes_map
+            and self._sites_map == sites_map
+        )
+
+
+class CatalogCategorizer:
+    """
+    Mantém o catálogo categorizado atual e reconstrói quando as entradas mudam.
+
+    Exemplo de Uso:
+        ```python
+        categorizer = CatalogCategorizer(consul_manager, engine, nodes_loader)
+        catalog = await categorizer.get_catalog()
+        services = catalog.partition('network-probes')
+        ```
+    """
+
+    def __init__(
+        self,
+        consul_manager,
+        engine,
+        nodes_loader: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        ttl_seconds: int = 30
+    ):
+        """
+        Args:
+            consul_manager: ConsulManager usado quando a réplica não está pronta
+            engine: CategorizationRuleEngine
+            nodes_loader: Corrotina que retorna os nós do Consul (cacheada)
+            ttl_seconds: TTL do resultado quando a réplica não está disponível
+        """
+        self.consul_manager = consul_manager
+        self.engine = engine
+        self.nodes_loader = nodes_loader
+        self.ttl = ttl_seconds
+        self._cache = get_cache()
+        self._current: Optional[CategorizedCatalog] = None
+        # Versões recentes (atual + anteriores) para cursores de paginação
+        self._recent: "OrderedDict[int, CategorizedCatalog]" = OrderedDict()
+        # Deltas por versão/categoria (histórico limitado)
+        self.changes = CatalogChangeLog()
+        self._version = 0
+        self._stats = {
+            "requests": 0,
+            "builds": 0,
+            "last_build_ms": 0.0,
+        }
+
+    async def _load_context(self) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]], int]:
+        """Carrega mapa de nós (Node → IP) e mapa de sites (IP → site)"""
+        consul_nodes = await self.nodes_loader()
+        nodes_map = {}  # Node Name → IP Address
+        for node in consul_nodes:
+            node_name = node.get('Node', '')
+            node_address = node.get('Address', '')
+            if node_name and node_address:
+                nodes_map[node_name] = node_address
+
+        sites = await self._cache.get_or_compute(
+            get_kv_bundle().cache_key(SITES_CACHE_KEY, SITES_KV_KEY),
+            self._load_sites,
+            ttl=Config.SITES_CACHE_TTL,
+            stale_ttl=Config.SITES_CACHE_TTL
+        )
+        return nodes_map, build_sites_map(sites), len(sites)
+
+    async def _load_sites(self) -> List[Dict[str, Any]]:
+        from core.kv_manager import KVManager
+
+        sites_data = await KVManager().get_json(SITES_KV_KEY)
+        return parse_sites(sites_data)
+
+    async def get_catalog(self) -> CategorizedCatalog:
+        """
+        Retorna o catálogo categorizado atual (reconstrói se necessário).
+
+        Returns:
+            CategorizedCatalog
+        """
+        self._stats["requests"] += 1
+        await self.engine.load_rules()
+
+        snapshot = get_ready_snapshot()
+        if snapshot is None:
+            # Sem réplica: sem versão de catálogo → TTL + single-flight
+            return await self._cache.get_or_compute(
+                FALLBACK_CACHE_KEY,
+                self._build_from_consul,
+                ttl=self.ttl,
+                stale_ttl=self.ttl
+            )
+
+        nodes_map, sites_map, total_sites = await self._load_context()
+        current = self._current
+        if current is not None and current.is_current(
+            snapshot.version, self.engine.rules, self.engine.default_category, nodes_map, sites_map
+        ):
+            return current
+
+        # Construção síncrona (sem await): requisições concorrentes não duplicam o trabalho
+        return self._build(
+            snapshot.to_nodes_dict(), snapshot.version, snapshot.metadata(),
+            nodes_map, sites_map, total_sites, snapshot=snapshot
+        )
+
+    async def _build_from_consul(self) -> CategorizedCatalog:
+        """Busca catálogo completo no Consul (fan-out) e categoriza"""
+        nodes_map, sites_map, total_sites = await self._load_context()
+        all_services_dict = await self.consul_manager.get_all_services_catalog(use_fallback=True)
+        response_metadata = all_services_dict.pop("_metadata", None)
+        return self._build(
+            all_services_dict, None, response_metadata, nodes_map, sites_map, total_sites
+        )
+
+    def _build(
+        self,
+        all_services_dict: Dict[str, Dict[str, Dict[str, Any]]],
+        catalog_version: Optional[int],
+        response_metadata: Optional[Dict[str, Any]],
+        nodes_map: Dict[str, str],
+        sites_map: Dict[str, Dict[str, Any]],
+        total_sites: int,
+        snapshot: Optional[CatalogSnapshot] = None
+    ) -> CategorizedCatalog:
+        """
+        Categoriza todos os serviços e anexa informações de nó/site.
+
+        Args:
+            all_services_dict: {node_name: {service_id: service_data}} (cópias)
+            snapshot: Snapshot de origem (habilita o índice de trigramas)
+        """
+        start = time.perf_counter()
+
+        # Converter estrutura aninhada para lista plana
+        records = []
+        for node_name, services_dict in all_services_dict.items():
+            for service_id, service_data in services_dict.items():
+                service_data['Node'] = node_name
+                service_data['ID'] = service_id
+                records.append(service_data)
+
+        categorized = self.engine.categorize_many(service_job_data(svc) for svc in records)
+
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        for svc, (svc_category, _) in zip(records, categorized):
+            # Mapear Node Name → IP Address → Site
+            # ✅ CRÍTICO: node_ip permite filtro no frontend (NodeSelector retorna IP)
+            node_ip = nodes_map.get(svc.get('Node', ''), '')
+            svc['node_ip'] = node_ip
+
+            site_info = sites_map.get(node_ip)
+            if site_info:
+                svc['site_code'] = site_info.get('code')
+                svc['site_name'] = site_info.get('name')
+            else:
+                # Fallback: usar metadata.site se disponível
+                svc['site_code'] = (svc.get('Meta') or {}).get('site')
+                svc['site_name'] = None
+
+            partitions.setdefault(svc_category, []).append(svc)
+
+        build_ms = (time.perf_counter() - start) * 1000
+        self._version += 1
+        self._stats["builds"] += 1
+        self._stats["last_build_ms"] = round(build_ms, 2)
+
+        catalog = CategorizedCatalog(
+            version=self._version,
+            catalog_version=catalog_version,
+            partitions={category: tuple(items) for category, items in partitions.items()},
+            total_sites=total_sites,
+            response_metadata=response_metadata,
+            build_ms=build_ms,
+            rules_ref=self.engine.rules,
+            default_category=self.engine.default_category,
+            nodes_map=nodes_map,
+            sites_map=sites_map,
+            snapshot=snapshot
+        )
+        self._current = catalog
+        self._recent[catalog.version] = catalog
+        self.changes.record(catalog)
+        while len(self._recent) > Config.MONITORING_CURSOR_VERSIONS + 1:
+            self._recent.popitem(last=False)
+
+        logger.info(
+            f"[CATEGORIZED CATALOG] v{catalog.version} construído: {catalog.total} serviços, "
+            f"{len(catalog.partitions)} categorias em {build_ms:.1f}ms "
+            f"(catálogo v{catalog_version if catalog_version is not None else '-'})"
+        )
+        return catalog
+
+    def get_version(self, version: int) -> Optional[CategorizedCatalog]:
+        """
+        Catálogo categorizado de uma versão recente (cursores de paginação).
+
+        Returns:
+            CategorizedCatalog ou None se a versão já foi descartada
+        """
+        return self._recent.get(version)
+
+    def changes_since(self, category: str, since: int) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Linhas adicionadas/modificadas/removidas em uma categoria desde uma versão.
+
+        Returns:
+            {'added', 'modified', 'removed'} ou None se a versão está fora do
+            histórico retido (cliente deve recarregar a categoria inteira)
+        """
+        return self.changes.changes_since(category, since)
+
+    async def invalidate(self) -> None:
+        """Força reconstrução na próxima requisição"""
+        self._current = None
+        await self._cache.invalidate(FALLBACK_CACHE_KEY)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas da categorização (builds vs requisições)"""
+        current = self._current
+        return {
+            **self._stats,
+            "version": current.version if current else None,
+            "retained_versions": list(self._recent),
+            "changes": self.changes.get_stats(),
+            "catalog_version": current.catalog_version if current else None,
+            "total_services": current.total if current else None,
+            "categories": current.category_counts() if current else {},
+            "indexes": current.index_stats() if current else {},
+        }
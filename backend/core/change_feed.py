@@ -0,0 +1,363 @@
+"""
+Change Feed - Pub/sub de mudanças do catálogo, KV e regras (SSE / WebSocket)
+
+RESPONSABILIDADES:
+- Assinantes escolhem tópicos:
+    catalog:<categoria>   → deltas da categoria (added/modified/removed)
+    kv:metadata/fields    → campos de metadata alterados
+    kv:sites              → sites alterados
+    rules                 → regras de categorização alteradas
+- Watchers em background (blocking queries no pool da réplica) publicam
+  assim que o índice do Consul muda; iniciados no primeiro assinante do tópico
+- Fan-out NÃO bloqueante: fila limitada por assinante; fila cheia → eventos
+  descartados e um único evento resync (cliente recarrega os tópicos)
+
+FORMATO DOS EVENTOS:
+    {"topic": "catalog:network-probes", "type": "delta", "since": 41, "version": 42,
+     "added": [...], "modified": [...], "removed": [{"Node": ..., "ID": ...}]}
+    {"topic": "kv:sites", "type": "changed", "index": 1234}
+    {"topic": "*", "type": "resync", "reason": "overflow"}
+
+ANTES: navegadores faziam polling a cada poucos segundos em cada página
+AGORA: 1 conexão por navegador, eventos só quando o Consul muda
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from core.catalog_replica import get_catalog_replica, next_blocking_index
+from core.config import Config
+from core.kv_sharded import SHARDED_LAYOUTS, items_prefix
+from core.metrics import change_feed_events, change_feed_subscribers
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PREFIX = "catalog:"
+
+# Tópico → chave do KV observada
+KV_TOPICS = {
+    "kv:metadata/fields": "skills/eye/metadata/fields",
+    "kv:sites": "skills/eye/metadata/sites",
+    "rules": "skills/eye/monitoring-types/categorization/rules",
+}
+
+
+def validate_topic(topic: str) -> str:
+    """
+    Valida um tópico de assinatura.
+
+    Raises:
+        ValueError: Tópico desconhecido
+    """
+    if topic in KV_TOPICS or (topic.startswith(CATALOG_PREFIX) and len(topic) > len(CATALOG_PREFIX)):
+        return topic
+    raise ValueError(
+        f"tópico inválido: '{topic}' (use {CATALOG_PREFIX}<categoria>, {', '.join(KV_TOPICS)})"
+    )
+
+
+class Subscription:
+    """Assinante do change feed: tópicos + fila limitada de eventos"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, topics: Iterable[str], queue_size: Optional[int] = None):
+        self.id = next(self._ids)
+        self.topics: Set[str] = set(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or Config.CHANGE_FEED_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """
+        Enfileira sem bloquear.
+
+        Fila cheia: descarta o pendente e deixa apenas um resync (o cliente
+        lento recarrega em vez de receber deltas incompletos).
+
+        Returns:
+            True se o evento foi enfileirado
+        """
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.dropped += 1
+            self.queue.put_nowait({"topic": "*", "type": "resync", "reason": "overflow"})
+            return False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Próximo evento (None se timeout)"""
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ChangeFeed:
+    """
+    Pub/sub em memória com watchers do Consul iniciados sob demanda.
+
+    Exemplo de Uso:
+        ```python
+        feed = get_change_feed()
+        feed.attach_categorizer(catalog_categorizer)
+        subscription = feed.subscribe(["catalog:network-probes", "kv:sites"])
+        event = await subscription.get()
+        feed.unsubscribe(subscription)
+        ```
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[int, Subscription] = {}
+        self._by_topic: Dict[str, Set[int]] = {}
+        self._watchers: Dict[str, asyncio.Task] = {}
+        self._categorizer = None
+        self._stats = {
+            "published": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "resyncs": 0,
+            "errors": 0,
+        }
+
+    # =========================================================================
+    # ASSINATURAS
+    # =========================================================================
+
+    def attach_categorizer(self, categorizer) -> None:
+        """Define o CatalogCategorizer usado pelos tópicos catalog:<categoria>"""
+        self._categorizer = categorizer
+        for topic in self.topics:
+            if topic.startswith(CATALOG_PREFIX):
+                self._ensure_watcher(topic)
+                break
+
+    def subscribe(self, topics: Iterable[str], queue_size: Optional[int] = None) -> Subscription:
+        """
+        Cria assinatura (tópicos validados) e garante os watchers necessários.
+
+        Raises:
+            ValueError: Tópico inválido
+        """
+        subscription = Subscription([validate_topic(t) for t in topics], queue_size)
+        self._subscriptions[subscription.id] = subscription
+        self._index(subscription, subscription.topics)
+        change_feed_subscribers.set(len(self._subscriptions))
+        return subscription
+
+    def update(self, subscription: Subscription, add: Iterable[str] = (), remove: Iterable[str] = ()) -> None:
+        """Adiciona/remove tópicos de uma assinatura existente"""
+        added = {validate_topic(t) for t in add} - subscription.topics
+        removed = set(remove) & subscription.topics
+        subscription.topics |= added
+        subscription.topics -= removed
+        self._index(subscription, added)
+        self._unindex(subscription, removed)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a assinatura (watchers continuam para próximos assinantes)"""
+        if self._subscriptions.pop(subscription.id, None) is not None:
+            self._unindex(subscription, subscription.topics)
+            change_feed_subscribers.set(len(self._subscriptions))
+
+    def _index(self, subscription: Subscription, topics: Iterable[str]) -> None:
+        for topic in topics:
+            self._by_topic.setdefault(topic, set()).add(subscription.id)
+            self._ensure_watcher(topic)
+
+    def _unindex(self, subscription: Subscription, topics: Iterable[str]) -> None:
+        for topic in topics:
+            ids = self._by_topic.get(topic)
+            if ids is not None:
+                ids.discard(subscription.id)
+                if not ids:
+                    del self._by_topic[topic]
+
+    @property
+    def topics(self) -> List[str]:
+        """Tópicos com pelo menos um assinante"""
+        return list(self._by_topic)
+
+    # =========================================================================
+    # PUBLICAÇÃO
+    # =========================================================================
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> int:
+        """
+        Fan-out não bloqueante para os assinantes do tópico.
+
+        Returns:
+            Número de assinantes que receberam o evento
+        """
+        event = {"topic": topic, **event}
+        self._stats["published"] += 1
+        delivered = 0
+        for sub_id in tuple(self._by_topic.get(topic, ())):
+            subscription = self._subscriptions.get(sub_id)
+            if subscription is None:
+                continue
+            if subscription.offer(event):
+                delivered += 1
+            else:
+                self._stats["dropped"] += 1
+                change_feed_events.labels(outcome="dropped").inc()
+        self._stats["delivered"] += delivered
+        change_feed_events.labels(outcome="delivered").inc(delivered)
+        return delivered
+
+    def publish_catalog(self, catalog, since: Optional[int]) -> int:
+        """
+        Publica os deltas de cada categoria assinada entre `since` e catalog.version.
+
+        Returns:
+            Número de eventos publicados
+        """
+        published = 0
+        for topic in self.topics:
+            if not topic.startswith(CATALOG_PREFIX):
+                continue
+            category = topic[len(CATALOG_PREFIX):]
+            changes = self._categorizer.changes_since(category, since) if since is not None else None
+            if changes is None:
+                self._stats["resyncs"] += 1
+                self.publish(topic, {"type": "resync", "version": catalog.version})
+            elif changes["added"] or changes["modified"] or changes["removed"]:
+                self.publish(topic, {"type": "delta", "since": since, "version": catalog.version, **changes})
+            else:
+                continue
+            published += 1
+        return published
+
+    # =========================================================================
+    # WATCHERS
+    # =========================================================================
+
+    def _ensure_watcher(self, topic: str) -> None:
+        name = "catalog" if topic.startswith(CATALOG_PREFIX) else topic
+        task = self._watchers.get(name)
+        if task is not None and not task.done():
+            return
+        if name == "catalog":
+            if self._categorizer is None:
+                return
+            coro = self._watch_catalog()
+        else:
+            coro = self._watch_kv(topic, KV_TOPICS[topic])
+        self._watchers[name] = asyncio.create_task(coro, name=f"change-feed:{name}")
+        logger.info(f"[CHANGE FEED] Watcher '{name}' iniciado")
+
+    async def _watch_catalog(self) -> None:
+        """Nova versão da réplica → recategoriza (se há assinantes) e publica deltas"""
+        replica = get_catalog_replica()
+        version = None
+        snapshot_version = 0
+        while True:
+            try:
+                if version is None:
+                    await replica.wait_ready()
+                    snapshot_version = replica.snapshot.version
+                    version = (await self._categorizer.get_catalog()).version
+
+                snapshot = await replica.wait_for_change(snapshot_version)
+                snapshot_version = snapshot.version
+                if not any(t.startswith(CATALOG_PREFIX) for t in self._by_topic):
+                    continue
+                catalog = await self._categorizer.get_catalog()
+                if catalog.version != version:
+                    self.publish_catalog(catalog, version)
+                    version = catalog.version
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                logger.warning(f"[CHANGE FEED] Erro ao publicar deltas do catálogo: {exc}")
+                await asyncio.sleep(1.0)
+
+    async def _watch_kv(self, topic: str, key: str) -> None:
+        """Blocking query na chave do KV → evento 'changed' a cada novo ModifyIndex"""
+        replica = get_catalog_replica()
+        # Layout fragmentado (core/kv_sharded.py): itens mudam sem tocar o índice
+        sharded = key in SHARDED_LAYOUTS
+        path = f"/kv/{key}?recurse=true" if sharded else f"/kv/{key}"
+        index = 0
+        modify_index = None
+        backoff = 1.0
+        while True:
+            try:
+                await replica.wait_ready()
+                try:
+                    entries, new_index = await replica.blocking_get(path, index)
+                except httpx.HTTPStatusError as exc:
+                    # Chave inexistente: 404 também traz X-Consul-Index (continua bloqueando)
+                    if exc.response.status_code != 404:
+                        raise
+                    entries, new_index = None, int(exc.response.headers.get("X-Consul-Index", "0"))
+                if sharded:
+                    entries = [
+                        e for e in entries or ()
+                        if e.get("Key") == key or e.get("Key", "").startswith(items_prefix(key))
+                    ]
+                current = max((e.get("ModifyIndex", 0) for e in entries or ()), default=0)
+                if modify_index is not None and current != modify_index:
+                    self.publish(topic, {"type": "changed", "index": current})
+                modify_index = current
+                index = next_blocking_index(index, new_index)
+                backoff = 1.0
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                logger.warning(f"[CHANGE FEED] Erro no watch de '{key}': {exc}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+    async def stop(self) -> None:
+        """Cancela os watchers (assinantes recebem fim de stream ao desconectar)"""
+        tasks = list(self._watchers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watchers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do feed (para debug/observabilidade)"""
+        return {
+            **self._stats,
+            "subscribers": len(self._subscriptions),
+            "topics": {topic: len(ids) for topic, ids in self._by_topic.items()},
+            "watchers": [name for name, task in self._watchers.items() if not task.done()],
+        }
+
+
+# Instância global (singleton)
+_change_feed: Optional[ChangeFeed] = None
+
+
+def get_change_feed() -> ChangeFeed:
+    """
+    Retorna o change feed global (singleton).
+
+    Returns:
+        Instância de ChangeFeed
+    """
+    global _change_feed
+    if _change_feed is None:
+        _change_feed = ChangeFeed()
+    return _change_feed
+
+
+def reset_change_feed() -> None:
+    """Reseta o change feed global (útil para testes)"""
+    global _change_feed
+    _change_feed = None
@@ -0,0 +1,165 @@
+"""
+Circuit Breakers por Host - Falha rápida para agentes Consul inacessíveis
+
+RESPONSABILIDADES:
+- Um breaker por host:porta do agente (ConsulManager._request)
+- CLOSED → OPEN após CONSUL_CIRCUIT_FAILURE_THRESHOLD falhas consecutivas
+  (erro de rede, timeout, HTTP 5xx)
+- OPEN: requisições falham na hora com CircuitOpenError (sem timeout e sem
+  os sleeps do retry_with_backoff) durante CONSUL_CIRCUIT_OPEN_SECONDS
+- HALF_OPEN: UMA requisição de teste; sucesso fecha, falha reabre
+- Estado exportado no Prometheus (consul_circuit_state, transições, rejeições)
+
+CircuitOpenError herda de httpx.ConnectError: os chamadores existentes já
+tratam "erro de conexão" (ex.: enriquecimento de nós em api/nodes.py).
+
+ANTES: agente remoto fora do ar → cada requisição pagava timeout + retries 1-2-4s
+AGORA: após o limiar, custo ~0 até a próxima requisição de teste
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from core.config import Config
+from core.metrics import consul_circuit_rejections, consul_circuit_state, consul_circuit_transitions
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Valor do gauge consul_circuit_state por estado
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(httpx.ConnectError):
+    """Requisição recusada localmente: breaker do host está aberto"""
+
+    def __init__(self, host: str, retry_in: float):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"Circuit breaker aberto para {host} (nova tentativa em {retry_in:.1f}s)")
+
+
+class CircuitBreaker:
+    """
+    Breaker de um host: contador de falhas consecutivas + janela aberta.
+
+    Uso (ver consul_manager.circuit_breaker):
+        breaker.before_request()      # CircuitOpenError se aberto
+        ... requisição ...
+        breaker.record_success() | breaker.record_failure() | breaker.release()
+    """
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: Optional[int] = None,
+        open_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.failure_threshold = failure_threshold or Config.CONSUL_CIRCUIT_FAILURE_THRESHOLD
+        self.open_seconds = open_seconds if open_seconds is not None else Config.CONSUL_CIRCUIT_OPEN_SECONDS
+        self._clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.rejected = 0
+        consul_circuit_state.labels(host=host).set(STATE_VALUES[CLOSED])
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"[CIRCUIT BREAKER] {self.host}: {self.state} → {state}")
+        self.state = state
+        consul_circuit_state.labels(host=self.host).set(STATE_VALUES[state])
+        consul_circuit_transitions.labels(host=self.host, state=state).inc()
+
+    def before_request(self) -> None:
+        """Libera a requisição ou lança CircuitOpenError"""
+        if self.state == CLOSED:
+            return
+        if self.state == OPEN:
+            retry_in = self.opened_at + self.open_seconds - self._clock()
+            if retry_in > 0:
+                self._reject(retry_in)
+            self._transition(HALF_OPEN)
+        # HALF_OPEN: apenas uma requisição de teste por vez
+        if self.trial_in_flight:
+            self._reject(0.0)
+        self.trial_in_flight = True
+
+    def _reject(self, retry_in: float) -> None:
+        self.rejected += 1
+        consul_circuit_rejections.labels(host=self.host).inc()
+        raise CircuitOpenError(self.host, retry_in)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """Resultado neutro (ex.: cancelada pelo chamador): libera a vaga de teste"""
+        self.trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Breakers criados sob demanda por host"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado de todos os breakers (abertos primeiro)"""
+        ordered = sorted(self._breakers.values(), key=lambda b: (-STATE_VALUES[b.state], b.host))
+        return {breaker.host: breaker.get_stats() for breaker in ordered}
+
+
+# Instância global (singleton)
+_registry: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """
+    Retorna o registro global de circuit breakers (singleton).
+
+    Returns:
+        Instância de CircuitBreakerRegistry
+    """
+    global _registry
+    if _registry is None:
+        _registry = CircuitBreakerRegistry()
+    return _registry
+
+
+def reset_circuit_breakers() -> None:
+    """Reseta o registro global (útil para testes)"""
+    global _registry
+    _registry = None
@@ -79,6 +79,8 @@ class Config:
     CONSUL_CATALOG_TIMEOUT = float(os.getenv("CONSUL_CATALOG_TIMEOUT", "2.0"))
     # Número máximo de chamadas simultâneas à Catalog API (evita tempestade de requisições)
     CONSUL_SEMAPHORE_LIMIT = int(os.getenv("CONSUL_SEMAPHORE_LIMIT", "5"))
+    # Requisições simultâneas nos fan-outs por serviço/nó (catálogo sem réplica, endpoints otimizados)
+    CONSUL_FANOUT_CONCURRENCY = int(os.getenv("CONSUL_FANOUT_CONCURRENCY", "32"))
     # TTL do cache de sites (segundos) - dados do KV mudam raramente
     SITES_CACHE_TTL = int(os.getenv("SITES_CACHE_TTL", "300"))
     # Número máximo de retries para chamadas ao Consul
@@ -86,6 +88,151 @@ class Config:
     # Delay base para backoff exponencial (segundos)
     CONSUL_RETRY_DELAY = float(os.getenv("CONSUL_RETRY_DELAY", "0.5"))
 
+    # SELETOR DE SERVIDORES: EWMA de latência/erros por servidor + hedge (core/consul_selector.py)
+    # Peso da amostra mais recente na EWMA (0-1)
+    CONSUL_SELECTOR_ALPHA = float(os.getenv("CONSUL_SELECTOR_ALPHA", "0.3"))
+    # Latências recentes por servidor usadas no p95 (atraso do hedge)
+    CONSUL_SELECTOR_WINDOW = int(os.getenv("CONSUL_SELECTOR_WINDOW", "100"))
+    # Estimativa de latência (ms) para servidores ainda sem amostras
+    CONSUL_SELECTOR_INITIAL_MS = float(os.getenv("CONSUL_SELECTOR_INITIAL_MS", "50"))
+    # Multiplicador da taxa de erro no score (score = ewma * (1 + penalidade * erro))
+    CONSUL_SELECTOR_ERROR_PENALTY = float(os.getenv("CONSUL_SELECTOR_ERROR_PENALTY", "10"))
+    # Falhas consecutivas para colocar o servidor em quarentena (fim do ranking)
+    CONSUL_SELECTOR_FAILURE_THRESHOLD = int(os.getenv("CONSUL_SELECTOR_FAILURE_THRESHOLD", "3"))
+    CONSUL_SELECTOR_QUARANTINE_SECONDS = float(os.getenv("CONSUL_SELECTOR_QUARANTINE_SECONDS", "30"))
+    # Requisição duplicada (hedge) ao segundo melhor servidor após o p95 do primeiro
+    CONSUL_HEDGE_ENABLED = os.getenv("CONSUL_HEDGE_ENABLED", "true").lower() == "true"
+    # Limites (ms) do atraso do hedge
+    CONSUL_HEDGE_MIN_DELAY_MS = float(os.getenv("CONSUL_HEDGE_MIN_DELAY_MS", "20"))
+    CONSUL_HEDGE_MAX_DELAY_MS = float(os.getenv("CONSUL_HEDGE_MAX_DELAY_MS", "250"))
+
+    # CIRCUIT BREAKER: por host do agente em ConsulManager._request (core/circuit_breaker.py)
+    CONSUL_CIRCUIT_ENABLED = os.getenv("CONSUL_CIRCUIT_ENABLED", "true").lower() == "true"
+    # Falhas consecutivas (rede, timeout, 5xx) para abrir o circuito
+    CONSUL_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CONSUL_CIRCUIT_FAILURE_THRESHOLD", "3"))
+    # Tempo aberto (falha rápida) antes da requisição de teste (half-open)
+    CONSUL_CIRCUIT_OPEN_SECONDS = float(os.getenv("CONSUL_CIRCUIT_OPEN_SECONDS", "30"))
+
+    # REGISTRO EM LOTE: /v1/txn + Agent API (core/consul_bulk.py)
+    # Operações por transação (máximo do Consul: 64)
+    CONSUL_TXN_BATCH_SIZE = int(os.getenv("CONSUL_TXN_BATCH_SIZE", "64"))
+    # Lotes (transações) simultâneos
+    CONSUL_BULK_CONCURRENCY = int(os.getenv("CONSUL_BULK_CONCURRENCY", "4"))
+    # Requisições simultâneas por lote na Agent API (sem txn ou fallback)
+    CONSUL_BULK_AGENT_CONCURRENCY = int(os.getenv("CONSUL_BULK_AGENT_CONCURRENCY", "16"))
+    # Nó de catálogo SEM agente para as operações do /v1/txn (vazio = só Agent API).
+    # Em nós com agente o anti-entropy removeria os serviços escritos no catálogo.
+    CONSUL_BULK_TXN_NODE = os.getenv("CONSUL_BULK_TXN_NODE", "")
+
+    # CATALOG REPLICA: Réplica em memória do catálogo via blocking queries
+    # Habilita/desabilita a réplica (se desabilitada, get_all_services_catalog faz fan-out direto)
+    CATALOG_REPLICA_ENABLED = os.getenv("CATALOG_REPLICA_ENABLED", "true").lower() == "true"
+    # Tempo máximo de espera de cada blocking query (formato Consul: "30s", "5m")
+    CATALOG_REPLICA_WAIT = os.getenv("CATALOG_REPLICA_WAIT", "5m")
+    # Requisições simultâneas no sync inicial (/catalog/service/{name})
+    CATALOG_REPLICA_FETCH_CONCURRENCY = int(os.getenv("CATALOG_REPLICA_FETCH_CONCURRENCY", "32"))
+    # Conexões máximas do pool dedicado aos watchers (long-polls excedentes aguardam na fila)
+    CATALOG_REPLICA_MAX_CONNECTIONS = int(os.getenv("CATALOG_REPLICA_MAX_CONNECTIONS", "512"))
+    # Janela de agrupamento de mudanças antes de publicar novo snapshot (segundos)
+    CATALOG_REPLICA_DEBOUNCE = float(os.getenv("CATALOG_REPLICA_DEBOUNCE", "0.05"))
+
+    # KV BUNDLE: Snapshot versionado das chaves de configuração do KV (blocking queries)
+    # Habilita/desabilita o bundle (se desabilitado, leituras vão direto ao KV como antes)
+    KV_BUNDLE_ENABLED = os.getenv("KV_BUNDLE_ENABLED", "true").lower() == "true"
+    # Prefixos observados, separados por vírgula (audit/backups/caches ficam de fora: mudam a todo momento)
+    KV_BUNDLE_PREFIXES = os.getenv(
+        "KV_BUNDLE_PREFIXES",
+        "skills/eye/metadata/,skills/eye/monitoring-types/categorization/",
+    )
+    # Tempo máximo de espera de cada blocking query (formato Consul: "30s", "5m")
+    KV_BUNDLE_WAIT = os.getenv("KV_BUNDLE_WAIT", "5m")
+
+    @classmethod
+    def get_kv_bundle_prefixes(cls) -> List[str]:
+        """Prefixos do KV_BUNDLE_PREFIXES (terminados em "/")"""
+        prefixes = []
+        for prefix in cls.KV_BUNDLE_PREFIXES.split(","):
+            prefix = prefix.strip()
+            if prefix:
+                prefixes.append(prefix if prefix.endswith("/") else f"{prefix}/")
+        return prefixes
+
+    # KV ENVELOPE: Compressão/chunks de documentos JSON grandes (KVManager.put_json/get_json)
+    # Habilita/desabilita o envelope (se desabilitado, put_json grava JSON puro como antes)
+    KV_ENVELOPE_ENABLED = os.getenv("KV_ENVELOPE_ENABLED", "true").lower() == "true"
+    # Tamanho mínimo (bytes do JSON) para comprimir - valores menores ficam JSON puro
+    KV_ENVELOPE_MIN_BYTES = int(os.getenv("KV_ENVELOPE_MIN_BYTES", "65536"))
+    # Codec: "zstd" (requer o pacote zstandard; sem ele usa gzip), "gzip" ou "none"
+    KV_ENVELOPE_CODEC = os.getenv("KV_ENVELOPE_CODEC", "zstd")
+    # Tamanho de cada chunk comprimido (bem abaixo do limite de 512 KB por valor do Consul)
+    KV_ENVELOPE_CHUNK_BYTES = int(os.getenv("KV_ENVELOPE_CHUNK_BYTES", "131072"))
+    # Tamanho máximo do corpo de uma transação (txn_max_req_len do Consul, padrão 512 KB)
+    KV_TXN_MAX_BYTES = int(os.getenv("KV_TXN_MAX_BYTES", "524288"))
+    # Tentativas de check-and-set em itens do layout fragmentado (core/kv_sharded.py)
+    # antes de responder 409 (edição concorrente do mesmo item)
+    KV_CAS_RETRIES = int(os.getenv("KV_CAS_RETRIES", "5"))
+
+    # DASHBOARD AGGREGATES: Contadores do /dashboard/metrics mantidos por deltas
+    # (catálogo da réplica + blocking query em /health/state/any)
+    DASHBOARD_AGGREGATES_ENABLED = os.getenv("DASHBOARD_AGGREGATES_ENABLED", "true").lower() == "true"
+
+    # CHANGE FEED: Push de mudanças (catálogo/KV/regras) via SSE e WebSocket
+    # Eventos pendentes por assinante (cheio → descarta e envia resync)
+    CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "100"))
+    # Intervalo (s) de heartbeat do SSE (mantém proxies/conexões abertas)
+    CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+
+    # LOCAL CACHE: Limites do cache em memória (core/cache_manager.py)
+    # Máximo de entradas (combinações categoria/nó/filtros crescem sem limite)
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    # Orçamento de memória estimado (MB) - teto rígido do cache
+    CACHE_MAX_MEMORY_MB = int(os.getenv("CACHE_MAX_MEMORY_MB", "256"))
+    # Política de eviction: "lru" (menos recente) ou "lfu" (menos acessado, aproximado)
+    CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru")
+
+    # MONITORING CURSOR: versões anteriores do catálogo categorizado mantidas para
+    # cursores de paginação já emitidos (páginas seguintes não embaralham)
+    MONITORING_CURSOR_VERSIONS = int(os.getenv("MONITORING_CURSOR_VERSIONS", "3"))
+
+    # JSON CODEC: auto (orjson → msgspec → json) ou forçar orjson|msgspec|json (core/json_codec.py)
+    JSON_CODEC = os.getenv("JSON_CODEC", "auto").lower()
+
+    # RESPONSE CACHE: Respostas JSON pré-serializadas (+ gzip/brotli) por ETag de versão
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    # TTL (s) das respostas (a chave já inclui a versão; TTL só limita memória)
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    # Corpos menores que isso (bytes) não são comprimidos
+    RESPONSE_CACHE_MIN_BYTES = int(os.getenv("RESPONSE_CACHE_MIN_BYTES", "1024"))
+    # Nível gzip (1-9) e qualidade brotli (0-11): compressão feita 1x por resposta
+    RESPONSE_CACHE_GZIP_LEVEL = int(os.getenv("RESPONSE_CACHE_GZIP_LEVEL", "6"))
+    RESPONSE_CACHE_BROTLI_QUALITY = int(os.getenv("RESPONSE_CACHE_BROTLI_QUALITY", "5"))
+
+    # MONITORING CHANGES: histórico de deltas por versão para /monitoring/data/changes
+    # Máximo de versões retidas (since mais antigo → resync)
+    MONITORING_CHANGELOG_VERSIONS = int(os.getenv("MONITORING_CHANGELOG_VERSIONS", "64"))
+    # Máximo de linhas somadas em todos os deltas retidos (limite de memória)
+    MONITORING_CHANGELOG_MAX_ROWS = int(os.getenv("MONITORING_CHANGELOG_MAX_ROWS", "50000"))
+
+    # AUDIT STORE: Eventos de auditoria em SQLite local (WAL) - core/audit_store.py
+    # Arquivo do banco (":memory:" = sem persistência, útil em testes)
+    AUDIT_DB_PATH = os.getenv(
+        "AUDIT_DB_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "audit.db"),
+    )
+    # Retenção (dias) e teto de eventos - aplicados na compactação periódica
+    AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+    AUDIT_MAX_EVENTS = int(os.getenv("AUDIT_MAX_EVENTS", "500000"))
+    # Intervalo (s) entre compactações (retenção + checkpoint do WAL + vacuum incremental)
+    AUDIT_COMPACT_INTERVAL = int(os.getenv("AUDIT_COMPACT_INTERVAL", "3600"))
+    # Rollup periódico no KV (resumo por instância em skills/eye/audit/rollup/<instância>)
+    # para visibilidade entre múltiplas instâncias - desabilitado por padrão
+    AUDIT_KV_ROLLUP_ENABLED = os.getenv("AUDIT_KV_ROLLUP_ENABLED", "false").lower() == "true"
+    AUDIT_KV_ROLLUP_INTERVAL = int(os.getenv("AUDIT_KV_ROLLUP_INTERVAL", "300"))
+    # Eventos recentes incluídos no rollup
+    AUDIT_KV_ROLLUP_RECENT = int(os.getenv("AUDIT_KV_ROLLUP_RECENT", "50"))
+    # Nome da instância no rollup (vazio = hostname)
+    AUDIT_INSTANCE_ID = os.getenv("AUDIT_INSTANCE_ID", "")
+
     @staticmethod
     def get_main_server() -> str:
         """
@@ -0,0 +1,237 @@
+"""
+Registro/Remoção em Lote - Transaction API (/v1/txn) + fallback Agent API
+
+RESPONSABILIDADES:
+- Dividir o lote em transações de até 64 operações (limite do Consul) e
+  executar as transações com concorrência limitada
+- Resultado por item: {"id", "success", "via": "txn"|"agent", "error"}
+- Transação revertida (409): operações com erro marcadas como falha, demais
+  reenviadas sem elas (o Consul aplica a transação inteira ou nada)
+- Erro de transporte/ACL/5xx na transação: itens do lote vão pela Agent API
+  (agent_fallback=True) ou são marcados como falha
+- Callback de progresso por lote (streaming em api/services.py)
+
+IMPORTANTE - NÓ DAS OPERAÇÕES DE CATÁLOGO:
+Operações Service do /v1/txn escrevem direto no catálogo de um nó. Em nós
+com agente, o anti-entropy do agente remove serviços que ele não conhece
+(e recria os que conhece). Por isso a transação só é usada com um nó de
+catálogo sem agente (txn_node / CONSUL_BULK_TXN_NODE, ex.: nó externo dos
+probes). Sem ele, o lote vai pela Agent API, em lotes de 64 com concorrência
+limitada (em vez de um await por item).
+
+ANTES: um await por serviço, milhares de probes → minutos
+AGORA: 64 operações por requisição, CONSUL_BULK_CONCURRENCY lotes simultâneos
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from core import json_codec
+from core.config import Config
+from core.consul_manager import ConsulManager, gather_bounded
+
+logger = logging.getLogger(__name__)
+
+# Máximo de operações por transação aceito pelo Consul
+TXN_MAX_OPS = 64
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def to_catalog_service(service_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload da Agent API (id, name, tags, ...) → estrutura Service do catálogo"""
+    service = {
+        "ID": service_data.get("id") or service_data.get("ID"),
+        "Service": service_data.get("name") or service_data.get("Service"),
+        "Tags": service_data.get("tags") or service_data.get("Tags") or [],
+        "Meta": service_data.get("Meta") or service_data.get("meta") or {},
+    }
+    address = service_data.get("address") or service_data.get("Address")
+    port = service_data.get("port") or service_data.get("Port")
+    if address:
+        service["Address"] = address
+    if port:
+        service["Port"] = port
+    return service
+
+
+def _result(item_id: str, success: bool, via: str, error: Optional[str] = None) -> Dict[str, Any]:
+    return {"id": item_id, "success": success, "via": via, "error": error}
+
+
+class _BulkRun:
+    """Um lote em execução: operações por item + progresso agregado"""
+
+    def __init__(
+        self,
+        manager: ConsulManager,
+        ids: List[str],
+        txn_ops: List[Dict[str, Any]],
+        agent_call: Callable[[int], Any],
+        use_txn: bool,
+        agent_fallback: bool,
+        progress: Optional[ProgressCallback],
+    ):
+        self.manager = manager
+        self.ids = ids
+        self.txn_ops = txn_ops
+        self.agent_call = agent_call
+        self.use_txn = use_txn
+        self.agent_fallback = agent_fallback
+        self.progress = progress
+        self.done = 0
+        self.success = 0
+
+    async def run(self) -> List[Dict[str, Any]]:
+        size = min(Config.CONSUL_TXN_BATCH_SIZE, TXN_MAX_OPS)
+        batches = [list(range(i, min(i + size, len(self.ids)))) for i in range(0, len(self.ids), size)]
+        results = await gather_bounded(batches, self._run_batch, limit=Config.CONSUL_BULK_CONCURRENCY)
+        return [item for batch in results for item in batch]
+
+    async def _run_batch(self, positions: List[int]) -> List[Dict[str, Any]]:
+        if self.use_txn:
+            results = await self._txn_batch(positions)
+        else:
+            results = await self._agent_batch(positions)
+
+        self.done += len(results)
+        self.success += sum(1 for r in results if r["success"])
+        if self.progress:
+            self.progress({
+                "done": self.done,
+                "total": len(self.ids),
+                "success": self.success,
+                "failed": self.done - self.success,
+            })
+        return results
+
+    async def _txn_batch(self, positions: List[int]) -> List[Dict[str, Any]]:
+        by_position: Dict[int, Dict[str, Any]] = {}
+        pending = list(positions)
+
+        while pending:
+            ops = [self.txn_ops[p] for p in pending]
+            try:
+                await self.manager._request("PUT", "/txn", content=json_codec.dumps(ops))
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code != 409:
+                    return await self._txn_failed(positions, by_position, pending, exc)
+                # Transação revertida: falham só as operações apontadas, o resto é reenviado
+                errors = (json_codec.decode_response(exc.response) or {}).get("Errors") or []
+                failed = {
+                    e["OpIndex"]: e.get("What", "erro na transação")
+                    for e in errors
+                    if isinstance(e.get("OpIndex"), int) and 0 <= e["OpIndex"] < len(pending)
+                }
+                if not failed:
+                    return await self._txn_failed(positions, by_position, pending, exc)
+                for op_index, what in failed.items():
+                    position = pending[op_index]
+                    by_position[position] = _result(self.ids[position], False, "txn", what)
+                pending = [p for i, p in enumerate(pending) if i not in failed]
+                continue
+            except Exception as exc:
+                return await self._txn_failed(positions, by_position, pending, exc)
+
+            for position in pending:
+                by_position[position] = _result(self.ids[position], True, "txn")
+            pending = []
+
+        return [by_position[p] for p in positions]
+
+    async def _txn_failed(
+        self,
+        positions: List[int],
+        by_position: Dict[int, Dict[str, Any]],
+        pending: List[int],
+        exc: Exception,
+    ) -> List[Dict[str, Any]]:
+        """Transação indisponível: Agent API para os pendentes ou falha"""
+        logger.warning(f"⚠️ [CONSUL BULK] /v1/txn falhou ({str(exc)[:100]}) para {len(pending)} itens")
+        if self.agent_fallback:
+            for position, item in zip(pending, await self._agent_batch(pending)):
+                by_position[position] = item
+        else:
+            for position in pending:
+                by_position[position] = _result(self.ids[position], False, "txn", str(exc)[:200])
+        return [by_position[p] for p in positions]
+
+    async def _agent_batch(self, positions: List[int]) -> List[Dict[str, Any]]:
+        async def call(position: int) -> Dict[str, Any]:
+            try:
+                ok = bool(await self.agent_call(position))
+                return _result(self.ids[position], ok, "agent", None if ok else "Agent API recusou a operação")
+            except Exception as exc:
+                return _result(self.ids[position], False, "agent", str(exc)[:200])
+
+        return await gather_bounded(positions, call, limit=Config.CONSUL_BULK_AGENT_CONCURRENCY)
+
+
+async def bulk_register(
+    manager: ConsulManager,
+    services: List[Dict[str, Any]],
+    node_addr: Optional[str] = None,
+    txn_node: Optional[str] = None,
+    agent_fallback: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Registra serviços em lote.
+
+    Args:
+        manager: ConsulManager (agente/servidor que recebe as requisições)
+        services: Payloads da Agent API (id, name, tags, port, address, Meta)
+        node_addr: Agente alvo da Agent API (None = manager.host)
+        txn_node: Nó de catálogo SEM agente para /v1/txn (default: CONSUL_BULK_TXN_NODE)
+        agent_fallback: Se a transação falhar, usar a Agent API
+        progress: Callback chamado a cada lote concluído
+
+    Returns:
+        Resultado por item, na ordem de entrada
+    """
+    txn_node = txn_node or Config.CONSUL_BULK_TXN_NODE or None
+    run = _BulkRun(
+        manager,
+        ids=[s.get("id") or "unknown" for s in services],
+        txn_ops=[
+            {"Service": {"Verb": "set", "Node": txn_node, "Service": to_catalog_service(s)}}
+            for s in services
+        ] if txn_node else [],
+        agent_call=lambda i: manager.register_service(services[i], node_addr),
+        use_txn=bool(txn_node),
+        agent_fallback=agent_fallback,
+        progress=progress,
+    )
+    return await run.run()
+
+
+async def bulk_deregister(
+    manager: ConsulManager,
+    service_ids: List[str],
+    node_addr: Optional[str] = None,
+    txn_node: Optional[str] = None,
+    agent_fallback: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Remove serviços em lote (mesma semântica de bulk_register).
+
+    Returns:
+        Resultado por item, na ordem de entrada
+    """
+    txn_node = txn_node or Config.CONSUL_BULK_TXN_NODE or None
+    run = _BulkRun(
+        manager,
+        ids=list(service_ids),
+        txn_ops=[
+            {"Service": {"Verb": "delete", "Node": txn_node, "Service": {"ID": service_id}}}
+            for service_id in service_ids
+        ] if txn_node else [],
+        agent_call=lambda i: manager.deregister_service(service_ids[i], node_addr),
+        use_txn=bool(txn_node),
+        agent_fallback=agent_fallback,
+        progress=progress,
+    )
+    return await run.run()
@@ -0,0 +1,181 @@
+"""
+Tradutor de filtros para a linguagem `filter=` do Consul
+
+RESPONSABILIDADES:
+- Traduzir o dicionário de filtros de metadados (search_services,
+  check_duplicate_service) e condições do AdvancedSearch para expressões
+  `filter=` do Consul (ServiceMeta.company == "x", Meta.name matches "(?i)...")
+- Mapear os campos normalizados (Meta.*, Service, ID, Tags, Node, Address)
+  para os seletores de cada endpoint (agent, catalog, health)
+
+CONTRATO:
+- A expressão gerada é SEMPRE um superconjunto do resultado em Python: o
+  chamador continua verificando os predicados localmente. Predicados que não
+  podem ser expressos com a mesma semântica (regex, comparações numéricas,
+  substring em listas, valores não-ASCII case-insensitive...) simplesmente
+  não entram na expressão (AND) ou desabilitam o filtro (OR)
+- None = sem filtro no servidor (buscar tudo e filtrar em Python)
+
+Referência: https://developer.hashicorp.com/consul/api-docs/features/filtering
+
+ANTES: buscas seletivas baixavam o catálogo inteiro e filtravam em Python
+AGORA: o Consul devolve apenas os candidatos quando os dados não estão em memória
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from .advanced_search import LogicalOperator, SearchOperator
+
+# Seletores por endpoint:
+# - agent:   GET /agent/services
+# - catalog: GET /catalog/service/:name
+# - health:  GET /health/service/:name
+FIELD_SELECTORS: Dict[str, Dict[str, str]] = {
+    "agent": {
+        "Service": "Service",
+        "ID": "ID",
+        "Tags": "Tags",
+        "Address": "Address",
+        "Meta": "Meta",
+    },
+    "catalog": {
+        "Service": "ServiceName",
+        "ID": "ServiceID",
+        "Tags": "ServiceTags",
+        "Address": "ServiceAddress",
+        "Node": "Node",
+        "Meta": "ServiceMeta",
+    },
+    "health": {
+        "Service": "Service.Service",
+        "ID": "Service.ID",
+        "Tags": "Service.Tags",
+        "Address": "Service.Address",
+        "Node": "Node.Node",
+        "Meta": "Service.Meta",
+    },
+}
+
+# Chaves de Meta utilizáveis diretamente em seletores
+_META_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Metacaracteres do RE2 (equivalente ao regexp.QuoteMeta do Go)
+_RE2_SPECIAL = set("\\.+*?()|[]{}^$")
+
+
+def quote_value(value: str) -> str:
+    """Literal string da linguagem de filtro (aspas duplas com escape)"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _quote_meta(value: str) -> str:
+    return "".join("\\" + ch if ch in _RE2_SPECIAL else ch for ch in value)
+
+
+def selector(field: str, target: str = "agent") -> Optional[str]:
+    """
+    Seletor do Consul para um campo normalizado.
+
+    Examples:
+        selector("Meta.company") → "Meta.company"
+        selector("Meta.company", "catalog") → "ServiceMeta.company"
+        selector("Tags", "health") → "Service.Tags"
+        selector("Port") → None (sem tradução)
+    """
+    selectors = FIELD_SELECTORS[target]
+    if field.startswith("Meta."):
+        key = field[5:]
+        if not _META_KEY.match(key):
+            return None
+        return f"{selectors['Meta']}.{key}"
+    return selectors.get(field)
+
+
+def translate_meta_filters(filters: Dict[str, Any], target: str = "agent") -> Optional[str]:
+    """
+    Traduz {campo_meta: valor} (igualdade exata de todos os campos).
+
+    Valores não-string nunca casam com Meta do Consul (sempre string) e são
+    deixados para a verificação em Python.
+    """
+    clauses = []
+    for field, value in filters.items():
+        if not isinstance(value, str):
+            continue
+        sel = selector(f"Meta.{field}", target)
+        if sel is not None:
+            clauses.append(f"{sel} == {quote_value(value)}")
+    return " and ".join(clauses) or None
+
+
+def _translate_condition(field: str, operator: SearchOperator, value: Any, target: str) -> Optional[str]:
+    # Tags é lista: a semântica str(lista) do AdvancedSearch não é expressável
+    if field == "Tags":
+        return None
+    sel = selector(field, target)
+    if sel is None:
+        return None
+
+    if operator == SearchOperator.EQUALS:
+        return f"{sel} == {quote_value(str(value))}"
+
+    if operator == SearchOperator.IN:
+        if not isinstance(value, list) or not value or not all(isinstance(v, str) for v in value):
+            return None
+        return "(" + " or ".join(f"{sel} == {quote_value(v)}" for v in value) + ")"
+
+    if operator in (SearchOperator.CONTAINS, SearchOperator.STARTS_WITH, SearchOperator.ENDS_WITH):
+        text = str(value)
+        # (?i) do RE2 usa case folding simples: só equivale a lower() em ASCII
+        if not text or not text.isascii():
+            return None
+        pattern = "(?i)" + _quote_meta(text)
+        if operator == SearchOperator.STARTS_WITH:
+            pattern = "(?i)^" + _quote_meta(text)
+        elif operator == SearchOperator.ENDS_WITH:
+            pattern += "$"
+        return f"{sel} matches {quote_value(pattern)}"
+
+    # ne/not_in (campo ausente casa em Python), regex (Python ≠ RE2) e
+    # comparações numéricas (float() em Python) ficam em Python
+    return None
+
+
+def translate_conditions(
+    conditions: Iterable[Dict[str, Any]],
+    logical_operator: str = "and",
+    target: str = "agent"
+) -> Optional[str]:
+    """
+    Traduz condições do AdvancedSearch para uma expressão `filter=`.
+
+    AND: condições não traduzíveis são omitidas (superconjunto).
+    OR: qualquer condição não traduzível desabilita o filtro.
+
+    Returns:
+        Expressão ou None (sem filtro no servidor)
+    """
+    logical = LogicalOperator(logical_operator)
+    clauses: List[str] = []
+    for condition in conditions:
+        clause = _translate_condition(
+            condition["field"], SearchOperator(condition["operator"]), condition["value"], target
+        )
+        if clause is None:
+            if logical == LogicalOperator.OR:
+                return None
+            continue
+        clauses.append(clause)
+
+    if not clauses:
+        return None
+    if logical == LogicalOperator.OR and len(clauses) > 1:
+        return " or ".join(clauses)
+    return " and ".join(clauses)
+
+
+def meta_field_present(field: str, target: str = "agent") -> Optional[str]:
+    """Expressão 'Meta.<campo> is not empty' (None se a chave não é seletor válido)"""
+    sel = selector(f"Meta.{field}", target)
+    return f"{sel} is not empty" if sel is not None else None
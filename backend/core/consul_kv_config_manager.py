@@ -17,6 +17,7 @@ from pydantic import BaseModel
 import logging
 import json
 
+from core.kv_bundle import get_kv_bundle
 from core.kv_manager import KVManager
 
 logger = logging.getLogger(__name__)
@@ -141,6 +142,12 @@ class ConsulKVConfigManager:
         """
         full_key = self._full_key(key)
 
+        # KV BUNDLE: chave já mantida em memória e invalidada pelo watch - o TTL
+        # local só serviria valores desatualizados
+        if get_kv_bundle().serves(full_key):
+            use_cache = False
+            self._cache.pop(full_key, None)
+
         # PASSO 1: Tentar cache primeiro
         if use_cache and full_key in self._cache:
             cached = self._cache[full_key]
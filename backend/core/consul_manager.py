@@ -22,6 +22,10 @@ from typing import Any, Dict, List, Optional, Set, Tuple
 from urllib.parse import quote
 from functools import wraps
 from .config import Config
+from .consul_filter import translate_meta_filters
+from . import json_codec
+from .circuit_breaker import get_circuit_breakers
+from .consul_selector import AllServersFailed, get_consul_selector, server_key, split_server
 from .metrics import (
     consul_request_duration,
     consul_requests_total,
@@ -77,6 +81,69 @@ def retry_with_backoff(max_retries=3, base_delay=1, max_delay=10):
     return decorator
 
 
+def circuit_breaker(func):
+    """
+    Decorator de circuit breaker por host (core/circuit_breaker.py).
+
+    Aplicado POR FORA do retry_with_backoff: circuito aberto falha na hora,
+    sem timeout nem sleeps de retry. Uma chamada (com seus retries) = um resultado.
+    Cancelamento pelo chamador só conta como falha se a requisição já durava
+    CONSUL_CATALOG_TIMEOUT (timeout externo via asyncio.wait_for); hedges
+    cancelados e blocking queries (?index=) são neutros.
+    """
+    @wraps(func)
+    async def wrapper(self, method: str, path: str, *args, **kwargs):
+        if not Config.CONSUL_CIRCUIT_ENABLED:
+            return await func(self, method, path, *args, **kwargs)
+
+        breaker = get_circuit_breakers().get(f"{self.host}:{self.port}")
+        breaker.before_request()
+        start = time.monotonic()
+        try:
+            response = await func(self, method, path, *args, **kwargs)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                # 4xx: agente respondeu
+                breaker.record_success()
+            raise
+        except (httpx.RequestError, ConnectionError, asyncio.TimeoutError):
+            breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            blocking = "index" in (kwargs.get("params") or {})
+            if not blocking and time.monotonic() - start >= Config.CONSUL_CATALOG_TIMEOUT:
+                breaker.record_failure()
+            else:
+                breaker.release()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return response
+    return wrapper
+
+
+async def gather_bounded(items, fetch, limit: Optional[int] = None) -> List[Any]:
+    """
+    asyncio.gather de fetch(item) para cada item com no máximo `limit`
+    corrotinas simultâneas (default: Config.CONSUL_FANOUT_CONCURRENCY).
+
+    Fan-outs por serviço/nó sem limite disparam centenas de requisições de
+    uma vez contra o mesmo agente; com o semáforo o pool compartilhado é
+    reaproveitado em ondas. Resultados na ordem de `items`.
+    """
+    semaphore = asyncio.Semaphore(limit or Config.CONSUL_FANOUT_CONCURRENCY)
+
+    async def run(item):
+        async with semaphore:
+            return await fetch(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+
 # ============================================================================
 # CLASSE PRINCIPAL CONSUL
 # ============================================================================
@@ -95,6 +162,9 @@ class ConsulManager:
     _shared_client: Optional[httpx.AsyncClient] = None
     _client_lock = asyncio.Lock()
 
+    # KV BUNDLE: snapshot das chaves de configuração (registrado por KVBundle.start)
+    kv_bundle: Optional[Any] = None
+
     def __init__(self, host: str = None, port: int = None, token: str = None):
         # Lazy evaluation: só acessa Config.MAIN_SERVER se necessário (evita loop circular)
         self.host = host or getattr(Config, 'MAIN_SERVER', os.getenv('CONSUL_HOST', 'localhost'))
@@ -144,6 +214,7 @@ class ConsulManager:
             cls._shared_client = None
             logger.info("✅ [ConsulManager] Cliente HTTP compartilhado fechado")
 
+    @circuit_breaker
     @retry_with_backoff()
     async def _request(self, method: str, path: str, use_cache: bool = False, **kwargs):
         """
@@ -240,6 +311,11 @@ class ConsulManager:
         consul_api_type.labels(api_type=api_type).inc()
 
         response.raise_for_status()
+
+        # KV BUNDLE: escrita em chave de configuração → leituras vão ao KV até o watch confirmar
+        if api_type == "kv" and method in ("PUT", "DELETE") and ConsulManager.kv_bundle is not None:
+            ConsulManager.kv_bundle.mark_written(path[len("/kv/"):].split("?")[0])
+
         return response
 
     @staticmethod
@@ -259,12 +335,55 @@ class ConsulManager:
 
         return candidate
 
+    @staticmethod
+    def normalize_catalog_instance(service_name: str, instance: Dict) -> Dict:
+        """
+        Converte uma entrada de /catalog/service/{name} para o formato interno.
+
+        Formato compartilhado entre get_all_services_catalog() e a CatalogReplica.
+        """
+        node_name = instance.get("Node", "unknown")
+        service_id = instance.get("ServiceID") or f"{service_name}-{node_name}"
+        return {
+            "ID": service_id,
+            "Service": service_name,
+            "Tags": instance.get("ServiceTags") or [],
+            "Meta": instance.get("ServiceMeta") or {},
+            "Port": instance.get("ServicePort", 0),
+            "Address": instance.get("ServiceAddress", ""),
+            "Node": node_name,
+            "NodeAddress": instance.get("Address", "")
+        }
+
+    async def get_services_snapshot(self, filter_expr: Optional[str] = None) -> List[Dict]:
+        """
+        Retorna [service_data] de TODO o catálogo a partir da réplica.
+
+        Lista (uma entrada por instância) nas duas origens: a réplica inclui o
+        mesmo service ID em nodes diferentes; /agent/services é chaveado por ID.
+
+        CATALOG REPLICA: Leitura em memória (0 requisições ao Consul).
+        Se a réplica ainda não estiver pronta, usa /agent/services (comportamento anterior).
+
+        Args:
+            filter_expr: Expressão `filter=` aplicada apenas quando os dados
+                vêm do Consul (ver core.consul_filter). O resultado pode conter
+                mais serviços que o filtro - o chamador SEMPRE verifica em Python.
+        """
+        from .catalog_replica import get_ready_snapshot
+
+        snapshot = get_ready_snapshot()
+        if snapshot is not None:
+            return snapshot.to_flat_list()
+        services = await self.get_services(filter_expr=filter_expr)
+        return list(services.values())
+
     async def query_agent_services(self, filter_expr: Optional[str] = None) -> Dict[str, Dict]:
         """Consulta /agent/services com filtro opcional"""
         params = {"filter": filter_expr} if filter_expr else None
         try:
             response = await self._request("GET", "/agent/services", params=params)
-            return response.json()
+            return json_codec.decode_response(response)
         except Exception as exc:
             logger.error("Failed to query agent services: %s", exc)
             return {}
@@ -273,7 +392,7 @@ class ConsulManager:
         """Retorna visão geral dos serviços (similar ao TenSunS)"""
         try:
             response = await self._request("GET", "/internal/ui/services")
-            info = response.json()
+            info = json_codec.decode_response(response)
             services_list: List[Dict] = []
 
             for item in info:
@@ -301,7 +420,7 @@ class ConsulManager:
         """Retorna apenas os nomes dos serviços cadastrados"""
         try:
             response = await self._request("GET", "/catalog/services")
-            services = response.json()
+            services = json_codec.decode_response(response)
             services.pop("consul", None)
             return sorted(list(services.keys()))
         except Exception as exc:
@@ -312,7 +431,7 @@ class ConsulManager:
         """Retorna instâncias e health-checks de um serviço específico"""
         try:
             response = await self._request("GET", f"/health/service/{quote(service_name, safe='')}")
-            data = response.json()
+            data = json_codec.decode_response(response)
             instances: List[Dict] = []
 
             for entry in data:
@@ -367,7 +486,7 @@ class ConsulManager:
         """Obtém dados do host em que o agente Consul está rodando"""
         try:
             response = await self._request("GET", "/agent/host")
-            info = response.json()
+            info = json_codec.decode_response(response)
 
             pmem = round(info["Memory"]["usedPercent"])
             pdisk = round(info["Disk"]["usedPercent"])
@@ -412,7 +531,7 @@ class ConsulManager:
         """Obtém membros do cluster via API"""
         try:
             response = await self._request("GET", "/agent/members")
-            members = response.json()
+            members = json_codec.decode_response(response)
 
             # Processar e enriquecer com nós conhecidos
             known_nodes_dict = {}
@@ -442,16 +561,29 @@ class ConsulManager:
                 for name, ip in Config.KNOWN_NODES.items()
             ]
 
-    async def get_services(self, node_addr: str = None) -> Dict:
-        """Obtém serviços de um nó específico ou local"""
+    async def get_services(self, node_addr: str = None, filter_expr: Optional[str] = None) -> Dict:
+        """
+        Obtém serviços de um nó específico ou local
+
+        Args:
+            node_addr: Nó alvo (None = local)
+            filter_expr: Expressão `filter=` do Consul (ver core.consul_filter)
+        """
         if node_addr and node_addr != self.host:
             # Conectar ao nó específico
             temp_manager = ConsulManager(host=node_addr, token=self.token)
-            return await temp_manager.get_services()
+            return await temp_manager.get_services(filter_expr=filter_expr)
 
+        params = {"filter": filter_expr} if filter_expr else None
         try:
-            response = await self._request("GET", "/agent/services")
-            return response.json()
+            response = await self._request("GET", "/agent/services", params=params)
+            return json_codec.decode_response(response)
+        except httpx.HTTPStatusError as exc:
+            if filter_expr and exc.response.status_code == 400:
+                # Expressão rejeitada pelo agente: buscar sem filtro (chamador filtra em Python)
+                logger.warning(f"[CONSUL FILTER] ⚠️ Filtro rejeitado ({filter_expr!r}), buscando sem filtro")
+                return await self.get_services()
+            return {}
         except:
             return {}
 
@@ -487,14 +619,22 @@ class ConsulManager:
             print(f"Erro: {e}")
             return False
 
-    async def get_health_status(self, service_name: str = None) -> List:
-        """Obtém status de saúde dos serviços"""
+    async def get_health_status(self, service_name: str = None, filter_expr: Optional[str] = None) -> List:
+        """
+        Obtém status de saúde dos serviços
+
+        Args:
+            service_name: Serviço (None = todos os checks)
+            filter_expr: Expressão `filter=` para /health/service (seletores
+                target="health" de core.consul_filter)
+        """
         try:
             if service_name:
-                response = await self._request("GET", f"/health/service/{service_name}")
+                params = {"filter": filter_expr} if filter_expr else None
+                response = await self._request("GET", f"/health/service/{service_name}", params=params)
             else:
                 response = await self._request("GET", "/health/state/any")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -502,7 +642,7 @@ class ConsulManager:
         """Lista todos os serviços do catálogo"""
         try:
             response = await self._request("GET", "/catalog/services")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return {}
 
@@ -576,7 +716,7 @@ class ConsulManager:
         """Obtém todos os serviços com um nome específico do catálogo"""
         try:
             response = await self._request("GET", f"/catalog/service/{service_name}")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -596,7 +736,7 @@ class ConsulManager:
         """Lista todos os datacenters do Consul"""
         try:
             response = await self._request("GET", "/catalog/datacenters")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -604,7 +744,7 @@ class ConsulManager:
         """Lista todos os nós do catálogo"""
         try:
             response = await self._request("GET", "/catalog/nodes")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -612,7 +752,7 @@ class ConsulManager:
         """Obtém todos os serviços de um nó específico pelo nome"""
         try:
             response = await self._request("GET", f"/catalog/node/{node_name}")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return {}
 
@@ -629,7 +769,7 @@ class ConsulManager:
             if passing:
                 path += "?passing=true"
             response = await self._request("GET", path)
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -640,7 +780,7 @@ class ConsulManager:
                 response = await self._request("GET", f"/health/checks/{service_id}")
             else:
                 response = await self._request("GET", "/agent/checks")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -648,7 +788,7 @@ class ConsulManager:
         """Obtém valor do KV store"""
         try:
             response = await self._request("GET", f"/kv/{key}")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return None
 
@@ -672,7 +812,7 @@ class ConsulManager:
         """Lista chaves do KV store com determinado prefixo"""
         try:
             response = await self._request("GET", f"/kv/{prefix}?keys")
-            return response.json()
+            return json_codec.decode_response(response)
         except:
             return []
 
@@ -685,10 +825,17 @@ class ConsulManager:
 
         SPRINT 1 - FIX CRÍTICO (2025-11-15)
         Corrige bug: 'str' object has no attribute 'get'
+
+        KV BUNDLE: chaves de configuração (metadata/, regras) vêm do snapshot
+        em memória mantido por blocking query (sem round-trip ao KV).
         """
+        bundle = ConsulManager.kv_bundle
+        if bundle is not None and bundle.serves(key):
+            return bundle.get_json(key, unwrap=False)
+
         try:
             response = await self._request("GET", f"/kv/{key}")
-            payload = response.json()
+            payload = json_codec.decode_response(response)
             if not payload:
                 return None
 
@@ -696,9 +843,9 @@ class ConsulManager:
             if raw_value is None:
                 return None
 
-            decoded = base64.b64decode(raw_value).decode("utf-8")
+            raw_bytes = base64.b64decode(raw_value)
             try:
-                parsed = json.loads(decoded)
+                parsed = json_codec.loads(raw_bytes)
                 # ✅ GARANTIR que retorna dict/list, NUNCA string!
                 if not isinstance(parsed, (dict, list)):
                     logger.warning(
@@ -708,6 +855,7 @@ class ConsulManager:
                     return None
                 return parsed
             except json.JSONDecodeError as e:
+                decoded = raw_bytes.decode("utf-8", errors="replace")
                 logger.error(
                     f"❌ KV key '{key}' contém valor não-JSON: {decoded[:100]}... "
                     f"Erro: {e}. Retornando None."
@@ -728,7 +876,7 @@ class ConsulManager:
     async def put_kv_json(self, key: str, value: Any) -> bool:
         """Armazena um valor JSON serializável no KV"""
         try:
-            payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            payload = json_codec.dumps(value)
             await self._request("PUT", f"/kv/{key}", content=payload)
             return True
         except Exception as exc:
@@ -749,20 +897,21 @@ class ConsulManager:
         """
         try:
             response = await self._request("GET", f"/kv/{prefix}", params={"recurse": "true"})
-            entries = response.json()
+            entries = json_codec.decode_response(response)
             result: Dict[str, Dict] = {}
 
             for item in entries:
                 value = item.get("Value")
                 if value is None:
                     continue
-                decoded = base64.b64decode(value).decode("utf-8")
+                raw_bytes = base64.b64decode(value)
 
-                # Parse JSON
+                # Parse JSON (bytes direto no codec; texto puro se não for JSON)
+                # errors="replace": chunks binários de valores envelopados (core/kv_envelope.py)
                 try:
-                    parsed_value = json.loads(decoded)
+                    parsed_value = json_codec.loads(raw_bytes)
                 except json.JSONDecodeError:
-                    parsed_value = decoded
+                    parsed_value = raw_bytes.decode("utf-8", errors="replace")
 
                 # Se include_metadata=True, retornar também CreateIndex, ModifyIndex
                 if include_metadata:
@@ -797,7 +946,8 @@ class ConsulManager:
         Returns:
             Dicionário com service_id: service_data dos serviços que correspondem
         """
-        all_services = await self.get_services()
+        # Consul filtra no servidor; verificação abaixo cobre o que não é traduzível
+        all_services = await self.get_services(filter_expr=translate_meta_filters(filters))
         filtered = {}
 
         for service_id, service_data in all_services.items():
@@ -840,7 +990,17 @@ class ConsulManager:
             True se encontrou duplicata, False caso contrário
         """
         try:
-            services = await self.get_services(target_node_addr)
+            # Apenas candidatos com as mesmas chaves (filtro no servidor)
+            services = await self.get_services(
+                target_node_addr,
+                filter_expr=translate_meta_filters({
+                    "module": module,
+                    "company": company,
+                    "project": project,
+                    "env": env,
+                    "name": name,
+                })
+            )
 
             for sid, svc in services.items():
                 # Pular o próprio serviço se estivermos atualizando
@@ -915,6 +1075,10 @@ class ConsulManager:
         """
         Busca serviços com fallback inteligente (master → clients)
 
+        Sites ordenados pelo seletor compartilhado (core/consul_selector.py):
+        EWMA de latência/erros, hedge no segundo melhor após o p95 do primeiro.
+        Master morto custa o atraso do hedge, não timeout_per_node.
+
         SPRINT 1 CORREÇÕES (2025-11-15):
         ✅ OFICIAL DOCS COMPLIANT:
         - Usa /catalog/services (vista global, TODOS os serviços)
@@ -934,6 +1098,7 @@ class ConsulManager:
                     "source_name": "Palmas",
                     "is_master": True,
                     "attempts": 1,
+                    "hedged": False,
                     "total_time_ms": 52,
                     "cache_status": "HIT",
                     "age_seconds": 0,
@@ -946,93 +1111,75 @@ class ConsulManager:
         start_time = datetime.now()
         sites = await self._load_sites_config()
 
-        attempts = 0
-        errors = []
-
-        for site in sites:
-            attempts += 1
-            node_addr = site.get("prometheus_instance")
-            node_name = site.get("name", node_addr)
-            is_master = site.get("is_default", False)
-
-            if not node_addr:
-                continue
-
-            try:
-                logger.debug(
-                    f"[Consul Fallback] Tentativa {attempts}: {node_name} ({node_addr}) "
-                    f"[{'MASTER' if is_master else 'client'}]"
-                )
-
-                # Criar manager temporário para o node específico
-                temp_manager = ConsulManager(host=node_addr, token=self.token)
-
-                # ✅ CORREÇÃO CRÍTICA: Catalog API (não Agent API!)
-                # Catalog API retorna TODOS os serviços do datacenter
-                # Agent API retornaria APENAS serviços locais do node
-                response = await asyncio.wait_for(
-                    temp_manager._request(
-                        "GET",
-                        "/catalog/services",
-                        use_cache=True,  # ← Agent caching (OFFICIAL FEATURE)
-                        params={"stale": ""}  # ← Stale reads (OFFICIAL CONSISTENCY MODE)
-                    ),
-                    timeout=timeout_per_node
-                )
-
-                services = response.json()
-                elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
-
-                # ✅ Metadata completo (conforme Copilot especificou)
-                metadata = {
-                    "source_node": node_addr,
-                    "source_name": node_name,
-                    "is_master": is_master,
-                    "attempts": attempts,
-                    "total_time_ms": int(elapsed_ms),
-                    "cache_status": response.headers.get("X-Cache", "MISS"),
-                    "age_seconds": int(response.headers.get("Age", "0")),
-                    "staleness_ms": int(response.headers.get("X-Consul-LastContact", "0"))
-                }
-
-                if not is_master:
-                    logger.warning(
-                        f"⚠️ [Consul Fallback] Master inacessível! Usando client {node_name}"
-                    )
-                    metadata["warning"] = f"Master offline - dados de {node_name}"
-
-                logger.info(
-                    f"✅ [Consul Fallback] Sucesso em {elapsed_ms:.0f}ms via {node_name} "
-                    f"(cache={metadata['cache_status']}, staleness={metadata['staleness_ms']}ms)"
-                )
-
-                return (services, metadata)
-
-            except asyncio.TimeoutError:
-                error_msg = f"Timeout {timeout_per_node}s em {node_name} ({node_addr})"
-                errors.append(error_msg)
-                logger.warning(f"⏱️ [Consul Fallback] {error_msg}")
-
-            except Exception as e:
-                error_msg = f"Erro em {node_name} ({node_addr}): {str(e)[:100]}"
-                errors.append(error_msg)
-                logger.error(f"❌ [Consul Fallback] {error_msg}")
+        # Seletor compartilhado: site mais rápido/saudável primeiro, hedge no segundo
+        selector = get_consul_selector()
+        selector.update_from_sites(sites)
+        sites_by_server = {
+            server_key(site["prometheus_instance"]): site
+            for site in sites if site.get("prometheus_instance")
+        }
+
+        async def fetch(server: str):
+            host, port = split_server(server)
+            temp_manager = ConsulManager(host=host, port=port, token=self.token)
+            # ✅ CORREÇÃO CRÍTICA: Catalog API (não Agent API!)
+            # Catalog API retorna TODOS os serviços do datacenter
+            # Agent API retornaria APENAS serviços locais do node
+            return await temp_manager._request(
+                "GET",
+                "/catalog/services",
+                use_cache=True,  # ← Agent caching (OFFICIAL FEATURE)
+                params={"stale": ""}  # ← Stale reads (OFFICIAL CONSISTENCY MODE)
+            )
 
-            # Verificar timeout global
-            elapsed = (datetime.now() - start_time).total_seconds()
-            if elapsed >= global_timeout:
-                logger.warning(
-                    f"⏱️ [Consul Fallback] Timeout global {global_timeout}s atingido"
-                )
-                break
+        try:
+            response, server, info = await selector.execute(
+                fetch,
+                timeout=timeout_per_node,
+                global_timeout=global_timeout,
+                candidates=sites_by_server,
+            )
+        except AllServersFailed as e:
+            elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
+            raise Exception(
+                f"❌ [Consul Fallback] Nenhum node acessível após {len(sites_by_server)} tentativas "
+                f"({elapsed_ms:.0f}ms). Erros: {'; '.join(e.errors)}"
+            )
 
-        # ❌ TODAS as tentativas falharam!
+        services = json_codec.decode_response(response)
         elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
-        raise Exception(
-            f"❌ [Consul Fallback] Nenhum node acessível após {attempts} tentativas "
-            f"({elapsed_ms:.0f}ms). Erros: {'; '.join(errors)}"
+        site = sites_by_server[server]
+        node_addr = site["prometheus_instance"]
+        node_name = site.get("name", node_addr)
+        is_master = site.get("is_default", False)
+
+        # ✅ Metadata completo (conforme Copilot especificou)
+        metadata = {
+            "source_node": node_addr,
+            "source_name": node_name,
+            "is_master": is_master,
+            "attempts": info["attempts"],
+            "hedged": info["hedged"],
+            "total_time_ms": int(elapsed_ms),
+            "cache_status": response.headers.get("X-Cache", "MISS"),
+            "age_seconds": int(response.headers.get("Age", "0")),
+            "staleness_ms": int(response.headers.get("X-Consul-LastContact", "0"))
+        }
+
+        if not is_master:
+            logger.warning(
+                f"⚠️ [Consul Fallback] Master fora do ranking (lento/inacessível)! Usando client {node_name}"
+            )
+            metadata["warning"] = f"Master lento/offline - dados de {node_name}"
+
+        logger.info(
+            f"✅ [Consul Fallback] Sucesso em {elapsed_ms:.0f}ms via {node_name} "
+            f"(tentativas={info['attempts']}, hedge={info['hedged']}, "
+            f"cache={metadata['cache_status']}, staleness={metadata['staleness_ms']}ms)"
         )
 
+        return (services, metadata)
+
     async def get_all_services_catalog(
         self,
         use_fallback: bool = True
@@ -1052,6 +1199,11 @@ class ConsulManager:
         - Cache complementa Agent Caching (TTL 3 dias)
         - Ideal para requests repetidos em janelas curtas
 
+        CATALOG REPLICA:
+        ✅ Quando a réplica (core/catalog_replica.py) está pronta, retorna cópia do
+           snapshot em memória (0 requisições ao Consul). _metadata inclui
+           catalog_version e catalog_index.
+
         Substitui get_all_services_from_all_nodes() com correção crítica:
         - ANTES (Agent API): Dados INCOMPLETOS (só serviços locais do node)
         - AGORA (Catalog API): Dados COMPLETOS (todos serviços do cluster)
@@ -1077,6 +1229,16 @@ class ConsulManager:
         # Cache local incompatível com estrutura de dados deste método
 
         if use_fallback:
+            # ✅ CATALOG REPLICA: Servir do snapshot em memória (sempre quente, versionado)
+            # Retorna cópia - consumidores podem modificar livremente
+            from .catalog_replica import get_ready_snapshot
+
+            snapshot = get_ready_snapshot()
+            if snapshot is not None:
+                all_services = snapshot.to_nodes_dict()
+                all_services["_metadata"] = snapshot.metadata()
+                return all_services
+
             # ✅ CORREÇÃO CRÍTICA (2025-11-16)
             # PROBLEMA IDENTIFICADO: Claude Code usava /agent/services (retorna só LOCAL)
             # SOLUÇÃO: Usar /catalog/services (lista global) + /catalog/service/{name} (detalhes)
@@ -1098,7 +1260,7 @@ class ConsulManager:
                 params={"stale": "", "cached": ""}
             )
 
-            service_names = response.json()  # Dict {name: [tags]}
+            service_names = json_codec.decode_response(response)  # Dict {name: [tags]}
             logger.debug(f"[Catalog] Encontrados {len(service_names)} nomes de serviços")
 
             # PASSO 2: Buscar detalhes de TODOS os serviços em PARALELO
@@ -1111,36 +1273,21 @@ class ConsulManager:
                         use_cache=True,
                         params={"stale": "", "cached": ""}
                     )
-                    return name, resp.json()
+                    return name, json_codec.decode_response(resp)
                 except Exception as e:
                     logger.error(f"[Catalog] Erro ao buscar serviço '{name}': {e}")
                     return name, []
 
-            # Executar todas as requisições em paralelo
-            tasks = [fetch_service_details(name) for name in service_names.keys()]
-            results = await asyncio.gather(*tasks)
+            # Executar as requisições em paralelo (limitado a CONSUL_FANOUT_CONCURRENCY)
+            results = await gather_bounded(service_names.keys(), fetch_service_details)
 
             # PASSO 3: Converter para estrutura {node_name: {service_id: service_data}}
             all_services = {}
 
             for service_name, instances in results:
                 for instance in instances:
-                    node_name = instance.get("Node", "unknown")
-                    service_id = instance.get("ServiceID", f"{service_name}-{node_name}")
-
-                    if node_name not in all_services:
-                        all_services[node_name] = {}
-
-                    all_services[node_name][service_id] = {
-                        "ID": service_id,
-                        "Service": service_name,
-                        "Tags": instance.get("ServiceTags", []),
-                        "Meta": instance.get("ServiceMeta", {}),
-                        "Port": instance.get("ServicePort", 0),
-                        "Address": instance.get("ServiceAddress", ""),
-                        "Node": node_name,
-                        "NodeAddress": instance.get("Address", "")
-                    }
+                    svc = self.normalize_catalog_instance(service_name, instance)
+                    all_services.setdefault(svc["Node"], {})[svc["ID"]] = svc
 
             # Adicionar metadata para debugging
             all_services["_metadata"] = metadata
@@ -1161,9 +1308,30 @@ class ConsulManager:
                 use_cache=True,
                 params={"stale": ""}
             )
-            services = response.json()
+            services = json_codec.decode_response(response)
             return {"default": services}
 
+    async def get_all_instances(self) -> List[Dict]:
+        """
+        Lista plana de todas as instâncias do catálogo, já normalizadas
+        (ID, Service, Tags, Meta, Port, Address, Node, NodeAddress).
+
+        - Réplica pronta: referências do snapshot (0 requisições) - NÃO modificar
+        - Sem réplica: get_all_services_catalog() (1 lista + fan-out limitado)
+
+        Substitui o padrão /internal/ui/services + /health/service/{name}
+        sequencial dos endpoints otimizados (N round-trips → 1 onda paralela).
+        """
+        from .catalog_replica import get_ready_snapshot
+
+        snapshot = get_ready_snapshot()
+        if snapshot is not None:
+            return list(snapshot.iter_instances())
+
+        all_services = await self.get_all_services_catalog()
+        all_services.pop("_metadata", None)
+        return [svc for services in all_services.values() for svc in services.values()]
+
     async def get_all_services_from_all_nodes(self) -> Dict[str, Dict]:
         """
         ⚠️ DEPRECATED - Esta função usa Agent API que retorna apenas dados locais
@@ -1317,41 +1485,42 @@ class ConsulManager:
 
         return len(errors) == 0, errors
 
-    async def bulk_register_services(self, services: List[Dict], node_addr: str = None) -> Dict[str, bool]:
+    async def bulk_register_services(
+        self,
+        services: List[Dict],
+        node_addr: str = None,
+        txn_node: Optional[str] = None,
+        agent_fallback: bool = True,
+    ) -> Dict[str, bool]:
         """
-        Registra múltiplos serviços em lote
+        Registra múltiplos serviços em lote (core/consul_bulk.py)
+
+        Transações /v1/txn de até 64 operações quando há nó de catálogo sem
+        agente (txn_node / CONSUL_BULK_TXN_NODE); senão Agent API em lotes
+        com concorrência limitada.
 
         Returns:
             Dicionário com {service_id: success_status}
         """
-        results = {}
-
-        for service_data in services:
-            service_id = service_data.get("id", "unknown")
-            try:
-                success = await self.register_service(service_data, node_addr)
-                results[service_id] = success
-            except Exception as e:
-                print(f"Erro ao registrar serviço {service_id}: {e}")
-                results[service_id] = False
+        from .consul_bulk import bulk_register
 
-        return results
+        results = await bulk_register(self, services, node_addr, txn_node, agent_fallback)
+        return {item["id"]: item["success"] for item in results}
 
-    async def bulk_deregister_services(self, service_ids: List[str], node_addr: str = None) -> Dict[str, bool]:
+    async def bulk_deregister_services(
+        self,
+        service_ids: List[str],
+        node_addr: str = None,
+        txn_node: Optional[str] = None,
+        agent_fallback: bool = True,
+    ) -> Dict[str, bool]:
         """
-        Remove múltiplos serviços em lote
+        Remove múltiplos serviços em lote (core/consul_bulk.py)
 
         Returns:
             Dicionário com {service_id: success_status}
         """
-        results = {}
-
-        for service_id in service_ids:
-            try:
-                success = await self.deregister_service(service_id, node_addr)
-                results[service_id] = success
-            except Exception as e:
-                print(f"Erro ao remover serviço {service_id}: {e}")
-                results[service_id] = False
+        from .consul_bulk import bulk_deregister
 
-        return results
+        results = await bulk_deregister(self, service_ids, node_addr, txn_node, agent_fallback)
+        return {item["id"]: item["success"] for item in results}
@@ -0,0 +1,369 @@
+"""
+Seletor de Servidores Consul - EWMA de latência/erros + requisições hedged
+
+RESPONSABILIDADES:
+- Manter, por servidor (CONSUL_SERVERS + sites do KV metadata/sites), a
+  latência EWMA, a taxa de erro EWMA e uma janela de latências recentes (p95)
+- Ordenar os servidores: saudáveis mais rápidos primeiro, servidores com
+  falhas consecutivas em quarentena vão para o fim da fila
+- execute(): envia a leitura ao melhor servidor e, se ele não responder até
+  o p95 observado, dispara uma cópia (hedge) para o segundo melhor; vence a
+  primeira resposta bem-sucedida, a outra é cancelada
+- Falha rápida (conexão recusada, erro HTTP) → próximo servidor na hora
+
+ANTES: fallback sequencial master → clients, até timeout_per_node (2s) por
+       servidor morto, em TODA requisição
+AGORA: master lento/morto custa o atraso do hedge (dezenas de ms) e é
+       rebaixado no ranking pela EWMA para as próximas requisições
+
+Usado por ConsulManager.get_services_with_fallback() e
+api/nodes.get_consul_manager_with_fallback().
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from core.config import Config
+from core.metrics import consul_hedged_requests, consul_server_latency_ewma
+
+logger = logging.getLogger(__name__)
+
+
+def server_key(address: str, default_port: Optional[int] = None) -> str:
+    """Normaliza "host" / "host:porta" para "host:porta" """
+    if ":" in address:
+        return address
+    return f"{address}:{default_port or Config.CONSUL_PORT}"
+
+
+def split_server(key: str) -> Tuple[str, int]:
+    """"host:porta" → (host, porta)"""
+    host, _, port = key.rpartition(":")
+    return host, int(port)
+
+
+@dataclass
+class ServerStats:
+    """Estado de um servidor Consul no seletor"""
+    key: str
+    name: str
+    is_master: bool = False
+    ewma_ms: Optional[float] = None
+    error_rate: float = 0.0
+    consecutive_failures: int = 0
+    quarantined_until: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=Config.CONSUL_SELECTOR_WINDOW))
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.quarantined_until
+
+    def score(self) -> float:
+        # Sem amostras: estimativa inicial (master ligeiramente preferido)
+        latency = self.ewma_ms if self.ewma_ms is not None else Config.CONSUL_SELECTOR_INITIAL_MS
+        if self.ewma_ms is None and self.is_master:
+            latency *= 0.5
+        return latency * (1 + Config.CONSUL_SELECTOR_ERROR_PENALTY * self.error_rate)
+
+    def p95_ms(self) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class AllServersFailed(Exception):
+    """Nenhum servidor Consul respondeu (lista de erros por servidor)"""
+
+    def __init__(self, errors: List[str], failed: Optional[Dict[str, str]] = None):
+        self.errors = errors
+        # servidor → "timeout" | "failure"
+        self.failed = failed or {}
+        super().__init__(f"Nenhum servidor Consul respondeu. Erros: {'; '.join(errors)}")
+
+
+class ConsulServerSelector:
+    """
+    Ranking de servidores por EWMA + execução com hedge.
+
+    Exemplo de Uso:
+        ```python
+        selector = get_consul_selector()
+        selector.update_servers([("172.16.1.26", "Palmas", True), ("172.16.200.14", "Rio", False)])
+
+        async def fetch(server):
+            host, port = split_server(server)
+            return await ConsulManager(host=host, port=port)._request("GET", "/catalog/services")
+
+        response, server, info = await selector.execute(fetch, timeout=2.0)
+        ```
+    """
+
+    def __init__(
+        self,
+        alpha: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.alpha = alpha if alpha is not None else Config.CONSUL_SELECTOR_ALPHA
+        self.hedge_enabled = hedge if hedge is not None else Config.CONSUL_HEDGE_ENABLED
+        self._clock = clock
+        self._servers: Dict[str, ServerStats] = {}
+        self._stats = {"executions": 0, "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "failures": 0}
+
+    # ------------------------------------------------------------------
+    # Servidores
+    # ------------------------------------------------------------------
+
+    def update_servers(self, servers: Iterable[Tuple[str, str, bool]]) -> None:
+        """
+        Registra servidores (endereço, nome, is_master); estatísticas dos já
+        conhecidos são preservadas. Servidores ausentes da lista continuam
+        conhecidos (CONSUL_SERVERS e sites do KV são registrados em momentos distintos).
+        """
+        for address, name, is_master in servers:
+            if not address:
+                continue
+            key = server_key(address)
+            stats = self._servers.get(key)
+            if stats is None:
+                self._servers[key] = ServerStats(key=key, name=name or key, is_master=is_master)
+            else:
+                stats.name = name or stats.name
+                stats.is_master = stats.is_master or is_master
+
+    def update_from_sites(self, sites: List[Dict[str, Any]]) -> None:
+        """Registra os sites do KV metadata/sites (prometheus_instance = agente Consul)"""
+        self.update_servers(
+            (site.get("prometheus_instance"), site.get("name"), bool(site.get("is_default")))
+            for site in sites
+        )
+
+    def update_from_config(self) -> None:
+        """Registra CONSUL_SERVERS (o primeiro é tratado como preferido)"""
+        self.update_servers(
+            (server, server, index == 0) for index, server in enumerate(Config.get_consul_servers())
+        )
+
+    def ranked(self, candidates: Optional[Iterable[str]] = None) -> List[ServerStats]:
+        """Servidores do melhor para o pior (quarentena sempre por último)"""
+        now = self._clock()
+        if candidates is None:
+            servers = list(self._servers.values())
+        else:
+            servers = [self._servers[server_key(c)] for c in candidates if server_key(c) in self._servers]
+        return sorted(servers, key=lambda s: (not s.healthy(now), s.score(), s.key))
+
+    def hedge_delay(self, server: ServerStats) -> float:
+        """Atraso (s) antes do hedge: p95 do servidor, limitado a [min, max]"""
+        p95 = server.p95_ms()
+        if p95 is None:
+            p95 = server.ewma_ms * 2 if server.ewma_ms is not None else Config.CONSUL_HEDGE_MAX_DELAY_MS
+        delay_ms = min(max(p95, Config.CONSUL_HEDGE_MIN_DELAY_MS), Config.CONSUL_HEDGE_MAX_DELAY_MS)
+        return delay_ms / 1000
+
+    # ------------------------------------------------------------------
+    # Observações
+    # ------------------------------------------------------------------
+
+    def record_success(self, key: str, elapsed_ms: float) -> None:
+        stats = self._servers.get(key)
+        if stats is None:
+            return
+        stats.requests += 1
+        stats.consecutive_failures = 0
+        stats.quarantined_until = 0.0
+        stats.latencies.append(elapsed_ms)
+        self._observe(stats, elapsed_ms, error=False)
+
+    def record_failure(self, key: str, elapsed_ms: float) -> None:
+        stats = self._servers.get(key)
+        if stats is None:
+            return
+        stats.requests += 1
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= Config.CONSUL_SELECTOR_FAILURE_THRESHOLD:
+            stats.quarantined_until = self._clock() + Config.CONSUL_SELECTOR_QUARANTINE_SECONDS
+        self._observe(stats, elapsed_ms, error=True)
+
+    def record_slow(self, key: str, elapsed_ms: float) -> None:
+        """
+        Requisição cancelada porque outro servidor respondeu antes: a latência
+        real é no mínimo elapsed_ms (amostra censurada) - só puxa a EWMA para cima.
+        """
+        stats = self._servers.get(key)
+        if stats is None or (stats.ewma_ms is not None and elapsed_ms <= stats.ewma_ms):
+            return
+        self._observe(stats, elapsed_ms, error=None)
+
+    def _observe(self, stats: ServerStats, elapsed_ms: float, error: Optional[bool]) -> None:
+        alpha = self.alpha
+        stats.ewma_ms = elapsed_ms if stats.ewma_ms is None else alpha * elapsed_ms + (1 - alpha) * stats.ewma_ms
+        if error is not None:
+            stats.error_rate = alpha * float(error) + (1 - alpha) * stats.error_rate
+        consul_server_latency_ewma.labels(server=stats.key).set(stats.ewma_ms)
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    async def execute(
+        self,
+        fn: Callable[[str], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        global_timeout: Optional[float] = None,
+        candidates: Optional[Iterable[str]] = None,
+        hedge: Optional[bool] = None,
+    ) -> Tuple[Any, str, Dict[str, Any]]:
+        """
+        Executa fn(servidor) no melhor servidor, com hedge e fallback.
+
+        Args:
+            fn: Corrotina recebendo "host:porta"
+            timeout: Timeout por tentativa (default: CONSUL_CATALOG_TIMEOUT)
+            global_timeout: Tempo máximo total (default: sem limite além das tentativas)
+            candidates: Restringe aos servidores informados (default: todos)
+            hedge: Sobrescreve CONSUL_HEDGE_ENABLED para esta chamada
+
+        Returns:
+            (resultado, servidor, info) - info: attempts, hedged, errors,
+            failed ({servidor: "timeout"|"failure"}), elapsed_ms
+
+        Raises:
+            AllServersFailed: Todos os servidores falharam / deram timeout
+        """
+        timeout = timeout or Config.CONSUL_CATALOG_TIMEOUT
+        hedge = self.hedge_enabled if hedge is None else hedge
+        queue = self.ranked(candidates)
+        if not queue:
+            raise AllServersFailed(["nenhum servidor Consul registrado"])
+
+        self._stats["executions"] += 1
+        start = self._clock()
+        deadline = start + global_timeout if global_timeout else None
+        running: Dict[asyncio.Task, Tuple[str, float]] = {}
+        errors: List[str] = []
+        failed: Dict[str, str] = {}
+        info = {"attempts": 0, "hedged": False}
+
+        async def attempt(key: str) -> Any:
+            return await asyncio.wait_for(fn(key), timeout=timeout)
+
+        def launch() -> None:
+            stats = queue.pop(0)
+            info["attempts"] += 1
+            running[asyncio.ensure_future(attempt(stats.key))] = (stats.key, self._clock())
+
+        launch()
+        try:
+            while running:
+                primary_key = next(iter(running.values()))[0]
+                wait_for: Optional[float] = None
+                if hedge and queue and len(running) == 1:
+                    wait_for = self.hedge_delay(self._servers[primary_key])
+                if deadline is not None:
+                    remaining = max(deadline - self._clock(), 0)
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+                done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if deadline is not None and self._clock() >= deadline:
+                        errors.append(f"timeout global {global_timeout}s")
+                        break
+                    # Primário sem resposta até o p95 → hedge no próximo servidor
+                    info["hedged"] = True
+                    self._stats["hedges"] += 1
+                    consul_hedged_requests.labels(outcome="launched").inc()
+                    launch()
+                    continue
+
+                for task in done:
+                    key, started = running.pop(task)
+                    elapsed_ms = (self._clock() - started) * 1000
+                    error = task.exception()
+                    if error is None:
+                        self.record_success(key, elapsed_ms)
+                        if info["hedged"] and key != primary_key:
+                            self._stats["hedge_wins"] += 1
+                            consul_hedged_requests.labels(outcome="won").inc()
+                        if info["attempts"] > 1 and key != primary_key:
+                            self._stats["fallbacks"] += 1
+                        info.update(errors=errors, failed=failed, elapsed_ms=int((self._clock() - start) * 1000))
+                        return task.result(), key, info
+
+                    self.record_failure(key, elapsed_ms)
+                    if isinstance(error, asyncio.TimeoutError):
+                        failed[key] = "timeout"
+                        errors.append(f"Timeout {timeout}s em {key}")
+                    else:
+                        failed[key] = "failure"
+                        errors.append(f"Erro em {key}: {str(error)[:100]}")
+                    logger.warning(f"⚠️ [CONSUL SELECTOR] {errors[-1]}")
+
+                # Falha rápida: próximo servidor sem esperar o hedge
+                if not running and queue:
+                    launch()
+        finally:
+            for task, (key, started) in running.items():
+                if task.done():
+                    if not task.cancelled():
+                        task.exception()
+                    continue
+                task.cancel()
+                self.record_slow(key, (self._clock() - started) * 1000)
+
+        self._stats["failures"] += 1
+        raise AllServersFailed(errors, failed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ranking atual e contadores de hedge/fallback"""
+        now = self._clock()
+        return {
+            **self._stats,
+            "hedge_enabled": self.hedge_enabled,
+            "servers": [
+                {
+                    "server": s.key,
+                    "name": s.name,
+                    "is_master": s.is_master,
+                    "healthy": s.healthy(now),
+                    "ewma_ms": round(s.ewma_ms, 2) if s.ewma_ms is not None else None,
+                    "p95_ms": s.p95_ms(),
+                    "error_rate": round(s.error_rate, 3),
+                    "requests": s.requests,
+                    "failures": s.failures,
+                }
+                for s in self.ranked()
+            ],
+        }
+
+
+# Instância global (singleton)
+_selector: Optional[ConsulServerSelector] = None
+
+
+def get_consul_selector() -> ConsulServerSelector:
+    """
+    Retorna o seletor de servidores global (singleton).
+
+    Returns:
+        Instância de ConsulServerSelector (CONSUL_SERVERS já registrados)
+    """
+    global _selector
+    if _selector is None:
+        _selector = ConsulServerSelector()
+        _selector.update_from_config()
+    return _selector
+
+
+def reset_consul_selector() -> None:
+    """Reseta o seletor global (útil para testes)"""
+    global _selector
+    _selector = None
@@ -0,0 +1,391 @@
+"""
+Agregados Materializados do Dashboard
+
+RESPONSABILIDADES:
+- Manter em memória os contadores do /dashboard/metrics (total, blackbox,
+  exporters, by_env, by_datacenter, saúde e nodes)
+- Aplicar DELTAS quando o catálogo muda (serviços adicionados, removidos ou
+  alterados no snapshot da CatalogReplica) ou quando o estado de saúde muda
+  (blocking query em /health/state/any)
+- Servir a leitura em O(1) com versão e idade
+
+SEMÂNTICA (mesma do /internal/ui/services usado antes):
+- Cada instância conta 1 em total/by_env/by_datacenter; o serviço 'consul' é ignorado
+- Saúde de uma instância = checks do serviço + checks do node da instância
+  (um check de node conta uma vez para cada instância naquele node)
+- Blackbox/exporter/env derivados das tags da instância
+- Nodes = todos os nodes de /catalog/nodes (inclusive registros externos sem
+  checks); /catalog/nodes não traz status, então ativos = total (como antes)
+
+ANTES: cada refresh do dashboard = /internal/ui/services + /catalog/nodes e recontagem
+AGORA: leitura dos contadores; o Consul só é consultado quando algo muda
+       (blocking queries em /health/state/any e /catalog/nodes)
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog_replica import get_catalog_replica, next_blocking_index
+
+logger = logging.getLogger(__name__)
+
+# Blackbox modules conhecidos (detectados nas tags)
+BLACKBOX_MODULES = ('icmp', 'http_2xx', 'http_4xx', 'http_5xx',
+                    'http_post_2xx', 'https', 'tcp_connect',
+                    'ssh_banner', 'pop3s_banner', 'irc_banner')
+
+HEALTH_STATUSES = ('passing', 'warning', 'critical')
+
+CheckKey = Tuple[str, str]  # (Node, CheckID)
+CheckValue = Tuple[str, str, str]  # (ServiceID, ServiceName, Status)
+
+
+def classify_instance(svc: Dict[str, Any]) -> Tuple[bool, bool, str]:
+    """
+    Classifica uma instância para o dashboard.
+
+    Returns:
+        (is_blackbox, is_exporter, env)
+    """
+    tags = [str(t).lower() for t in svc.get('Tags') or []]
+    is_blackbox = any(bm in tag for tag in tags for bm in BLACKBOX_MODULES)
+    is_exporter = not is_blackbox and '_exporter' in str(svc.get('Service', '')).lower()
+
+    env = 'unknown'
+    for tag in tags:
+        if '=' in tag:
+            key, val = tag.split('=', 1)
+            if key in ('env', 'ambiente'):
+                env = val
+                break
+    return is_blackbox, is_exporter, env
+
+
+class DashboardAggregates:
+    """
+    Contadores do dashboard atualizados incrementalmente.
+
+    Exemplo de Uso:
+        ```python
+        aggregates = get_dashboard_aggregates()
+        await aggregates.start()                # watcher de saúde em background
+        aggregates.sync_catalog(snapshot)       # aplica só os serviços alterados
+        aggregates.read()                       # O(1)
+        ```
+    """
+
+    def __init__(self):
+        # Catálogo: nome → tupla de instâncias já aplicada (diff por identidade)
+        self._services: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        self.catalog_version: Optional[int] = None
+
+        self._total = 0
+        self._blackbox = 0
+        self._exporters = 0
+        self._by_env: Counter = Counter()
+        self._instances_per_node: Counter = Counter()
+
+        # Saúde: checks aplicados e contadores por node
+        self._checks: Dict[CheckKey, CheckValue] = {}
+        self._node_checks: Dict[str, Counter] = {}
+        self._health: Counter = Counter()
+        self.health_index = 0
+        self.health_ready = False
+
+        # Nodes do catálogo (/catalog/nodes)
+        self._nodes: Set[str] = set()
+        self.nodes_index = 0
+        self.nodes_ready = False
+        self.datacenter: Optional[str] = None
+
+        self.version = 0
+        self.updated_at = time.time()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "catalog_syncs": 0,
+            "services_applied": 0,
+            "health_updates": 0,
+            "checks_applied": 0,
+            "nodes_updates": 0,
+            "reads": 0,
+            "errors": 0,
+        }
+
+    # =========================================================================
+    # DELTAS DO CATÁLOGO
+    # =========================================================================
+
+    def _apply_instances(self, instances: Iterable[Dict[str, Any]], sign: int) -> None:
+        for svc in instances:
+            is_blackbox, is_exporter, env = classify_instance(svc)
+            self._total += sign
+            self._blackbox += sign * is_blackbox
+            self._exporters += sign * is_exporter
+            self._by_env[env] += sign
+
+            node = svc.get('Node')
+            self._instances_per_node[node] += sign
+            for status, count in self._node_checks.get(node, {}).items():
+                self._health[status] += sign * count
+
+    def sync_catalog(self, snapshot) -> bool:
+        """
+        Aplica ao agregado os serviços alterados desde a última versão.
+
+        Args:
+            snapshot: CatalogSnapshot
+
+        Returns:
+            True se o agregado está na versão do snapshot (False se já avançou)
+        """
+        if self.catalog_version == snapshot.version:
+            return True
+        if self.catalog_version is not None and self.catalog_version > snapshot.version:
+            return False
+
+        services = snapshot.services
+        changed = 0
+        for name, instances in services.items():
+            old = self._services.get(name)
+            if old is instances:
+                continue
+            changed += 1
+            if name != 'consul':
+                self._apply_instances(old or (), -1)
+                self._apply_instances(instances, 1)
+            self._services[name] = instances
+
+        for name in [name for name in self._services if name not in services]:
+            changed += 1
+            old = self._services.pop(name)
+            if name != 'consul':
+                self._apply_instances(old, -1)
+
+        self.catalog_version = snapshot.version
+        self._stats["catalog_syncs"] += 1
+        self._stats["services_applied"] += changed
+        if changed:
+            self._touch()
+        return True
+
+    # =========================================================================
+    # DELTAS DE SAÚDE
+    # =========================================================================
+
+    def _apply_check(self, node: str, value: CheckValue, sign: int) -> None:
+        service_id, service_name, status = value
+        if not service_id:
+            # Check de node: vale para cada instância do node
+            node_counter = self._node_checks.setdefault(node, Counter())
+            node_counter[status] += sign
+            self._health[status] += sign * self._instances_per_node[node]
+        elif service_name != 'consul':
+            self._health[status] += sign
+
+    def apply_checks(self, checks: List[Dict[str, Any]], index: int = 0) -> int:
+        """
+        Aplica o resultado de /health/state/any como diff contra os checks atuais.
+
+        Returns:
+            Número de checks adicionados/removidos/alterados
+        """
+        current: Dict[CheckKey, CheckValue] = {
+            (check.get('Node', ''), check.get('CheckID', '')): (
+                check.get('ServiceID') or '',
+                check.get('ServiceName') or '',
+                check.get('Status', 'critical'),
+            )
+            for check in checks or []
+        }
+
+        touched_nodes = set()
+        changed = 0
+        for key, old in self._checks.items():
+            new = current.get(key)
+            if new != old:
+                self._apply_check(key[0], old, -1)
+                if new is not None:
+                    self._apply_check(key[0], new, 1)
+                touched_nodes.add(key[0])
+                changed += 1
+        for key, new in current.items():
+            if key not in self._checks:
+                self._apply_check(key[0], new, 1)
+                touched_nodes.add(key[0])
+                changed += 1
+        self._checks = current
+
+        for node in touched_nodes:
+            node_counter = self._node_checks.get(node)
+            if node_counter is not None and not any(node_counter.values()):
+                del self._node_checks[node]
+
+        self.health_index = index
+        self.health_ready = True
+        self._stats["health_updates"] += 1
+        self._stats["checks_applied"] += changed
+        if changed:
+            self._touch()
+        return changed
+
+    # =========================================================================
+    # NODES DO CATÁLOGO
+    # =========================================================================
+
+    def apply_nodes(self, nodes: List[Dict[str, Any]], index: int = 0) -> bool:
+        """
+        Aplica o resultado de /catalog/nodes.
+
+        Returns:
+            True se o conjunto de nodes mudou
+        """
+        current = {node.get('Node', '') for node in nodes or []}
+        changed = current != self._nodes
+        self._nodes = current
+        self.nodes_index = index
+        self.nodes_ready = True
+        self._stats["nodes_updates"] += 1
+        if changed:
+            self._touch()
+        return changed
+
+    # =========================================================================
+    # LEITURA
+    # =========================================================================
+
+    def _touch(self) -> None:
+        self.version += 1
+        self.updated_at = time.time()
+
+    @property
+    def live_ready(self) -> bool:
+        """Watchers de saúde e de nodes já aplicaram o primeiro resultado"""
+        return self.health_ready and self.nodes_ready
+
+    @property
+    def is_ready(self) -> bool:
+        return self.catalog_version is not None and self.live_ready
+
+    def read(self) -> Dict[str, Any]:
+        """Métricas atuais no formato do DashboardMetrics (sem recent_changes)"""
+        self._stats["reads"] += 1
+        total_nodes = len(self._nodes)
+        return {
+            'total_services': self._total,
+            'blackbox_targets': self._blackbox,
+            'exporters': self._exporters,
+            'active_nodes': total_nodes,
+            'total_nodes': total_nodes,
+            'health': {status: self._health[status] for status in HEALTH_STATUSES},
+            'by_env': {env: count for env, count in self._by_env.items() if count},
+            'by_datacenter': {self.datacenter or 'unknown': self._total} if self._total else {},
+            'version': self.version,
+            'age_seconds': round(time.time() - self.updated_at, 3),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas dos agregados (para debug/observabilidade)"""
+        return {
+            "ready": self.is_ready,
+            "running": self._task is not None and not self._task.done(),
+            "version": self.version,
+            "catalog_version": self.catalog_version,
+            "health_index": self.health_index,
+            "nodes_index": self.nodes_index,
+            "nodes": len(self._nodes),
+            "checks": len(self._checks),
+            **self._stats,
+        }
+
+    # =========================================================================
+    # WATCHER DE SAÚDE
+    # =========================================================================
+
+    async def start(self) -> None:
+        """Inicia os watchers de /health/state/any e /catalog/nodes em background (idempotente)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._watch(), name="dashboard-aggregates")
+        logger.info("[DASHBOARD] Agregados incrementais iniciados")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _watch(self) -> None:
+        await asyncio.gather(self._watch_health(), self._watch_nodes())
+
+    async def _watch_health(self) -> None:
+        replica = get_catalog_replica()
+        backoff = 1.0
+        while True:
+            try:
+                await replica.wait_ready()
+                if self.datacenter is None:
+                    info, _ = await replica.blocking_get("/agent/self", 0)
+                    self.datacenter = (info.get('Config') or {}).get('Datacenter', 'unknown')
+
+                checks, new_index = await replica.blocking_get("/health/state/any", self.health_index)
+                if new_index != self.health_index:
+                    self.apply_checks(checks, next_blocking_index(self.health_index, new_index))
+                else:
+                    self.health_index = next_blocking_index(self.health_index, new_index)
+                backoff = 1.0
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                logger.warning(f"[DASHBOARD] Erro no watch de /health/state/any: {exc}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+    async def _watch_nodes(self) -> None:
+        replica = get_catalog_replica()
+        backoff = 1.0
+        while True:
+            try:
+                await replica.wait_ready()
+                nodes, new_index = await replica.blocking_get("/catalog/nodes", self.nodes_index)
+                if new_index != self.nodes_index or not self.nodes_ready:
+                    self.apply_nodes(nodes, next_blocking_index(self.nodes_index, new_index))
+                else:
+                    self.nodes_index = next_blocking_index(self.nodes_index, new_index)
+                backoff = 1.0
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                logger.warning(f"[DASHBOARD] Erro no watch de /catalog/nodes: {exc}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+
+# Instância global (singleton)
+_dashboard_aggregates: Optional[DashboardAggregates] = None
+
+
+def get_dashboard_aggregates() -> DashboardAggregates:
+    """
+    Retorna os agregados globais do dashboard (singleton).
+
+    Returns:
+        Instância de DashboardAggregates
+    """
+    global _dashboard_aggregates
+    if _dashboard_aggregates is None:
+        _dashboard_aggregates = DashboardAggregates()
+    return _dashboard_aggregates
+
+
+def reset_dashboard_aggregates() -> None:
+    """Reseta os agregados globais (útil para testes)"""
+    global _dashboard_aggregates
+    _dashboard_aggregates = None
@@ -0,0 +1,209 @@
+"""
+Conditional GET - ETag / If-None-Match → 304 e Cache-Control por router
+
+RESPONSABILIDADES:
+- Dependência de router (opt-in): conditional_get("<Cache-Control>")
+- ETag por VERSÃO (check_not_modified): o endpoint informa a versão dos dados
+  (catálogo categorizado, agregados do dashboard, ModifyIndex do KV...) e o
+  304 sai ANTES de filtrar/serializar o payload
+- ETag por CONTEÚDO (ConditionalGetMiddleware): respostas 200 de rotas
+  opt-in sem ETag próprio recebem hash do corpo; If-None-Match igual → 304
+  sem reenviar o payload
+
+USO:
+    # app.py
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_exception_handler(NotModified, not_modified_handler)
+    app.include_router(router, dependencies=[Depends(conditional_get("private, no-cache"))])
+
+    # endpoint
+    check_not_modified(request, response, catalog.version)
+
+ANTES: cada polling do frontend re-serializava e reenviava o payload inteiro
+AGORA: nada mudou → 304 vazio (e, com ETag por versão, nem serializa)
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Chave em request.state com a política Cache-Control da rota (None = sem opt-in)
+STATE_KEY = "http_cache"
+
+# Respostas que não podem ser bufferizadas para hash
+_STREAMING_TYPES = (b"text/event-stream",)
+
+
+class NotModified(Exception):
+    """Levantada por check_not_modified quando If-None-Match casa com o ETag atual"""
+
+    def __init__(self, etag: str, cache_control: Optional[str] = None):
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """
+    ETag a partir de partes de versão (ou de bytes do corpo).
+
+    Args:
+        parts: Valores JSON-serializáveis (versões, query params...) ou bytes
+        weak: W/"..." quando o corpo pode variar em campos irrelevantes
+            (ex.: load_time_ms) para a mesma versão
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str, separators=(",", ":")).encode())
+        digest.update(b"\x00")
+    tag = f'"{digest.hexdigest()}"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110 §13.1.2), inclusive '*' e listas"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_get(cache_control: str = "no-cache") -> Callable:
+    """
+    Dependência de router que habilita ETag/304 e define o Cache-Control.
+
+    Args:
+        cache_control: Política enviada em respostas 200/304 das rotas GET
+    """
+    async def dependency(request: Request) -> None:
+        setattr(request.state, STATE_KEY, cache_control)
+
+    return dependency
+
+
+def check_not_modified(request: Request, response: Response, *version: Any, weak: bool = False) -> str:
+    """
+    ETag derivado da versão dos dados + path + query string.
+
+    Levanta NotModified (→ 304) se o cliente já tem essa versão; senão define
+    o header ETag na resposta (o middleware não recalcula por conteúdo).
+
+    Returns:
+        ETag calculado
+    """
+    etag = make_etag(request.url.path, sorted(request.query_params.multi_items()), *version, weak=weak)
+    if request.method in ("GET", "HEAD") and etag_matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(etag, getattr(request.state, STATE_KEY, None))
+    response.headers["ETag"] = etag
+    return etag
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    """Exception handler de NotModified"""
+    headers = {"ETag": exc.etag}
+    if exc.cache_control:
+        headers["Cache-Control"] = exc.cache_control
+    return Response(status_code=304, headers=headers)
+
+
+class ConditionalGetMiddleware:
+    """
+    Middleware ASGI: ETag por hash do corpo para rotas com conditional_get.
+
+    - Só GET com status 200 e sem ETag definido pelo endpoint
+    - Respostas de streaming (SSE) passam direto
+    - Adiciona Cache-Control da rota quando o endpoint não definiu
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # HEAD não tem corpo para hash (ETag por versão continua valendo)
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        # Mesmo dict usado por request.state nos endpoints/dependências
+        state = scope.setdefault("state", {})
+        if_none_match = None
+        for name, value in scope.get("headers", ()):
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        start_message = None
+        body = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                policy = state.get(STATE_KEY)
+                if policy is None:
+                    passthrough = True
+                    await send(message)
+                    return
+
+                headers = list(message.get("headers", []))
+                names = {name.lower() for name, _ in headers}
+                if b"cache-control" not in names and message["status"] in (200, 304):
+                    headers.append((b"cache-control", policy.encode("latin-1")))
+                message = {**message, "headers": headers}
+
+                content_type = next((v for n, v in headers if n.lower() == b"content-type"), b"")
+                if (
+                    message["status"] != 200
+                    or b"etag" in names
+                    or content_type.startswith(_STREAMING_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+
+                start_message = message
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            payload = b"".join(body)
+            etag = make_etag(payload)
+            headers = start_message["headers"]
+
+            if etag_matches(if_none_match, etag):
+                headers = [
+                    (name, value) for name, value in headers
+                    if name.lower() not in (b"content-length", b"content-type")
+                ]
+                headers.append((b"etag", etag.encode("latin-1")))
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            headers.append((b"etag", etag.encode("latin-1")))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": payload})
+
+        await self.app(scope, receive, send_wrapper)
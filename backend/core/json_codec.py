@@ -0,0 +1,123 @@
+"""
+Codec JSON plugável - orjson / msgspec com fallback para a stdlib
+
+RESPONSABILIDADES:
+- dumps()/loads() únicos para o caminho quente: KV (get_kv_json, put_kv_json,
+  get_kv_tree), respostas do Consul (catálogo, saúde, nós) e respostas da API
+- Backend escolhido na importação: JSON_CODEC=auto (orjson → msgspec → json),
+  ou forçado com JSON_CODEC=orjson|msgspec|json
+- CodecJSONResponse: JSONResponse do FastAPI renderizado pelo codec
+  (include_router(..., default_response_class=CodecJSONResponse))
+
+COMPATIBILIDADE:
+- dumps() sempre retorna bytes UTF-8 compactos (ensure_ascii=False)
+- Erros de decodificação são json.JSONDecodeError em todos os backends
+- Tipos que o backend rápido não serializa caem para a stdlib
+
+Benchmark: scripts/bench_json_codec.py (catálogo sintético de 50k serviços)
+"""
+
+import json
+import logging
+from typing import Any, Callable, Optional
+
+from fastapi.responses import JSONResponse
+
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+
+def _select_backend(requested: str) -> str:
+    available = {"orjson": HAS_ORJSON, "msgspec": HAS_MSGSPEC, "json": True}
+    if requested in available:
+        if available[requested]:
+            return requested
+        logger.warning(f"[JSON CODEC] '{requested}' não instalado - usando detecção automática")
+    for name in ("orjson", "msgspec", "json"):
+        if available[name]:
+            return name
+    return "json"
+
+
+# Backend ativo: "orjson", "msgspec" ou "json"
+BACKEND = _select_backend(Config.JSON_CODEC)
+
+
+def _stdlib_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+
+
+def _stdlib_loads(data: Any) -> Any:
+    return json.loads(data)
+
+
+if BACKEND == "orjson":
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Serializa para bytes JSON UTF-8 compactos"""
+        try:
+            return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Ex.: inteiros > 64 bits, subclasses não suportadas
+            return _stdlib_dumps(obj, default)
+
+    def loads(data: Any) -> Any:
+        """Decodifica bytes/str JSON (orjson.JSONDecodeError é json.JSONDecodeError)"""
+        return orjson.loads(data)
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Serializa para bytes JSON UTF-8 compactos"""
+        try:
+            if default is None:
+                return _encoder.encode(obj)
+            return msgspec.json.Encoder(enc_hook=default).encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            return _stdlib_dumps(obj, default)
+
+    def loads(data: Any) -> Any:
+        """Decodifica bytes/str JSON"""
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as exc:
+            raise json.JSONDecodeError(str(exc), data if isinstance(data, str) else "", 0) from exc
+
+else:
+    dumps = _stdlib_dumps
+    loads = _stdlib_loads
+
+
+def decode_response(response: Any) -> Any:
+    """
+    Corpo JSON de uma resposta HTTP do Consul via codec.
+
+    Objetos sem corpo em bytes (ex.: respostas simuladas) usam response.json().
+    """
+    content = getattr(response, "content", None)
+    if isinstance(content, (bytes, bytearray)):
+        return loads(content)
+    return response.json()
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse renderizado pelo codec ativo (orjson/msgspec/json)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,439 @@
+"""
+Config Bundle do KV - Snapshot versionado de skills/eye/ com watch (blocking queries)
+
+RESPONSABILIDADES:
+- Ler os prefixos de configuração (KV_BUNDLE_PREFIXES: metadata/ e
+  monitoring-types/categorization/) com UMA leitura recursiva por prefixo
+- Manter em memória um KVBundleSnapshot imutável e versionado: bytes JSON e
+  objeto parseado por chave (+ ModifyIndex)
+- Blocking query recursiva por prefixo: a cada mudança, só as chaves com
+  ModifyIndex novo são decodificadas de novo (demais reaproveitadas)
+- ConsulManager.get_kv_json() lê daqui quando serves(key): sites, fields e
+  regras deixam de custar round-trips ao KV e janelas de TTL
+
+CONSISTÊNCIA:
+- start() registra o bundle em ConsulManager.kv_bundle: escritas no KV pelo
+  ConsulManager._request (PUT/DELETE em /kv/) marcam a chave como pendente: leituras vão direto ao KV até o watch entregar um
+  índice posterior à escrita (read-your-writes)
+- Pendência confirmada quando o watch chega ao índice da escrita (transações
+  informam o ModifyIndex) ou, sem ele (PUT/DELETE em /kv/ não devolvem
+  índice), quando os ModifyIndex das chaves escritas mudam na resposta
+- Escrita invalida as chaves base de cache_key() (usadas durante a pendência)
+- Leitores recebem cópias (loads dos bytes guardados); peek() devolve a
+  referência compartilhada (NÃO modificar)
+- Bundle parado (scripts, testes, KV_BUNDLE_ENABLED=false) → serves() False
+  e todos os consumidores continuam lendo do KV como antes
+
+ANTES: 1 cache miss de /monitoring/data = leituras separadas de sites,
+       fields e regras; cada módulo com seu TTL (até 5 min desatualizado)
+AGORA: leituras em memória, invalidadas pela blocking query em ~ms
+"""
+
+import asyncio
+import base64
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from . import json_codec
+from .catalog_replica import next_blocking_index, parse_consul_wait
+from .cache_manager import get_cache
+from .config import Config
+from .consul_manager import ConsulManager
+from .kv_envelope import is_chunk_key
+from .metrics import kv_bundle_key_updates, kv_bundle_version
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo (s) de uma escrita pendente sem confirmação do watch
+PENDING_MAX_SECONDS = 30.0
+
+# Escrita pendente: (índice do prefixo na marcação, índice da escrita ou None,
+#                    ModifyIndex das chaves sob a marca na marcação, monotonic)
+PendingWrite = Tuple[int, Optional[int], Dict[str, int], float]
+
+
+def txn_write_index(body: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Índice Raft de uma transação /v1/txn (ModifyIndex dos resultados de escrita)"""
+    indexes = [
+        (result.get("KV") or {}).get("ModifyIndex", 0)
+        for result in (body or {}).get("Results") or []
+    ]
+    return max(indexes) if indexes and max(indexes) else None
+
+
+def unwrap_metadata(value: Any) -> Any:
+    """Mesmo desembrulho de KVManager.get_json ({"data": ..., "meta": ...} → data)"""
+    if isinstance(value, dict) and "data" in value and "meta" in value:
+        return value["data"]
+    return value
+
+
+def decode_kv_value(raw_value: Optional[str]) -> Tuple[Optional[bytes], Any]:
+    """
+    Valor base64 de /kv → (bytes JSON ou None, objeto parseado).
+
+    Valores que não são JSON ficam como string (bytes None: não há o que recarregar).
+    """
+    if raw_value is None:
+        return None, None
+    raw_bytes = base64.b64decode(raw_value)
+    try:
+        return raw_bytes, json_codec.loads(raw_bytes)
+    except ValueError:
+        return None, raw_bytes.decode("utf-8", errors="replace")
+
+
+class KVEntry:
+    """Valor de uma chave no snapshot (imutável)"""
+
+    __slots__ = ("modify_index", "raw", "value")
+
+    def __init__(self, modify_index: int, raw: Optional[bytes], value: Any):
+        self.modify_index = modify_index
+        self.raw = raw
+        self.value = value
+
+    def copy(self) -> Any:
+        """Cópia independente (decodifica os bytes JSON guardados)"""
+        if self.raw is None:
+            return self.value
+        return json_codec.loads(self.raw)
+
+
+class KVBundleSnapshot:
+    """
+    Snapshot imutável das chaves de configuração.
+
+    Nunca é alterado após publicado; nova versão compartilha as KVEntry
+    das chaves que não mudaram.
+    """
+
+    __slots__ = ("version", "created_at", "entries")
+
+    def __init__(self, version: int, entries: Dict[str, KVEntry]):
+        self.version = version
+        self.created_at = time.time()
+        self.entries = entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cópia do valor parseado (default se a chave não existe)"""
+        entry = self.entries.get(key)
+        return entry.copy() if entry is not None else default
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """Referência compartilhada do valor parseado (NÃO modificar)"""
+        entry = self.entries.get(key)
+        return entry.value if entry is not None else default
+
+    def modify_index(self, key: str) -> Optional[int]:
+        entry = self.entries.get(key)
+        return entry.modify_index if entry is not None else None
+
+    def keys(self, prefix: str = "") -> List[str]:
+        return sorted(k for k in self.entries if k.startswith(prefix))
+
+
+class KVBundle:
+    """
+    Snapshot do KV de configuração mantido por blocking queries.
+
+    Exemplo de Uso:
+        ```python
+        bundle = get_kv_bundle()
+        await bundle.start()                      # lifespan (app.py)
+
+        if bundle.serves("skills/eye/metadata/sites"):
+            sites = bundle.get_json("skills/eye/metadata/sites")   # cópia, sem round-trip
+        ```
+    """
+
+    def __init__(self, prefixes: Optional[List[str]] = None, wait: Optional[str] = None):
+        self.prefixes = prefixes if prefixes is not None else Config.get_kv_bundle_prefixes()
+        self.wait = wait or Config.KV_BUNDLE_WAIT
+        self.wait_seconds = parse_consul_wait(self.wait)
+        self._snapshot: Optional[KVBundleSnapshot] = None
+        self._ready = asyncio.Event()
+        # prefixo → X-Consul-Index da última resposta
+        self._indexes: Dict[str, int] = {}
+        # chave/prefixo escrito → PendingWrite
+        self._pending: Dict[str, PendingWrite] = {}
+        # chave do KV → chaves base de cache_key() (invalidadas na escrita)
+        self._cache_bases: Dict[str, set] = {}
+        self._loaded: set = set()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = {"publishes": 0, "key_updates": 0, "writes_pending": 0, "errors": 0}
+
+    # =========================================================================
+    # API PÚBLICA
+    # =========================================================================
+
+    @property
+    def snapshot(self) -> Optional[KVBundleSnapshot]:
+        """Snapshot atual (None antes da carga inicial)"""
+        return self._snapshot
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks.values())
+
+    def covers(self, key: str) -> bool:
+        """Chave pertence a um prefixo do bundle já carregado"""
+        return any(key.startswith(prefix) for prefix in self._loaded)
+
+    def serves(self, key: str) -> bool:
+        """Leitura pode vir do snapshot (watch ativo, carregado e sem escrita pendente)"""
+        if self._snapshot is None or not self.is_running or not self.covers(key):
+            return False
+        if not any(key.startswith(pending) for pending in self._pending):
+            return True
+        return not self._expire_pending(key)
+
+    def get_json(self, key: str, unwrap: bool = True) -> Any:
+        """
+        Valor JSON da chave (cópia), como KVManager.get_json (unwrap=True)
+        ou ConsulManager.get_kv_json (unwrap=False: só dict/list).
+        """
+        value = self._snapshot.get(key) if self._snapshot else None
+        if unwrap:
+            return unwrap_metadata(value)
+        return value if isinstance(value, (dict, list)) else None
+
+    def token(self, key: str) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Identidade da versão atual da chave (None se o bundle não a serve).
+
+        Caches derivados (ex.: regras compiladas) comparam o token para
+        recarregar só quando a chave mudou.
+        """
+        if not self.serves(key):
+            return None
+        return (id(self), self._snapshot.modify_index(key))
+
+    def cache_key(self, base: str, key: str) -> str:
+        """
+        Chave de cache derivada versionada pela chave do KV.
+
+        Caches com TTL (ex.: mapa de sites) usam base@ModifyIndex: mudança no
+        KV gera chave nova (miss imediato) em vez de esperar o TTL. Durante uma
+        escrita pendente a chave é a base, invalidada a cada mark_written().
+        """
+        self._cache_bases.setdefault(key, set()).add(base)
+        token = self.token(key)
+        return f"{base}@{token[1]}" if token is not None else base
+
+    def mark_written(self, key: str, write_index: Optional[int] = None) -> None:
+        """
+        Escrita/remoção feita pela aplicação: chave (ou prefixo) pendente até o watch confirmar.
+
+        Args:
+            key: Chave ou prefixo escrito
+            write_index: Índice Raft da escrita, quando conhecido (ver txn_write_index)
+        """
+        # Base pode guardar valor cacheado na pendência de uma escrita anterior
+        cache = get_cache()
+        for kv_key, bases in self._cache_bases.items():
+            if kv_key.startswith(key):
+                for base in bases:
+                    cache.invalidate_nowait(base)
+
+        indexes = [
+            self._indexes.get(prefix, 0)
+            for prefix in self.prefixes
+            if key.startswith(prefix) or prefix.startswith(key)
+        ]
+        if indexes:
+            entries = self._snapshot.entries if self._snapshot else {}
+            self._pending[key] = (max(indexes), write_index, self._fingerprint(entries, key), time.monotonic())
+            self._stats["writes_pending"] += 1
+
+    @staticmethod
+    def _fingerprint(entries: Dict[str, KVEntry], key: str) -> Dict[str, int]:
+        """ModifyIndex das chaves sob a chave/prefixo"""
+        return {k: entry.modify_index for k, entry in entries.items() if k.startswith(key)}
+
+    def _confirmed(self, pending: str, write: PendingWrite, index: int, entries: Dict[str, KVEntry]) -> bool:
+        """Resposta do watch (índice, entradas) já reflete a escrita pendente"""
+        marked_index, write_index, fingerprint, _ = write
+        if write_index is not None:
+            return index >= write_index
+        # Índice da escrita desconhecido: uma resposta entre a marcação e a
+        # escrita (outra chave do prefixo mudou) não confirma - a chave escrita
+        # precisa ter mudado
+        return index > marked_index and self._fingerprint(entries, pending) != fingerprint
+
+    def _expire_pending(self, key: str) -> bool:
+        """
+        Descarta pendências antigas da chave; True se ainda resta alguma.
+
+        Remoção de chave inexistente não altera o índice do Consul: sem o
+        limite a chave ficaria pendente (lida direto do KV) para sempre.
+        """
+        deadline = time.monotonic() - PENDING_MAX_SECONDS
+        for pending, (*_, marked_at) in list(self._pending.items()):
+            if key.startswith(pending) and marked_at < deadline:
+                del self._pending[pending]
+        return any(key.startswith(pending) for pending in self._pending)
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a carga inicial (False se timeout)"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def start(self) -> None:
+        """Inicia um watcher por prefixo (idempotente)"""
+        if self.is_running:
+            return
+        for prefix in self.prefixes:
+            self._tasks[prefix] = asyncio.create_task(self._watch(prefix), name=f"kv-bundle:{prefix}")
+        ConsulManager.kv_bundle = self
+        logger.info(f"[KV BUNDLE] Iniciado: {', '.join(self.prefixes)} (wait={self.wait})")
+
+    async def stop(self) -> None:
+        """Para os watchers e fecha o pool HTTP dedicado"""
+        if ConsulManager.kv_bundle is self:
+            ConsulManager.kv_bundle = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do bundle (para debug/observabilidade)"""
+        snapshot = self._snapshot
+        return {
+            "running": self.is_running,
+            "ready": snapshot is not None,
+            "version": snapshot.version if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.created_at, 2) if snapshot else None,
+            "keys": len(snapshot.entries) if snapshot else 0,
+            "prefixes": {prefix: self._indexes.get(prefix) for prefix in self.prefixes},
+            "pending_writes": sorted(self._pending),
+            **self._stats,
+        }
+
+    # =========================================================================
+    # WATCH
+    # =========================================================================
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pool dedicado (long-polls não ocupam o pool compartilhado do ConsulManager)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(connect=5.0, read=self.wait_seconds + 30.0, write=5.0, pool=None),
+                limits=httpx.Limits(max_connections=max(len(self.prefixes), 1) + 2),
+            )
+        return self._client
+
+    async def _fetch(self, prefix: str, index: int) -> Tuple[List[Dict[str, Any]], int]:
+        """GET /kv/<prefixo>?recurse (bloqueante se index > 0); 404 = prefixo vazio"""
+        consul = ConsulManager()
+        params = {"recurse": ""}
+        if index:
+            params["index"] = str(index)
+            params["wait"] = self.wait
+        response = await self._get_client().get(
+            f"{consul.base_url}/kv/{prefix}", params=params, headers=consul.headers
+        )
+        new_index = int(response.headers.get("X-Consul-Index", "0"))
+        if response.status_code == 404:
+            return [], new_index
+        response.raise_for_status()
+        return json_codec.decode_response(response), new_index
+
+    async def _watch(self, prefix: str) -> None:
+        index = 0
+        backoff = 1.0
+        while True:
+            try:
+                entries, new_index = await self._fetch(prefix, index)
+                self._apply(prefix, entries, new_index)
+                index = next_blocking_index(index, new_index)
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._stats["errors"] += 1
+                logger.warning(f"[KV BUNDLE] Erro no watch de '{prefix}': {exc}")
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+    def _apply(self, prefix: str, entries: List[Dict[str, Any]], index: int) -> None:
+        """Aplica a resposta do prefixo: decodifica só chaves com ModifyIndex novo"""
+        current = self._snapshot.entries if self._snapshot else {}
+        merged = {k: v for k, v in current.items() if not k.startswith(prefix)}
+        changed = []
+        for item in entries:
+            key = item.get("Key", "")
+            if key.endswith("/") or is_chunk_key(key):
+                continue  # "pasta" do KV / chunk binário de valor envelopado
+            modify_index = item.get("ModifyIndex", 0)
+            previous = current.get(key)
+            if previous is not None and previous.modify_index == modify_index:
+                merged[key] = previous
+                continue
+            raw, value = decode_kv_value(item.get("Value"))
+            merged[key] = KVEntry(modify_index, raw, value)
+            changed.append(key)
+        removed = [k for k in current if k.startswith(prefix) and k not in merged]
+
+        self._indexes[prefix] = index
+        for pending, write in list(self._pending.items()):
+            if (pending.startswith(prefix) or prefix.startswith(pending)) and self._confirmed(
+                pending, write, index, merged
+            ):
+                del self._pending[pending]
+
+        first_load = prefix not in self._loaded
+        if changed or removed or self._snapshot is None:
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = KVBundleSnapshot(version, merged)
+            self._stats["publishes"] += 1
+            self._stats["key_updates"] += len(changed) + len(removed)
+            kv_bundle_version.set(version)
+            if changed or removed:
+                kv_bundle_key_updates.inc(len(changed) + len(removed))
+            if not first_load:
+                logger.info(
+                    f"[KV BUNDLE] v{version}: {len(changed)} alteradas, {len(removed)} removidas em '{prefix}'"
+                )
+        self._loaded.add(prefix)
+        if not self._ready.is_set() and self._loaded.issuperset(self.prefixes):
+            self._ready.set()
+            logger.info(f"[KV BUNDLE] ✅ Carregado: {len(self._snapshot.entries)} chaves")
+
+
+# Instância global (singleton)
+_bundle: Optional[KVBundle] = None
+
+
+def get_kv_bundle() -> KVBundle:
+    """
+    Retorna o bundle de configuração global (singleton).
+
+    Returns:
+        Instância de KVBundle
+    """
+    global _bundle
+    if _bundle is None:
+        _bundle = KVBundle()
+    return _bundle
+
+
+def reset_kv_bundle() -> None:
+    """Reseta o bundle global (útil para testes)"""
+    global _bundle
+    if _bundle is not None and ConsulManager.kv_bundle is _bundle:
+        ConsulManager.kv_bundle = None
+    _bundle = None
@@ -0,0 +1,339 @@
+"""
+Envelope do KV - Compressão e divisão em chunks de documentos JSON grandes
+
+RESPONSABILIDADES:
+- Valores acima de KV_ENVELOPE_MIN_BYTES são comprimidos (zstd se instalado,
+  senão gzip) e divididos em chunks de KV_ENVELOPE_CHUNK_BYTES
+- A chave original guarda só o manifesto; os chunks ficam em
+  "<chave>.chunks/<geração>/<n>" (geração nova a cada escrita)
+- Escrita atômica via /v1/txn: remove chunks antigos, grava os novos e o
+  manifesto em uma transação
+- Leitura: manifesto (servido pelo KV bundle quando disponível) + UMA
+  leitura recursiva dos chunks da geração; valor descomprimido memoizado
+  por geração
+- Valores pequenos continuam JSON puro (compatível com o formato antigo)
+
+FORMATO DO MANIFESTO:
+    {"__kv_envelope__": 1, "codec": "zstd", "generation": "9f3c...",
+     "chunks": 3, "size": 1843211, "stored": 201554, "sha256": "..."}
+
+TRANSAÇÃO ACIMA DO LIMITE (txn_max_req_len do Consul, KV_TXN_MAX_BYTES):
+chunks gravados primeiro na geração nova, manifesto por último (ponto de
+troca), gerações antigas removidas depois. Leitores nunca veem uma mistura
+de gerações: no pior caso releem o manifesto.
+
+ANTES: metadata/fields e monitoring-types reescritos inteiros (perto do limite
+       de 512 KB por valor) e lidos inteiros em toda consulta
+AGORA: ~5-10x menos bytes gravados/replicados; leituras repetidas sem
+       descompressão
+"""
+
+import base64
+import gzip
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from core import json_codec
+from core.config import Config
+from core.consul_manager import ConsulManager
+from core.metrics import kv_envelope_bytes, kv_envelope_read_duration
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+    HAS_ZSTD = False
+
+ENVELOPE_MARKER = "__kv_envelope__"
+ENVELOPE_VERSION = 1
+CHUNKS_SUFFIX = ".chunks/"
+# Máximo de operações por transação aceito pelo Consul
+TXN_MAX_OPS = 64
+
+# Valor descomprimido por chave: (geração, bytes JSON) - poucos documentos grandes
+_decoded: Dict[str, Tuple[str, bytes]] = {}
+
+
+class EnvelopeError(Exception):
+    """Manifesto inválido, chunks ausentes ou corrompidos"""
+
+
+def chunk_prefix(key: str) -> str:
+    return f"{key}{CHUNKS_SUFFIX}"
+
+
+def is_chunk_key(key: str) -> bool:
+    return CHUNKS_SUFFIX in key
+
+
+def is_manifest(value: Any) -> bool:
+    return isinstance(value, dict) and value.get(ENVELOPE_MARKER) == ENVELOPE_VERSION
+
+
+# =============================================================================
+# CODECS
+# =============================================================================
+
+def resolve_codec(codec: Optional[str] = None) -> str:
+    """Codec efetivo: zstd sem a biblioteca instalada cai para gzip"""
+    codec = (codec or Config.KV_ENVELOPE_CODEC).lower()
+    if codec == "zstd" and not HAS_ZSTD:
+        return "gzip"
+    if codec not in ("zstd", "gzip", "none"):
+        logger.warning(f"[KV ENVELOPE] Codec desconhecido '{codec}', usando gzip")
+        return "gzip"
+    return codec
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not HAS_ZSTD:
+            raise EnvelopeError("Valor comprimido com zstd, mas 'zstandard' não está instalado")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise EnvelopeError(f"Codec desconhecido no manifesto: {codec}")
+
+
+# =============================================================================
+# CODIFICAÇÃO
+# =============================================================================
+
+def encode(
+    value: Any,
+    codec: Optional[str] = None,
+    min_bytes: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+) -> Tuple[bytes, Optional[Dict[str, Any]], List[bytes]]:
+    """
+    Serializa o valor para o KV.
+
+    Returns:
+        (bytes da chave principal, manifesto ou None, chunks comprimidos)
+        Sem manifesto: bytes = JSON puro e nenhum chunk.
+    """
+    raw = json_codec.dumps(value)
+    codec = resolve_codec(codec)
+    min_bytes = Config.KV_ENVELOPE_MIN_BYTES if min_bytes is None else min_bytes
+    if codec == "none" or len(raw) < min_bytes:
+        return raw, None, []
+
+    data = compress(raw, codec)
+    if len(data) >= len(raw):
+        return raw, None, []  # incompressível: não compensa o envelope
+
+    chunk_bytes = chunk_bytes or Config.KV_ENVELOPE_CHUNK_BYTES
+    chunks = [data[i:i + chunk_bytes] for i in range(0, len(data), chunk_bytes)]
+    manifest = {
+        ENVELOPE_MARKER: ENVELOPE_VERSION,
+        "codec": codec,
+        "generation": uuid.uuid4().hex[:16],
+        "chunks": len(chunks),
+        "size": len(raw),
+        "stored": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    return json_codec.dumps(manifest), manifest, chunks
+
+
+def _kv_op(verb: str, key: str, value: Optional[bytes] = None) -> Dict[str, Any]:
+    op: Dict[str, Any] = {"Verb": verb, "Key": key}
+    if value is not None:
+        op["Value"] = base64.b64encode(value).decode("ascii")
+    return {"KV": op}
+
+
+async def _txn(consul: ConsulManager, ops: List[Dict[str, Any]]) -> Optional[int]:
+    """Executa a transação; devolve o índice Raft da escrita (None se desconhecido)"""
+    from .kv_bundle import txn_write_index
+
+    response = await consul._request("PUT", "/txn", content=json_codec.dumps(ops))
+    return txn_write_index(json_codec.decode_response(response))
+
+
+def _mark_written(key: str, write_index: Optional[int] = None) -> None:
+    """Escritas via /v1/txn não passam pelo gancho de /kv/ do _request"""
+    if ConsulManager.kv_bundle is not None:
+        ConsulManager.kv_bundle.mark_written(key, write_index)
+
+
+# =============================================================================
+# API PÚBLICA
+# =============================================================================
+
+async def write_json(consul: ConsulManager, key: str, value: Any) -> bool:
+    """
+    Grava o valor (JSON puro ou envelope) de forma atômica.
+
+    Args:
+        consul: ConsulManager de destino
+        key: Chave completa
+        value: Valor JSON serializável
+
+    Returns:
+        True se gravou
+    """
+    try:
+        main, manifest, chunks = encode(value)
+        write_index = None
+        if manifest is None:
+            # JSON puro + limpeza de chunks de uma versão envelopada anterior
+            write_index = await _txn(consul, [_kv_op("set", key, main), _kv_op("delete-tree", chunk_prefix(key))])
+        else:
+            generation_prefix = f"{chunk_prefix(key)}{manifest['generation']}/"
+            chunk_ops = [_kv_op("set", f"{generation_prefix}{i}", c) for i, c in enumerate(chunks)]
+            ops = [_kv_op("delete-tree", chunk_prefix(key))] + chunk_ops + [_kv_op("set", key, main)]
+            if len(ops) <= TXN_MAX_OPS and len(json_codec.dumps(ops)) <= Config.KV_TXN_MAX_BYTES:
+                write_index = await _txn(consul, ops)
+            else:
+                await _write_generations(consul, key, manifest["generation"], chunk_ops, main)
+
+            _decoded.pop(key, None)
+            kv_envelope_bytes.labels(kind="raw").inc(manifest["size"])
+            kv_envelope_bytes.labels(kind="stored").inc(manifest["stored"])
+            logger.info(
+                f"[KV ENVELOPE] {key}: {manifest['size']} → {manifest['stored']} bytes "
+                f"({manifest['codec']}, {manifest['chunks']} chunks)"
+            )
+        _mark_written(key, write_index)
+        return True
+    except Exception as exc:
+        logger.error("Failed to write KV %s: %s", key, exc)
+        return False
+
+
+async def _write_generations(
+    consul: ConsulManager,
+    key: str,
+    generation: str,
+    chunk_ops: List[Dict[str, Any]],
+    main: bytes,
+) -> None:
+    """Acima do limite da transação: chunks → manifesto (troca) → limpeza"""
+    batch: List[Dict[str, Any]] = []
+    for op in chunk_ops:
+        if batch and (len(batch) >= TXN_MAX_OPS or len(json_codec.dumps(batch + [op])) > Config.KV_TXN_MAX_BYTES):
+            await _txn(consul, batch)
+            batch = []
+        batch.append(op)
+    if batch:
+        await _txn(consul, batch)
+
+    await consul._request("PUT", f"/kv/{key}", content=main)
+
+    prefix = chunk_prefix(key)
+    stale = {
+        k[len(prefix):].split("/", 1)[0]
+        for k in await consul.list_keys(prefix)
+        if k.startswith(prefix)
+    } - {generation}
+    if stale:
+        await _txn(consul, [_kv_op("delete-tree", f"{prefix}{old}/") for old in sorted(stale)])
+
+
+async def resolve(consul: ConsulManager, key: str, manifest: Dict[str, Any]) -> Any:
+    """
+    Valor completo de uma chave envelopada.
+
+    Chunks ausentes ou corrompidos (geração trocada durante a leitura) →
+    relê o manifesto uma vez antes de desistir.
+    """
+    for attempt in range(2):
+        start = time.perf_counter()
+        generation = manifest.get("generation")
+        cached = _decoded.get(key)
+        if cached is not None and cached[0] == generation:
+            kv_envelope_read_duration.labels(source="memo").observe(time.perf_counter() - start)
+            return json_codec.loads(cached[1])
+
+        try:
+            raw = await _read_chunks(consul, key, manifest)
+        except EnvelopeError as exc:
+            fresh = await consul.get_kv_json(key) if attempt == 0 else None
+            if not is_manifest(fresh) or fresh.get("generation") == generation:
+                raise
+            logger.debug(f"[KV ENVELOPE] {key}: geração trocada durante a leitura ({exc})")
+            manifest = fresh
+            continue
+
+        _decoded[key] = (generation, raw)
+        kv_envelope_read_duration.labels(source="chunks").observe(time.perf_counter() - start)
+        return json_codec.loads(raw)
+    raise EnvelopeError(f"{key}: manifesto instável")
+
+
+async def _read_chunks(consul: ConsulManager, key: str, manifest: Dict[str, Any]) -> bytes:
+    generation_prefix = f"{chunk_prefix(key)}{manifest.get('generation')}/"
+    try:
+        response = await consul._request("GET", f"/kv/{generation_prefix}", params={"recurse": "true"})
+        entries = json_codec.decode_response(response) or []
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code != 404:
+            raise
+        entries = []
+
+    parts: Dict[int, bytes] = {}
+    for item in entries:
+        suffix = item.get("Key", "")[len(generation_prefix):]
+        if suffix.isdigit() and item.get("Value") is not None:
+            parts[int(suffix)] = base64.b64decode(item["Value"])
+    total = manifest.get("chunks", 0)
+    if sorted(parts) != list(range(total)):
+        raise EnvelopeError(f"{key}: {len(parts)}/{total} chunks da geração {manifest.get('generation')}")
+
+    data = b"".join(parts[i] for i in range(total))
+    if hashlib.sha256(data).hexdigest() != manifest.get("sha256"):
+        raise EnvelopeError(f"{key}: sha256 dos chunks não confere")
+    return decompress(data, manifest.get("codec", ""))
+
+
+async def read_json(consul: ConsulManager, key: str) -> Any:
+    """
+    Lê a chave (JSON puro ou envelope), como ConsulManager.get_kv_json.
+
+    Returns:
+        Valor decodificado ou None (chave ausente/envelope ilegível)
+    """
+    value = await consul.get_kv_json(key)
+    if not is_manifest(value):
+        return value
+    try:
+        return await resolve(consul, key, value)
+    except Exception as exc:
+        logger.error("Failed to read KV envelope %s: %s", key, exc)
+        return None
+
+
+async def delete_json(consul: ConsulManager, key: str, trees: Optional[List[str]] = None) -> bool:
+    """
+    Remove a chave e os chunks de qualquer geração (atômico).
+
+    Args:
+        trees: Prefixos removidos na mesma transação (ex.: itens do layout fragmentado)
+    """
+    try:
+        ops = [_kv_op("delete", key), _kv_op("delete-tree", chunk_prefix(key))]
+        ops += [_kv_op("delete-tree", prefix) for prefix in trees or ()]
+        await _txn(consul, ops)
+        for prefix in trees or ():
+            _mark_written(prefix)
+        _decoded.pop(key, None)
+        _mark_written(key)
+        return True
+    except Exception as exc:
+        logger.error("Failed to delete KV %s: %s", key, exc)
+        return False
@@ -8,6 +8,8 @@ import json
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
+from . import kv_envelope, kv_sharded
+from .config import Config
 from .consul_manager import ConsulManager
 
 logger = logging.getLogger(__name__)
@@ -61,7 +63,11 @@ class KVManager:
             Decoded JSON object or default value (auto-unwraps metadata wrapper)
         """
         self._validate_namespace(key)
-        result = await self.consul.get_kv_json(key)
+        # Envelope: documentos grandes gravados comprimidos/em chunks (core/kv_envelope.py)
+        result = await kv_envelope.read_json(self.consul, key)
+        # Layout fragmentado: índice + uma chave por item (core/kv_sharded.py)
+        if kv_sharded.is_index(result):
+            result = await kv_sharded.read_document(self.consul, key)
 
         if result is None:
             return default
@@ -103,6 +109,12 @@ class KVManager:
         else:
             payload = value
 
+        if key in kv_sharded.SHARDED_LAYOUTS and await kv_sharded.is_sharded(self.consul, key):
+            # Já migrado: grava só os itens alterados (sem o documento inteiro)
+            return await kv_sharded.write_document(self.consul, key, payload)
+
+        if Config.KV_ENVELOPE_ENABLED:
+            return await kv_envelope.write_json(self.consul, key, payload)
         return await self.consul.put_kv_json(key, payload)
 
     async def delete_key(self, key: str) -> bool:
@@ -116,6 +128,12 @@ class KVManager:
             True if successful
         """
         self._validate_namespace(key)
+        if key in kv_sharded.SHARDED_LAYOUTS:
+            # Remove também os itens do layout fragmentado (e chunks)
+            return await kv_envelope.delete_json(self.consul, key, trees=[kv_sharded.items_prefix(key)])
+        if Config.KV_ENVELOPE_ENABLED:
+            # Remove também os chunks de um valor envelopado
+            return await kv_envelope.delete_json(self.consul, key)
         return await self.consul.delete_key(key)
 
     async def delete_tree(self, prefix: str) -> bool:
@@ -147,7 +165,11 @@ class KVManager:
             List of key paths
         """
         self._validate_namespace(prefix)
-        return await self.consul.list_keys(prefix)
+        keys = await self.consul.list_keys(prefix)
+        return [
+            key for key in keys
+            if not kv_envelope.is_chunk_key(key) and not kv_sharded.is_item_key(key)
+        ]
 
     async def get_tree(self, prefix: str, unwrap_metadata: bool = True) -> Dict[str, Any]:
         """
@@ -163,6 +185,19 @@ class KVManager:
         self._validate_namespace(prefix)
         tree = await self.consul.get_kv_tree(prefix)
 
+        # Envelope: chunks ficam ocultos, manifestos viram o valor completo
+        for key in [k for k in tree if kv_envelope.is_chunk_key(k)]:
+            del tree[key]
+        for key, value in tree.items():
+            if kv_envelope.is_manifest(value):
+                try:
+                    tree[key] = await kv_envelope.resolve(self.consul, key, value)
+                except Exception as exc:
+                    logger.error("Failed to read KV envelope %s: %s", key, exc)
+                    tree[key] = None
+        # Layout fragmentado: índices remontados com os itens da mesma leitura
+        tree = kv_sharded.assemble_tree(tree)
+
         if unwrap_metadata:
             unwrapped = {}
             for key, value in tree.items():
@@ -304,7 +339,11 @@ class KVManager:
         details: Optional[Dict] = None
     ) -> bool:
         """
-        Log an audit event to Consul KV.
+        Log an audit event to the local audit store (core/audit_store.py).
+
+        Previously one KV key per event under skills/eye/audit/; events now go
+        to the indexed SQLite store and reach the KV only through the optional
+        per-instance rollup (AUDIT_KV_ROLLUP_ENABLED).
 
         Args:
             action: Action performed (CREATE, UPDATE, DELETE, IMPORT, EXPORT)
@@ -316,29 +355,30 @@ class KVManager:
         Returns:
             True if logged successfully
         """
-        now = datetime.utcnow()
-        date_path = now.strftime("%Y/%m/%d")
-
-        event = {
-            "timestamp": now.isoformat(),
-            "action": action,
-            "resource_type": resource_type,
-            "resource_id": resource_id,
-            "user": user,
-            "details": details or {}
-        }
-
-        # Append to daily log (use timestamp as unique key component)
-        key = f"{self.AUDIT_LOG}/{date_path}/{now.strftime('%H%M%S')}-{resource_type}-{resource_id}.json"
+        from .audit_manager import audit_manager
 
-        return await self.put_json(key, event)
+        try:
+            await asyncio.to_thread(
+                audit_manager.log_event,
+                action,
+                resource_type,
+                resource_id,
+                user,
+                metadata=details or {},
+                timestamp=datetime.utcnow().isoformat(),
+            )
+            return True
+        except Exception as exc:
+            logger.error("Failed to log audit event %s/%s: %s", resource_type, resource_id, exc)
+            return False
 
     async def get_audit_events(
         self,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         resource_type: Optional[str] = None,
-        action: Optional[str] = None
+        action: Optional[str] = None,
+        limit: int = 1000
     ) -> List[Dict]:
         """
         Get audit events with optional filtering.
@@ -348,34 +388,23 @@ class KVManager:
             end_date: End date (YYYY-MM-DD format)
             resource_type: Filter by resource type
             action: Filter by action
+            limit: Maximum number of events (most recent first)
 
         Returns:
             List of audit events
         """
-        # Get all audit logs
-        tree = await self.get_tree(self.AUDIT_LOG)
-        events = []
-
-        for key, value in tree.items():
-            if not isinstance(value, dict):
-                continue
-
-            # Apply filters
-            if start_date and value.get("timestamp", "") < start_date:
-                continue
-            if end_date and value.get("timestamp", "") > end_date:
-                continue
-            if resource_type and value.get("resource_type") != resource_type:
-                continue
-            if action and value.get("action") != action:
-                continue
-
-            events.append(value)
-
-        # Sort by timestamp descending
-        events.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-
-        return events
+        from .audit_manager import audit_manager
+
+        result = await asyncio.to_thread(
+            audit_manager.query_events,
+            start_date=start_date,
+            end_date=end_date,
+            resource_type=resource_type,
+            action=action,
+            limit=limit,
+            include_total=False,
+        )
+        return result["events"]
 
     # =========================================================================
     # Import/Export Tracking
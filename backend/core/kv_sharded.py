@@ -0,0 +1,580 @@
+"""
+KV Fragmentado - Uma chave por item + índice para documentos editados item a item
+
+RESPONSABILIDADES:
+- Layout fragmentado para documentos do SHARDED_LAYOUTS (metadata/fields,
+  monitoring-types): a chave original vira um ÍNDICE pequeno (atributos do
+  documento, ordem dos itens, posições) e cada item vai para
+  "<chave>.items/<id>"
+- Leitura consistente (read_snapshot): índice + itens em UMA transação de
+  leitura (/v1/txn get + get-tree) ou do KV bundle em memória
+- Atualização de itens com check-and-set: transação com verbo "cas" no
+  ModifyIndex de cada item (e do índice quando a ordem muda); conflito →
+  relê e reaplica até KV_CAS_RETRIES vezes
+- Escrita do documento inteiro (KVManager.put_json): só os itens alterados
+  são gravados; índice por último (ponto de troca)
+- Migração nos dois sentidos (scripts/migrate_kv_sharded.py)
+
+FORMATO DO ÍNDICE:
+    {"__kv_sharded__": 1, "items_path": "fields", "id_attr": "name",
+     "order_attr": "order", "order": ["company", "env"],
+     "positions": {"company": 1, "env": 2}, "document": {...}, "meta": {...}}
+
+O layout é detectado pelo valor gravado: KVManager.get_json remonta a visão
+completa e os leitores existentes não mudam.
+
+ANTES: PATCH de um campo = ler documento inteiro, alterar 1 item, regravar
+       tudo (última escrita vence - edições concorrentes se perdiam)
+AGORA: PATCH = 1 transação com CAS no item; reorder = CAS só no índice
+"""
+
+import base64
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import httpx
+
+from core import json_codec, kv_envelope
+from core.config import Config
+from core.consul_manager import ConsulManager
+from core.metrics import kv_cas_updates
+
+logger = logging.getLogger(__name__)
+
+SHARDED_MARKER = "__kv_sharded__"
+SHARDED_VERSION = 1
+ITEMS_SUFFIX = ".items/"
+# Máximo de operações por transação aceito pelo Consul
+TXN_MAX_OPS = 64
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """Onde estão os itens no documento e como identificá-los"""
+
+    items_path: str                    # chave do documento com os itens
+    id_attr: Optional[str] = None      # lista de dicts: atributo id; None = dict {id: item}
+    order_attr: Optional[str] = None   # atributo de ordenação mantido no índice
+
+
+# Documentos que podem usar o layout fragmentado
+SHARDED_LAYOUTS: Dict[str, ShardSpec] = {
+    "skills/eye/metadata/fields": ShardSpec("fields", id_attr="name", order_attr="order"),
+    "skills/eye/monitoring-types": ShardSpec("servers"),
+}
+
+
+class CASConflictError(Exception):
+    """Item alterado por outra requisição em todas as tentativas"""
+
+
+class ItemNotFoundError(KeyError):
+    """Item inexistente no documento fragmentado"""
+
+
+class ShardedSnapshot:
+    """Leitura consistente: índice + itens (com ModifyIndex)"""
+
+    def __init__(self, index: Dict[str, Any], index_modify: int, items: Dict[str, Tuple[Any, int]]):
+        self.index = index
+        self.index_modify = index_modify
+        self.items = items
+
+    @property
+    def spec(self) -> ShardSpec:
+        return spec_from_index(self.index)
+
+    def document(self) -> Any:
+        return assemble(self.index, {item_id: value for item_id, (value, _) in self.items.items()})
+
+
+def items_prefix(key: str) -> str:
+    return f"{key}{ITEMS_SUFFIX}"
+
+
+def item_key(key: str, item_id: str) -> str:
+    return f"{items_prefix(key)}{quote(str(item_id), safe=':@-._~')}"
+
+
+def is_item_key(key: str) -> bool:
+    return ITEMS_SUFFIX in key
+
+
+def is_index(value: Any) -> bool:
+    return isinstance(value, dict) and value.get(SHARDED_MARKER) == SHARDED_VERSION
+
+
+def spec_from_index(index: Dict[str, Any]) -> ShardSpec:
+    return ShardSpec(index["items_path"], index.get("id_attr"), index.get("order_attr"))
+
+
+# =============================================================================
+# DOCUMENTO ↔ ÍNDICE + ITENS
+# =============================================================================
+
+def split_document(value: Any, spec: ShardSpec) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Documento completo → (índice, {id: item}).
+
+    Aceita o wrapper {"data": ..., "meta": ...} do KVManager.put_json.
+    """
+    meta = None
+    document = value
+    if isinstance(value, dict) and "data" in value and "meta" in value:
+        document, meta = value["data"], value["meta"]
+    if not isinstance(document, dict):
+        raise ValueError("Documento fragmentado precisa ser um objeto JSON")
+
+    raw_items = document.get(spec.items_path) or ({} if spec.id_attr is None else [])
+    if spec.id_attr is None:
+        items = {str(item_id): copy.deepcopy(item) for item_id, item in raw_items.items()}
+    else:
+        items = {}
+        for item in raw_items:
+            item_id = str(item[spec.id_attr])
+            if item_id in items:
+                raise ValueError(f"Item duplicado em '{spec.items_path}': {item_id}")
+            items[item_id] = copy.deepcopy(item)
+
+    positions = {}
+    if spec.order_attr:
+        for item_id, item in items.items():
+            if isinstance(item, dict) and spec.order_attr in item:
+                positions[item_id] = item.pop(spec.order_attr)
+
+    index = {
+        SHARDED_MARKER: SHARDED_VERSION,
+        "items_path": spec.items_path,
+        "id_attr": spec.id_attr,
+        "order_attr": spec.order_attr,
+        "order": list(items),
+        "positions": positions,
+        "document": {k: v for k, v in document.items() if k != spec.items_path},
+    }
+    if meta is not None:
+        index["meta"] = meta
+    return index, items
+
+
+def assemble(index: Dict[str, Any], items: Dict[str, Any]) -> Any:
+    """Índice + itens → documento completo (itens fora de index["order"] são ignorados)"""
+    spec = spec_from_index(index)
+    positions = index.get("positions") or {}
+    ordered = []
+    for item_id in index.get("order", []):
+        if item_id not in items:
+            continue
+        item = items[item_id]
+        if spec.order_attr and item_id in positions and isinstance(item, dict):
+            item = {**item, spec.order_attr: positions[item_id]}
+        ordered.append((item_id, item))
+
+    document = dict(index.get("document") or {})
+    if spec.id_attr is None:
+        document[spec.items_path] = dict(ordered)
+    else:
+        document[spec.items_path] = [item for _, item in ordered]
+    if "meta" in index:
+        return {"data": document, "meta": index["meta"]}
+    return document
+
+
+# =============================================================================
+# LEITURA
+# =============================================================================
+
+def _kv_op(verb: str, key: str, value: Any = None, index: Optional[int] = None) -> Dict[str, Any]:
+    op: Dict[str, Any] = {"Verb": verb, "Key": key}
+    if value is not None:
+        op["Value"] = base64.b64encode(json_codec.dumps(value)).decode("ascii")
+    if index is not None:
+        op["Index"] = index
+    return {"KV": op}
+
+
+async def _txn(consul: ConsulManager, ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    response = await consul._request("PUT", "/txn", content=json_codec.dumps(ops))
+    return json_codec.decode_response(response) or {}
+
+
+def _decode(value: Optional[str]) -> Any:
+    return json_codec.loads(base64.b64decode(value)) if value is not None else None
+
+
+def _snapshot_from_bundle(key: str) -> Optional[ShardedSnapshot]:
+    bundle = ConsulManager.kv_bundle
+    if bundle is None or not bundle.serves(key) or not bundle.serves(items_prefix(key)):
+        return None
+    entries = bundle.snapshot.entries
+    index_entry = entries.get(key)
+    if index_entry is None or not is_index(index_entry.value):
+        return None
+    prefix = items_prefix(key)
+    items = {
+        unquote(k[len(prefix):]): (entry.copy(), entry.modify_index)
+        for k, entry in entries.items()
+        if k.startswith(prefix)
+    }
+    return ShardedSnapshot(index_entry.copy(), index_entry.modify_index, items)
+
+
+async def read_snapshot(consul: ConsulManager, key: str, fresh: bool = False) -> Optional[ShardedSnapshot]:
+    """
+    Índice + itens lidos de forma consistente.
+
+    Args:
+        fresh: Ignora o KV bundle (leitura para CAS)
+
+    Returns:
+        ShardedSnapshot ou None (chave inexistente ou não fragmentada)
+    """
+    if not fresh:
+        snapshot = _snapshot_from_bundle(key)
+        if snapshot is not None:
+            return snapshot
+
+    try:
+        body = await _txn(consul, [_kv_op("get", key), _kv_op("get-tree", items_prefix(key))])
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 409:
+            return None  # "get" de chave inexistente reverte a transação
+        raise
+
+    index, index_modify = None, 0
+    items: Dict[str, Tuple[Any, int]] = {}
+    prefix = items_prefix(key)
+    for result in body.get("Results") or []:
+        entry = result.get("KV") or {}
+        entry_key = entry.get("Key", "")
+        if entry_key == key:
+            index, index_modify = _decode(entry.get("Value")), entry.get("ModifyIndex", 0)
+        elif entry_key.startswith(prefix):
+            items[unquote(entry_key[len(prefix):])] = (_decode(entry.get("Value")), entry.get("ModifyIndex", 0))
+    if not is_index(index):
+        return None
+    return ShardedSnapshot(index, index_modify, items)
+
+
+async def read_document(consul: ConsulManager, key: str) -> Any:
+    """Visão completa do documento fragmentado (None se ausente)"""
+    snapshot = await read_snapshot(consul, key)
+    return snapshot.document() if snapshot is not None else None
+
+
+async def is_sharded(consul: ConsulManager, key: str) -> bool:
+    """A chave está gravada no layout fragmentado"""
+    return is_index(await consul.get_kv_json(key))
+
+
+def assemble_tree(tree: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado de get_kv_tree: remonta índices com os itens já lidos e oculta as chaves de itens"""
+    result = {}
+    for key, value in tree.items():
+        if is_item_key(key):
+            continue
+        if is_index(value):
+            prefix = items_prefix(key)
+            items = {unquote(k[len(prefix):]): v for k, v in tree.items() if k.startswith(prefix)}
+            value = assemble(value, items)
+        result[key] = value
+    return result
+
+
+# =============================================================================
+# ESCRITA
+# =============================================================================
+
+def _mark_written(key: str, body: Optional[Dict[str, Any]] = None, items: bool = True) -> None:
+    """
+    Escritas via /v1/txn não passam pelo gancho de /kv/ do _request.
+
+    Args:
+        body: Resposta da última transação (índice da escrita para o bundle)
+        items: Itens também foram escritos (senão só o índice fica pendente)
+    """
+    if ConsulManager.kv_bundle is not None:
+        from core.kv_bundle import txn_write_index
+
+        write_index = txn_write_index(body)
+        ConsulManager.kv_bundle.mark_written(key, write_index)
+        if items:
+            ConsulManager.kv_bundle.mark_written(items_prefix(key), write_index)
+
+
+def _batches(ops: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    batches: List[List[Dict[str, Any]]] = [[]]
+    size = 2
+    for op in ops:
+        op_size = len(json_codec.dumps(op)) + 1
+        if batches[-1] and (len(batches[-1]) >= TXN_MAX_OPS or size + op_size > Config.KV_TXN_MAX_BYTES):
+            batches.append([])
+            size = 2
+        batches[-1].append(op)
+        size += op_size
+    return batches
+
+
+async def write_document(
+    consul: ConsulManager,
+    key: str,
+    value: Any,
+    spec: Optional[ShardSpec] = None,
+    current: Optional[ShardedSnapshot] = None,
+) -> bool:
+    """
+    Grava o documento completo no layout fragmentado (só itens alterados).
+
+    Cabe em uma transação → atômico. Senão: itens novos/alterados, depois o
+    índice (ponto de troca), depois remoção dos itens que saíram.
+
+    Já fragmentado: todas as operações usam CAS no ModifyIndex lido aqui, então
+    uma edição de item (update_items) entre essa leitura e a escrita faz a
+    gravação falhar (False) em vez de ser sobrescrita.
+
+    LIMITAÇÃO: o chamador leu o documento antes (load → altera → put_json) e
+    essa leitura não chega até aqui; um item editado por update_items nesse
+    intervalo E alterado também pelo chamador é sobrescrito pela versão do
+    chamador. Itens que o chamador não alterou são preservados (só os itens
+    diferentes do KV são gravados). Edições de item devem usar update_items.
+    """
+    try:
+        if current is None:
+            current = await read_snapshot(consul, key, fresh=True)
+        spec = spec or (current.spec if current else SHARDED_LAYOUTS[key])
+        index, items = split_document(value, spec)
+
+        existing = current.items if current else {}
+        sets = [
+            # Item novo: CAS com índice 0 (só cria se ainda não existir)
+            _kv_op("cas", item_key(key, item_id), item, index=existing[item_id][1] if item_id in existing else 0)
+            for item_id, item in items.items()
+            if item_id not in existing or existing[item_id][0] != item
+        ]
+        deletes = [
+            _kv_op("delete-cas", item_key(key, item_id), index=modify_index)
+            for item_id, (_, modify_index) in existing.items()
+            if item_id not in items
+        ]
+        # Migração (current None): a chave ainda guarda o documento único
+        index_op = _kv_op("cas", key, index, index=current.index_modify) if current else _kv_op("set", key, index)
+
+        batches = _batches(sets + [index_op] + deletes)
+        if len(batches) == 1:
+            body = await _txn(consul, batches[0])
+        else:
+            for batch in _batches(sets):
+                await _txn(consul, batch)
+            body = await _txn(consul, [index_op])
+            for batch in _batches(deletes):
+                await _txn(consul, batch)
+
+        _mark_written(key, body, items=bool(sets or deletes))
+        logger.info(
+            f"[KV SHARDED] {key}: {len(sets)} itens gravados, {len(deletes)} removidos "
+            f"({len(items)} no total, {len(batches)} transações)"
+        )
+        return True
+    except httpx.HTTPStatusError as exc:
+        if _cas_failed(exc):
+            kv_cas_updates.labels(key=key, result="conflict").inc()
+            _mark_written(key)  # lotes anteriores podem ter sido aplicados
+            logger.warning(f"[KV SHARDED] {key}: documento alterado concorrentemente - escrita abortada")
+        else:
+            logger.error("Failed to write sharded KV %s: %s", key, exc)
+        return False
+    except Exception as exc:
+        logger.error("Failed to write sharded KV %s: %s", key, exc)
+        return False
+
+
+def _cas_failed(exc: httpx.HTTPStatusError) -> bool:
+    """Transação revertida por CAS (409 com erro de índice)"""
+    return exc.response.status_code == 409
+
+
+async def update_items(
+    consul: ConsulManager,
+    key: str,
+    mutations: Dict[str, Callable[[Any], Any]],
+    index_mutate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    retries: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Altera itens (e opcionalmente o índice) com check-and-set.
+
+    Cada mutação recebe uma cópia do item e devolve o novo valor (ou altera
+    in-place e devolve None). index_mutate recebe o documento do índice
+    (atributos + "positions") para alterações como reordenação.
+
+    Atômico quando as operações cabem em uma transação (TXN_MAX_OPS /
+    KV_TXN_MAX_BYTES). Senão: lotes de CAS dos itens e o índice por último
+    (ponto de troca, como em write_document); um conflito num lote relê e
+    reaplica as mutações - itens já gravados não mudam de novo (mutações
+    devem ser idempotentes, como "definir form_schema").
+
+    Raises:
+        ItemNotFoundError: Item inexistente
+        CASConflictError: Conflito em todas as tentativas (lotes anteriores
+            ao conflito podem ter sido aplicados)
+        ValueError: Documento não fragmentado
+    """
+    retries = retries or Config.KV_CAS_RETRIES
+
+    for attempt in range(retries):
+        snapshot = await read_snapshot(consul, key, fresh=True)
+        if snapshot is None:
+            raise ValueError(f"{key} não está no layout fragmentado")
+        spec = snapshot.spec
+        positions = snapshot.index.get("positions") or {}
+
+        ops = []
+        updated: Dict[str, Any] = {}
+        index = copy.deepcopy(snapshot.index)
+        index_changed = False
+        for item_id, mutate in mutations.items():
+            if item_id not in snapshot.items:
+                raise ItemNotFoundError(item_id)
+            current, modify_index = snapshot.items[item_id]
+            view = copy.deepcopy(current)
+            if spec.order_attr and item_id in positions and isinstance(view, dict):
+                view[spec.order_attr] = positions[item_id]
+            result = mutate(view)
+            new_item = view if result is None else result
+            updated[item_id] = copy.deepcopy(new_item)
+
+            # Atributo de ordenação fica no índice
+            if spec.order_attr and isinstance(new_item, dict) and spec.order_attr in new_item:
+                position = new_item.pop(spec.order_attr)
+                if positions.get(item_id) != position:
+                    index.setdefault("positions", {})[item_id] = position
+                    index_changed = True
+            if new_item != current:
+                ops.append(_kv_op("cas", item_key(key, item_id), new_item, index=modify_index))
+
+        if index_mutate is not None:
+            before = copy.deepcopy(index)
+            index_mutate(index)
+            index_changed = index_changed or index != before
+        index_ops = [_kv_op("cas", key, index, index=snapshot.index_modify)] if index_changed else []
+        if not ops and not index_ops:
+            return updated
+
+        batches = _batches(ops + index_ops)
+        try:
+            if len(batches) == 1:
+                body = await _txn(consul, batches[0])
+            else:
+                for batch in _batches(ops):
+                    body = await _txn(consul, batch)
+                if index_ops:
+                    body = await _txn(consul, index_ops)
+        except httpx.HTTPStatusError as exc:
+            if not _cas_failed(exc):
+                raise
+            kv_cas_updates.labels(key=key, result="conflict").inc()
+            if len(batches) > 1:
+                _mark_written(key)  # lotes anteriores ao conflito foram aplicados
+            logger.info(f"[KV SHARDED] {key}: conflito de CAS (tentativa {attempt + 1}/{retries})")
+            continue
+        kv_cas_updates.labels(key=key, result="success").inc()
+        _mark_written(key, body, items=bool(ops))
+        return updated
+
+    kv_cas_updates.labels(key=key, result="exhausted").inc()
+    raise CASConflictError(f"{key}: itens alterados concorrentemente ({', '.join(mutations)})")
+
+
+async def update_item(
+    consul: ConsulManager,
+    key: str,
+    item_id: str,
+    mutate: Callable[[Any], Any],
+) -> Any:
+    """Altera um item com check-and-set (ver update_items)"""
+    return (await update_items(consul, key, {item_id: mutate}))[item_id]
+
+
+async def delete_item(
+    consul: ConsulManager,
+    key: str,
+    item_id: str,
+    index_mutate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    retries: Optional[int] = None,
+) -> None:
+    """Remove um item e sua entrada no índice (transação com CAS)"""
+    retries = retries or Config.KV_CAS_RETRIES
+    for attempt in range(retries):
+        snapshot = await read_snapshot(consul, key, fresh=True)
+        if snapshot is None:
+            raise ValueError(f"{key} não está no layout fragmentado")
+        if item_id not in snapshot.items:
+            raise ItemNotFoundError(item_id)
+        index = copy.deepcopy(snapshot.index)
+        index["order"] = [i for i in index.get("order", []) if i != item_id]
+        (index.get("positions") or {}).pop(item_id, None)
+        if index_mutate is not None:
+            index_mutate(index)
+        try:
+            body = await _txn(consul, [
+                _kv_op("cas", key, index, index=snapshot.index_modify),
+                _kv_op("delete-cas", item_key(key, item_id), index=snapshot.items[item_id][1]),
+            ])
+        except httpx.HTTPStatusError as exc:
+            if not _cas_failed(exc):
+                raise
+            kv_cas_updates.labels(key=key, result="conflict").inc()
+            continue
+        kv_cas_updates.labels(key=key, result="success").inc()
+        _mark_written(key, body)
+        return
+    kv_cas_updates.labels(key=key, result="exhausted").inc()
+    raise CASConflictError(f"{key}: item '{item_id}' alterado concorrentemente")
+
+
+# =============================================================================
+# MIGRAÇÃO
+# =============================================================================
+
+async def migrate_to_sharded(consul: ConsulManager, key: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Documento único (JSON puro ou envelope) → layout fragmentado (idempotente)"""
+    value = await consul.get_kv_json(key)
+    if is_index(value):
+        return {"key": key, "status": "skipped", "reason": "already_sharded"}
+    if kv_envelope.is_manifest(value):
+        value = await kv_envelope.resolve(consul, key, value)
+    if value is None:
+        return {"key": key, "status": "skipped", "reason": "not_found"}
+
+    spec = SHARDED_LAYOUTS[key]
+    index, items = split_document(value, spec)
+    if dry_run:
+        return {
+            "key": key,
+            "status": "dry_run",
+            "items": len(items),
+            "index_bytes": len(json_codec.dumps(index)),
+            "largest_item_bytes": max((len(json_codec.dumps(item)) for item in items.values()), default=0),
+        }
+    if not await write_document(consul, key, value, spec=spec):
+        return {"key": key, "status": "error", "reason": "write_failed"}
+    # Chunks de um envelope anterior deixam de ser referenciados
+    await consul._request("DELETE", f"/kv/{kv_envelope.chunk_prefix(key)}", params={"recurse": "true"})
+    kv_envelope._decoded.pop(key, None)
+    return {"key": key, "status": "success", "items": len(items)}
+
+
+async def migrate_to_document(consul: ConsulManager, key: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Layout fragmentado → documento único (rollback)"""
+    snapshot = await read_snapshot(consul, key, fresh=True)
+    if snapshot is None:
+        return {"key": key, "status": "skipped", "reason": "not_sharded"}
+    if dry_run:
+        return {"key": key, "status": "dry_run", "items": len(snapshot.items)}
+    if not await kv_envelope.write_json(consul, key, snapshot.document()):
+        return {"key": key, "status": "error", "reason": "write_failed"}
+    await consul._request("DELETE", f"/kv/{items_prefix(key)}", params={"recurse": "true"})
+    _mark_written(key)
+    return {"key": key, "status": "success", "items": len(snapshot.items)}
@@ -45,6 +45,35 @@ consul_server_fallback = Counter(
     ['server', 'status']  # status: success|failure|timeout
 )
 
+# Seletor de servidores Consul (EWMA + hedge)
+consul_server_latency_ewma = Gauge(
+    'consul_server_latency_ewma_ms',
+    'Latência EWMA (ms) por servidor Consul no seletor',
+    ['server']
+)
+consul_hedged_requests = Counter(
+    'consul_hedged_requests_total',
+    'Requisições hedged ao segundo melhor servidor Consul',
+    ['outcome']  # outcome: launched|won
+)
+
+# Circuit breakers por host do agente Consul
+consul_circuit_state = Gauge(
+    'consul_circuit_state',
+    'Estado do circuit breaker por host (0=closed, 1=half_open, 2=open)',
+    ['host']
+)
+consul_circuit_transitions = Counter(
+    'consul_circuit_transitions_total',
+    'Transições de estado do circuit breaker por host',
+    ['host', 'state']  # state: closed|half_open|open
+)
+consul_circuit_rejections = Counter(
+    'consul_circuit_rejections_total',
+    'Requisições recusadas localmente com o circuito aberto',
+    ['host']
+)
+
 # SPRINT 1 CORREÇÕES (2025-11-15): Métricas Agent Caching e Stale Reads
 consul_cache_hits = Counter(
     'consul_cache_hits_total',
@@ -84,6 +113,78 @@ consul_sites_cache_status = Counter(
     ['status']  # status: hit|miss|refresh|error
 )
 
+# CATALOG REPLICA: Réplica do catálogo via blocking queries
+consul_catalog_replica_version = Gauge(
+    'consul_catalog_replica_version',
+    'Versão atual do snapshot da réplica do catálogo'
+)
+
+consul_catalog_replica_services = Gauge(
+    'consul_catalog_replica_services',
+    'Total de instâncias de serviço no snapshot da réplica'
+)
+
+consul_catalog_replica_updates = Counter(
+    'consul_catalog_replica_updates_total',
+    'Total de atualizações aplicadas na réplica do catálogo',
+    ['kind']  # kind: initial|added|modified|removed|error
+)
+
+# KV BUNDLE: Snapshot das chaves de configuração do KV
+kv_bundle_version = Gauge(
+    'kv_bundle_version',
+    'Versão atual do snapshot de configuração do KV'
+)
+
+kv_bundle_key_updates = Counter(
+    'kv_bundle_key_updates_total',
+    'Chaves do KV alteradas/removidas aplicadas no bundle'
+)
+
+# KV ENVELOPE: Compressão/chunks de documentos grandes do KV
+kv_envelope_bytes = Counter(
+    'kv_envelope_bytes_total',
+    'Bytes de documentos envelopados gravados no KV (raw = JSON original, stored = comprimido)',
+    ['kind']  # kind: raw|stored
+)
+
+kv_envelope_read_duration = Histogram(
+    'kv_envelope_read_duration_seconds',
+    'Tempo de leitura de documentos envelopados do KV',
+    ['source'],  # source: memo|chunks
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+# KV SHARDED: Atualizações de itens com check-and-set
+kv_cas_updates = Counter(
+    'kv_cas_updates_total',
+    'Transações de check-and-set em itens do layout fragmentado do KV',
+    ['key', 'result']  # result: success|conflict|exhausted
+)
+
+# AUDIT STORE: Auditoria em SQLite local
+audit_query_duration = Histogram(
+    'audit_query_duration_seconds',
+    'Tempo das consultas ao audit store (filtros + paginação)',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+audit_events_deleted = Counter(
+    'audit_events_deleted_total',
+    'Eventos de auditoria removidos na compactação',
+    ['reason']  # reason: retention|overflow
+)
+
+# CHANGE FEED: Push de mudanças para assinantes (SSE/WebSocket)
+change_feed_subscribers = Gauge(
+    'change_feed_subscribers',
+    'Assinantes conectados ao change feed'
+)
+change_feed_events = Counter(
+    'change_feed_events_total',
+    'Eventos do change feed por resultado da entrega',
+    ['outcome']  # outcome: delivered|dropped
+)
+
 # ============================================================================
 # MÉTRICAS DE NEGÓCIO - Serviços e Targets
 # ============================================================================
@@ -116,6 +217,17 @@ cache_misses_total = Counter(
     ['cache_key']
 )
 
+cache_evictions_total = Counter(
+    'cache_evictions_total',
+    'Total de entradas removidas do LocalCache por motivo',
+    ['reason']  # reason: expired|capacity|memory|oversize
+)
+
+cache_memory_bytes = Gauge(
+    'cache_memory_bytes',
+    'Tamanho estimado (bytes) das entradas do LocalCache'
+)
+
 cache_ttl_seconds = Histogram(
     'cache_ttl_seconds',
     'Tempo de vida dos itens no cache',
@@ -10,6 +10,7 @@ ARQUITETURA:
 - Cache em memoria com invalidacao por TTL
 - Integracao com LocalCache global para consistencia
 - Suporte a invalidacao manual por categoria
+- get_or_compute_data(): single-flight + stale-while-revalidate por categoria
 
 AUTOR: Backend Expert Agent
 DATA: 2025-11-22
@@ -18,7 +19,7 @@ VERSION: 1.0.0
 
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
 
 from core.cache_manager import get_cache
@@ -37,16 +38,19 @@ class MonitoringDataCache:
     3. Reduzir chamadas repetidas ao Consul
 
     TTL padrao: 30 segundos (equilibrio entre freshness e performance)
+    Janela stale padrao: 30 segundos (valor antigo servido durante o refresh)
     """
 
-    def __init__(self, ttl_seconds: int = 30):
+    def __init__(self, ttl_seconds: int = 30, stale_ttl_seconds: int = 30):
         """
         Inicializa cache de monitoramento.
 
         Args:
             ttl_seconds: Tempo de vida do cache em segundos (padrao: 30s)
+            stale_ttl_seconds: Janela stale-while-revalidate em segundos (padrao: 30s)
         """
         self.ttl = ttl_seconds
+        self.stale_ttl = stale_ttl_seconds
 
         # Usar LocalCache global para consistencia com resto da aplicacao
         self._cache = get_cache(ttl_seconds=ttl_seconds)
@@ -134,13 +138,67 @@ class MonitoringDataCache:
         cache_key = self._make_key(category, node)
         used_ttl = ttl if ttl is not None else self.ttl
 
-        await self._cache.set(cache_key, data, ttl=used_ttl)
+        await self._cache.set(cache_key, data, ttl=used_ttl, stale_ttl=self.stale_ttl)
 
         logger.debug(
             f"[MonitoringDataCache] SET: category='{category}', node='{node}', "
             f"total={len(data)} servicos, TTL={used_ttl}s"
         )
 
+    async def get_or_compute_data(
+        self,
+        category: str,
+        loader: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        node: Optional[str] = None,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retorna dados do cache ou executa o loader (single-flight + SWR).
+
+        Requisicoes concorrentes para a mesma categoria/no compartilham UM
+        unico loader. Listas vazias nao sao armazenadas.
+
+        Args:
+            category: Categoria de monitoramento
+            loader: Corrotina que busca os dados no Consul
+            node: IP do no para filtro (opcional)
+            ttl: TTL customizado em segundos (None = usar padrao)
+            stale_ttl: Janela stale customizada (None = usar padrao)
+
+        Returns:
+            Lista de servicos (do cache ou do loader)
+        """
+        self._stats["requests"] += 1
+        cache_key = self._make_key(category, node)
+        loader_called = False
+
+        async def _tracked_loader():
+            nonlocal loader_called
+            loader_called = True
+            return await loader()
+
+        data = await self._cache.get_or_compute(
+            cache_key,
+            _tracked_loader,
+            ttl=ttl if ttl is not None else self.ttl,
+            stale_ttl=stale_ttl if stale_ttl is not None else self.stale_ttl,
+            should_cache=bool
+        )
+
+        if loader_called:
+            self._stats["cache_misses"] += 1
+            logger.debug(
+                f"[MonitoringDataCache] MISS: category='{category}', node='{node}'"
+            )
+        else:
+            self._stats["cache_hits"] += 1
+            logger.debug(
+                f"[MonitoringDataCache] HIT: category='{category}', node='{node}', "
+                f"total={len(data)} servicos"
+            )
+        return data
+
     async def invalidate(self, category: Optional[str] = None) -> int:
         """
         Invalida cache para refresh.
@@ -191,7 +249,8 @@ class MonitoringDataCache:
             "cache_misses": self._stats["cache_misses"],
             "invalidations": self._stats["invalidations"],
             "hit_rate_percent": round(hit_rate, 2),
-            "ttl_seconds": self.ttl
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl
         }
 
 
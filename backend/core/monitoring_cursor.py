@@ -0,0 +1,58 @@
+"""
+Cursor de Paginação (keyset) da /monitoring/data
+
+RESPONSABILIDADES:
+- Codificar/decodificar o cursor opaco devolvido em nextCursor
+- O cursor fixa a versão do catálogo categorizado, a categoria, a combinação
+  de filtros/ordenação (digest) e a posição após o último registro da página
+
+ANTES: page=N refazia filtro + sort; um novo catálogo entre a página 3 e a 4
+embaralhava as linhas
+AGORA: páginas seguintes leem a mesma permutação (mesma versão) em O(page_size)
+"""
+
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(catalog_version: int, category: str, position: Dict[str, Any]) -> str:
+    """
+    Gera o cursor opaco.
+
+    Args:
+        catalog_version: Versão do CategorizedCatalog que gerou a página
+        category: Categoria consultada
+        position: '_next' retornado por PartitionIndex.query
+    """
+    payload = {"v": catalog_version, "c": category, **position}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Decodifica o cursor.
+
+    Returns:
+        {'v': versão, 'c': categoria, 'selection', 'position', 'last'}
+
+    Raises:
+        ValueError: cursor malformado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"cursor inválido: {e}") from e
+
+    if not (
+        isinstance(payload, dict)
+        and isinstance(payload.get("v"), int)
+        and isinstance(payload.get("c"), str)
+        and isinstance(payload.get("selection"), str)
+        and isinstance(payload.get("position"), int)
+        and isinstance(payload.get("last"), list)
+    ):
+        raise ValueError("cursor inválido")
+    return payload
@@ -18,10 +18,75 @@ VERSION: 1.0.0
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+# Campos do nivel raiz pesquisados pela busca textual
+TEXT_SEARCH_ROOT_FIELDS = ('ID', 'Service', 'Address', 'Node', 'node_ip', 'site_code', 'site_name')
+
+# Campos do nivel raiz incluidos nas filterOptions
+FILTER_OPTION_ROOT_FIELDS = ('Service', 'Node', 'node_ip', 'site_code', 'site_name')
+
+
+def active_metadata_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Remove filtros vazios, None ou 'all'"""
+    if not filters:
+        return {}
+    return {
+        k: v for k, v in filters.items()
+        if v is not None and v != '' and v != 'all'
+    }
+
+
+def metadata_filter_matches(item: Dict[str, Any], field: str, value: Any) -> bool:
+    """
+    Verifica um filtro de metadata em um servico.
+
+    Busca no Meta primeiro e, se ausente, no nivel raiz do item.
+    Comparacao case-insensitive para strings.
+    """
+    # Tentar buscar no Meta primeiro
+    meta_value = item.get('Meta', {}).get(field)
+
+    # Se nao estiver no Meta, tentar no nivel raiz do item
+    if meta_value is None:
+        meta_value = item.get(field)
+
+    # Comparacao case-insensitive para strings
+    if isinstance(meta_value, str) and isinstance(value, str):
+        return meta_value.lower() == value.lower()
+    return meta_value == value
+
+
+def base_filter_matches(
+    item: Dict[str, Any],
+    company: Optional[str],
+    site: Optional[str],
+    env: Optional[str]
+) -> bool:
+    """Filtros fixos company/site/env (site compara site_code OU metadata.site)"""
+    meta = item.get('Meta') or {}
+    if company and meta.get('company') != company:
+        return False
+    if site and item.get('site_code') != site and meta.get('site') != site:
+        return False
+    if env and meta.get('env') != env:
+        return False
+    return True
+
+
+def apply_base_filters(
+    data: List[Dict[str, Any]],
+    company: Optional[str],
+    site: Optional[str],
+    env: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Aplica os filtros fixos company/site/env (comparacao exata)"""
+    if not (company or site or env):
+        return data
+    return [item for item in data if base_filter_matches(item, company, site, env)]
+
 
 def apply_node_filter(
     data: List[Dict[str, Any]],
@@ -71,43 +136,19 @@ def apply_metadata_filters(
     Returns:
         Lista filtrada de servicos
     """
-    if not filters:
-        return data
-
     # Remover filtros vazios ou None
-    active_filters = {
-        k: v for k, v in filters.items()
-        if v is not None and v != '' and v != 'all'
-    }
+    active_filters = active_metadata_filters(filters)
 
     if not active_filters:
         return data
 
-    filtered = []
-    for item in data:
-        meta = item.get('Meta', {})
-        matches = True
-
-        # Verificar cada filtro ativo
-        for field, value in active_filters.items():
-            # Tentar buscar no Meta primeiro
-            meta_value = meta.get(field)
-
-            # Se nao estiver no Meta, tentar no nivel raiz do item
-            if meta_value is None:
-                meta_value = item.get(field)
-
-            # Comparacao case-insensitive para strings
-            if isinstance(meta_value, str) and isinstance(value, str):
-                if meta_value.lower() != value.lower():
-                    matches = False
-                    break
-            elif meta_value != value:
-                matches = False
-                break
-
-        if matches:
-            filtered.append(item)
+    filtered = [
+        item for item in data
+        if all(
+            metadata_filter_matches(item, field, value)
+            for field, value in active_filters.items()
+        )
+    ]
 
     logger.debug(
         f"[Filter] metadata_filters={active_filters}: "
@@ -117,40 +158,22 @@ def apply_metadata_filters(
     return filtered
 
 
-def apply_sort(
-    data: List[Dict[str, Any]],
-    field: Optional[str],
-    order: Optional[str]
-) -> List[Dict[str, Any]]:
-    """
-    Ordena dados no servidor.
+def is_descending(order: str) -> bool:
+    """Normaliza direcao de ordenacao ('descend' | 'desc' -> True)"""
+    return order.lower() in ('descend', 'desc')
 
-    Args:
-        data: Lista de servicos
-        field: Campo para ordenacao (ex: 'Service', 'Meta.company')
-        order: Direcao da ordenacao ('ascend' | 'descend' | 'asc' | 'desc')
 
-    Returns:
-        Lista ordenada de servicos
+def make_sort_key(field: str) -> Callable[[Dict[str, Any]], Any]:
     """
-    if not field or not order:
-        return data
+    Cria funcao que extrai o valor de ordenacao de um item.
 
-    # SPEC-PERF-002 FIX: Aceitar AMBOS os formatos de ordenacao
-    # Frontend pode enviar 'desc' ou 'descend', 'asc' ou 'ascend'
-    # Normalizar para um unico formato
-    order_lower = order.lower()
-    reverse = order_lower in ('descend', 'desc')
+    Suporta campos aninhados como 'Meta.company'.
+    """
+    parts = field.split('.') if '.' in field else None
 
     def get_sort_key(item: Dict[str, Any]) -> Any:
-        """
-        Extrai valor para ordenacao de um item.
-
-        Suporta campos aninhados como 'Meta.company'.
-        """
         # Se campo contem '.', e um campo aninhado
-        if '.' in field:
-            parts = field.split('.')
+        if parts is not None:
             value = item
             for part in parts:
                 if isinstance(value, dict):
@@ -182,8 +205,35 @@ def apply_sort(
         # Outros tipos
         return (0, str(value).lower())
 
+    return get_sort_key
+
+
+def apply_sort(
+    data: List[Dict[str, Any]],
+    field: Optional[str],
+    order: Optional[str]
+) -> List[Dict[str, Any]]:
+    """
+    Ordena dados no servidor.
+
+    Args:
+        data: Lista de servicos
+        field: Campo para ordenacao (ex: 'Service', 'Meta.company')
+        order: Direcao da ordenacao ('ascend' | 'descend' | 'asc' | 'desc')
+
+    Returns:
+        Lista ordenada de servicos
+    """
+    if not field or not order:
+        return data
+
+    # SPEC-PERF-002 FIX: Aceitar AMBOS os formatos de ordenacao
+    # Frontend pode enviar 'desc' ou 'descend', 'asc' ou 'ascend'
+    # Normalizar para um unico formato
+    reverse = is_descending(order)
+
     try:
-        sorted_data = sorted(data, key=get_sort_key, reverse=reverse)
+        sorted_data = sorted(data, key=make_sort_key(field), reverse=reverse)
         logger.debug(
             f"[Sort] field='{field}', order='{order}': "
             f"{len(sorted_data)} servicos ordenados"
@@ -230,6 +280,21 @@ def apply_pagination(
     return paginated
 
 
+def text_search_matches(item: Dict[str, Any], query_lower: str) -> bool:
+    """Verifica se algum campo textual do servico contem query_lower"""
+    # Verificar campos do nivel raiz
+    for field in TEXT_SEARCH_ROOT_FIELDS:
+        value = item.get(field)
+        if value and isinstance(value, str) and query_lower in value.lower():
+            return True
+
+    # Se nao encontrou no nivel raiz, verificar no Meta
+    for value in item.get('Meta', {}).values():
+        if value and isinstance(value, str) and query_lower in value.lower():
+            return True
+    return False
+
+
 def apply_text_search(
     data: List[Dict[str, Any]],
     query: Optional[str]
@@ -256,28 +321,7 @@ def apply_text_search(
     # Normalizar query para busca case-insensitive
     query_lower = query.strip().lower()
 
-    filtered = []
-    for item in data:
-        # Verificar campos do nivel raiz
-        root_fields = ['ID', 'Service', 'Address', 'Node', 'node_ip', 'site_code', 'site_name']
-        found = False
-
-        for field in root_fields:
-            value = item.get(field)
-            if value and isinstance(value, str) and query_lower in value.lower():
-                found = True
-                break
-
-        # Se nao encontrou no nivel raiz, verificar no Meta
-        if not found:
-            meta = item.get('Meta', {})
-            for key, value in meta.items():
-                if value and isinstance(value, str) and query_lower in value.lower():
-                    found = True
-                    break
-
-        if found:
-            filtered.append(item)
+    filtered = [item for item in data if text_search_matches(item, query_lower)]
 
     logger.debug(
         f"[TextSearch] query='{query}': {len(data)} -> {len(filtered)} servicos"
@@ -315,7 +359,7 @@ def extract_filter_options(
         all_fields: Set[str] = set()
 
         # Campos de nivel raiz que queremos incluir
-        root_fields_to_include = {'Service', 'Node', 'node_ip', 'site_code', 'site_name'}
+        root_fields_to_include = FILTER_OPTION_ROOT_FIELDS
 
         for item in data:
             # Adicionar campos do nivel raiz
@@ -0,0 +1,628 @@
+"""
+Indice Invertido por Particao - Consultas de /monitoring/data sem varredura linear
+
+RESPONSABILIDADES:
+- Indice invertido por campo (valor -> conjunto de row ids) para qualquer
+  chave do Meta e campos raiz (node_ip, site_code, Service, ...)
+- Facetas (campo, valor) -> row ids mantidas junto com o indice
+- filterOptions/_fieldStats lidos das facetas (sem iterar os dados)
+- Ordenacoes por campo memorizadas (permutacao de row ids)
+- Paginacao por cursor: selecoes com cursor emitido ficam fixadas (pinned)
+  enquanto o indice existir, e a pagina seguinte e um slice O(page_size)
+
+ARQUITETURA:
+- Um PartitionIndex por particao do CategorizedCatalog (construido sob demanda
+  e descartado junto com o catalogo na proxima versao)
+- Combinacao de filtros = intersecao de conjuntos (menor conjunto primeiro)
+- Indice de filtro de um campo e construido na primeira consulta que o usa
+  (1 passada); facetas sao construidas junto com o indice
+- Busca textual (q) via indice de trigramas do catalogo (text_search), quando
+  disponivel; campos derivados (node_ip/site_code/site_name) resolvidos pelos
+  valores distintos da particao
+- Filtros fixos exatos (company/site/env), valores nao-string e busca textual
+  sem indice verificam apenas os candidatos ja reduzidos pela intersecao
+- Resultado IDENTICO a process_monitoring_data (mesma semantica de filtros,
+  ordenacao estavel e filterOptions)
+
+ANTES: busca + filtros + filterOptions + sort = 4 varreduras por requisicao
+AGORA: intersecao de conjuntos + facetas/ordenacao memorizadas por selecao
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from core.monitoring_filters import (
+    FILTER_OPTION_ROOT_FIELDS,
+    TEXT_SEARCH_ROOT_FIELDS,
+    active_metadata_filters,
+    base_filter_matches,
+    is_descending,
+    make_sort_key,
+    metadata_filter_matches,
+    text_search_matches,
+)
+
+logger = logging.getLogger(__name__)
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+# Campos da busca textual presentes nas instancias do catalogo (indice de trigramas);
+# os demais (node_ip, site_code, site_name) sao anexados na categorizacao
+CATALOG_TEXT_ROOT_FIELDS = ('ID', 'Service', 'Address', 'Node')
+DERIVED_TEXT_FIELDS = tuple(f for f in TEXT_SEARCH_ROOT_FIELDS if f not in CATALOG_TEXT_ROOT_FIELDS)
+
+# text_search(query, field_filter) -> {(Node, ID)} ou None (indice indisponivel)
+TextSearch = Callable[[str, Callable[[str], bool]], Optional[Set[Tuple[Any, Any]]]]
+
+
+def catalog_text_field(field: str) -> bool:
+    """Campos do indice de trigramas considerados pela busca textual (q)"""
+    return field in CATALOG_TEXT_ROOT_FIELDS or field.startswith('Meta.')
+
+
+def _option_sort_key(value: str) -> Tuple[str, str]:
+    """Ordenacao case-insensitive das filterOptions (desempate deterministico)"""
+    return (value.lower(), value)
+
+
+class _Selection:
+    """Resultado memorizado de uma combinacao de filtros"""
+
+    __slots__ = ("ids", "facets", "orders")
+
+    def __init__(self, ids: Optional[List[int]]):
+        self.ids = ids  # None = particao inteira
+        self.facets: Optional[Dict[str, Any]] = None
+        self.orders: Dict[Tuple[str, bool], List[int]] = {}
+
+
+class PartitionIndex:
+    """
+    Indice invertido imutavel sobre os registros de uma particao.
+
+    - Facetas (filterOptions): colunas por campo construidas junto com o indice
+    - Filtros: indice do campo construido na primeira consulta que o usa
+
+    Exemplo de Uso:
+        ```python
+        index = PartitionIndex(catalog.partition('network-probes'))
+        result = index.query(filters={'company': 'Acme'}, page=1, page_size=50)
+        ```
+    """
+
+    SELECTION_MEMO_SIZE = 64
+    # Selecoes com cursor emitido (fora do LRU) - vivem ate o fim do indice
+    PINNED_SELECTIONS = 256
+
+    def __init__(
+        self,
+        records: Iterable[Dict[str, Any]],
+        text_search: Optional[TextSearch] = None
+    ):
+        """
+        Args:
+            records: Registros da particao (referencias, NAO sao copiados)
+            text_search: Busca no indice de trigramas do catalogo (opcional)
+        """
+        start = time.perf_counter()
+        self.rows: Tuple[Dict[str, Any], ...] = tuple(records)
+        self._text_search = text_search
+
+        meta_keys: Dict[str, None] = {}
+        root_keys = set()
+        metas = []
+        for item in self.rows:
+            meta = item.get('Meta') or {}
+            metas.append(meta)
+            meta_keys.update(dict.fromkeys(meta))
+            root_keys.update(item)
+        # Campos raiz que tambem sao chaves do Meta em algum registro (raiz tem prioridade)
+        shadowed = root_keys.intersection(meta_keys)
+
+        # Facetas em colunas: campo -> valor (strip) por row id, None = sem valor
+        # (mesma semantica de extract_filter_options: raiz antes do Meta)
+        self._columns: Dict[str, List[Optional[str]]] = {}
+        self._sorted_values: Dict[str, List[str]] = {}
+        # Campos que so entram nas filterOptions se algum registro tiver o campo no Meta
+        self._detected_ids: Dict[str, FrozenSet[int]] = {}
+        for field in dict.fromkeys((*FILTER_OPTION_ROOT_FIELDS, *meta_keys)):
+            if field in FILTER_OPTION_ROOT_FIELDS or field in shadowed:
+                raw = [
+                    item[field] if field in item else meta.get(field)
+                    for item, meta in zip(self.rows, metas)
+                ]
+            else:
+                raw = [meta.get(field) for meta in metas]
+            column = [(v.strip() or None) if isinstance(v, str) else None for v in raw]
+
+            values = set(column)
+            values.discard(None)
+            if not values:
+                continue
+            self._columns[field] = column
+            # Valores ja ordenados (case-insensitive) para as filterOptions
+            self._sorted_values[field] = sorted(values, key=_option_sort_key)
+            if field in shadowed and field not in FILTER_OPTION_ROOT_FIELDS:
+                self._detected_ids[field] = frozenset(
+                    row_id for row_id, meta in enumerate(metas) if meta.get(field)
+                )
+
+        # Facetas (campo -> valor -> row ids), sob demanda para campos de baixa cardinalidade
+        self._facet_postings: Dict[str, Dict[str, FrozenSet[int]]] = {}
+        # Indices de filtro (campo -> valor em minusculas -> row ids), sob demanda
+        self._postings: Dict[str, Dict[str, FrozenSet[int]]] = {}
+        self._node_postings: Optional[Dict[Any, FrozenSet[int]]] = None
+        self._text_postings: Dict[str, Dict[str, FrozenSet[int]]] = {}
+        self._doc_rows: Optional[Dict[Tuple[Any, Any], int]] = None
+
+        self._all_facets: Optional[Dict[str, Any]] = None
+        self._keys: Dict[str, List[Any]] = {}
+        self._orders: Dict[Tuple[str, bool], Optional[List[int]]] = {}
+        self._selections: "OrderedDict[Any, _Selection]" = OrderedDict()
+        self._pinned: Dict[Any, _Selection] = {}
+        self._stats = {
+            "queries": 0, "selection_hits": 0, "text_indexed": 0, "text_scans": 0, "cursor_pages": 0
+        }
+        self.build_ms = (time.perf_counter() - start) * 1000
+
+        logger.debug(
+            f"[INDEX] {len(self.rows)} registros, {len(self._columns)} campos de faceta "
+            f"em {self.build_ms:.1f}ms"
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _value_postings(self, field: str) -> Dict[str, FrozenSet[int]]:
+        """Faceta do campo: valor -> row ids (construida a partir da coluna)"""
+        postings = self._facet_postings.get(field)
+        if postings is None:
+            values: Dict[str, List[int]] = {}
+            for row_id, value in enumerate(self._columns[field]):
+                if value is not None:
+                    values.setdefault(value, []).append(row_id)
+            postings = {value: frozenset(ids) for value, ids in values.items()}
+            self._facet_postings[field] = postings
+        return postings
+
+    def _field_postings(self, field: str) -> Dict[str, FrozenSet[int]]:
+        """Indice do campo (semantica de apply_metadata_filters: Meta -> raiz)"""
+        postings = self._postings.get(field)
+        if postings is None:
+            values: Dict[str, List[int]] = {}
+            for row_id, item in enumerate(self.rows):
+                value = (item.get('Meta') or {}).get(field)
+                if value is None:
+                    value = item.get(field)
+                if isinstance(value, str):
+                    values.setdefault(value.lower(), []).append(row_id)
+            postings = {value: frozenset(ids) for value, ids in values.items()}
+            self._postings[field] = postings
+        return postings
+
+    def _node_ids(self, node: str) -> FrozenSet[int]:
+        """Row ids com node_ip == node (comparacao exata)"""
+        if self._node_postings is None:
+            values: Dict[Any, List[int]] = {}
+            for row_id, item in enumerate(self.rows):
+                values.setdefault(item.get('node_ip'), []).append(row_id)
+            self._node_postings = {value: frozenset(ids) for value, ids in values.items()}
+        return self._node_postings.get(node, _EMPTY)
+
+    def _text_ids(self, query: str) -> Optional[Set[int]]:
+        """
+        Row ids cujo texto contem query, via indice de trigramas do catalogo.
+
+        Returns:
+            Conjunto de row ids, ou None se o indice nao estiver disponivel
+        """
+        if self._text_search is None:
+            return None
+        docs = self._text_search(query, catalog_text_field)
+        if docs is None:
+            return None
+
+        if self._doc_rows is None:
+            self._doc_rows = {
+                (item.get('Node'), item.get('ID')): row_id
+                for row_id, item in enumerate(self.rows)
+            }
+        doc_rows = self._doc_rows
+        ids = {doc_rows[doc] for doc in docs if doc in doc_rows}
+
+        # Campos derivados: poucos valores distintos por particao
+        for field in DERIVED_TEXT_FIELDS:
+            postings = self._text_postings.get(field)
+            if postings is None:
+                values: Dict[str, List[int]] = {}
+                for row_id, item in enumerate(self.rows):
+                    value = item.get(field)
+                    if value and isinstance(value, str):
+                        values.setdefault(value.lower(), []).append(row_id)
+                postings = {value: frozenset(ids) for value, ids in values.items()}
+                self._text_postings[field] = postings
+            for value, posting in postings.items():
+                if query in value:
+                    ids |= posting
+        return ids
+
+    # ------------------------------------------------------------------
+    # Selecao
+    # ------------------------------------------------------------------
+
+    def select(
+        self,
+        node: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        search_query: Optional[str] = None,
+        exact_filters: Optional[Dict[str, Optional[str]]] = None
+    ) -> Optional[List[int]]:
+        """
+        Retorna row ids (ordem da particao) que passam em todos os filtros.
+
+        Args:
+            node: IP do no (None ou 'all' = sem filtro)
+            filters: Filtros de metadata (case-insensitive, Meta -> raiz)
+            search_query: Busca textual
+            exact_filters: Filtros fixos {'company', 'site', 'env'} (comparacao exata)
+
+        Returns:
+            Lista de row ids, ou None quando nenhum filtro restringe a particao
+        """
+        return self._selection(node, filters, search_query, exact_filters)[1].ids
+
+    @staticmethod
+    def _selection_key(
+        node: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        search_query: Optional[str],
+        exact_filters: Optional[Dict[str, Optional[str]]]
+    ) -> Tuple:
+        """Chave normalizada de uma combinacao de filtros"""
+        active = active_metadata_filters(filters)
+        return (
+            node if node and node != 'all' else None,
+            tuple(sorted((k, repr(v)) for k, v in active.items())),
+            search_query.strip().lower() if search_query and search_query.strip() else None,
+            tuple(sorted((k, v) for k, v in (exact_filters or {}).items() if v)),
+        )
+
+    def _selection(
+        self,
+        node: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        search_query: Optional[str],
+        exact_filters: Optional[Dict[str, Optional[str]]]
+    ) -> Tuple[Tuple, _Selection]:
+        self._stats["queries"] += 1
+        key = self._selection_key(node, filters, search_query, exact_filters)
+        selection = self._pinned.get(key)
+        if selection is None:
+            selection = self._selections.get(key)
+            if selection is not None:
+                self._selections.move_to_end(key)
+        if selection is not None:
+            self._stats["selection_hits"] += 1
+            return key, selection
+
+        node, _, query, exact = key
+        selection = _Selection(self._compute_ids(node, active_metadata_filters(filters), query, dict(exact)))
+        self._selections[key] = selection
+        if len(self._selections) > self.SELECTION_MEMO_SIZE:
+            self._selections.popitem(last=False)
+        return key, selection
+
+    def _pin(self, key: Tuple, selection: _Selection) -> None:
+        """Fixa a selecao (e suas ordenacoes) ate o fim do indice"""
+        if key not in self._pinned and len(self._pinned) < self.PINNED_SELECTIONS:
+            self._pinned[key] = selection
+
+    def _compute_ids(
+        self,
+        node: Optional[str],
+        active: Dict[str, Any],
+        query: Optional[str],
+        exact: Dict[str, str]
+    ) -> Optional[List[int]]:
+        sets: List[Set[int]] = []
+        linear: List[Tuple[str, Any]] = []
+
+        if node is not None:
+            sets.append(self._node_ids(node))
+
+        if query is not None:
+            text_ids = self._text_ids(query)
+            if text_ids is not None:
+                self._stats["text_indexed"] += 1
+                sets.append(text_ids)
+                query = None
+            else:
+                self._stats["text_scans"] += 1
+
+        for field, value in active.items():
+            if isinstance(value, str):
+                sets.append(self._field_postings(field).get(value.lower(), _EMPTY))
+            else:
+                # Valor nao-string: comparacao direta (raro, sem indice)
+                linear.append((field, value))
+
+        if not sets and not linear and query is None and not exact:
+            return None
+
+        # Intersecao: menor conjunto primeiro
+        if sets:
+            sets.sort(key=len)
+            ids = set(sets[0])
+            for posting in sets[1:]:
+                if not ids:
+                    break
+                ids &= posting
+            candidates = sorted(ids)
+        else:
+            candidates = range(len(self.rows))
+
+        if not linear and query is None and not exact:
+            return list(candidates)
+
+        rows = self.rows
+        company, site, env = exact.get('company'), exact.get('site'), exact.get('env')
+        selected = []
+        for row_id in candidates:
+            item = rows[row_id]
+            if linear and not all(metadata_filter_matches(item, f, v) for f, v in linear):
+                continue
+            if exact and not base_filter_matches(item, company, site, env):
+                continue
+            if query is not None and not text_search_matches(item, query):
+                continue
+            selected.append(row_id)
+        return selected
+
+    # ------------------------------------------------------------------
+    # Facetas
+    # ------------------------------------------------------------------
+
+    def filter_options(self, ids: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+        """
+        filterOptions/_fieldStats (mesmo formato de extract_filter_options).
+
+        - Particao inteira: lido direto do indice de facetas (memorizado)
+        - Campo com poucos valores: testa cada valor contra a selecao (isdisjoint)
+        - Campo com muitos valores: le a coluna apenas nos row ids selecionados
+        """
+        if ids is None or len(ids) == len(self.rows):
+            if self._all_facets is None:
+                self._all_facets = self._format_facets({
+                    field: values for field, values in self._sorted_values.items()
+                    if field not in self._detected_ids or self._detected_ids[field]
+                })
+            return self._all_facets
+
+        selected: Optional[Set[int]] = None
+        options = {}
+        for field, values in self._sorted_values.items():
+            if field in self._detected_ids:
+                if selected is None:
+                    selected = set(ids)
+                if selected.isdisjoint(self._detected_ids[field]):
+                    continue
+
+            if len(values) * 4 <= len(ids):
+                # Poucos valores: testar cada valor contra a selecao
+                if selected is None:
+                    selected = set(ids)
+                postings = self._value_postings(field)
+                options[field] = [
+                    value for value in values if not selected.isdisjoint(postings[value])
+                ]
+            else:
+                # Muitos valores (ex: name): ler a coluna apenas nos row ids selecionados
+                column = self._columns[field]
+                found = {column[row_id] for row_id in ids}
+                found.discard(None)
+                if len(found) * 16 >= len(values):
+                    options[field] = [value for value in values if value in found]
+                else:
+                    options[field] = sorted(found, key=_option_sort_key)
+        return self._format_facets(options)
+
+    @staticmethod
+    def _format_facets(options: Dict[str, List[str]]) -> Dict[str, Any]:
+        options = {field: values for field, values in options.items() if values}
+        return {
+            'options': options,
+            '_fieldStats': {field: len(values) for field, values in options.items()}
+        }
+
+    # ------------------------------------------------------------------
+    # Ordenacao
+    # ------------------------------------------------------------------
+
+    def _sort_keys(self, field: str) -> List[Any]:
+        """Chaves de ordenacao de todos os registros para o campo (memorizadas)"""
+        keys = self._keys.get(field)
+        if keys is None:
+            keys = list(map(make_sort_key(field), self.rows))
+            self._keys[field] = keys
+        return keys
+
+    def _order(self, field: str, reverse: bool) -> Optional[List[int]]:
+        """Permutacao estavel de todos os row ids ordenada pelo campo (memorizada)"""
+        key = (field, reverse)
+        if key not in self._orders:
+            keys = self._sort_keys(field)
+            try:
+                order = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+            except Exception as e:
+                logger.debug(f"[INDEX] Ordenacao por '{field}' indisponivel no indice: {e}")
+                order = None
+            self._orders[key] = order
+        return self._orders[key]
+
+    def _sorted_ids(
+        self,
+        selection: _Selection,
+        field: Optional[str],
+        order: Optional[str]
+    ) -> Optional[List[int]]:
+        if not field or not order:
+            return selection.ids
+
+        reverse = is_descending(order)
+        cached = selection.orders.get((field, reverse))
+        if cached is not None:
+            return cached
+
+        ids = selection.ids
+        n = len(self.rows)
+        # Selecoes pequenas: ordenar direto; grandes: filtrar a permutacao global
+        permutation = self._order(field, reverse) if ids is None or len(ids) * 4 >= n else None
+        if permutation is None:
+            # Mesma semantica de apply_sort: em caso de erro mantem a ordem original
+            keys = self._sort_keys(field)
+            candidates = ids if ids is not None else range(n)
+            try:
+                result = sorted(candidates, key=keys.__getitem__, reverse=reverse)
+            except Exception as e:
+                logger.error(f"[INDEX] Erro ao ordenar por '{field}': {e}")
+                result = list(candidates)
+        elif ids is None:
+            result = permutation
+        else:
+            inside = bytearray(n)
+            for row_id in ids:
+                inside[row_id] = 1
+            result = [row_id for row_id in permutation if inside[row_id]]
+
+        selection.orders[(field, reverse)] = result
+        return result
+
+    # ------------------------------------------------------------------
+    # Consulta completa
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        node: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        sort_field: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        page: Optional[int] = None,
+        page_size: Optional[int] = None,
+        search_query: Optional[str] = None,
+        exact_filters: Optional[Dict[str, Optional[str]]] = None,
+        cursor: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Equivalente indexado de process_monitoring_data.
+
+        Args:
+            cursor: Posicao emitida em '_next' por uma consulta anterior com os
+                mesmos filtros/ordenacao (substitui page)
+
+        Returns:
+            Dicionario com data, total, page, pageSize, filterOptions e _fieldStats.
+            Consultas paginadas incluem '_next' (posicao da pagina seguinte ou None)
+
+        Raises:
+            ValueError: cursor nao corresponde a esta consulta
+        """
+        key, selection = self._selection(node, filters, search_query, exact_filters)
+        if selection.facets is None:
+            selection.facets = self.filter_options(selection.ids)
+
+        ids = self._sorted_ids(selection, sort_field, sort_order)
+        total = len(self.rows) if ids is None else len(ids)
+        rows = self.rows
+
+        paged = cursor is not None or (page is not None and page_size is not None)
+        if paged:
+            if page_size is None or page_size < 1:
+                page_size = 50
+            if cursor is not None:
+                start_idx = self._cursor_position(cursor, key, sort_field, sort_order, ids, total)
+                self._stats["cursor_pages"] += 1
+            else:
+                if page < 1:
+                    page = 1
+                start_idx = (page - 1) * page_size
+            page = start_idx // page_size + 1
+            window = range(start_idx, min(start_idx + page_size, total))
+        else:
+            # Sem paginacao - retornar todos (compatibilidade backward)
+            window = range(total)
+            page = 1
+            page_size = total
+
+        if ids is None:
+            data = [rows[i] for i in window]
+        else:
+            data = [rows[ids[i]] for i in window]
+
+        logger.debug(
+            f"[INDEX] Consulta: total={len(rows)}, filtrados={total}, retornados={len(data)}"
+        )
+
+        result = {
+            "data": data,
+            "total": total,
+            "page": page,
+            "pageSize": page_size,  # camelCase
+            "filterOptions": selection.facets['options'],  # camelCase
+            "_fieldStats": selection.facets['_fieldStats']
+        }
+        if paged:
+            result["_next"] = None
+            if data and window.stop < total:
+                # Permutacao fixada: a proxima pagina e um slice da mesma ordem
+                self._pin(key, selection)
+                last = data[-1]
+                result["_next"] = {
+                    "selection": self._cursor_digest(key, sort_field, sort_order),
+                    "position": window.stop,
+                    "last": [last.get('Node'), last.get('ID')],
+                }
+        return result
+
+    @staticmethod
+    def _cursor_digest(key: Tuple, sort_field: Optional[str], sort_order: Optional[str]) -> str:
+        """Identifica (filtros, ordenacao) de um cursor"""
+        sort = (sort_field, is_descending(sort_order)) if sort_field and sort_order else None
+        return hashlib.sha1(repr((key, sort)).encode()).hexdigest()[:16]
+
+    def _cursor_position(
+        self,
+        cursor: Dict[str, Any],
+        key: Tuple,
+        sort_field: Optional[str],
+        sort_order: Optional[str],
+        ids: Optional[List[int]],
+        total: int
+    ) -> int:
+        """Valida o cursor contra a consulta e retorna a posicao inicial"""
+        if cursor.get("selection") != self._cursor_digest(key, sort_field, sort_order):
+            raise ValueError("cursor não corresponde aos filtros/ordenação da consulta")
+        position = cursor.get("position")
+        if not isinstance(position, int) or not 0 < position <= total:
+            raise ValueError("posição do cursor inválida")
+        row = self.rows[ids[position - 1] if ids is not None else position - 1]
+        if [row.get('Node'), row.get('ID')] != list(cursor.get("last") or ()):
+            raise ValueError("cursor não corresponde ao último registro da página")
+        return position
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatisticas do indice"""
+        return {
+            **self._stats,
+            "rows": len(self.rows),
+            "indexed_fields": len(self._postings),
+            "facet_fields": len(self._columns),
+            "facet_values": sum(len(values) for values in self._sorted_values.values()),
+            "memoized_selections": len(self._selections),
+            "pinned_selections": len(self._pinned),
+            "sort_orders": len(self._orders),
+            "build_ms": round(self.build_ms, 2),
+        }
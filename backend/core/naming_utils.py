@@ -32,6 +32,10 @@ _naming_cache: Dict[str, Any] = {}
 _cache_last_update: float = 0
 _cache_ttl: int = 60  # segundos
 _cache_initialized: bool = False
+# Versão da chave de sites no KV bundle no último carregamento (None = sem bundle)
+_cache_token: Optional[tuple] = None
+
+SITES_KV_KEY = "skills/eye/metadata/sites"
 
 
 # ============================================================================
@@ -53,7 +57,7 @@ async def _load_sites_from_kv() -> List[Dict[str, Any]]:
         
         # Tentar carregar do KV primeiro
         logger.info("[NAMING] 🔍 Tentando carregar sites do KV...")
-        kv_data = await kv.get_json("skills/eye/metadata/sites")
+        kv_data = await kv.get_json(SITES_KV_KEY)
         logger.info(f"[NAMING] 📦 KV retornou: {type(kv_data)} - has_data: {'data' in kv_data if kv_data else False}")
         
         if kv_data and "data" in kv_data and "sites" in kv_data["data"]:
@@ -91,7 +95,7 @@ async def _load_naming_strategy() -> Dict[str, Any]:
         kv = KVManager()
         
         # ✅ Ler do JSON unificado de sites (campo global data.naming_config)
-        sites_data = await kv.get_json("skills/eye/metadata/sites")
+        sites_data = await kv.get_json(SITES_KV_KEY)
         
         if sites_data and "data" in sites_data and "naming_config" in sites_data["data"]:
             naming_config = sites_data["data"]["naming_config"]
@@ -112,18 +116,29 @@ async def _load_naming_strategy() -> Dict[str, Any]:
     }
 
 
+def _sites_token() -> Optional[tuple]:
+    """Versão atual da chave de sites no KV bundle (None se o bundle não a serve)"""
+    from core.kv_bundle import get_kv_bundle
+    return get_kv_bundle().token(SITES_KV_KEY)
+
+
 async def _update_cache():
     """
     Atualiza cache de sites e naming
     Deve ser chamado em background task ou periodicamente
     """
-    global _sites_cache, _naming_cache, _cache_last_update, _cache_initialized
+    global _sites_cache, _naming_cache, _cache_last_update, _cache_initialized, _cache_token
     
     current_time = time.time()
+    token = _sites_token()
     
-    # Verifica se cache expirou
-    if _cache_initialized and (current_time - _cache_last_update < _cache_ttl):
-        return  # Cache ainda válido
+    # Verifica se cache expirou (com KV bundle: só quando a chave de sites muda)
+    if _cache_initialized:
+        if token is not None:
+            if token == _cache_token:
+                return  # Cache ainda válido
+        elif current_time - _cache_last_update < _cache_ttl:
+            return  # Cache ainda válido
     
     logger.info("[NAMING] 🔄 Atualizando cache...")
     
@@ -131,6 +146,7 @@ async def _update_cache():
     _naming_cache = await _load_naming_strategy()
     _cache_last_update = current_time
     _cache_initialized = True
+    _cache_token = token
     
     logger.info(f"[NAMING] ✅ Cache atualizado: {len(_sites_cache)} sites, strategy={_naming_cache.get('naming_strategy')}")
 
@@ -141,7 +157,8 @@ def _ensure_cache_sync():
     """
     global _cache_initialized
     
-    if not _cache_initialized:
+    token = _sites_token()
+    if not _cache_initialized or (token is not None and token != _cache_token):
         import asyncio
         try:
             loop = asyncio.get_event_loop()
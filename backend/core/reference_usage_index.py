@@ -0,0 +1,193 @@
+"""
+Índice de Uso dos Reference Values
+
+RESPONSABILIDADES:
+- Manter em memória (campo, valor normalizado) → instâncias que usam o valor
+  (Meta.<campo> de cada serviço do catálogo)
+- Derivado do snapshot da CatalogReplica e mantido por DELTAS: só os serviços
+  cuja tupla de instâncias mudou desde a última versão são reaplicados (mesma
+  estratégia do DashboardAggregates.sync_catalog)
+- Consulta O(1): ReferenceValuesManager._check_usage e usage_count do
+  list_values passam a ser leituras do índice (contagem exata, sem gravar no KV)
+
+SEMÂNTICA (mesma do _check_usage anterior):
+- Cada instância conta 1 (mesmo ID em nodes diferentes conta 2x)
+- Meta vazio é ignorado; valores comparados após normalize_value (Title Case)
+
+ANTES: cada delete_value buscava todos os serviços e normalizava todos os
+       Meta; usage_count era um contador no KV (read-modify-write por criação)
+       que divergia do catálogo
+AGORA: lookup em dicionário; contagens exatas derivadas do catálogo
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog_replica import get_ready_snapshot
+from .reference_values_manager import ReferenceValuesManager
+
+logger = logging.getLogger(__name__)
+
+UsageKey = Tuple[str, str]  # (campo, valor normalizado)
+InstanceKey = Tuple[str, str]  # (Node, ServiceID)
+
+
+@lru_cache(maxsize=65536)
+def _normalize(value: str) -> Optional[str]:
+    """normalize_value memoizado (valores de Meta se repetem muito); None se inválido"""
+    try:
+        return ReferenceValuesManager.normalize_value(value) or None
+    except ValueError:
+        return None
+
+
+class ReferenceUsageIndex:
+    """
+    Uso dos reference values derivado do catálogo.
+
+    Exemplo de Uso:
+        ```python
+        index = get_reference_usage_index()
+        index.sync_catalog(snapshot)          # aplica só os serviços alterados
+        index.usage("company", "Ramada")      # O(1)
+        ```
+    """
+
+    def __init__(self):
+        # Catálogo: nome → tupla de instâncias já aplicada (diff por identidade)
+        self._services: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        self._usage: Dict[UsageKey, Set[InstanceKey]] = {}
+        self.catalog_version: Optional[int] = None
+        self._stats = {
+            "catalog_syncs": 0,
+            "services_applied": 0,
+            "lookups": 0,
+        }
+
+    # =========================================================================
+    # DELTAS DO CATÁLOGO
+    # =========================================================================
+
+    def _apply_instances(self, instances: Iterable[Dict[str, Any]], add: bool) -> None:
+        for svc in instances:
+            meta = svc.get("Meta") or {}
+            if not meta:
+                continue
+            instance = (svc.get("Node", ""), svc.get("ID", ""))
+            for field_name, raw in meta.items():
+                if not raw:
+                    continue
+                normalized = _normalize(str(raw))
+                if normalized is None:
+                    continue
+                key = (field_name, normalized)
+                if add:
+                    self._usage.setdefault(key, set()).add(instance)
+                else:
+                    users = self._usage.get(key)
+                    if users is not None:
+                        users.discard(instance)
+                        if not users:
+                            del self._usage[key]
+
+    def sync_catalog(self, snapshot) -> bool:
+        """
+        Aplica ao índice os serviços alterados desde a última versão.
+
+        Args:
+            snapshot: CatalogSnapshot
+
+        Returns:
+            True se o índice está na versão do snapshot (False se já avançou)
+        """
+        if self.catalog_version == snapshot.version:
+            return True
+        if self.catalog_version is not None and self.catalog_version > snapshot.version:
+            return False
+
+        services = snapshot.services
+        updated = [name for name, instances in services.items() if self._services.get(name) is not instances]
+        removed = [name for name in self._services if name not in services]
+        changed = len(updated) + len(removed)
+
+        # Remoções antes das adições: uma instância (Node, ID) que migrou de
+        # serviço não pode ser descartada depois de já reindexada no novo
+        for name in updated:
+            self._apply_instances(self._services.get(name, ()), add=False)
+        for name in removed:
+            self._apply_instances(self._services.pop(name), add=False)
+        for name in updated:
+            self._services[name] = services[name]
+            self._apply_instances(services[name], add=True)
+
+        self.catalog_version = snapshot.version
+        self._stats["catalog_syncs"] += 1
+        self._stats["services_applied"] += changed
+        if changed:
+            logger.debug(f"[USAGE INDEX] v{snapshot.version}: {changed} serviços reaplicados")
+        return True
+
+    # =========================================================================
+    # CONSULTA
+    # =========================================================================
+
+    def usage(self, field_name: str, value: str) -> int:
+        """Instâncias que usam o valor (normalizado) no campo"""
+        self._stats["lookups"] += 1
+        return len(self._usage.get((field_name, value), ()))
+
+    def service_ids(self, field_name: str, value: str) -> List[str]:
+        """IDs dos serviços que usam o valor (ordenados, sem repetição)"""
+        return sorted({service_id for _, service_id in self._usage.get((field_name, value), ())})
+
+    def counts(self, field_name: str) -> Dict[str, int]:
+        """Uso de todos os valores de um campo ({valor normalizado: instâncias})"""
+        return {value: len(users) for (name, value), users in self._usage.items() if name == field_name}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do índice (para debug/observabilidade)"""
+        return {
+            **self._stats,
+            "catalog_version": self.catalog_version,
+            "services": len(self._services),
+            "keys": len(self._usage),
+        }
+
+
+# Instância global (singleton)
+_usage_index: Optional[ReferenceUsageIndex] = None
+
+
+def get_reference_usage_index() -> ReferenceUsageIndex:
+    """
+    Retorna instância global do índice de uso.
+
+    Returns:
+        ReferenceUsageIndex singleton
+    """
+    global _usage_index
+    if _usage_index is None:
+        _usage_index = ReferenceUsageIndex()
+    return _usage_index
+
+
+def get_synced_usage_index() -> Optional[ReferenceUsageIndex]:
+    """
+    Índice sincronizado com o snapshot atual da réplica do catálogo.
+
+    Returns:
+        ReferenceUsageIndex ou None (réplica desabilitada/ainda não pronta)
+    """
+    snapshot = get_ready_snapshot()
+    if snapshot is None:
+        return None
+    index = get_reference_usage_index()
+    index.sync_catalog(snapshot)
+    return index
+
+
+def reset_reference_usage_index() -> None:
+    """Reseta o índice global (útil para testes)"""
+    global _usage_index
+    _usage_index = None
@@ -43,12 +43,17 @@ NORMALIZAÇÃO:
 PROTEÇÃO CONTRA DELEÇÃO:
 - Bloqueia deleção se valor está em uso
 - Mostra mensagem: "Valor 'X' está em uso em N instâncias"
+
+USO (usage_count):
+- Derivado do catálogo pelo índice de uso (core/reference_usage_index.py),
+  mantido por deltas da réplica do catálogo - não é mais gravado no KV
 """
 
 import re
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
+from .consul_filter import meta_field_present
 from .consul_manager import ConsulManager
 from .kv_manager import KVManager
 
@@ -300,11 +305,16 @@ class ReferenceValuesManager:
         # Carregar array completo
         array = await self.kv.get_json(key) or []
 
+        # Uso exato derivado do catálogo (None sem réplica: usa o contador gravado)
+        usage = self._usage_counts(field_name)
+
         # Filtrar dados conforme solicitado
         values = []
         for item in array:
             if isinstance(item, dict) and "value" in item:
                 if include_stats:
+                    if usage is not None:
+                        item = {**item, "usage_count": usage.get(item["value"], 0)}
                     values.append(item)
                 else:
                     # Retorna apenas os dados essenciais
@@ -319,7 +329,10 @@ class ReferenceValuesManager:
             if sort_by == "value":
                 values.sort(key=lambda x: x.get("value", ""))
             elif sort_by == "usage_count":
-                values.sort(key=lambda x: x.get("usage_count", 0), reverse=True)
+                if usage is not None:
+                    values.sort(key=lambda x: usage.get(x["value"], 0), reverse=True)
+                else:
+                    values.sort(key=lambda x: x.get("usage_count", 0), reverse=True)
             elif sort_by == "created_at":
                 values.sort(key=lambda x: x.get("created_at", ""))
             # Se sort_by for inválido, ignora e retorna sem ordenar
@@ -736,8 +749,9 @@ class ReferenceValuesManager:
         Verifica quantas vezes um valor está em uso.
 
         IMPLEMENTAÇÃO:
-        - Busca todos os serviços no Consul
-        - Conta quantos têm Meta.{field_name} == value
+        - Réplica do catálogo pronta: lookup no índice de uso (mantido por deltas)
+        - Sem réplica: busca todos os serviços no Consul e conta quantos têm
+          Meta.{field_name} == value
 
         Args:
             field_name: Nome do campo
@@ -747,17 +761,26 @@ class ReferenceValuesManager:
             Número de instâncias que usam este valor
         """
         try:
-            # Buscar todos os serviços
-            services_response = await self.consul.get_services()
+            from .reference_usage_index import get_synced_usage_index
+
+            index = get_synced_usage_index()
+            if index is not None:
+                return index.usage(field_name, value)
+
+            # Buscar todos os serviços (CATALOG REPLICA: snapshot em memória).
+            # Sem réplica: o Consul devolve apenas serviços com o campo preenchido
+            services_response = await self.consul.get_services_snapshot(
+                filter_expr=meta_field_present(field_name)
+            )
 
             if not services_response:
                 return 0
 
             count = 0
 
-            # Iterar sobre todos os serviços (mesma estrutura do _bulk_update_services)
-            # services_response É UM DICIONÁRIO {service_id: service_data}
-            for svc_id, service in services_response.items():
+            # Iterar sobre todos os serviços
+            # services_response É UMA LISTA [service_data] (uma por instância)
+            for service in services_response:
                 meta = service.get('Meta', {})
 
                 # Verificar se o valor está presente
@@ -776,31 +799,34 @@ class ReferenceValuesManager:
             logger.error(f"Erro ao verificar uso de {field_name}={value}: {exc}")
             return 0  # Em caso de erro, não bloqueia deleção
 
-    async def increment_usage(self, field_name: str, value: str) -> bool:
+    def _usage_counts(self, field_name: str) -> Optional[Dict[str, int]]:
         """
-        Incrementa contador de uso de um valor.
+        Uso de todos os valores do campo, derivado do catálogo.
+
+        Returns:
+            {valor normalizado: instâncias} ou None (réplica indisponível)
+        """
+        from .reference_usage_index import get_synced_usage_index
+
+        try:
+            index = get_synced_usage_index()
+            return index.counts(field_name) if index is not None else None
+        except Exception as exc:
+            logger.error(f"Erro ao consultar índice de uso de {field_name}: {exc}")
+            return None
 
-        Chamado automaticamente quando um serviço/exporter/blackbox é criado.
+    async def increment_usage(self, field_name: str, value: str) -> bool:
+        """
+        Mantido por compatibilidade: usage_count agora é derivado do catálogo
+        (core/reference_usage_index.py) e não é mais gravado no KV a cada
+        criação de serviço/exporter/blackbox.
 
         Args:
             field_name: Nome do campo
             value: Valor usado
 
         Returns:
-            True se sucesso
+            True se o valor está cadastrado
         """
         normalized = self.normalize_value(value)
-
-        # Buscar valor existente
-        existing = await self.get_value(field_name, normalized)
-
-        if not existing:
-            # Valor não existe, não incrementa
-            return False
-
-        # Incrementar contador
-        existing["usage_count"] = existing.get("usage_count", 0) + 1
-        existing["last_used_at"] = datetime.utcnow().isoformat()
-
-        # Salvar
-        return await self._put_value(field_name, normalized, existing, "system")
+        return await self.get_value(field_name, normalized) is not None
@@ -0,0 +1,209 @@
+"""
+Cache de Respostas Pré-serializadas - JSON codificado + gzip/brotli
+
+RESPONSABILIDADES:
+- Guardar o corpo JSON JÁ codificado de respostas quentes (ex.: mesma página
+  de /monitoring/data pedida por vários navegadores) + variantes gzip/brotli
+- Servir direto os bytes com o Content-Encoding negociado (Accept-Encoding),
+  sem jsonable_encoder/json.dumps/compressão a cada hit
+- Chave = namespace + ETag por versão (path + query normalizada + versão dos
+  dados, ver core/http_cache.check_not_modified)
+
+INVALIDAÇÃO:
+- Entradas vivem no LocalCache global sob "<namespace>:response:"; com namespace
+  "monitoring:data:<categoria>" o MonitoringDataCache.invalidate() existente
+  também as remove
+- Nova versão dos dados no namespace → respostas das versões anteriores removidas
+- brotli é opcional (pip install brotli); sem ele só gzip
+
+ANTES: cache hit ainda re-serializava milhares de dicts por requisição
+AGORA: hit = lookup + envio dos bytes já comprimidos
+"""
+
+import asyncio
+import gzip
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from core import json_codec
+from core.cache_manager import get_cache
+from core.config import Config
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+logger = logging.getLogger(__name__)
+
+
+class EncodedResponse(NamedTuple):
+    """Corpo JSON codificado e variantes comprimidas (tupla: medida pelo LocalCache)"""
+    etag: str
+    body: bytes
+    gzip: Optional[bytes]
+    br: Optional[bytes]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], entry: EncodedResponse) -> Optional[str]:
+    """
+    Escolhe a codificação pelo Accept-Encoding (br > gzip > identity).
+
+    Returns:
+        "br", "gzip" ou None (sem compressão)
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    def allowed(encoding: str) -> bool:
+        return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+    if entry.br is not None and allowed("br"):
+        return "br"
+    if entry.gzip is not None and allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def encode_response(etag: str, payload: Any, min_size: int = 0) -> EncodedResponse:
+    """
+    Codifica o payload como o CodecJSONResponse e gera as variantes.
+
+    Corpos menores que min_size não são comprimidos.
+    """
+    body = json_codec.dumps(payload, default=jsonable_encoder)
+    if len(body) < min_size:
+        return EncodedResponse(etag, body, None, None)
+    return EncodedResponse(
+        etag,
+        body,
+        gzip.compress(body, compresslevel=Config.RESPONSE_CACHE_GZIP_LEVEL),
+        brotli.compress(body, quality=Config.RESPONSE_CACHE_BROTLI_QUALITY) if HAS_BROTLI else None,
+    )
+
+
+class ResponseCache:
+    """
+    Respostas codificadas no LocalCache, por namespace e ETag.
+
+    Exemplo de Uso:
+        ```python
+        etag = check_not_modified(request, http_response, catalog.version)
+        namespace = f"monitoring:data:{category}"
+        cached = await response_cache.get(namespace, etag)
+        if cached is None:
+            cached = await response_cache.store(namespace, etag, catalog.version, build_payload())
+        return response_cache.respond(request, cached)
+        ```
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, min_size: Optional[int] = None):
+        self.ttl = ttl_seconds or Config.RESPONSE_CACHE_TTL
+        self.min_size = min_size if min_size is not None else Config.RESPONSE_CACHE_MIN_BYTES
+        self._cache = get_cache()
+        # namespace → versão dos dados das respostas armazenadas
+        self._versions: Dict[str, Any] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "version_invalidations": 0,
+            "served": {"identity": 0, "gzip": 0, "br": 0},
+        }
+
+    @staticmethod
+    def _key(namespace: str, etag: str) -> str:
+        return f"{namespace}:response:{etag}"
+
+    async def get(self, namespace: str, etag: str) -> Optional[EncodedResponse]:
+        """Resposta codificada para o ETag (None se não armazenada)"""
+        entry = await self._cache.get(self._key(namespace, etag))
+        self._stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    async def store(self, namespace: str, etag: str, version: Any, payload: Any) -> EncodedResponse:
+        """
+        Codifica (fora do event loop) e armazena a resposta.
+
+        Primeira resposta de uma nova versão remove as das versões anteriores.
+        """
+        entry = await asyncio.to_thread(encode_response, etag, payload, self.min_size)
+
+        if self._versions.get(namespace, version) != version:
+            self._stats["version_invalidations"] += 1
+            await self.invalidate(namespace)
+        self._versions[namespace] = version
+
+        await self._cache.set(self._key(namespace, etag), entry, ttl=self.ttl)
+        self._stats["stores"] += 1
+        return entry
+
+    def respond(self, request: Request, entry: EncodedResponse) -> Response:
+        """Response com a variante negociada (ETag fraco nas variantes comprimidas)"""
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), entry)
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is None:
+            content = entry.body
+            headers["ETag"] = entry.etag
+        else:
+            content = entry.br if encoding == "br" else entry.gzip
+            headers["ETag"] = entry.etag if entry.etag.startswith("W/") else f"W/{entry.etag}"
+            headers["Content-Encoding"] = encoding
+        self._stats["served"][encoding or "identity"] += 1
+        return Response(content=content, media_type="application/json", headers=headers)
+
+    async def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Remove respostas de um namespace (prefixo) ou todas"""
+        if namespace is None:
+            self._versions.clear()
+            return await self._cache.invalidate_pattern("*:response:*")
+        self._versions.pop(namespace, None)
+        return await self._cache.invalidate_pattern(f"{namespace}:response:*")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache de respostas"""
+        total = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate_percent": round(self._stats["hits"] / total * 100, 2) if total else 0,
+            "brotli": HAS_BROTLI,
+            "namespaces": len(self._versions),
+        }
+
+
+# Instância global (singleton)
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Retorna o cache de respostas global (singleton).
+
+    Returns:
+        Instância de ResponseCache
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def reset_response_cache() -> None:
+    """Reseta o cache de respostas global (útil para testes)"""
+    global _response_cache
+    _response_cache = None
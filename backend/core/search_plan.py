@@ -0,0 +1,443 @@
+"""
+Compiled Query Plans for Advanced Search
+Compiles an AdvancedSearch condition list once into an executable plan.
+
+SearchCondition.matches() dispatches on the operator for every item, splits
+the field path on every call and re-compiles regexes per item. A QueryPlan
+does that work once:
+
+- field accessors are pre-split (specialized for 1 and 2 path segments)
+- regexes are compiled once; numeric operands are coerced once
+- conditions are ordered by selectivity/cost (cheap and selective first)
+- CONTAINS/EQ/STARTS_WITH/ENDS_WITH on string fields are pushed down to the
+  catalog trigram index when one is available (candidate sets are intersected
+  for AND and united for OR, then verified exactly when needed)
+
+Plans are cached by normalized query (operator + sorted conditions), so
+repeated queries from the UI skip compilation entirely.
+
+Semantics are exactly those of SearchQuery/SearchCondition.
+"""
+import json
+import logging
+import operator as op
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from core.advanced_search import LogicalOperator, SearchOperator
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_SIZE = 256
+
+Accessor = Callable[[Dict[str, Any]], Any]
+Predicate = Callable[[Dict[str, Any]], bool]
+
+_NUMERIC = {
+    SearchOperator.GT: op.gt,
+    SearchOperator.LT: op.lt,
+    SearchOperator.GTE: op.ge,
+    SearchOperator.LTE: op.le,
+}
+
+# Lower rank runs first: selective equality checks, then cheap string checks,
+# then numeric coercion, then regex
+_RANK = {
+    SearchOperator.EQUALS: 0,
+    SearchOperator.IN: 1,
+    SearchOperator.STARTS_WITH: 2,
+    SearchOperator.ENDS_WITH: 2,
+    SearchOperator.CONTAINS: 3,
+    SearchOperator.GT: 4,
+    SearchOperator.LT: 4,
+    SearchOperator.GTE: 4,
+    SearchOperator.LTE: 4,
+    SearchOperator.NOT_EQUALS: 5,
+    SearchOperator.NOT_IN: 5,
+    SearchOperator.REGEX: 6,
+}
+
+# Operators the trigram index can answer (exact) or narrow (superset + verify)
+_INDEX_EXACT = {SearchOperator.CONTAINS}
+_INDEX_SUPERSET = {SearchOperator.EQUALS, SearchOperator.STARTS_WITH, SearchOperator.ENDS_WITH}
+
+
+def field_accessor(path: str) -> Accessor:
+    """
+    Pre-split accessor for a dotted field path (same rules as
+    SearchCondition._get_nested_value).
+    """
+    keys = tuple(path.split("."))
+
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get_one(item: Dict[str, Any]) -> Any:
+            return item.get(key) if isinstance(item, dict) else None
+        return get_one
+
+    if len(keys) == 2:
+        first, second = keys
+
+        def get_two(item: Dict[str, Any]) -> Any:
+            value = item.get(first) if isinstance(item, dict) else None
+            return value.get(second) if isinstance(value, dict) else None
+        return get_two
+
+    def get_path(item: Dict[str, Any]) -> Any:
+        value = item
+        for key in keys:
+            if isinstance(value, dict):
+                value = value.get(key)
+            else:
+                return None
+        return value
+    return get_path
+
+
+def _never(_: Any) -> bool:
+    return False
+
+
+def _value_test(operator: SearchOperator, value: Any) -> Callable[[Any], bool]:
+    """Test applied to the item value (operands prepared once)"""
+    if operator == SearchOperator.EQUALS:
+        expected = str(value)
+        return lambda v: str(v) == expected
+
+    if operator == SearchOperator.NOT_EQUALS:
+        expected = str(value)
+        return lambda v: str(v) != expected
+
+    if operator == SearchOperator.CONTAINS:
+        needle = str(value).lower()
+        return lambda v: needle in str(v).lower()
+
+    if operator == SearchOperator.STARTS_WITH:
+        prefix = str(value).lower()
+        return lambda v: str(v).lower().startswith(prefix)
+
+    if operator == SearchOperator.ENDS_WITH:
+        suffix = str(value).lower()
+        return lambda v: str(v).lower().endswith(suffix)
+
+    if operator == SearchOperator.REGEX:
+        try:
+            pattern = re.compile(str(value), re.IGNORECASE)
+        except re.error:
+            return _never
+        return lambda v: bool(pattern.search(str(v)))
+
+    if operator in (SearchOperator.IN, SearchOperator.NOT_IN):
+        negate = operator == SearchOperator.NOT_IN
+        if not isinstance(value, list):
+            return (lambda v: True) if negate else _never
+        try:
+            members = frozenset(value)
+        except TypeError:
+            members = None
+
+        def contains(v: Any) -> bool:
+            if members is not None:
+                try:
+                    return v in members
+                except TypeError:
+                    pass  # unhashable item value: fall back to list equality
+            return v in value
+
+        if negate:
+            return lambda v: not contains(v)
+        return contains
+
+    compare = _NUMERIC[operator]
+    try:
+        operand = float(value)
+    except (ValueError, TypeError):
+        return _never
+
+    def numeric(v: Any) -> bool:
+        try:
+            return compare(float(v), operand)
+        except (ValueError, TypeError):
+            return False
+    return numeric
+
+
+class CompiledCondition:
+    """A single condition compiled into a predicate"""
+
+    __slots__ = ("field", "operator", "value", "rank", "predicate")
+
+    def __init__(self, field: str, operator: SearchOperator, value: Any):
+        self.field = field
+        self.operator = operator
+        self.value = value
+        self.rank = _RANK[operator]
+
+        get = field_accessor(field)
+        test = _value_test(operator, value)
+        if operator in (SearchOperator.NOT_EQUALS, SearchOperator.NOT_IN):
+            self.predicate: Predicate = lambda item: test(get(item))
+        else:
+            def predicate(item: Dict[str, Any]) -> bool:
+                item_value = get(item)
+                return item_value is not None and test(item_value)
+            self.predicate = predicate
+
+    @property
+    def index_query(self) -> Optional[str]:
+        """Text to look up in the trigram index (None = not indexable)"""
+        if self.operator in _INDEX_EXACT or self.operator in _INDEX_SUPERSET:
+            text = str(self.value)
+            return text if text else None
+        return None
+
+    @property
+    def index_exact(self) -> bool:
+        return self.operator in _INDEX_EXACT
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "field": self.field,
+            "operator": self.operator.value,
+            "value": self.value,
+            "rank": self.rank,
+        }
+
+
+class QueryPlan:
+    """
+    Executable plan for a list of conditions combined with AND/OR.
+
+    Example:
+        ```python
+        plan = compile_query([{"field": "Meta.env", "operator": "eq", "value": "prod"}])
+        results = plan.execute(services)
+        ```
+    """
+
+    def __init__(self, conditions: Sequence[CompiledCondition], logical_operator: LogicalOperator):
+        self.logical_operator = logical_operator
+        self.conditions: Tuple[CompiledCondition, ...] = tuple(
+            sorted(conditions, key=lambda c: c.rank)
+        )
+        self.compile_ms = 0.0
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        """Same result as SearchQuery.matches"""
+        if not self.conditions:
+            return True
+        if self.logical_operator == LogicalOperator.AND:
+            return all(c.predicate(item) for c in self.conditions)
+        return any(c.predicate(item) for c in self.conditions)
+
+    def _index_lookup(self, text_index: Any, trace: Dict[str, Any]):
+        """
+        Candidate document keys from the trigram index.
+
+        Returns:
+            (candidates, exact_docs, residual conditions) or None when the
+            index cannot narrow this query
+        """
+        pushed: List[Tuple[CompiledCondition, Set[Any]]] = []
+        for condition in self.conditions:
+            query = condition.index_query
+            docs = None
+            if query is not None:
+                docs = text_index.search(query, fields=[condition.field])
+            if docs is None:
+                if self.logical_operator == LogicalOperator.OR:
+                    return None  # one unindexed branch forces a scan
+                continue
+            pushed.append((condition, docs))
+
+        if not pushed:
+            return None
+        trace["pushed_down"] = [c.field + ":" + c.operator.value for c, _ in pushed]
+
+        exact_pushed = {id(c) for c, _ in pushed if c.index_exact}
+        residual = tuple(c for c in self.conditions if id(c) not in exact_pushed)
+
+        if self.logical_operator == LogicalOperator.AND:
+            candidates: Optional[Set[Any]] = None
+            for _, docs in sorted(pushed, key=lambda p: len(p[1])):
+                candidates = set(docs) if candidates is None else candidates & docs
+                if not candidates:
+                    break
+            return candidates, set(), residual
+
+        exact_docs: Set[Any] = set()
+        candidates = set()
+        for condition, docs in pushed:
+            (exact_docs if condition.index_exact else candidates).update(docs)
+        return candidates, exact_docs, residual
+
+    def execute(
+        self,
+        items: Iterable[Dict[str, Any]],
+        text_index: Any = None,
+        trace: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter items with the plan.
+
+        Args:
+            items: Items to filter
+            text_index: Optional CatalogTextIndex synced to the same catalog
+                snapshot the items come from (documents keyed by (Node, ID))
+            trace: Optional dict filled with execution details (explain mode)
+
+        Returns:
+            Matching items, in input order
+        """
+        start = time.perf_counter()
+        trace = trace if trace is not None else {}
+        trace["pushed_down"] = []
+
+        lookup = None
+        if text_index is not None and self.conditions:
+            lookup = self._index_lookup(text_index, trace)
+
+        if lookup is None:
+            trace["strategy"] = "scan"
+            results = [item for item in items if self.matches(item)]
+        else:
+            candidates, exact_docs, residual = lookup
+            trace["strategy"] = "index"
+            trace["candidates"] = len(candidates) + len(exact_docs)
+            if self.logical_operator == LogicalOperator.AND:
+                results = [
+                    item for item in items
+                    if (item.get("Node"), item.get("ID")) in candidates
+                    and all(c.predicate(item) for c in residual)
+                ]
+            else:
+                results = []
+                for item in items:
+                    key = (item.get("Node"), item.get("ID"))
+                    if key in exact_docs or (
+                        key in candidates and any(c.predicate(item) for c in residual)
+                    ):
+                        results.append(item)
+
+        trace["execute_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        trace["matches"] = len(results)
+        return results
+
+    def explain(self) -> Dict[str, Any]:
+        """Plan description (evaluation order and index eligibility)"""
+        return {
+            "logical_operator": self.logical_operator.value,
+            "compile_ms": round(self.compile_ms, 3),
+            "steps": [
+                {
+                    **c.describe(),
+                    "index": ("exact" if c.index_exact else "candidates")
+                    if c.index_query is not None else None,
+                }
+                for c in self.conditions
+            ],
+        }
+
+
+def normalize_query(conditions: Sequence[Dict[str, Any]], logical_operator: str = "and") -> Tuple:
+    """
+    Cache key for a query. AND/OR are commutative, so condition order does not
+    matter; operators are validated here (ValueError on unknown operator).
+    """
+    logical = LogicalOperator(logical_operator)
+    normalized = sorted(
+        json.dumps(
+            [c["field"], SearchOperator(c["operator"]).value, c["value"]],
+            sort_keys=True,
+            default=str,
+        )
+        for c in conditions
+    )
+    return logical.value, tuple(normalized)
+
+
+def _compile(conditions: Sequence[Dict[str, Any]], logical_operator: str) -> QueryPlan:
+    start = time.perf_counter()
+    plan = QueryPlan(
+        [
+            CompiledCondition(c["field"], SearchOperator(c["operator"]), c["value"])
+            for c in conditions
+        ],
+        LogicalOperator(logical_operator),
+    )
+    plan.compile_ms = (time.perf_counter() - start) * 1000
+    return plan
+
+
+class QueryPlanCache:
+    """LRU cache of compiled plans keyed by normalized query"""
+
+    def __init__(self, max_size: int = PLAN_CACHE_SIZE):
+        self.max_size = max_size
+        self._plans: "OrderedDict[Tuple, QueryPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_or_compile(
+        self,
+        conditions: Sequence[Dict[str, Any]],
+        logical_operator: str = "and"
+    ) -> Tuple[QueryPlan, bool]:
+        """
+        Returns:
+            (plan, cache_hit)
+        """
+        key = normalize_query(conditions, logical_operator)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self._stats["hits"] += 1
+                return plan, True
+
+        plan = _compile(conditions, logical_operator)
+        with self._lock:
+            self._plans[key] = plan
+            self._stats["misses"] += 1
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+                self._stats["evictions"] += 1
+        return plan, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._plans), "max_size": self.max_size}
+
+
+# Global instance (singleton)
+_plan_cache: Optional[QueryPlanCache] = None
+
+
+def get_query_plan_cache() -> QueryPlanCache:
+    """Returns the global compiled plan cache (singleton)"""
+    global _plan_cache
+    if _plan_cache is None:
+        _plan_cache = QueryPlanCache()
+    return _plan_cache
+
+
+def reset_query_plan_cache() -> None:
+    """Resets the global plan cache (useful for tests)"""
+    global _plan_cache
+    _plan_cache = None
+
+
+def compile_query(
+    conditions: Sequence[Dict[str, Any]],
+    logical_operator: str = "and"
+) -> QueryPlan:
+    """Compiled plan for the conditions (served from the global cache)"""
+    return get_query_plan_cache().get_or_compile(conditions, logical_operator)[0]
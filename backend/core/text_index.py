@@ -0,0 +1,390 @@
+"""
+Índice de Trigramas - Busca por substring sem varrer o catálogo
+
+RESPONSABILIDADES:
+- Indexar termos (campo, texto em minúsculas) de cada documento por trigramas
+- Responder "query está contida em algum campo?" intersectando as listas de
+  postings dos trigramas da query e verificando os termos candidatos
+- Manter o índice do catálogo sincronizado com o snapshot da CatalogReplica
+  de forma incremental (apenas serviços cuja tupla de instâncias mudou)
+- Expor tempos por consulta (get_stats)
+
+ARQUITETURA:
+- Postings no nível de TERMO (não de documento): valores repetidos (company,
+  env, site...) são indexados uma única vez e a verificação é exata
+  (query in termo), então não existem falsos positivos
+- Termo → documentos; documento → termos (remoção/atualização incremental)
+- Queries com menos de 3 caracteres varrem apenas os termos distintos
+
+ANTES: cada tecla na busca da tabela = lower() + substring em todos os campos
+de todos os serviços
+AGORA: interseção de postings + verificação de poucos termos distintos
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+GRAM_SIZE = 3
+
+Term = Tuple[str, str]  # (campo, texto em minúsculas)
+DocKey = Tuple[str, str]  # (Node, ID)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigramas de um texto (já em minúsculas)"""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TrigramIndex:
+    """
+    Índice invertido de trigramas com atualização incremental por documento.
+
+    Exemplo de Uso:
+        ```python
+        index = TrigramIndex()
+        index.add("svc-1", [("Meta.name", "gateway principal")])
+        index.search("princ")  # {"svc-1"}
+        ```
+    """
+
+    def __init__(self):
+        self._doc_terms: Dict[Hashable, FrozenSet[Term]] = {}
+        self._term_docs: Dict[Term, Set[Hashable]] = {}
+        self._gram_terms: Dict[str, Set[Term]] = {}
+        self._stats = {
+            "queries": 0,
+            "trigram_queries": 0,
+            "scan_queries": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "last_ms": 0.0,
+            "last_candidates": 0,
+            "last_matches": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc: Hashable) -> bool:
+        return doc in self._doc_terms
+
+    def add(self, doc: Hashable, terms: Iterable[Term]) -> bool:
+        """
+        Indexa (ou reindexa) um documento.
+
+        Returns:
+            True se o índice mudou
+        """
+        new_terms = frozenset(terms)
+        old_terms = self._doc_terms.get(doc)
+        if old_terms == new_terms:
+            return False
+
+        if old_terms is not None:
+            for term in old_terms - new_terms:
+                self._unlink(doc, term)
+            added = new_terms - old_terms
+        else:
+            added = new_terms
+
+        for term in added:
+            docs = self._term_docs.get(term)
+            if docs is None:
+                docs = self._term_docs[term] = set()
+                for gram in trigrams(term[1]):
+                    self._gram_terms.setdefault(gram, set()).add(term)
+            docs.add(doc)
+
+        self._doc_terms[doc] = new_terms
+        return True
+
+    def remove(self, doc: Hashable) -> bool:
+        """Remove um documento do índice"""
+        terms = self._doc_terms.pop(doc, None)
+        if terms is None:
+            return False
+        for term in terms:
+            self._unlink(doc, term)
+        return True
+
+    def _unlink(self, doc: Hashable, term: Term) -> None:
+        docs = self._term_docs.get(term)
+        if docs is None:
+            return
+        docs.discard(doc)
+        if docs:
+            return
+        # Termo sem documentos: remover dos postings de trigramas
+        del self._term_docs[term]
+        for gram in trigrams(term[1]):
+            terms = self._gram_terms.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._gram_terms[gram]
+
+    def matching_terms(
+        self,
+        query: str,
+        field_filter: Optional[Callable[[str], bool]] = None
+    ) -> List[Term]:
+        """Termos que contêm query (já em minúsculas), opcionalmente filtrados por campo"""
+        grams = trigrams(query)
+        if grams:
+            postings = []
+            for gram in grams:
+                terms = self._gram_terms.get(gram)
+                if not terms:
+                    return []
+                postings.append(terms)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for terms in postings[1:]:
+                candidates &= terms
+                if not candidates:
+                    return []
+        else:
+            # Query curta (< 3 caracteres): varrer os termos distintos
+            candidates = self._term_docs
+
+        self._stats["last_candidates"] = len(candidates)
+        return [
+            term for term in candidates
+            if query in term[1] and (field_filter is None or field_filter(term[0]))
+        ]
+
+    def search(
+        self,
+        query: str,
+        field_filter: Optional[Callable[[str], bool]] = None
+    ) -> Set[Hashable]:
+        """
+        Documentos com algum termo contendo query (case-insensitive).
+
+        Args:
+            query: Texto buscado (substring)
+            field_filter: Restringe os campos considerados (None = todos)
+
+        Returns:
+            Conjunto de chaves de documento
+        """
+        start = time.perf_counter()
+        query = query.lower()
+        docs: Set[Hashable] = set()
+        for term in self.matching_terms(query, field_filter):
+            docs |= self._term_docs[term]
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stats["queries"] += 1
+        self._stats["trigram_queries" if len(query) >= GRAM_SIZE else "scan_queries"] += 1
+        self._stats["total_ms"] += elapsed_ms
+        self._stats["last_ms"] = elapsed_ms
+        self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+        self._stats["last_matches"] = len(docs)
+        return docs
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanho do índice e tempos das consultas"""
+        queries = self._stats["queries"]
+        return {
+            **self._stats,
+            "total_ms": round(self._stats["total_ms"], 3),
+            "max_ms": round(self._stats["max_ms"], 3),
+            "last_ms": round(self._stats["last_ms"], 3),
+            "avg_ms": round(self._stats["total_ms"] / queries, 3) if queries else 0.0,
+            "documents": len(self._doc_terms),
+            "terms": len(self._term_docs),
+            "trigrams": len(self._gram_terms),
+        }
+
+
+def instance_terms(svc: Dict[str, Any]) -> Tuple[List[Term], List[str]]:
+    """
+    Termos de uma instância do catálogo.
+
+    - Campos raiz string (ID, Service, Address, Node, ...) → (campo, texto)
+    - Valores string do Meta → ('Meta.<chave>', texto)
+
+    Returns:
+        (termos, campos com valores não-string - não respondidos pelo índice)
+    """
+    terms: List[Term] = []
+    non_text: List[str] = []
+    for field, value in svc.items():
+        if field == 'Meta':
+            continue
+        if isinstance(value, str):
+            if value:
+                terms.append((field, value.lower()))
+        elif value is not None:
+            non_text.append(field)
+
+    non_text.append('Meta')
+    for key, value in (svc.get('Meta') or {}).items():
+        field = f"Meta.{key}"
+        if isinstance(value, str):
+            if value:
+                terms.append((field, value.lower()))
+        elif value is not None:
+            non_text.append(field)
+    return terms, non_text
+
+
+class CatalogTextIndex:
+    """
+    Índice de trigramas do catálogo, sincronizado com o snapshot da réplica.
+
+    Documentos: (Node, ID) de cada instância. A sincronização compara a tupla
+    de instâncias de cada serviço por identidade (snapshots são copy-on-write),
+    reindexando apenas serviços alterados, adicionados ou removidos.
+    """
+
+    def __init__(self):
+        self._index = TrigramIndex()
+        self._services: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        self._non_text: Dict[DocKey, Tuple[str, ...]] = {}
+        self._non_text_counts: Dict[str, int] = {}
+        self.version: Optional[int] = None
+        self._sync_stats = {"syncs": 0, "services_reindexed": 0, "last_sync_ms": 0.0}
+
+    def sync(self, snapshot) -> bool:
+        """
+        Aplica as mudanças do snapshot ao índice.
+
+        Args:
+            snapshot: CatalogSnapshot
+
+        Returns:
+            True se o índice está na versão do snapshot (False se já avançou
+            para uma versão mais nova)
+        """
+        if self.version == snapshot.version:
+            return True
+        if self.version is not None and self.version > snapshot.version:
+            return False
+
+        start = time.perf_counter()
+        services = snapshot.services
+        updated = {name: instances for name, instances in services.items() if self._services.get(name) is not instances}
+        removed = [name for name in self._services if name not in services]
+        changed = len(updated) + len(removed)
+
+        # Remoções ANTES das inclusões: um (Node, ID) que muda de serviço no
+        # mesmo delta não pode ser removido pela passada do serviço antigo
+        new_keys = {(svc.get('Node'), svc.get('ID')) for instances in updated.values() for svc in instances}
+        for name in [*updated, *removed]:
+            for svc in self._services.get(name) or ():
+                key = (svc.get('Node'), svc.get('ID'))
+                if key not in new_keys:
+                    self._remove_doc(key)
+        for name in removed:
+            del self._services[name]
+
+        for name, instances in updated.items():
+            for svc in instances:
+                key = (svc.get('Node'), svc.get('ID'))
+                terms, non_text = instance_terms(svc)
+                self._index.add(key, terms)
+                self._set_non_text(key, non_text)
+            self._services[name] = instances
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.version = snapshot.version
+        self._sync_stats["syncs"] += 1
+        self._sync_stats["services_reindexed"] += changed
+        self._sync_stats["last_sync_ms"] = round(elapsed_ms, 2)
+        logger.info(
+            f"[TEXT INDEX] ✅ Sincronizado com catálogo v{snapshot.version}: "
+            f"{changed} serviços reindexados em {elapsed_ms:.1f}ms ({len(self._index)} documentos)"
+        )
+        return True
+
+    def _remove_doc(self, key: DocKey) -> None:
+        self._index.remove(key)
+        self._set_non_text(key, ())
+
+    def _set_non_text(self, key: DocKey, fields: Iterable[str]) -> None:
+        new = tuple(fields)
+        old = self._non_text.pop(key, ())
+        if old == new:
+            if new:
+                self._non_text[key] = new
+            return
+        for field in old:
+            self._non_text_counts[field] -= 1
+            if not self._non_text_counts[field]:
+                del self._non_text_counts[field]
+        for field in new:
+            self._non_text_counts[field] = self._non_text_counts.get(field, 0) + 1
+        if new:
+            self._non_text[key] = new
+
+    def answers_field(self, field: str) -> bool:
+        """
+        Indica se o índice responde CONTAINS no campo (mesma semântica de
+        AdvancedSearch: caminho raiz ou 'Meta.<chave>' com valores string).
+        """
+        if field in self._non_text_counts:
+            return False
+        dots = field.count('.')
+        return dots == 0 or (dots == 1 and field.startswith('Meta.'))
+
+    def search(
+        self,
+        query: str,
+        fields: Optional[Iterable[str]] = None,
+        field_filter: Optional[Callable[[str], bool]] = None
+    ) -> Optional[Set[DocKey]]:
+        """
+        Documentos (Node, ID) com algum dos campos contendo query.
+
+        Args:
+            query: Texto buscado
+            fields: Campos considerados (None = todos os campos indexados)
+            field_filter: Alternativa a fields (predicado sobre o nome do campo)
+
+        Returns:
+            Conjunto de (Node, ID), ou None se algum campo não puder ser
+            respondido pelo índice (chamador deve varrer linearmente)
+        """
+        if fields is not None:
+            fields = set(fields)
+            if not all(self.answers_field(field) for field in fields):
+                return None
+            field_filter = fields.__contains__
+        return self._index.search(query, field_filter)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do índice, das sincronizações e dos tempos de consulta"""
+        return {
+            **self._index.get_stats(),
+            **self._sync_stats,
+            "version": self.version,
+            "non_text_fields": sorted(self._non_text_counts),
+        }
+
+
+# Instância global (singleton)
+_catalog_text_index: Optional[CatalogTextIndex] = None
+
+
+def get_catalog_text_index() -> CatalogTextIndex:
+    """
+    Retorna o índice de trigramas global do catálogo (singleton).
+
+    Returns:
+        Instância de CatalogTextIndex
+    """
+    global _catalog_text_index
+    if _catalog_text_index is None:
+        _catalog_text_index = CatalogTextIndex()
+    return _catalog_text_index
+
+
+def reset_catalog_text_index() -> None:
+    """Reseta o índice global (útil para testes)"""
+    global _catalog_text_index
+    _catalog_text_index = None
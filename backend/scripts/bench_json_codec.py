@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark do codec JSON (core/json_codec.py) vs stdlib json.
+
+Mede, em um catálogo sintético de 50k serviços:
+- decode: corpo de /catalog/service/<nome> (bytes → objetos)
+- encode: resposta da API com a lista de serviços (objetos → bytes)
+- kv_tree: GET /kv/<prefixo>?recurse (base64 + JSON por chave)
+
+Uso:
+    python scripts/bench_json_codec.py
+    python scripts/bench_json_codec.py --services 50000 --iterations 5
+    JSON_CODEC=msgspec python scripts/bench_json_codec.py   # forçar backend
+
+Requisitos:
+    - Nenhum serviço rodando (dados sintéticos, tudo em memória)
+    - orjson ou msgspec instalados para comparar com a stdlib
+"""
+
+import argparse
+import base64
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import json_codec  # noqa: E402
+
+
+def build_catalog(total: int) -> List[Dict[str, Any]]:
+    """Instâncias no formato de /catalog/service (ServiceMeta com acentos)"""
+    return [
+        {
+            "ID": f"node-{i // 200}",
+            "Node": f"consul-{i % 7}",
+            "Address": f"172.16.{i % 250}.{i % 200}",
+            "Datacenter": "dc1",
+            "ServiceID": f"icmp-site{i % 300}-{i}",
+            "ServiceName": "blackbox" if i % 3 else "node_exporter",
+            "ServiceTags": ["monitoring", f"env={'prod' if i % 2 else 'dev'}"],
+            "ServiceAddress": f"10.{i % 250}.{i % 100}.1",
+            "ServicePort": 9115,
+            "ServiceMeta": {
+                "module": "icmp",
+                "company": "Empresa Ramada",
+                "site": f"site-{i % 300}",
+                "name": f"Gateway São João {i}",
+                "env": "prod" if i % 2 else "dev",
+                "instance": f"10.{i % 250}.{i % 100}.1",
+            },
+            "CreateIndex": 1000 + i,
+            "ModifyIndex": 2000 + i,
+        }
+        for i in range(total)
+    ]
+
+
+def build_kv_tree(keys: int) -> bytes:
+    """Resposta de /kv/<prefixo>?recurse com valores JSON em base64"""
+    entries = []
+    for i in range(keys):
+        value = json.dumps({"field": f"campo_{i}", "values": [f"valor {j}" for j in range(20)]})
+        entries.append({
+            "Key": f"skills/eye/reference-values/campo_{i}",
+            "Value": base64.b64encode(value.encode()).decode(),
+            "CreateIndex": i, "ModifyIndex": i, "LockIndex": 0, "Flags": 0,
+        })
+    return json.dumps(entries).encode()
+
+
+def decode_kv_tree(body: bytes, loads: Callable[[Any], Any]) -> Dict[str, Any]:
+    return {item["Key"]: loads(base64.b64decode(item["Value"])) for item in loads(body)}
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> float:
+    """Mediana (ms) de `iterations` execuções"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def stdlib_dumps(obj: Any) -> bytes:
+    # Equivalente ao JSONResponse padrão do FastAPI
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do codec JSON")
+    parser.add_argument("--services", type=int, default=50000, help="Instâncias no catálogo sintético")
+    parser.add_argument("--kv-keys", type=int, default=2000, help="Chaves no KV tree sintético")
+    parser.add_argument("--iterations", type=int, default=5, help="Execuções por medida (mediana)")
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.services)
+    catalog_body = stdlib_dumps(catalog)
+    kv_body = build_kv_tree(args.kv_keys)
+
+    cases = [
+        ("decode catálogo", lambda: json.loads(catalog_body), lambda: json_codec.loads(catalog_body)),
+        ("encode resposta", lambda: stdlib_dumps(catalog), lambda: json_codec.dumps(catalog)),
+        ("kv tree", lambda: decode_kv_tree(kv_body, json.loads), lambda: decode_kv_tree(kv_body, json_codec.loads)),
+    ]
+
+    print(f"Backend do codec: {json_codec.BACKEND}")
+    print(f"Catálogo: {args.services} serviços ({len(catalog_body) / 1e6:.1f} MB), "
+          f"KV: {args.kv_keys} chaves, mediana de {args.iterations} execuções\n")
+    print(f"{'caso':<18}{'stdlib (ms)':>14}{'codec (ms)':>14}{'speedup':>10}")
+    for name, old, new in cases:
+        old_result, new_result = old(), new()
+        if isinstance(old_result, bytes):
+            old_result, new_result = json.loads(old_result), json.loads(new_result)
+        assert old_result == new_result, f"{name}: resultados diferentes"
+        old_ms = measure(old, args.iterations)
+        new_ms = measure(new, args.iterations)
+        print(f"{name:<18}{old_ms:>14.1f}{new_ms:>14.1f}{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
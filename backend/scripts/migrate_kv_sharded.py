@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script de Migração: Documento único → Layout fragmentado do KV (core/kv_sharded.py)
+
+OBJETIVO:
+Separar metadata/fields e monitoring-types em uma chave por item + índice,
+para que PATCH de um campo, reorder e form-schema gravem só o que mudou
+(com check-and-set) em vez de reescrever o documento inteiro.
+
+ESTRUTURA ANTIGA:
+skills/eye/metadata/fields          ← {"fields": [{...}, {...}, ...], ...}
+
+ESTRUTURA NOVA:
+skills/eye/metadata/fields          ← índice (ordem, posições, atributos do documento)
+skills/eye/metadata/fields.items/
+  ├── company                       ← {"name": "company", ...}
+  └── env                           ← {"name": "env", ...}
+
+USO:
+    python migrate_kv_sharded.py --dry-run                                # Simula sem aplicar
+    python migrate_kv_sharded.py                                          # Migra todos os documentos
+    python migrate_kv_sharded.py --key skills/eye/metadata/fields         # Migra apenas uma chave
+    python migrate_kv_sharded.py --rollback                               # Volta ao documento único
+
+SEGURANÇA:
+- Idempotente: chaves já migradas são puladas
+- Leitores (KVManager.get_json) entendem os dois formatos: a migração não
+  exige deploy coordenado
+- --rollback regrava o documento único a partir do snapshot consistente
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core import kv_sharded  # noqa: E402
+from core.consul_manager import ConsulManager  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Migra documentos do KV para o layout fragmentado")
+    parser.add_argument("--dry-run", action="store_true", help="Simula sem aplicar mudanças")
+    parser.add_argument("--rollback", action="store_true", help="Volta ao documento único")
+    parser.add_argument("--key", choices=sorted(kv_sharded.SHARDED_LAYOUTS), help="Migrar apenas esta chave")
+    args = parser.parse_args()
+
+    logger.info("=" * 80)
+    logger.info(f"MIGRAÇÃO KV FRAGMENTADO ({'rollback' if args.rollback else 'documento → itens'})")
+    logger.info("=" * 80)
+
+    consul = ConsulManager()
+    keys = [args.key] if args.key else sorted(kv_sharded.SHARDED_LAYOUTS)
+    migrate = kv_sharded.migrate_to_document if args.rollback else kv_sharded.migrate_to_sharded
+
+    results = []
+    for key in keys:
+        try:
+            results.append(await migrate(consul, key, dry_run=args.dry_run))
+        except Exception as exc:
+            logger.error(f"Erro ao migrar {key}: {exc}", exc_info=True)
+            results.append({"key": key, "status": "error", "reason": str(exc)})
+
+    # Relatório final
+    logger.info("=" * 80)
+    logger.info("RELATÓRIO FINAL")
+    logger.info("=" * 80)
+
+    for result in results:
+        if result["status"] in ["success", "dry_run"]:
+            details = f"{result['items']} itens"
+            if "index_bytes" in result:
+                details += f" (índice: {result['index_bytes']} bytes, maior item: {result['largest_item_bytes']} bytes)"
+            logger.info(f"  ✅ {result['key']}: {details}")
+        elif result["status"] == "skipped":
+            logger.info(f"  ⏭️  {result['key']}: {result.get('reason', 'unknown')}")
+        else:
+            logger.error(f"  ❌ {result['key']}: {result.get('reason', 'unknown')}")
+
+    if args.dry_run:
+        logger.info("\n⚠️  DRY-RUN: Execute sem --dry-run para aplicar as mudanças")
+
+    logger.info("=" * 80)
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
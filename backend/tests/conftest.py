@@ -0,0 +1,60 @@
+"""
+Helpers compartilhados dos testes: instâncias e snapshots do catálogo
+
+- catalog_entry(): entrada bruta de /catalog/service/{name}
+- catalog_instance(): instância normalizada (ConsulManager.normalize_catalog_instance)
+- catalog_snapshot(): CatalogSnapshot publicado pela CatalogReplica
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Mapping
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.catalog_replica import CatalogSnapshot
+from core.consul_manager import ConsulManager
+
+
+def catalog_entry(
+    sid: str,
+    node: str = "node-1",
+    *,
+    address: str = "172.16.1.26",
+    tags: Iterable[str] = (),
+    port: int = 9115,
+    service_address: str = "10.0.0.1",
+    **meta,
+) -> Dict:
+    """Entrada de /catalog/service/{name} como retornada pelo Consul (Meta = kwargs)"""
+    return {
+        "Node": node,
+        "Address": address,
+        "ServiceID": sid,
+        "ServiceTags": list(tags),
+        "ServiceMeta": meta,
+        "ServicePort": port,
+        "ServiceAddress": service_address,
+    }
+
+
+def catalog_instance(service: str, sid: str, node: str = "node-1", **kwargs) -> Dict:
+    """Instância no formato interno (mesmos argumentos de catalog_entry)"""
+    return ConsulManager.normalize_catalog_instance(service, catalog_entry(sid, node, **kwargs))
+
+
+def catalog_snapshot(services: Mapping[str, Iterable[Dict]], version: int = 1) -> CatalogSnapshot:
+    """
+    Snapshot com {serviço: instâncias}; índices = version.
+
+    Tuplas são mantidas (mesma identidade), o que permite testar diffs por identidade.
+    """
+    services = {name: tuple(instances) for name, instances in services.items()}
+    return CatalogSnapshot(
+        version=version,
+        index=version,
+        source_node="127.0.0.1",
+        services=services,
+        service_indexes={name: version for name in services},
+    )
@@ -0,0 +1,170 @@
+"""
+Testes Unitários: Audit store (SQLite WAL) e AuditManager
+
+OBJETIVO:
+- Validar persistência entre instâncias (reabrir o arquivo) e ids crescentes
+- Validar filtros indexados (resource_type, action, resource_id, período)
+- Validar paginação por cursor estável com eventos novos chegando
+- Validar retenção por tempo e teto de eventos na compactação
+- Validar KVManager.log_audit_event sem uma chave do KV por evento
+- Validar rollup no KV por instância
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import audit_manager as audit_manager_module
+from core.audit_manager import AuditManager
+from core.audit_store import AuditStore, InvalidCursorError
+from core.config import Config
+from core.kv_manager import KVManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = AuditManager(store=AuditStore(path=str(tmp_path / "audit.db")))
+    yield manager
+    manager.store.close()
+
+
+def _ts(minutes_ago, now=datetime(2025, 6, 1, 12, 0, 0)):
+    return (now - timedelta(minutes=minutes_ago)).isoformat() + "Z"
+
+
+def _populate(manager, total=30):
+    for i in range(total):
+        manager.log_event(
+            action=("create", "update", "delete")[i % 3],
+            resource_type="service" if i % 2 == 0 else "kv",
+            resource_id=f"svc_{i % 5}",
+            user="admin" if i < 10 else "operator",
+            metadata={"i": i},
+            timestamp=_ts(total - i),
+        )
+
+
+class TestStore:
+    """Persistência, filtros e estatísticas"""
+
+    def test_persists_across_reopen(self, tmp_path):
+        path = str(tmp_path / "audit.db")
+        first = AuditManager(store=AuditStore(path=path))
+        event = first.log_event("create", "service", "svc_1", "admin", metadata={"env": "prod"})
+        assert event["id"] == 1
+        first.store.close()
+
+        second = AuditManager(store=AuditStore(path=path))
+        events, total = second.get_events()
+        assert total == 1
+        assert events[0]["metadata"] == {"env": "prod"}
+        assert events[0]["details"] == "create on service: svc_1"
+        assert second.log_event("update", "service", "svc_1")["id"] == 2
+        assert second.last_event_id == 2
+        second.store.close()
+
+    def test_filters_and_offset(self, manager):
+        _populate(manager)
+
+        events, total = manager.get_events(resource_type="service", action="create", limit=100)
+        assert total == 5  # i múltiplo de 6
+        assert all(e["resource_type"] == "service" and e["action"] == "create" for e in events)
+        assert [e["timestamp"] for e in events] == sorted((e["timestamp"] for e in events), reverse=True)
+
+        result = manager.query_events(resource_id="svc_3", user="operator")
+        assert {e["metadata"]["i"] for e in result["events"]} == {13, 18, 23, 28}
+
+        events, total = manager.get_events(start_date=_ts(5), end_date=_ts(2), limit=2, offset=1)
+        assert total == 4
+        assert [e["metadata"]["i"] for e in events] == [27, 26]
+
+    def test_statistics_and_clear(self, manager):
+        _populate(manager)
+        stats = manager.get_statistics()
+        assert stats["total_events"] == 30
+        assert stats["by_action"] == {"create": 10, "update": 10, "delete": 10}
+        assert stats["by_user"] == {"admin": 10, "operator": 20}
+
+        manager.clear_events()
+        assert manager.count() == 0
+        assert manager.log_event("create", "kv", "x")["id"] == 1
+
+
+class TestCursor:
+    """Paginação por cursor (timestamp, id)"""
+
+    def test_pages_are_stable_with_new_events(self, manager):
+        _populate(manager)
+        first = manager.query_events(limit=12)
+        assert first["total"] == 30 and first["next_cursor"]
+
+        # Eventos novos não deslocam as páginas seguintes (offset deslocaria)
+        manager.log_event("create", "service", "novo", timestamp=_ts(-10))
+
+        seen = [e["id"] for e in first["events"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = manager.query_events(limit=12, cursor=cursor, include_total=False)
+            seen += [e["id"] for e in page["events"]]
+            cursor = page["next_cursor"]
+        assert seen == list(range(30, 0, -1))
+
+    def test_invalid_cursor(self, manager):
+        with pytest.raises(InvalidCursorError):
+            manager.query_events(cursor="nao-e-cursor")
+
+
+class TestCompaction:
+    """Retenção por tempo e teto de eventos"""
+
+    def test_retention_and_max_events(self, tmp_path):
+        store = AuditStore(path=str(tmp_path / "audit.db"), retention_days=7, max_events=5)
+        manager = AuditManager(store=store)
+        now = datetime(2025, 6, 1)
+        for days_ago in (30, 10, 8):
+            manager.log_event("delete", "kv", f"old_{days_ago}", timestamp=(now - timedelta(days=days_ago)).isoformat())
+        for i in range(8):
+            manager.log_event("create", "kv", f"new_{i}", timestamp=(now - timedelta(hours=8 - i)).isoformat())
+
+        assert store.compact(now=now) == {"retention": 3, "overflow": 3}
+        events, total = manager.get_events()
+        assert total == 5
+        assert [e["resource_id"] for e in events] == [f"new_{i}" for i in range(7, 2, -1)]
+        assert store.compact(now=now) == {"retention": 0, "overflow": 0}
+        store.close()
+
+
+class TestIntegration:
+    """KVManager e rollup no KV"""
+
+    @pytest.mark.asyncio
+    async def test_kv_manager_logs_to_store(self, manager):
+        kv = KVManager()
+        with patch.object(audit_manager_module, "audit_manager", manager), \
+                patch.object(KVManager, "put_json", AsyncMock()) as put_json:
+            assert await kv.log_audit_event("IMPORT", "services", "arquivo.csv", "admin", {"created": 3})
+            events = await kv.get_audit_events(resource_type="services")
+
+        put_json.assert_not_called()
+        assert len(events) == 1
+        assert events[0]["metadata"] == {"created": 3}
+        assert events[0]["action"] == "IMPORT"
+
+    @pytest.mark.asyncio
+    async def test_rollup_published_per_instance(self, manager):
+        _populate(manager, total=6)
+        with patch.object(Config, "AUDIT_INSTANCE_ID", "api-1"), \
+                patch.object(KVManager, "put_json", AsyncMock(return_value=True)) as put_json:
+            assert await manager.publish_rollup()
+
+        key, rollup = put_json.call_args.args
+        assert key == "skills/eye/audit/rollup/api-1"
+        assert rollup["instance"] == "api-1"
+        assert rollup["total_events"] == 6 and rollup["last_event_id"] == 6
+        assert [e["id"] for e in rollup["recent"]][:2] == [6, 5]
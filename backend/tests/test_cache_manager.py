@@ -0,0 +1,339 @@
+"""
+Testes Unitários: LocalCache.get_or_compute (single-flight + stale-while-revalidate)
+
+OBJETIVO:
+- Validar que requisições concorrentes executam UM único loader
+- Validar que exceções do loader são propagadas a todos os chamadores
+- Validar que valor stale é servido enquanto o refresh roda em background
+- Validar estatísticas de tempo de refresh por chave
+- Validar que invalidação durante o load não é sobrescrita pelo resultado
+- Validar que o loader de GET /nodes armazena o próprio resultado
+- Validar limites de entradas/bytes, eviction LRU/LFU e índice de prefixos
+"""
+
+import asyncio
+import heapq
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.cache_manager import LocalCache
+from core.monitoring_cache import MonitoringDataCache
+
+
+def _expire(cache: LocalCache, key: str, seconds: int) -> None:
+    """Envelhece a entrada manualmente (evita sleep nos testes)"""
+    entry = cache._cache[key]
+    entry.created_at -= seconds
+    entry.expires_at -= seconds
+    entry.stale_until -= seconds
+    heapq.heappush(cache._expiry_heap, (entry.stale_until, -1, key, entry))
+
+
+class TestGetOrCompute:
+    """Testes do single-flight e SWR do LocalCache"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_loader(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        calls = 0
+        release = asyncio.Event()
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return ["a", "b"]
+
+        tasks = [asyncio.create_task(cache.get_or_compute("k", loader)) for _ in range(20)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert all(r == ["a", "b"] for r in results)
+        stats = await cache.get_stats()
+        assert stats["coalesced_waits"] == 19
+        assert stats["in_flight"] == 0
+
+        # Próxima chamada é HIT (sem loader)
+        assert await cache.get_or_compute("k", loader) == ["a", "b"]
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_loader_error_propagates_and_is_not_cached(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError("consul offline")
+
+        tasks = [asyncio.create_task(cache.get_or_compute("k", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await cache.get("k") is None
+        assert cache.get_refresh_stats()["k"]["errors"] == 1
+
+        async def ok():
+            return 42
+
+        assert await cache.get_or_compute("k", ok) == 42
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_revalidating(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        await cache.set("k", "old", ttl=10, stale_ttl=30)
+        _expire(cache, "k", 15)
+
+        # get() simples trata stale como miss, mas mantém a entrada
+        assert await cache.get("k") is None
+        assert "k" in cache._cache
+
+        release = asyncio.Event()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "new"
+
+        assert await cache.get_or_compute("k", loader, ttl=10, stale_ttl=30) == "old"
+        assert await cache.get_or_compute("k", loader, ttl=10, stale_ttl=30) == "old"
+
+        release.set()
+        await asyncio.gather(*cache._background_tasks)
+
+        assert calls == 1
+        assert await cache.get("k") == "new"
+        stats = await cache.get_stats()
+        assert stats["stale_hits"] == 2
+        assert stats["background_refreshes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_entry_beyond_stale_window_is_recomputed(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        await cache.set("k", "old", ttl=10, stale_ttl=5)
+        _expire(cache, "k", 20)
+
+        async def loader():
+            return "new"
+
+        assert await cache.get_or_compute("k", loader, ttl=10, stale_ttl=5) == "new"
+
+    @pytest.mark.asyncio
+    async def test_should_cache_and_refresh_timings(self):
+        cache = LocalCache(default_ttl_seconds=60)
+
+        async def empty():
+            return []
+
+        assert await cache.get_or_compute("k", empty, should_cache=bool) == []
+        assert await cache.get("k") is None
+
+        timings = cache.get_refresh_stats()["k"]
+        assert timings["count"] == 1
+        assert timings["last_refresh_at"] is not None
+        assert timings["in_flight"] is False
+
+    @pytest.mark.asyncio
+    async def test_caller_cancellation_does_not_cancel_loader(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "value"
+
+        first = asyncio.create_task(cache.get_or_compute("k", loader))
+        second = asyncio.create_task(cache.get_or_compute("k", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("invalidate", [
+        lambda cache: cache.invalidate("kv:sites"),
+        lambda cache: cache.invalidate_pattern("kv:*"),
+        lambda cache: cache.clear(),
+    ])
+    async def test_invalidation_during_load_is_not_overwritten(self, invalidate):
+        cache = LocalCache(default_ttl_seconds=60)
+        release = asyncio.Event()
+
+        async def stale_loader():
+            await release.wait()
+            return "antes-da-escrita"
+
+        async def fresh_loader():
+            return "depois-da-escrita"
+
+        waiting = asyncio.create_task(cache.get_or_compute("kv:sites", stale_loader))
+        await asyncio.sleep(0)
+
+        # Escrita no KV + invalidação enquanto o load (que já leu) está em execução
+        await invalidate(cache)
+
+        # Novo chamador não aguarda o load descartado
+        assert await cache.get_or_compute("kv:sites", fresh_loader) == "depois-da-escrita"
+
+        release.set()
+        assert await waiting == "antes-da-escrita"
+        assert await cache.get("kv:sites") == "depois-da-escrita"
+        stats = await cache.get_stats()
+        assert stats["in_flight"] == 0
+
+
+class TestNodesLoader:
+    """GET /nodes via get_or_compute"""
+
+    @pytest.mark.asyncio
+    async def test_membership_change_result_is_cached(self):
+        from api import nodes
+
+        cache = LocalCache(default_ttl_seconds=60)
+        consul = MagicMock()
+        consul.get_members = AsyncMock(return_value=[
+            {"node": "consul-1", "addr": "172.16.1.26"},
+            {"node": "consul-2", "addr": "172.16.1.27"},
+        ])
+        consul.get_node_services = AsyncMock(return_value={"Services": {}})
+        # Contagem antiga de membros (formato anterior) não afeta o load
+        await cache.set("nodes:member_count", 1)
+
+        with patch.object(nodes, "cache", cache), \
+                patch.object(nodes, "sites_cache", LocalCache(default_ttl_seconds=60)), \
+                patch.object(nodes, "get_consul_manager_with_fallback",
+                             AsyncMock(return_value=(consul, "172.16.1.26"))), \
+                patch("core.kv_manager.KVManager.get_json", AsyncMock(return_value=None)):
+            result = await nodes.get_nodes()
+            again = await nodes.get_nodes()
+
+        assert result["total"] == 2
+        assert await cache.get("nodes:list:all") is result
+        assert again is result
+        consul.get_members.assert_awaited_once()
+
+
+class TestBoundedCache:
+    """Testes dos limites de memória, eviction e expiração"""
+
+    @pytest.mark.asyncio
+    async def test_lru_evicts_least_recently_used(self):
+        cache = LocalCache(default_ttl_seconds=60, max_entries=3, eviction_policy="lru")
+        for key in ("a", "b", "c"):
+            await cache.set(key, key)
+
+        # "a" acessado → "b" passa a ser o menos recente
+        assert await cache.get("a") == "a"
+        await cache.set("d", "d")
+
+        assert await cache.get_keys() == ["c", "a", "d"]
+        stats = await cache.get_stats()
+        assert stats["evictions_by_reason"]["capacity"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lfu_evicts_least_frequently_used(self):
+        cache = LocalCache(default_ttl_seconds=60, max_entries=3, eviction_policy="lfu")
+        for key in ("a", "b", "c"):
+            await cache.set(key, key)
+        for _ in range(3):
+            await cache.get("a")
+        await cache.get("c")
+
+        await cache.set("d", "d")
+
+        assert set(await cache.get_keys()) == {"a", "c", "d"}
+
+    @pytest.mark.asyncio
+    async def test_memory_budget(self):
+        cache = LocalCache(default_ttl_seconds=60, max_bytes=20_000)
+        for i in range(10):
+            await cache.set(f"k{i}", "x" * 4_000)
+
+        stats = await cache.get_stats()
+        assert stats["current_bytes"] <= 20_000
+        assert stats["evictions_by_reason"]["memory"] > 0
+        # Mais recentes permanecem
+        assert await cache.get("k9") is not None
+
+        # Valor maior que o orçamento inteiro não é armazenado
+        await cache.set("huge", "x" * 50_000)
+        assert await cache.get("huge") is None
+        assert (await cache.get_stats())["evictions_by_reason"]["oversize"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_purged_without_reads(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        await cache.set("old", 1, ttl=10)
+        await cache.set("fresh", 2, ttl=60)
+        _expire(cache, "old", 30)
+
+        assert await cache.purge_expired() == 1
+        assert await cache.get_keys() == ["fresh"]
+        assert (await cache.get_stats())["evictions_by_reason"]["expired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_overwrite_keeps_byte_accounting(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        await cache.set("k", "x" * 1_000)
+        await cache.set("k", "y")
+
+        stats = await cache.get_stats()
+        assert stats["current_size"] == 1
+        assert stats["current_bytes"] == cache._cache["k"].size
+
+    @pytest.mark.asyncio
+    async def test_invalidate_pattern_uses_prefix_index(self):
+        cache = LocalCache(default_ttl_seconds=60)
+        await cache.set("monitoring:data:network-probes:all", 1)
+        await cache.set("monitoring:data:network-probes:10.0.0.1", 2)
+        await cache.set("monitoring:data:web-probes:all", 3)
+        await cache.set("nodes:list:all", 4)
+
+        assert sorted(cache._candidate_keys("monitoring:data:network-probes:*")) == [
+            "monitoring:data:network-probes:10.0.0.1",
+            "monitoring:data:network-probes:all",
+        ]
+        assert await cache.invalidate_pattern("monitoring:data:network-probes:*") == 2
+        assert await cache.invalidate_pattern("monitoring:*") == 1
+        assert await cache.invalidate_pattern("*:all") == 1
+        assert await cache.get_keys() == []
+        assert cache._prefix_index == {}
+
+
+class TestMonitoringDataCacheGetOrCompute:
+    """Testes da integração do MonitoringDataCache com get_or_compute"""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self):
+        monitoring_cache = MonitoringDataCache(ttl_seconds=30)
+        monitoring_cache._cache = LocalCache(default_ttl_seconds=30)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return [{"ID": "svc-1"}]
+
+        await monitoring_cache.get_or_compute_data("network-probes", loader)
+        result = await monitoring_cache.get_or_compute_data("network-probes", loader)
+
+        assert result == [{"ID": "svc-1"}]
+        assert calls == 1
+        stats = await monitoring_cache.get_stats()
+        assert stats["cache_misses"] == 1
+        assert stats["cache_hits"] == 1
@@ -0,0 +1,166 @@
+"""
+Testes Unitários: Change log do catálogo categorizado (/monitoring/data/changes)
+
+OBJETIVO:
+- Validar que aplicar os deltas sobre a versão `since` reproduz a versão atual
+- Validar resync fora do histórico (limite de versões/linhas, versão desconhecida)
+- Validar o endpoint com o CatalogCategorizer
+"""
+
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Request, Response
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.catalog_changes import CatalogChangeLog, diff_rows
+
+from conftest import catalog_instance, catalog_snapshot
+
+CATEGORIES = ["network-probes", "web-probes", "system-exporters"]
+
+
+def _catalog(version, rows):
+    """rows: {(Node, ID): (categoria, env)} → objeto com version/partitions"""
+    partitions = {}
+    for (node, sid), (category, env) in rows.items():
+        partitions.setdefault(category, []).append({"Node": node, "ID": sid, "Meta": {"env": env}})
+    return SimpleNamespace(version=version, partitions={c: tuple(r) for c, r in partitions.items()})
+
+
+def _apply(rows, changes):
+    """Aplica o delta sobre {(Node, ID): registro} como o frontend faria"""
+    result = dict(rows)
+    for key in changes["removed"]:
+        del result[(key["Node"], key["ID"])]
+    for record in changes["added"]:
+        key = (record["Node"], record["ID"])
+        assert key not in result
+        result[key] = record
+    for record in changes["modified"]:
+        key = (record["Node"], record["ID"])
+        assert key in result and result[key] != record
+        result[key] = record
+    return result
+
+
+def _rows_of(catalog, category):
+    return {(r["Node"], r["ID"]): r for r in catalog.partitions.get(category, ())}
+
+
+class TestCatalogChangeLog:
+    """Deltas compostos == diferença entre versões"""
+
+    def test_diff_rows(self):
+        a = {("n1", "x"): {"v": 1}, ("n1", "y"): {"v": 1}}
+        b = {("n1", "x"): {"v": 2}, ("n1", "z"): {"v": 1}}
+        delta = diff_rows(a, b)
+        assert delta.added == ({"v": 1},)
+        assert delta.modified == (({"v": 1}, {"v": 2}),)
+        assert delta.removed == ({"v": 1},)
+        assert diff_rows(b, dict(b)) is None
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_versions_compose(self, seed):
+        rng = random.Random(seed)
+        log = CatalogChangeLog(max_versions=1000, max_rows=10 ** 6)
+        rows = {}
+        history = []
+
+        for version in range(1, 40):
+            for _ in range(rng.randint(0, 6)):
+                key = (rng.choice(["n1", "n2"]), f"svc-{rng.randint(0, 15)}")
+                if key in rows and rng.random() < 0.4:
+                    del rows[key]
+                else:
+                    rows[key] = (rng.choice(CATEGORIES), rng.choice(["prod", "dev"]))
+            catalog = _catalog(version, dict(rows))
+            log.record(catalog)
+            history.append(catalog)
+
+            for old in history:
+                for category in CATEGORIES:
+                    changes = log.changes_since(category, old.version)
+                    assert _apply(_rows_of(old, category), changes) == _rows_of(catalog, category)
+
+        assert log.changes_since(CATEGORIES[0], 39) == {"added": [], "modified": [], "removed": []}
+
+    def test_resync_outside_history(self):
+        log = CatalogChangeLog(max_versions=3, max_rows=10 ** 6)
+        for version in range(1, 7):
+            log.record(_catalog(version, {("n1", f"s{i}"): ("web-probes", "prod") for i in range(version)}))
+
+        assert log.floor == 3
+        assert log.changes_since("web-probes", 2) is None
+        assert log.changes_since("web-probes", 7) is None
+        assert [r["ID"] for r in log.changes_since("web-probes", 3)["added"]] == ["s3", "s4", "s5"]
+
+        # Limite de linhas: delta grande descarta o histórico anterior
+        small = CatalogChangeLog(max_versions=100, max_rows=5)
+        small.record(_catalog(1, {}))
+        small.record(_catalog(2, {("n1", "a"): ("web-probes", "prod")}))
+        small.record(_catalog(3, {("n1", f"s{i}"): ("web-probes", "prod") for i in range(5)}))
+        assert small.changes_since("web-probes", 1) is None
+        assert small.get_stats()["retained_rows"] <= 5
+
+        # Versão não consecutiva reinicia o histórico
+        log.record(_catalog(10, {}))
+        assert log.changes_since("web-probes", 6) is None
+        assert log.changes_since("web-probes", 10) == {"added": [], "modified": [], "removed": []}
+
+
+class TestChangesEndpoint:
+    """GET /monitoring/data/changes sobre o CatalogCategorizer"""
+
+    @pytest.mark.asyncio
+    async def test_changes_and_resync(self):
+        from api import monitoring_unified
+        from core import categorized_catalog as categorized_module
+        from core.cache_manager import LocalCache
+        from core.categorized_catalog import CatalogCategorizer
+
+        engine = AsyncMock()
+        engine.rules = []
+        engine.default_category = "custom-exporters"
+        engine.categorize_many = lambda jobs: [
+            ("network-probes" if job.get("job_name") == "icmp" else "custom-exporters", {})
+            for job in jobs
+        ]
+        categorizer = CatalogCategorizer(AsyncMock(), engine, nodes_loader=AsyncMock(return_value=[]))
+        categorizer._cache = LocalCache(default_ttl_seconds=60)
+        categorizer._load_sites = AsyncMock(return_value=[])
+
+        def instance(sid, module):
+            return catalog_instance("icmp", sid, "n1", module=module)
+
+        def request():
+            return Request({"type": "http", "method": "GET", "path": "/api/v1/monitoring/data/changes",
+                            "query_string": b"", "headers": []})
+
+        snapshots = [
+            catalog_snapshot({"icmp": [instance("a", "icmp"), instance("b", "icmp")]}, 1),
+            catalog_snapshot({"icmp": [instance("a", "tcp"), instance("c", "icmp")]}, 2),
+        ]
+        with patch.object(monitoring_unified, "catalog_categorizer", categorizer):
+            with patch.object(categorized_module, "get_ready_snapshot", return_value=snapshots[0]):
+                first = await categorizer.get_catalog()
+            with patch.object(categorized_module, "get_ready_snapshot", return_value=snapshots[1]):
+                result = await monitoring_unified.get_monitoring_data_changes(
+                    request(), Response(), category="network-probes", since=first.version
+                )
+                stale = await monitoring_unified.get_monitoring_data_changes(
+                    request(), Response(), category="network-probes", since=first.version + 10
+                )
+
+        assert result["resync"] is False and result["version"] == first.version + 1
+        assert [r["ID"] for r in result["added"]] == ["c"]
+        assert [(r["ID"], r["Meta"]["module"]) for r in result["modified"]] == [("a", "tcp")]
+        assert result["removed"] == [{"Node": "n1", "ID": "b"}]
+        assert result["total"] == 2
+        assert stale["resync"] is True and stale["added"] == []
@@ -0,0 +1,173 @@
+"""
+Testes Unitários: CatalogReplica (réplica do catálogo via blocking queries)
+
+OBJETIVO:
+- Validar sync inicial e versionamento dos snapshots
+- Validar que apenas serviços com índice alterado são republicados
+- Validar remoção de nomes que sumiram do catálogo
+- Validar que get_all_services_catalog() serve do snapshot (0 requisições)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import catalog_replica as replica_module
+from core.catalog_replica import (
+    CatalogReplica,
+    next_blocking_index,
+    parse_consul_wait,
+)
+from core.consul_manager import ConsulManager
+
+from conftest import catalog_entry, catalog_instance
+
+
+class FakeConsul:
+    """Simula respostas de /catalog/services e /catalog/service/{name} com índices"""
+
+    def __init__(self):
+        self.names_index = 10
+        self.services = {
+            "blackbox": (11, [catalog_entry("icmp-1", company="Acme")]),
+            "node_exporter": (12, [catalog_entry("node-1", node="node-2", company="Acme")]),
+        }
+        self.calls = []
+
+    async def blocking_get(self, path, index):
+        self.calls.append((path, index))
+        if path == "/catalog/services":
+            return {name: [] for name in self.services}, self.names_index
+        name = path.rsplit("/", 1)[-1]
+        svc_index, instances = self.services[name]
+        return instances, svc_index
+
+
+@pytest.fixture
+def fake_consul():
+    return FakeConsul()
+
+
+@pytest.fixture
+def replica(fake_consul):
+    r = CatalogReplica(token="test", wait="1s", debounce_seconds=0)
+    r._source_node = "127.0.0.1"
+    r._blocking_get = fake_consul.blocking_get
+    # Watchers não devem rodar nestes testes (controlamos as mudanças manualmente)
+    r._start_watcher = lambda name: r._watchers.setdefault(name, asyncio.Future())
+    return r
+
+
+class TestHelpers:
+    """Testes das funções auxiliares de blocking query"""
+
+    def test_parse_consul_wait(self):
+        assert parse_consul_wait("5m") == 300
+        assert parse_consul_wait("30s") == 30
+        assert parse_consul_wait("500ms") == 0.5
+        assert parse_consul_wait("10") == 10
+        with pytest.raises(ValueError):
+            parse_consul_wait("abc")
+
+    def test_next_blocking_index(self):
+        assert next_blocking_index(10, 15) == 15
+        # Índice voltou (restore/troca de líder) → resetar
+        assert next_blocking_index(15, 10) == 0
+        # Nunca bloquear com índice 0
+        assert next_blocking_index(0, 0) == 1
+
+
+class TestCatalogReplica:
+    """Testes do sync e publicação de snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_initial_sync(self, replica):
+        await replica._initial_sync()
+
+        snapshot = replica.snapshot
+        assert snapshot.version == 1
+        assert snapshot.total_instances == 2
+        assert snapshot.index == 12
+        assert snapshot.service_indexes == {"blackbox": 11, "node_exporter": 12}
+
+        nodes = snapshot.to_nodes_dict()
+        assert nodes["node-1"]["icmp-1"]["Meta"] == {"company": "Acme"}
+        assert nodes["node-2"]["node-1"]["Service"] == "node_exporter"
+
+    @pytest.mark.asyncio
+    async def test_only_changed_service_is_republished(self, replica):
+        await replica._initial_sync()
+        old_snapshot = replica.snapshot
+
+        replica._pending["blackbox"] = (
+            (catalog_instance("blackbox", "icmp-1", company="Nova"),),
+            20,
+        )
+        assert replica.apply_changes() is True
+
+        new_snapshot = replica.snapshot
+        assert new_snapshot.version == 2
+        assert new_snapshot.service_indexes["blackbox"] == 20
+        # Serviço não alterado mantém a MESMA referência (copy-on-write)
+        assert new_snapshot.services["node_exporter"] is old_snapshot.services["node_exporter"]
+        # Snapshot antigo é imutável
+        assert old_snapshot.services["blackbox"][0]["Meta"]["company"] == "Acme"
+
+    @pytest.mark.asyncio
+    async def test_removed_names(self, replica, fake_consul):
+        await replica._initial_sync()
+
+        replica._reconcile_names({"blackbox"})
+        replica.apply_changes()
+
+        assert "node_exporter" not in replica.snapshot.services
+        assert "node_exporter" not in replica._watchers
+        assert replica.snapshot.version == 2
+
+    @pytest.mark.asyncio
+    async def test_copies_are_isolated(self, replica):
+        await replica._initial_sync()
+
+        flat = replica.snapshot.to_flat_list()
+        for svc in flat:
+            svc["node_ip"] = "1.2.3.4"
+
+        assert "node_ip" not in replica.snapshot.services["blackbox"][0]
+
+    @pytest.mark.asyncio
+    async def test_same_service_id_on_two_nodes(self, replica, fake_consul):
+        fake_consul.services["blackbox"] = (11, [
+            catalog_entry("icmp-1", node="node-1", company="Acme"),
+            catalog_entry("icmp-1", node="node-2", company="Globex"),
+        ])
+        await replica._initial_sync()
+
+        flat = {(svc["Node"], svc["ID"]): svc for svc in replica.snapshot.to_flat_list()}
+        assert flat[("node-1", "icmp-1")]["Meta"] == {"company": "Acme"}
+        assert flat[("node-2", "icmp-1")]["Meta"] == {"company": "Globex"}
+        assert len(flat) == replica.snapshot.total_instances == 3
+
+    @pytest.mark.asyncio
+    async def test_get_all_services_catalog_uses_snapshot(self, replica):
+        await replica._initial_sync()
+
+        with patch.object(replica_module, "_catalog_replica", replica), \
+             patch.object(replica_module.Config, "CATALOG_REPLICA_ENABLED", True):
+            manager = ConsulManager(host="127.0.0.1", token="test")
+            with patch.object(manager, "get_services_with_fallback", new_callable=AsyncMock) as mock_fallback:
+                result = await manager.get_all_services_catalog(use_fallback=True)
+                mock_fallback.assert_not_called()
+
+            metadata = result.pop("_metadata")
+            assert metadata["catalog_version"] == 1
+            assert metadata["cache_status"] == "REPLICA"
+            assert set(result.keys()) == {"node-1", "node-2"}
+
+            flat = await manager.get_services_snapshot()
+            assert sorted((svc["Node"], svc["ID"]) for svc in flat) == [("node-1", "icmp-1"), ("node-2", "node-1")]
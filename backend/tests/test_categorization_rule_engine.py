@@ -6,6 +6,7 @@ OBJETIVO:
 - Validar matching de regras por prioridade
 - Validar fallback para custom-exporters
 - Validar cache de regras
+- Validar memo, dispatch compilado e categorize_many()
 
 AUTOR: Sistema de Refatoração Skills Eye v2.0
 DATA: 2025-11-13
@@ -15,7 +16,7 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from core.categorization_rule_engine import CategorizationRuleEngine
+from core.categorization_rule_engine import CategorizationRuleEngine, literal_prefixes
 
 
 # ============================================================================
@@ -295,6 +296,113 @@ class TestCategorize:
         assert cat_metrics == "custom-exporters"
 
 
+# ============================================================================
+# TESTES DE MEMO E DISPATCH COMPILADO
+# ============================================================================
+
+class TestCompiledDispatch:
+    """Testes do índice de regras, memo e categorize_many()"""
+
+    def test_literal_prefixes(self):
+        """Testa extração de prefixos literais necessários"""
+        assert literal_prefixes("^node.*") == ["node"]
+        assert literal_prefixes("^(icmp|ping).*") == ["icmp", "ping"]
+        assert literal_prefixes("^(?:HTTP|tcp)_") == ["http", "tcp"]
+        assert literal_prefixes("^https?$") == ["http"]
+        assert literal_prefixes(".*icmp.*") is None
+        assert literal_prefixes("^icmp|ping") is None
+        assert literal_prefixes("^(icmp|ping)?x") is None
+
+    @pytest.mark.asyncio
+    async def test_dispatch_matches_linear_scan(self, engine, mock_rules_data):
+        """Resultado do dispatch compilado deve ser idêntico à varredura linear"""
+        mock_rules_data["rules"].extend([
+            {
+                "id": "generic_icmp",
+                "priority": 50,
+                "category": "custom-exporters",
+                "conditions": {"job_name_pattern": ".*icmp.*"}
+            },
+            {
+                "id": "blackbox_http",
+                "priority": 90,
+                "category": "web-probes",
+                "conditions": {
+                    "job_name_pattern": "^(http|https)_.*",
+                    "metrics_path": "/probe",
+                    "module_pattern": "^http_[0-9]xx$"
+                }
+            },
+            {
+                "id": "windows",
+                "priority": 70,
+                "category": "system-exporters",
+                "conditions": {"job_name_pattern": "^(?:win|windows)"}
+            },
+            {
+                "id": "catch_probe",
+                "priority": 10,
+                "category": "network-probes",
+                "conditions": {"metrics_path": "/probe"}
+            },
+        ])
+        with patch.object(engine.config_manager, 'get', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = mock_rules_data
+            await engine.load_rules()
+
+        jobs = [
+            {"job_name": name, "module": module, "metrics_path": path, "_has_metrics_path": has_path}
+            for name in ("icmp", "ICMP_remote", "blackbox", "node_exporter", "mysql", "http_2xx",
+                         "windows_exporter", "my_icmp_job", "unknown")
+            for module in ("", "icmp", "http_2xx", "tcp_connect")
+            for path in ("/probe", "/metrics")
+            for has_path in (True, False)
+        ]
+
+        for job in jobs:
+            expected = next(
+                (rule for rule in engine.rules if rule.matches(dict(job))), None
+            )
+            category, type_info = engine.categorize(dict(job))
+            if expected is None:
+                assert category == engine.default_category
+                assert type_info["matched_rule"] is None
+            else:
+                assert category == expected.category
+                assert type_info["matched_rule"]["id"] == expected.id
+
+    @pytest.mark.asyncio
+    async def test_memo_and_reload_invalidation(self, engine, mock_rules_data):
+        """Memo reaproveita combinações e é descartado no reload"""
+        with patch.object(engine.config_manager, 'get', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = mock_rules_data
+            await engine.load_rules()
+
+            jobs = [{"job_name": "node_exporter", "metrics_path": "/metrics"} for _ in range(100)]
+            results = engine.categorize_many(jobs)
+
+            assert len(results) == 100
+            assert all(category == "system-exporters" for category, _ in results)
+            memo = engine.get_rules_summary()["memo"]
+            assert memo["size"] == 1
+            assert memo["hits"] == 99
+
+            # Resultado retornado é cópia (mutação não afeta o memo)
+            results[0][1]["display_name"] = "alterado"
+            results[0][1]["matched_rule"]["id"] = "alterado"
+            assert results[1][1]["matched_rule"] is not results[0][1]["matched_rule"]
+            type_info = engine.categorize(jobs[0])[1]
+            assert type_info["display_name"] == "Node Exporter"
+            assert type_info["matched_rule"]["id"] != "alterado"
+
+            # Reload com regras diferentes → memo descartado
+            mock_rules_data["rules"][1]["category"] = "infra-exporters"
+            await engine.load_rules(force_reload=True)
+
+        assert engine.get_rules_summary()["memo"]["size"] == 0
+        assert engine.categorize(jobs[0])[0] == "infra-exporters"
+
+
 # ============================================================================
 # EXECUTAR TESTES
 # ============================================================================
@@ -0,0 +1,185 @@
+"""
+Testes Unitários: CatalogCategorizer (categorização 1x por versão do catálogo)
+
+OBJETIVO:
+- Validar partições por categoria com node_ip/site_code/site_name
+- Validar que o catálogo só é recategorizado quando a versão muda
+- Validar fallback sem réplica (fan-out + LocalCache)
+- Validar que os índices das partições vivem com a versão do catálogo
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import categorized_catalog as categorized_module
+from core.cache_manager import LocalCache
+from core.categorization_rule_engine import CategorizationRuleEngine
+from core.categorized_catalog import CatalogCategorizer, parse_sites
+
+from conftest import catalog_instance, catalog_snapshot
+
+
+RULES = {
+    "rules": [
+        {
+            "id": "blackbox_icmp",
+            "priority": 100,
+            "category": "network-probes",
+            "conditions": {"job_name_pattern": "^icmp.*", "module_pattern": "^icmp$"}
+        },
+        {
+            "id": "exporter_node",
+            "priority": 80,
+            "category": "system-exporters",
+            "conditions": {"job_name_pattern": "^node.*"}
+        },
+    ],
+    "default_category": "custom-exporters"
+}
+
+NODES = [
+    {"Node": "consul-1", "Address": "172.16.1.26"},
+    {"Node": "consul-2", "Address": "172.16.1.27"},
+]
+
+SITES = [{"code": "palmas", "name": "Palmas", "prometheus_instance": "172.16.1.26"}]
+
+
+@pytest.fixture
+def engine():
+    config_manager = AsyncMock()
+    config_manager.get = AsyncMock(return_value=RULES)
+    return CategorizationRuleEngine(config_manager)
+
+
+@pytest.fixture
+def categorizer(engine):
+    consul = AsyncMock()
+    c = CatalogCategorizer(consul, engine, nodes_loader=AsyncMock(return_value=NODES))
+    c._cache = LocalCache(default_ttl_seconds=60)
+    c._load_sites = AsyncMock(return_value=SITES)
+    return c
+
+
+SERVICES = {
+    "icmp": (catalog_instance("icmp", "icmp-1", "consul-1", module="icmp", site="meta-site"),),
+    "node_exporter": (
+        catalog_instance("node_exporter", "node-1", "consul-1", site="meta-site"),
+        catalog_instance("node_exporter", "node-2", "consul-2", site="meta-site"),
+    ),
+    "custom": (catalog_instance("custom", "custom-1", "consul-2", site="meta-site"),),
+}
+
+
+class TestCatalogCategorizer:
+
+    def test_parse_sites_structures(self):
+        assert parse_sites({"data": {"sites": SITES}}) == SITES
+        assert parse_sites({"data": {"data": SITES}}) == SITES
+        assert parse_sites({"sites": SITES}) == SITES
+        assert parse_sites(None) == []
+
+    @pytest.mark.asyncio
+    async def test_partitions_with_site_info(self, categorizer):
+        snapshot = catalog_snapshot(SERVICES, 1)
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=snapshot):
+            catalog = await categorizer.get_catalog()
+
+        assert catalog.category_counts() == {
+            "network-probes": 1, "system-exporters": 2, "custom-exporters": 1
+        }
+        icmp = catalog.partition("network-probes")[0]
+        assert icmp["node_ip"] == "172.16.1.26"
+        assert icmp["site_code"] == "palmas"
+        assert icmp["site_name"] == "Palmas"
+
+        # Sem site mapeado → fallback para metadata.site
+        custom = catalog.partition("custom-exporters")[0]
+        assert custom["node_ip"] == "172.16.1.27"
+        assert custom["site_code"] == "meta-site"
+        assert custom["site_name"] is None
+
+        # Snapshot da réplica não é modificado
+        assert "node_ip" not in snapshot.services["icmp"][0]
+
+    @pytest.mark.asyncio
+    async def test_categorized_once_per_catalog_version(self, categorizer):
+        snapshot = catalog_snapshot(SERVICES, 1)
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=snapshot):
+            first = await categorizer.get_catalog()
+            for _ in range(6):
+                assert await categorizer.get_catalog() is first
+        assert categorizer.get_stats()["builds"] == 1
+
+        # Nova versão do catálogo → nova categorização
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=catalog_snapshot(SERVICES, 2)):
+            second = await categorizer.get_catalog()
+        assert second is not first
+        assert second.catalog_version == 2
+        assert categorizer.get_stats()["builds"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rules_reload_triggers_rebuild(self, categorizer, engine):
+        snapshot = catalog_snapshot(SERVICES, 1)
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=snapshot):
+            first = await categorizer.get_catalog()
+            await engine.load_rules(force_reload=True)
+            second = await categorizer.get_catalog()
+        assert second is not first
+
+    @pytest.mark.asyncio
+    async def test_fallback_without_replica(self, categorizer):
+        nodes_dict = {
+            "consul-1": {"icmp-1": catalog_instance("icmp", "icmp-1", "consul-1", module="icmp", site="meta-site")},
+            "_metadata": {"cache_status": "MISS"},
+        }
+        categorizer.consul_manager.get_all_services_catalog = AsyncMock(side_effect=lambda **kw: {
+            k: (dict(v) if k == "_metadata" else {sid: dict(s) for sid, s in v.items()})
+            for k, v in nodes_dict.items()
+        })
+
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=None):
+            first = await categorizer.get_catalog()
+            second = await categorizer.get_catalog()
+
+        assert first is second
+        assert categorizer.consul_manager.get_all_services_catalog.await_count == 1
+        assert first.response_metadata == {"cache_status": "MISS"}
+        assert first.partition("network-probes")[0]["ID"] == "icmp-1"
+
+    @pytest.mark.asyncio
+    async def test_partition_index_lives_with_catalog_version(self, categorizer):
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=catalog_snapshot(SERVICES, 1)):
+            catalog = await categorizer.get_catalog()
+
+        index = catalog.index("system-exporters")
+        assert catalog.index("system-exporters") is index
+        result = index.query(node="172.16.1.27")
+        assert [svc["ID"] for svc in result["data"]] == ["node-2"]
+        assert result["filterOptions"]["node_ip"] == ["172.16.1.27"]
+        assert "system-exporters" in categorizer.get_stats()["indexes"]
+
+        # Nova versão do catálogo → índices novos
+        with patch.object(categorized_module, "get_ready_snapshot", return_value=catalog_snapshot(SERVICES, 2)):
+            second = await categorizer.get_catalog()
+        assert second.index("system-exporters") is not index
+
+    @pytest.mark.asyncio
+    async def test_recent_versions_retained_for_cursors(self, categorizer):
+        from core.config import Config
+
+        catalogs = []
+        for version in range(1, Config.MONITORING_CURSOR_VERSIONS + 3):
+            with patch.object(categorized_module, "get_ready_snapshot", return_value=catalog_snapshot(SERVICES, version)):
+                catalogs.append(await categorizer.get_catalog())
+
+        # Atual + MONITORING_CURSOR_VERSIONS anteriores; a mais antiga foi descartada
+        assert categorizer.get_version(catalogs[0].version) is None
+        for catalog in catalogs[1:]:
+            assert categorizer.get_version(catalog.version) is catalog
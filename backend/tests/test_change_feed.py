@@ -0,0 +1,178 @@
+"""
+Testes Unitários: Change feed (pub/sub de mudanças via SSE/WebSocket)
+
+OBJETIVO:
+- Validar fan-out não bloqueante com fila limitada (overflow → resync)
+- Validar deltas de catalog:<categoria> publicados a cada nova versão da réplica
+- Validar os protocolos do SSE e do WebSocket (subscribe/unsubscribe/erros)
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import categorized_catalog as categorized_module
+from core import change_feed as change_feed_module
+from core.cache_manager import LocalCache
+from core.catalog_replica import CatalogReplica
+from core.categorized_catalog import CatalogCategorizer
+from core.change_feed import ChangeFeed, validate_topic
+
+from conftest import catalog_instance
+
+
+def _categorizer():
+    engine = AsyncMock()
+    engine.rules = []
+    engine.default_category = "custom-exporters"
+    engine.categorize_many = lambda jobs: [
+        ("network-probes" if job["module"] == "icmp" else "custom-exporters", {}) for job in jobs
+    ]
+    categorizer = CatalogCategorizer(AsyncMock(), engine, nodes_loader=AsyncMock(return_value=[]))
+    categorizer._cache = LocalCache(default_ttl_seconds=60)
+    categorizer._load_sites = AsyncMock(return_value=[])
+    return categorizer
+
+
+class TestFanOut:
+    """Assinaturas e entrega"""
+
+    def test_topics_validation(self):
+        assert validate_topic("catalog:web-probes") == "catalog:web-probes"
+        assert validate_topic("kv:sites") == "kv:sites"
+        for topic in ("catalog:", "kv:other", "anything"):
+            with pytest.raises(ValueError):
+                validate_topic(topic)
+
+    @pytest.mark.asyncio
+    async def test_publish_routes_by_topic_and_overflow_resyncs(self):
+        feed = ChangeFeed()
+        with patch.object(feed, "_ensure_watcher"):
+            fast = feed.subscribe(["kv:sites", "rules"])
+            slow = feed.subscribe(["kv:sites"], queue_size=2)
+
+            assert feed.publish("rules", {"type": "changed", "index": 1}) == 1
+            for index in range(2, 5):
+                feed.publish("kv:sites", {"type": "changed", "index": index})
+
+            assert [(await fast.get(0))["index"] for _ in range(4)] == [1, 2, 3, 4]
+            # Fila cheia: pendentes descartados, sobra um único resync
+            assert await slow.get(0) == {"topic": "*", "type": "resync", "reason": "overflow"}
+            assert await slow.get(0) is None
+            assert slow.dropped == 3
+
+            feed.update(fast, remove=["kv:sites"])
+            feed.unsubscribe(slow)
+            assert feed.publish("kv:sites", {"type": "changed", "index": 5}) == 0
+            assert feed.topics == ["rules"]
+
+
+class TestCatalogWatcher:
+    """Nova versão da réplica → deltas por categoria assinada"""
+
+    @pytest.mark.asyncio
+    async def test_deltas_pushed_on_replica_change(self):
+        replica = CatalogReplica(debounce_seconds=0)
+        replica._publish({"icmp": (catalog_instance("icmp", "a", "n1", module="icmp"),)}, {"icmp": 1}, changed=1)
+        categorizer = _categorizer()
+
+        feed = ChangeFeed()
+        feed.attach_categorizer(categorizer)
+        with patch.object(change_feed_module, "get_catalog_replica", return_value=replica), \
+                patch.object(categorized_module, "get_ready_snapshot", side_effect=lambda: replica.snapshot):
+            subscription = feed.subscribe(["catalog:network-probes"])
+            other = feed.subscribe(["catalog:custom-exporters"])
+            await asyncio.sleep(0.01)
+
+            instances = (
+                catalog_instance("icmp", "a", "n1", module="tcp"),
+                catalog_instance("icmp", "b", "n1", module="icmp"),
+            )
+            replica._publish({"icmp": instances}, {"icmp": 2}, changed=1)
+            event = await subscription.get(timeout=1)
+            other_event = await other.get(timeout=1)
+            await feed.stop()
+
+        assert event["type"] == "delta" and event["version"] == event["since"] + 1
+        assert [r["ID"] for r in event["added"]] == ["b"]
+        assert event["removed"] == [{"Node": "n1", "ID": "a"}]
+        assert [r["ID"] for r in other_event["added"]] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_wait_for_change(self):
+        replica = CatalogReplica(debounce_seconds=0)
+        assert await replica.wait_for_change(0, timeout=0.01) is None
+        waiter = asyncio.create_task(replica.wait_for_change(0))
+        await asyncio.sleep(0)
+        replica._publish({}, {}, changed=0)
+        assert (await waiter).version == 1
+
+
+class TestEndpoints:
+    """Protocolos do /events/stream (SSE) e /events/ws"""
+
+    @pytest.mark.asyncio
+    async def test_sse_stream(self):
+        from fastapi import HTTPException
+        from api import events
+
+        feed = ChangeFeed()
+        request = AsyncMock()
+        request.is_disconnected = AsyncMock(return_value=False)
+        with patch.object(events, "get_change_feed", return_value=feed), patch.object(feed, "_ensure_watcher"):
+            with pytest.raises(HTTPException):
+                await events.stream_events(request, topics="kv:sites,bogus")
+
+            response = await events.stream_events(request, topics="kv:sites")
+            assert response.media_type == "text/event-stream"
+            body = response.body_iterator
+            assert (await body.__anext__()).startswith("event: subscribed")
+
+            feed.publish("kv:sites", {"type": "changed", "index": 3})
+            assert await body.__anext__() == (
+                'event: changed\ndata: {"topic": "kv:sites", "type": "changed", "index": 3}\n\n'
+            )
+            await body.aclose()
+        assert feed.get_stats()["subscribers"] == 0
+
+    def test_subscribe_and_receive(self):
+        from api import events
+
+        feed = ChangeFeed()
+        app = FastAPI()
+        app.include_router(events.router)
+
+        with patch.object(events, "get_change_feed", return_value=feed), \
+                patch.object(feed, "_ensure_watcher"), TestClient(app) as client:
+            with client.websocket_connect("/events/ws?topics=kv:sites") as ws:
+                assert ws.receive_json()["topics"] == ["kv:sites"]
+
+                ws.send_json({"action": "subscribe", "topics": ["catalog:web-probes"]})
+                assert ws.receive_json()["topics"] == ["catalog:web-probes", "kv:sites"]
+
+                ws.send_json({"action": "subscribe", "topics": ["bogus"]})
+                assert ws.receive_json()["type"] == "error"
+
+                client.portal.call(feed.publish, "kv:sites", {"type": "changed", "index": 9})
+                assert ws.receive_json() == {"topic": "kv:sites", "type": "changed", "index": 9}
+
+                # Valores não-JSON serializados como no SSE (sender não morre)
+                when = datetime(2025, 6, 1, 12, 0)
+                client.portal.call(feed.publish, "kv:sites", {"type": "changed", "at": when, "ids": {"a"}})
+                assert ws.receive_json() == {"topic": "kv:sites", "type": "changed", "at": str(when), "ids": "{'a'}"}
+                client.portal.call(feed.publish, "kv:sites", {"type": "changed", "index": 10})
+                assert ws.receive_json()["index"] == 10
+
+            with client.websocket_connect("/events/ws?topics=bogus") as ws:
+                assert ws.receive_json()["type"] == "error"
+
+        assert feed.get_stats()["subscribers"] == 0
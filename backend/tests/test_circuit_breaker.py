@@ -0,0 +1,166 @@
+"""
+Testes Unitários: Circuit breakers por host no ConsulManager._request
+
+OBJETIVO:
+- Validar transições closed → open → half_open → closed/open
+- Validar falha rápida (sem timeout e sem retries) com o circuito aberto
+- Validar que 4xx e hedges cancelados não abrem o circuito
+- Validar CircuitOpenError tratado como erro de conexão pelos chamadores
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breakers,
+    reset_circuit_breakers,
+)
+from core.config import Config
+from core.consul_manager import ConsulManager
+
+_real_sleep = asyncio.sleep
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+class TestBreaker:
+    """Máquina de estados"""
+
+    def test_transitions(self):
+        now = [0.0]
+        breaker = CircuitBreaker("10.0.0.9:8500", failure_threshold=2, open_seconds=10, clock=lambda: now[0])
+
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as exc:
+            breaker.before_request()
+        assert isinstance(exc.value, httpx.ConnectError)
+        assert exc.value.retry_in == pytest.approx(10)
+
+        # Janela expirada: uma única requisição de teste
+        now[0] = 11
+        breaker.before_request()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+        breaker.record_failure()
+        assert breaker.state == OPEN and breaker.opened_at == 11
+
+        now[0] = 22
+        breaker.before_request()
+        breaker.record_success()
+        assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+
+    def test_release_frees_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker("h:1", failure_threshold=1, open_seconds=1, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 2
+        breaker.before_request()
+        breaker.release()
+        breaker.before_request()
+        assert breaker.state == HALF_OPEN
+
+
+def _transport(handler):
+    return patch.object(
+        ConsulManager, "get_shared_client",
+        classmethod(lambda cls: _client(handler)),
+    )
+
+
+async def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestRequestIntegration:
+    """Breaker aplicado por fora do retry_with_backoff"""
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_timeout_and_retries(self):
+        calls = []
+
+        def refuse(request):
+            calls.append(request.url.host)
+            raise httpx.ConnectError("recusada", request=request)
+
+        manager = ConsulManager(host="10.9.9.9")
+        with _transport(refuse), patch("core.consul_manager.asyncio.sleep", new=lambda *_: _real_sleep(0)):
+            for _ in range(Config.CONSUL_CIRCUIT_FAILURE_THRESHOLD):
+                with pytest.raises(httpx.ConnectError):
+                    await manager._request("GET", "/agent/services")
+            attempts = len(calls)
+
+            start = time.monotonic()
+            with pytest.raises(CircuitOpenError):
+                await manager._request("GET", "/agent/services")
+            assert time.monotonic() - start < 0.05
+            assert len(calls) == attempts
+            # Chamadores existentes (except: → {}) continuam funcionando
+            assert await manager.get_services() == {}
+
+        breaker = get_circuit_breakers().get("10.9.9.9:8500")
+        assert breaker.state == OPEN
+        assert get_circuit_breakers().get_stats()["10.9.9.9:8500"]["rejected"] == 2
+        # Outro host não é afetado
+        assert get_circuit_breakers().get("10.0.0.1:8500").state == CLOSED
+
+    @pytest.mark.asyncio
+    async def test_client_errors_and_cancelled_hedges_keep_closed(self):
+        def not_found(request):
+            return httpx.Response(404, request=request)
+
+        manager = ConsulManager(host="10.9.9.8")
+        with _transport(not_found):
+            for _ in range(Config.CONSUL_CIRCUIT_FAILURE_THRESHOLD + 1):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await manager._request("GET", "/kv/missing")
+        assert get_circuit_breakers().get("10.9.9.8:8500").state == CLOSED
+
+        async def hang(self, method, url, **kwargs):
+            await asyncio.sleep(10)
+
+        manager = ConsulManager(host="10.9.9.7")
+        with patch.object(httpx.AsyncClient, "request", hang):
+            for _ in range(Config.CONSUL_CIRCUIT_FAILURE_THRESHOLD + 1):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(manager._request("GET", "/catalog/services"), timeout=0.01)
+        assert get_circuit_breakers().get("10.9.9.7:8500").state == CLOSED
+
+    @pytest.mark.asyncio
+    async def test_external_timeout_counts_as_failure(self):
+        async def hang(self, method, url, **kwargs):
+            await asyncio.sleep(10)
+
+        manager = ConsulManager(host="10.9.9.6")
+        with patch.object(Config, "CONSUL_CATALOG_TIMEOUT", 0.02), \
+                patch.object(httpx.AsyncClient, "request", hang):
+            for _ in range(Config.CONSUL_CIRCUIT_FAILURE_THRESHOLD):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(manager._request("GET", "/catalog/services"), timeout=0.03)
+        assert get_circuit_breakers().get("10.9.9.6:8500").state == OPEN
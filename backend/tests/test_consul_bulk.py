@@ -0,0 +1,192 @@
+"""
+Testes Unitários: Registro/remoção em lote via /v1/txn + Agent API
+
+OBJETIVO:
+- Validar transações de até 64 operações e resultado por item
+- Validar transação revertida (409): só as operações com erro falham
+- Validar fallback para a Agent API (e sem fallback)
+- Validar concorrência limitada sem txn_node e callback de progresso
+- Validar os endpoints /services/bulk/* (JSON e streaming NDJSON)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.config import Config
+from core.consul_bulk import bulk_deregister, bulk_register, to_catalog_service
+from core.consul_manager import ConsulManager
+
+
+def _services(total):
+    return [
+        {"id": f"icmp/site{i}", "name": "blackbox", "tags": ["icmp"], "address": f"10.0.0.{i % 250}",
+         "port": 9115, "Meta": {"instance": f"10.0.0.{i % 250}"}}
+        for i in range(total)
+    ]
+
+
+def _conflict(errors):
+    request = httpx.Request("PUT", "http://consul/v1/txn")
+    response = httpx.Response(409, content=json.dumps({"Errors": errors}).encode(), request=request)
+    return httpx.HTTPStatusError("409 Conflict", request=request, response=response)
+
+
+class FakeTxn:
+    """_request falso: registra as transações; fail_ids → 409 com OpIndex"""
+
+    def __init__(self, fail_ids=(), error=None):
+        self.transactions = []
+        self.fail_ids = set(fail_ids)
+        self.error = error
+
+    async def __call__(self, method, path, **kwargs):
+        assert (method, path) == ("PUT", "/txn")
+        if self.error is not None:
+            raise self.error
+        ops = json.loads(kwargs["content"])
+        self.transactions.append(ops)
+        errors = [
+            {"OpIndex": i, "What": "node não existe"}
+            for i, op in enumerate(ops)
+            if op["Service"]["Service"]["ID"] in self.fail_ids
+        ]
+        if errors:
+            raise _conflict(errors)
+        return httpx.Response(200, json={"Results": [], "Errors": None})
+
+
+class TestTxn:
+    """Transações de 64 operações"""
+
+    def test_catalog_service(self):
+        service = to_catalog_service(_services(1)[0])
+        assert service == {
+            "ID": "icmp/site0", "Service": "blackbox", "Tags": ["icmp"],
+            "Meta": {"instance": "10.0.0.0"}, "Address": "10.0.0.0", "Port": 9115,
+        }
+
+    @pytest.mark.asyncio
+    async def test_batches_of_64(self):
+        manager = ConsulManager(host="10.0.0.1")
+        fake = FakeTxn()
+        progress = []
+        with patch.object(manager, "_request", fake):
+            results = await bulk_register(manager, _services(150), txn_node="probes-externos", progress=progress.append)
+
+        assert [len(t) for t in fake.transactions] == [64, 64, 22]
+        assert fake.transactions[0][0]["Service"]["Verb"] == "set"
+        assert fake.transactions[0][0]["Service"]["Node"] == "probes-externos"
+        assert [r["id"] for r in results] == [s["id"] for s in _services(150)]
+        assert all(r["success"] and r["via"] == "txn" for r in results)
+        assert progress[-1] == {"done": 150, "total": 150, "success": 150, "failed": 0}
+
+    @pytest.mark.asyncio
+    async def test_rollback_retries_without_failed_ops(self):
+        manager = ConsulManager(host="10.0.0.1")
+        fake = FakeTxn(fail_ids={"icmp/site3", "icmp/site70"})
+        with patch.object(manager, "_request", fake):
+            results = await bulk_register(manager, _services(100), txn_node="probes-externos")
+
+        failed = {r["id"]: r["error"] for r in results if not r["success"]}
+        assert failed == {"icmp/site3": "node não existe", "icmp/site70": "node não existe"}
+        # Cada lote com erro reenviado uma vez sem a operação rejeitada
+        assert sorted(len(t) for t in fake.transactions) == [35, 36, 63, 64]
+
+    @pytest.mark.asyncio
+    async def test_agent_fallback(self):
+        manager = ConsulManager(host="10.0.0.1")
+        fake = FakeTxn(error=httpx.ConnectError("recusada"))
+        register = AsyncMock(side_effect=lambda data, node: data["id"] != "icmp/site1")
+        with patch.object(manager, "_request", fake), patch.object(manager, "register_service", register):
+            results = await bulk_register(manager, _services(5), node_addr="10.0.0.2", txn_node="ext")
+            assert [r["via"] for r in results] == ["agent"] * 5
+            assert [r["success"] for r in results] == [True, False, True, True, True]
+            assert register.await_args.args[1] == "10.0.0.2"
+
+            results = await bulk_register(manager, _services(5), txn_node="ext", agent_fallback=False)
+            assert all(not r["success"] and r["via"] == "txn" for r in results)
+            assert "recusada" in results[0]["error"]
+
+    @pytest.mark.asyncio
+    async def test_deregister_ops(self):
+        manager = ConsulManager(host="10.0.0.1")
+        calls = []
+
+        async def fake(method, path, **kwargs):
+            calls.append(json.loads(kwargs["content"]))
+            return httpx.Response(200, json={})
+
+        with patch.object(manager, "_request", fake):
+            results = await bulk_deregister(manager, ["a", "b"], txn_node="ext")
+        assert calls == [[
+            {"Service": {"Verb": "delete", "Node": "ext", "Service": {"ID": "a"}}},
+            {"Service": {"Verb": "delete", "Node": "ext", "Service": {"ID": "b"}}},
+        ]]
+        assert all(r["success"] for r in results)
+
+
+class TestAgentPath:
+    """Sem nó de catálogo: Agent API com concorrência limitada"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self):
+        manager = ConsulManager(host="10.0.0.1")
+        state = {"running": 0, "peak": 0}
+
+        async def register(data, node_addr=None):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.001)
+            state["running"] -= 1
+            return True
+
+        with patch.object(Config, "CONSUL_BULK_TXN_NODE", ""), patch.object(manager, "register_service", register):
+            results = await manager.bulk_register_services(_services(300))
+
+        assert len(results) == 300 and all(results.values())
+        assert 1 < state["peak"] <= Config.CONSUL_BULK_CONCURRENCY * Config.CONSUL_BULK_AGENT_CONCURRENCY
+
+
+class TestEndpoints:
+    """POST /services/bulk/register e DELETE /services/bulk/deregister"""
+
+    @pytest.fixture
+    def client(self):
+        from api.services import router
+
+        app = FastAPI()
+        app.include_router(router, prefix="/services")
+        return TestClient(app)
+
+    def test_register_json_and_stream(self, client):
+        payload = [{"id": s["id"], "name": s["name"], "Meta": s["Meta"]} for s in _services(130)]
+        with patch.object(Config, "CONSUL_BULK_TXN_NODE", ""), \
+                patch.object(ConsulManager, "register_service", AsyncMock(return_value=True)):
+            body = client.post("/services/bulk/register", json=payload).json()
+            assert body["summary"] == {"total": 130, "success": 130, "failed": 0, "via_txn": 0, "via_agent": 130}
+            assert body["results"]["icmp/site7"] is True
+
+            response = client.post("/services/bulk/register", params={"stream": "true"}, json=payload)
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [line["type"] for line in lines] == ["progress", "progress", "progress", "result"]
+            assert lines[-2]["done"] == 130
+            assert lines[-1]["summary"]["success"] == 130
+
+    def test_deregister(self, client):
+        with patch.object(Config, "CONSUL_BULK_TXN_NODE", ""), \
+                patch.object(ConsulManager, "deregister_service", AsyncMock(side_effect=[True, False])):
+            body = client.request("DELETE", "/services/bulk/deregister", json=["a", "b"]).json()
+        assert body["results"] == {"a": True, "b": False}
+        assert body["details"][1]["error"] == "Agent API recusou a operação"
@@ -0,0 +1,152 @@
+"""
+Testes Unitários: Tradução de filtros para o `filter=` do Consul
+
+OBJETIVO:
+- Validar a tradução de filtros de metadados e condições do AdvancedSearch
+- Validar que predicados não traduzíveis ficam para o Python (superconjunto)
+- Validar o repasse do filtro ao /agent/services e o fallback sem filtro
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.consul_filter import (
+    meta_field_present,
+    quote_value,
+    selector,
+    translate_conditions,
+    translate_meta_filters,
+)
+from core.consul_manager import ConsulManager
+
+
+class TestTranslator:
+    """Geração das expressões"""
+
+    def test_selectors_per_endpoint(self):
+        assert selector("Meta.company") == "Meta.company"
+        assert selector("Meta.company", "catalog") == "ServiceMeta.company"
+        assert selector("Meta.company", "health") == "Service.Meta.company"
+        assert selector("Node", "health") == "Node.Node"
+        assert selector("Node") is None  # /agent/services não tem Node
+        assert selector("Meta.a.b") is None
+        assert selector("Meta.bad key") is None
+
+    def test_quote_value(self):
+        assert quote_value('a "b" \\c') == '"a \\"b\\" \\\\c"'
+
+    def test_meta_filters(self):
+        assert translate_meta_filters({"company": "Ramada", "env": "prod"}) == (
+            'Meta.company == "Ramada" and Meta.env == "prod"'
+        )
+        assert translate_meta_filters({"company": None, "env": "prod"}, "catalog") == (
+            'ServiceMeta.env == "prod"'
+        )
+        assert translate_meta_filters({}) is None
+
+    def test_conditions_and(self):
+        expr = translate_conditions([
+            {"field": "Service", "operator": "eq", "value": "blackbox_exporter"},
+            {"field": "Meta.env", "operator": "in", "value": ["prod", "staging"]},
+            {"field": "Meta.name", "operator": "contains", "value": "web.1"},
+            {"field": "Meta.name", "operator": "starts_with", "value": "gw"},
+            {"field": "Meta.name", "operator": "ends_with", "value": "(sp)"},
+            {"field": "Meta.name", "operator": "regex", "value": "^web"},  # fica em Python
+            {"field": "Port", "operator": "gt", "value": 9000},  # fica em Python
+        ])
+        assert expr == (
+            'Service == "blackbox_exporter"'
+            ' and (Meta.env == "prod" or Meta.env == "staging")'
+            ' and Meta.name matches "(?i)web\\\\.1"'
+            ' and Meta.name matches "(?i)^gw"'
+            ' and Meta.name matches "(?i)\\\\(sp\\\\)$"'
+        )
+
+    def test_conditions_or(self):
+        assert translate_conditions([
+            {"field": "Meta.company", "operator": "eq", "value": "A"},
+            {"field": "Meta.company", "operator": "eq", "value": "B"},
+        ], "or") == 'Meta.company == "A" or Meta.company == "B"'
+
+        # Um ramo não traduzível → sem filtro no servidor
+        assert translate_conditions([
+            {"field": "Meta.company", "operator": "eq", "value": "A"},
+            {"field": "Meta.env", "operator": "ne", "value": "dev"},
+        ], "or") is None
+
+    @pytest.mark.parametrize("condition", [
+        {"field": "Tags", "operator": "contains", "value": "web"},
+        {"field": "Meta.name", "operator": "contains", "value": "São"},  # não-ASCII
+        {"field": "Meta.env", "operator": "not_in", "value": ["dev"]},
+        {"field": "Meta.env", "operator": "in", "value": "prod"},
+        {"field": "Meta.port", "operator": "lte", "value": 10},
+    ])
+    def test_untranslatable(self, condition):
+        assert translate_conditions([condition]) is None
+
+    def test_meta_field_present(self):
+        assert meta_field_present("company") == "Meta.company is not empty"
+        assert meta_field_present("company", "catalog") == "ServiceMeta.company is not empty"
+
+
+def _response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+class TestConsulManagerPushdown:
+    """Filtro repassado ao Consul com verificação local"""
+
+    @pytest.mark.asyncio
+    async def test_search_services_sends_filter_and_verifies(self):
+        consul = ConsulManager(host="127.0.0.1")
+        services = {
+            "a": {"ID": "a", "Meta": {"company": "Ramada"}},
+            "b": {"ID": "b", "Meta": {"company": "Other"}},
+        }
+        request = AsyncMock(return_value=_response(services))
+        with patch.object(consul, "_request", request):
+            result = await consul.search_services({"company": "Ramada"})
+
+        assert list(result) == ["a"]
+        assert request.await_args.kwargs["params"] == {"filter": 'Meta.company == "Ramada"'}
+
+    @pytest.mark.asyncio
+    async def test_rejected_filter_falls_back(self):
+        consul = ConsulManager(host="127.0.0.1")
+        rejected = httpx.HTTPStatusError(
+            "bad filter", request=MagicMock(), response=MagicMock(status_code=400)
+        )
+        request = AsyncMock(side_effect=[rejected, _response({"a": {"ID": "a", "Meta": {}}})])
+        with patch.object(consul, "_request", request):
+            result = await consul.get_services(filter_expr='Meta.x == "y"')
+
+        assert result == {"a": {"ID": "a", "Meta": {}}}
+        assert request.await_args_list[1].kwargs["params"] is None
+
+    @pytest.mark.asyncio
+    async def test_snapshot_ignores_filter_when_in_memory(self):
+        consul = ConsulManager(host="127.0.0.1")
+        snapshot = MagicMock()
+        snapshot.to_flat_list.return_value = [{"ID": "a"}]
+        request = AsyncMock(return_value=_response({}))
+
+        with patch("core.catalog_replica.get_ready_snapshot", return_value=snapshot), \
+                patch.object(consul, "_request", request):
+            assert await consul.get_services_snapshot(filter_expr='Meta.x == "y"') == [{"ID": "a"}]
+        request.assert_not_awaited()
+
+        request.return_value = _response({"b": {"ID": "b"}})
+        with patch("core.catalog_replica.get_ready_snapshot", return_value=None), \
+                patch.object(consul, "_request", request):
+            # Mesmo formato (lista) vindo de /agent/services
+            assert await consul.get_services_snapshot(filter_expr='Meta.x == "y"') == [{"ID": "b"}]
+        assert request.await_args.kwargs["params"] == {"filter": 'Meta.x == "y"'}
@@ -0,0 +1,190 @@
+"""
+Testes Unitários: Seletor de servidores Consul (EWMA + hedge)
+
+OBJETIVO:
+- Validar ranking por EWMA de latência/erros e quarentena
+- Validar hedge no segundo melhor servidor após o p95 do primeiro
+- Validar fallback imediato em falha rápida e erro agregado
+- Validar get_services_with_fallback e get_consul_manager_with_fallback
+  com master lento (custo do hedge, não do timeout)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.config import Config
+from core.consul_manager import ConsulManager
+from core.consul_selector import AllServersFailed, ConsulServerSelector, reset_consul_selector
+
+MASTER = "10.0.0.1:8500"
+CLIENT = "10.0.0.2:8500"
+OTHER = "10.0.0.3:8500"
+
+
+@pytest.fixture(autouse=True)
+def fresh_selector():
+    reset_consul_selector()
+    yield
+    reset_consul_selector()
+
+
+def _selector(**kwargs):
+    selector = ConsulServerSelector(alpha=0.5, **kwargs)
+    selector.update_servers([(MASTER, "Palmas", True), (CLIENT, "Rio", False), (OTHER, "Dtc", False)])
+    return selector
+
+
+def _server(delays, failing=()):
+    """fn(servidor) com atraso por servidor; servidores em failing falham na hora"""
+    calls = []
+
+    async def fn(server):
+        calls.append(server)
+        if server in failing:
+            raise ConnectionError("recusada")
+        await asyncio.sleep(delays.get(server, 0))
+        return server
+
+    return fn, calls
+
+
+class TestRanking:
+    """EWMA, penalidade de erro e quarentena"""
+
+    def test_master_first_then_fastest(self):
+        selector = _selector()
+        assert selector.ranked()[0].key == MASTER
+
+        for _ in range(3):
+            selector.record_success(MASTER, 80)
+            selector.record_success(CLIENT, 10)
+            selector.record_success(OTHER, 30)
+        assert [s.key for s in selector.ranked()] == [CLIENT, OTHER, MASTER]
+
+        # Erros pesam no score mesmo com latência baixa
+        selector.record_failure(CLIENT, 10)
+        assert selector.ranked()[0].key == OTHER
+
+    def test_quarantine_moves_to_end(self):
+        now = [0.0]
+        selector = ConsulServerSelector(alpha=0.5, clock=lambda: now[0])
+        selector.update_servers([(MASTER, "Palmas", True), (CLIENT, "Rio", False)])
+        for _ in range(Config.CONSUL_SELECTOR_FAILURE_THRESHOLD):
+            selector.record_failure(MASTER, 1)
+        ranked = selector.ranked()
+        assert ranked[-1].key == MASTER and not ranked[-1].healthy(now[0])
+
+        now[0] += Config.CONSUL_SELECTOR_QUARANTINE_SECONDS + 1
+        assert selector.ranked()[-1].healthy(now[0])
+
+    def test_hedge_delay_uses_p95(self):
+        selector = _selector()
+        master = selector.ranked()[0]
+        assert selector.hedge_delay(master) == Config.CONSUL_HEDGE_MAX_DELAY_MS / 1000
+        for latency in [30] * 19 + [120]:
+            selector.record_success(MASTER, latency)
+        assert selector.hedge_delay(master) == pytest.approx(0.12)
+
+
+class TestExecute:
+    """Hedge, fallback e falha total"""
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_over_slow_master(self):
+        selector = _selector()
+        fn, calls = _server({MASTER: 5.0, CLIENT: 0.01, OTHER: 0.01})
+
+        start = time.monotonic()
+        result, server, info = await selector.execute(fn, timeout=2.0)
+        elapsed = time.monotonic() - start
+
+        assert result == server == CLIENT
+        assert info["hedged"] and info["attempts"] == 2
+        assert elapsed < Config.CONSUL_HEDGE_MAX_DELAY_MS / 1000 + 0.5
+        assert selector.get_stats()["hedge_wins"] == 1
+        # Master cancelado: EWMA puxada para cima → próximo request vai ao client
+        assert selector.ranked()[0].key == CLIENT
+
+    @pytest.mark.asyncio
+    async def test_fast_failure_falls_back_without_waiting(self):
+        selector = _selector()
+        fn, calls = _server({CLIENT: 0.01}, failing={MASTER})
+        result, server, info = await selector.execute(fn, timeout=2.0, hedge=False)
+        assert server == CLIENT
+        assert calls == [MASTER, CLIENT]
+        assert info["failed"] == {MASTER: "failure"}
+        assert not info["hedged"]
+
+    @pytest.mark.asyncio
+    async def test_all_failed(self):
+        selector = _selector()
+        fn, _ = _server({MASTER: 1.0}, failing={CLIENT, OTHER})
+        with pytest.raises(AllServersFailed) as exc:
+            await selector.execute(fn, timeout=0.05, hedge=False)
+        assert exc.value.failed == {MASTER: "timeout", CLIENT: "failure", OTHER: "failure"}
+
+    @pytest.mark.asyncio
+    async def test_candidates_restrict_servers(self):
+        selector = _selector()
+        fn, calls = _server({})
+        _, server, _ = await selector.execute(fn, candidates=["10.0.0.3"])
+        assert server == OTHER and calls == [OTHER]
+
+
+def _slow_master_request(delay):
+    async def fake_request(self, method, path, **kwargs):
+        if self.host == "10.0.0.1":
+            await asyncio.sleep(delay)
+        response = MagicMock()
+        response.json.return_value = {"consul": [], "host": self.host}
+        response.headers = {}
+        return response
+
+    return fake_request
+
+
+class TestIntegration:
+    """Chamadores existentes usando o seletor"""
+
+    @pytest.mark.asyncio
+    async def test_services_with_fallback_hedges_dead_master(self):
+        sites = [
+            {"name": "Palmas", "prometheus_instance": "10.0.0.1", "is_default": True},
+            {"name": "Rio", "prometheus_instance": "10.0.0.2", "is_default": False},
+        ]
+        with patch.object(ConsulManager, "_load_sites_config", AsyncMock(return_value=sites)), \
+                patch.object(ConsulManager, "_request", _slow_master_request(5.0)):
+            start = time.monotonic()
+            services, metadata = await ConsulManager().get_services_with_fallback(timeout_per_node=2.0)
+            assert time.monotonic() - start < 1.0
+            assert services["host"] == "10.0.0.2"
+            assert metadata["source_node"] == "10.0.0.2"
+            assert metadata["hedged"] is True and metadata["is_master"] is False
+
+            # Segunda chamada: client já é o primeiro do ranking, sem hedge
+            _, metadata = await ConsulManager().get_services_with_fallback(timeout_per_node=2.0)
+            assert metadata["source_node"] == "10.0.0.2" and metadata["hedged"] is False
+
+    @pytest.mark.asyncio
+    async def test_nodes_fallback_uses_selector(self, monkeypatch):
+        from api.nodes import get_consul_manager_with_fallback
+
+        monkeypatch.setenv("CONSUL_SERVERS", "10.0.0.1:8500,10.0.0.2:8500")
+
+        async def members(self):
+            if self.host == "10.0.0.1":
+                raise ConnectionError("recusada")
+            return [{"Name": "rio"}]
+
+        with patch.object(ConsulManager, "get_members", members):
+            consul, server = await get_consul_manager_with_fallback()
+        assert server == "10.0.0.2:8500"
+        assert consul.host == "10.0.0.2"
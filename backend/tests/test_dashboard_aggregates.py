@@ -0,0 +1,191 @@
+"""
+Testes Unitários: Agregados incrementais do dashboard
+
+OBJETIVO:
+- Validar que os deltas (catálogo e saúde) reproduzem a recontagem completa
+- Validar nodes a partir de /catalog/nodes (inclusive nodes sem checks)
+- Validar versão/idade e a leitura sem requisições no /dashboard/metrics
+"""
+
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Request, Response
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.consul_manager import ConsulManager
+from core.dashboard_aggregates import DashboardAggregates, classify_instance
+
+from conftest import catalog_instance, catalog_snapshot
+
+NODES = ["n1", "n2", "n3"]
+# Registro externo: node no catálogo sem nenhum check
+CATALOG_NODES = [{"Node": node} for node in NODES + ["external-1"]]
+
+
+def _random_services(rng):
+    services = {"consul": tuple(catalog_instance("consul", f"consul-{n}", n) for n in NODES)}
+    for name in rng.sample(["node_exporter", "blackbox", "web", "mysqld_exporter"], rng.randint(1, 4)):
+        services[name] = tuple(
+            catalog_instance(name, f"{name}-{i}", rng.choice(NODES), tags=rng.choice([
+                ["env=prod"], ["ambiente=dev"], ["icmp", "env=prod"], [],
+            ]))
+            for i in range(rng.randint(0, 4))
+        )
+    return services
+
+
+def _random_checks(rng, services):
+    checks = [
+        {"Node": node, "CheckID": "serfHealth", "ServiceID": "", "ServiceName": "",
+         "Status": rng.choice(["passing", "passing", "critical"])}
+        for node in NODES if rng.random() > 0.1
+    ]
+    for instances in services.values():
+        for svc in instances:
+            if rng.random() > 0.3:
+                checks.append({
+                    "Node": svc["Node"], "CheckID": f"service:{svc['ID']}",
+                    "ServiceID": svc["ID"], "ServiceName": svc["Service"],
+                    "Status": rng.choice(["passing", "warning", "critical"]),
+                })
+    return checks
+
+
+def _reference(services, checks):
+    """Recontagem completa (semântica do /internal/ui/services)"""
+    node_checks = {}
+    health = Counter()
+    for check in checks:
+        if not check["ServiceID"]:
+            node_checks.setdefault(check["Node"], Counter())[check["Status"]] += 1
+        elif check["ServiceName"] != "consul":
+            health[check["Status"]] += 1
+
+    total = blackbox = exporters = 0
+    by_env = Counter()
+    for name, instances in services.items():
+        if name == "consul":
+            continue
+        for svc in instances:
+            is_blackbox, is_exporter, env = classify_instance(svc)
+            total += 1
+            blackbox += is_blackbox
+            exporters += is_exporter
+            by_env[env] += 1
+            health.update(node_checks.get(svc["Node"], {}))
+
+    return {
+        "total_services": total,
+        "blackbox_targets": blackbox,
+        "exporters": exporters,
+        "by_env": dict(by_env),
+        "health": {s: health[s] for s in ("passing", "warning", "critical")},
+        "total_nodes": len(CATALOG_NODES),
+        "active_nodes": len(CATALOG_NODES),  # /catalog/nodes não tem status
+    }
+
+
+def _request(path="/api/v1/dashboard/metrics", headers=()):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": list(headers)})
+
+
+class TestIncrementalAggregates:
+    """Deltas == recontagem completa"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_changes_match_full_recount(self, seed):
+        rng = random.Random(seed)
+        aggregates = DashboardAggregates()
+        aggregates.apply_nodes(CATALOG_NODES, 1)
+        services = _random_services(rng)
+        checks = _random_checks(rng, services)
+
+        for version in range(1, 30):
+            if rng.random() < 0.6:
+                # Muda alguns serviços (os demais mantêm a mesma tupla)
+                changed = _random_services(rng)
+                for name in rng.sample(sorted(set(services) | set(changed)), 2):
+                    if name in changed:
+                        services[name] = changed[name]
+                    elif name != "consul":
+                        services.pop(name, None)
+                services = dict(services)
+            else:
+                checks = _random_checks(rng, services)
+
+            if rng.random() < 0.5:
+                aggregates.apply_checks(checks, version)
+                aggregates.sync_catalog(catalog_snapshot(services, version))
+            else:
+                aggregates.sync_catalog(catalog_snapshot(services, version))
+                aggregates.apply_checks(checks, version)
+
+            result = aggregates.read()
+            expected = _reference(services, checks)
+            assert {k: result[k] for k in expected} == expected
+
+    def test_version_only_moves_on_change(self):
+        aggregates = DashboardAggregates()
+        services = {"web": (catalog_instance("web", "w1", "n1", tags=["env=prod"]),)}
+        checks = [{"Node": "n1", "CheckID": "serfHealth", "ServiceID": "", "Status": "passing"}]
+
+        assert not aggregates.is_ready
+        aggregates.sync_catalog(catalog_snapshot(services, 1))
+        aggregates.apply_checks(checks, 10)
+        assert not aggregates.is_ready  # nodes ainda não lidos
+        aggregates.apply_nodes([{"Node": "n1"}, {"Node": "n2"}], 5)
+        assert aggregates.is_ready
+        assert aggregates.read()["total_nodes"] == 2 and aggregates.read()["active_nodes"] == 2
+        version = aggregates.read()["version"]
+
+        # Novo snapshot com as mesmas tuplas e mesmos checks/nodes → sem mudança
+        aggregates.sync_catalog(catalog_snapshot(dict(services), 2))
+        assert aggregates.apply_checks(list(checks), 11) == 0
+        assert aggregates.apply_nodes([{"Node": "n2"}, {"Node": "n1"}], 6) is False
+        assert aggregates.read()["version"] == version
+
+        # Snapshot antigo não regride
+        assert aggregates.sync_catalog(catalog_snapshot({}, 1)) is False
+        assert aggregates.read()["total_services"] == 1
+
+
+class TestDashboardEndpoint:
+    """/dashboard/metrics lê os agregados quando prontos"""
+
+    @pytest.mark.asyncio
+    async def test_reads_aggregates_without_consul(self):
+        from api import dashboard
+
+        services = {"node_exporter": (catalog_instance("node_exporter", "ne-1", "n1", tags=["env=prod"]),)}
+        aggregates = DashboardAggregates()
+        aggregates.datacenter = "dc1"
+        aggregates.apply_checks([
+            {"Node": "n1", "CheckID": "serfHealth", "ServiceID": "", "Status": "passing"},
+        ], 5)
+        aggregates.apply_nodes([{"Node": "n1"}, {"Node": "external-1"}], 7)
+
+        request = AsyncMock()
+        recent = {"events": [{"id": 7}], "total": None, "next_cursor": None}
+        with patch.object(dashboard, "get_ready_snapshot", return_value=catalog_snapshot(services, 3)), \
+                patch.object(dashboard, "get_dashboard_aggregates", return_value=aggregates), \
+                patch.object(dashboard.audit_manager, "query_events", return_value=recent) as query, \
+                patch.object(ConsulManager, "_request", request):
+            metrics = await dashboard.get_dashboard_metrics_fast(_request(), Response())
+
+        request.assert_not_awaited()
+        # Eventos recentes sem COUNT(*) do audit store
+        query.assert_called_once_with(limit=10, include_total=False)
+        assert metrics["recent_changes"] == [{"id": 7}]
+        assert metrics["exporters"] == 1
+        assert metrics["by_datacenter"] == {"dc1": 1}
+        assert metrics["health"] == {"passing": 1, "warning": 0, "critical": 0}
+        assert metrics["total_nodes"] == metrics["active_nodes"] == 2
+        assert metrics["version"] == aggregates.version
+        assert dashboard.DashboardMetrics(**metrics).age_seconds is not None
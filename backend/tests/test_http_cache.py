@@ -0,0 +1,123 @@
+"""
+Testes Unitários: Conditional GET (ETag / If-None-Match → 304)
+
+OBJETIVO:
+- Validar ETag por conteúdo (middleware) e por versão (check_not_modified)
+- Validar que o 304 por versão sai antes de processar o payload
+- Validar Cache-Control por router e rotas sem opt-in intactas
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.http_cache import (
+    ConditionalGetMiddleware,
+    NotModified,
+    check_not_modified,
+    conditional_get,
+    etag_matches,
+    make_etag,
+    not_modified_handler,
+)
+
+
+def _client(state):
+    cached = APIRouter(prefix="/cached")
+    plain = APIRouter(prefix="/plain")
+
+    @cached.get("/content")
+    async def content():
+        return {"items": state["items"]}
+
+    @cached.get("/versioned")
+    async def versioned(request: Request, response: Response, q: str = ""):
+        check_not_modified(request, response, state["version"])
+        state["computed"] += 1
+        return {"items": state["items"], "q": q}
+
+    @cached.post("/content")
+    async def post_content():
+        return {"ok": True}
+
+    @plain.get("/content")
+    async def plain_content():
+        return {"items": state["items"]}
+
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_exception_handler(NotModified, not_modified_handler)
+    app.include_router(cached, dependencies=[Depends(conditional_get("private, max-age=30"))])
+    app.include_router(plain)
+    return TestClient(app)
+
+
+class TestEtagHelpers:
+    """Geração e comparação"""
+
+    def test_make_and_match(self):
+        strong = make_etag(1, {"a": [1, 2]})
+        assert strong == make_etag(1, {"a": [1, 2]}) and strong.startswith('"')
+        assert make_etag(1, weak=True).startswith('W/"')
+        assert etag_matches(f'"x", {strong}', strong)
+        assert etag_matches(f"W/{strong}", strong)
+        assert etag_matches("*", strong)
+        assert not etag_matches(None, strong)
+        assert not etag_matches('"other"', strong)
+
+
+class TestConditionalGet:
+    """Middleware + dependência por router"""
+
+    def test_content_etag_and_304(self):
+        state = {"items": [1, 2, 3], "version": 1, "computed": 0}
+        client = _client(state)
+
+        first = client.get("/cached/content")
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == "private, max-age=30"
+
+        again = client.get("/cached/content", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        assert again.headers["cache-control"] == "private, max-age=30"
+
+        state["items"].append(4)
+        changed = client.get("/cached/content", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+
+    def test_version_etag_skips_processing(self):
+        state = {"items": [1], "version": 7, "computed": 0}
+        client = _client(state)
+
+        first = client.get("/cached/versioned", params={"q": "a"})
+        etag = first.headers["etag"]
+        assert state["computed"] == 1
+
+        assert client.get("/cached/versioned", params={"q": "a"}, headers={"If-None-Match": etag}).status_code == 304
+        assert state["computed"] == 1
+
+        # Outra query string → outro ETag
+        assert client.get("/cached/versioned", params={"q": "b"}, headers={"If-None-Match": etag}).status_code == 200
+
+        state["version"] = 8
+        assert client.get("/cached/versioned", params={"q": "a"}, headers={"If-None-Match": etag}).status_code == 200
+        assert state["computed"] == 3
+
+    def test_opt_in_only_for_get(self):
+        state = {"items": [1], "version": 1, "computed": 0}
+        client = _client(state)
+
+        plain = client.get("/plain/content")
+        assert "etag" not in plain.headers and "cache-control" not in plain.headers
+
+        posted = client.post("/cached/content")
+        assert posted.status_code == 200 and "etag" not in posted.headers
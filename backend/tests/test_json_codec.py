@@ -0,0 +1,99 @@
+"""
+Testes Unitários: Codec JSON plugável (orjson / msgspec / stdlib)
+
+OBJETIVO:
+- Validar paridade de dumps/loads com a stdlib (bytes UTF-8 compactos)
+- Validar erros de decodificação como json.JSONDecodeError
+- Validar get_kv_json/get_kv_tree/put_kv_json do ConsulManager via codec
+- Validar o CodecJSONResponse
+"""
+
+import base64
+import json
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import json_codec
+from core.consul_manager import ConsulManager
+from core.json_codec import CodecJSONResponse, decode_response
+
+SAMPLE = {
+    "services": [{"ID": "icmp-1", "Meta": {"name": "Gateway São João"}, "Port": 9115, "ok": True}],
+    "ratio": 0.25,
+    "empty": None,
+}
+
+
+def _kv_response(entries, status=200):
+    return httpx.Response(status, content=json.dumps(entries).encode(), request=httpx.Request("GET", "http://x"))
+
+
+def _b64(value):
+    return base64.b64encode(value.encode()).decode()
+
+
+class TestCodec:
+    """Paridade com a stdlib"""
+
+    def test_roundtrip_matches_stdlib(self):
+        encoded = json_codec.dumps(SAMPLE)
+        assert isinstance(encoded, bytes)
+        assert encoded == json.dumps(SAMPLE, ensure_ascii=False, separators=(",", ":")).encode()
+        assert json_codec.loads(encoded) == SAMPLE
+        assert json_codec.loads(encoded.decode()) == SAMPLE
+
+    def test_non_str_keys_and_default(self):
+        assert json.loads(json_codec.dumps({1: "a"})) == {"1": "a"}
+        assert json_codec.dumps({"v": {1, 2}}, default=sorted) == b'{"v":[1,2]}'
+        # Inteiro fora de 64 bits: cai para a stdlib
+        assert json_codec.dumps([2 ** 70]) == str([2 ** 70]).replace(" ", "").encode()
+
+    def test_decode_error_is_stdlib_error(self):
+        with pytest.raises(json.JSONDecodeError):
+            json_codec.loads(b"{not json")
+
+    def test_decode_response(self):
+        assert decode_response(_kv_response([1, 2])) == [1, 2]
+        mocked = MagicMock()
+        mocked.json.return_value = {"a": 1}
+        assert decode_response(mocked) == {"a": 1}
+
+    def test_codec_json_response(self):
+        assert CodecJSONResponse(SAMPLE).body == json_codec.dumps(SAMPLE)
+
+
+class TestConsulKV:
+    """KV via codec (bytes decodificados direto, sem str intermediária)"""
+
+    @pytest.mark.asyncio
+    async def test_kv_tree_and_json(self):
+        tree = [
+            {"Key": "p/a", "Value": _b64('{"x": "ç"}'), "ModifyIndex": 5},
+            {"Key": "p/b", "Value": _b64("texto puro")},
+            {"Key": "p/c", "Value": None},
+        ]
+        with patch.object(ConsulManager, "_request", AsyncMock(return_value=_kv_response(tree))):
+            manager = ConsulManager()
+            assert await manager.get_kv_tree("p") == {"p/a": {"x": "ç"}, "p/b": "texto puro"}
+            with_meta = await manager.get_kv_tree("p", include_metadata=True)
+            assert with_meta["p/a"]["metadata"]["ModifyIndex"] == 5
+
+        for raw, expected in (('{"fields": [1]}', {"fields": [1]}), ('"primitivo"', None), ("{quebrado", None)):
+            response = _kv_response([{"Key": "k", "Value": _b64(raw)}])
+            with patch.object(ConsulManager, "_request", AsyncMock(return_value=response)):
+                assert await ConsulManager().get_kv_json("k") == expected
+
+    @pytest.mark.asyncio
+    async def test_put_kv_json_uses_codec(self):
+        request = AsyncMock()
+        with patch.object(ConsulManager, "_request", request):
+            assert await ConsulManager().put_kv_json("k", {"nome": "São"}) is True
+        assert request.await_args.kwargs["content"] == json_codec.dumps({"nome": "São"})
+        assert json.loads(request.await_args.kwargs["content"]) == {"nome": "São"}
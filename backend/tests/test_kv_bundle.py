@@ -0,0 +1,258 @@
+"""
+Testes Unitários: KVBundle (snapshot versionado do KV de configuração)
+
+OBJETIVO:
+- Validar carga inicial recursiva e leituras em memória (cópias, unwrap)
+- Validar que só chaves com ModifyIndex novo são decodificadas de novo
+- Validar read-your-writes: escrita pelo ConsulManager → leitura direta até o watch confirmar
+- Validar que a pendência só é confirmada no índice da escrita (ou quando a chave muda)
+- Validar fallback para o KV com o bundle parado
+- Validar recarga das regras de categorização quando a chave muda
+"""
+
+import asyncio
+import base64
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+import pytest_asyncio
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import kv_bundle as kv_bundle_module
+from core.categorization_rule_engine import CategorizationRuleEngine
+from core.consul_kv_config_manager import ConsulKVConfigManager
+from core.cache_manager import get_cache
+from core.consul_manager import ConsulManager
+from core.kv_bundle import get_kv_bundle, reset_kv_bundle, txn_write_index
+
+METADATA = "skills/eye/metadata/"
+RULES = "skills/eye/monitoring-types/categorization/"
+
+
+class FakeKV:
+    """KV falso: blocking query retorna quando o índice avança"""
+
+    def __init__(self, values):
+        self.index = 10
+        self.entries = {}
+        self.changed = asyncio.Event()
+        for key, value in values.items():
+            self.put(key, value)
+
+    def put(self, key, value):
+        self.index += 1
+        raw = value if isinstance(value, bytes) else json.dumps(value).encode()
+        self.entries[key] = (self.index, raw)
+        self._notify()
+
+    def delete(self, key):
+        self.index += 1
+        self.entries.pop(key, None)
+        self._notify()
+
+    def _notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def fetch(self, prefix, index):
+        while index and index >= self.index:
+            await self.changed.wait()
+        items = [
+            {"Key": key, "ModifyIndex": modify, "Value": base64.b64encode(raw).decode()}
+            for key, (modify, raw) in sorted(self.entries.items())
+            if key.startswith(prefix)
+        ]
+        return items, self.index
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest_asyncio.fixture
+async def bundle():
+    reset_kv_bundle()
+    fake = FakeKV({
+        f"{METADATA}sites": {"data": {"sites": [{"code": "palmas"}]}, "meta": {"version": 1}},
+        f"{METADATA}fields": {"fields": [{"name": "company"}]},
+        f"{RULES}rules": {"rules": [{
+            "id": "blackbox_icmp", "priority": 100, "category": "network-probes",
+            "display_name": "ICMP", "exporter_type": "blackbox",
+            "conditions": {"job_name_pattern": "^icmp.*"},
+        }], "default_category": "custom-exporters"},
+        "skills/eye/audit/1": {"ignored": True},
+    })
+    instance = get_kv_bundle()
+    instance.prefixes = [METADATA, RULES]
+    instance._fetch = fake.fetch
+    instance.fake = fake
+    await instance.start()
+    assert await instance.wait_ready(timeout=1)
+    yield instance
+    await instance.stop()
+    reset_kv_bundle()
+
+
+class TestSnapshot:
+    """Carga inicial e leituras em memória"""
+
+    @pytest.mark.asyncio
+    async def test_reads_from_memory(self, bundle):
+        assert bundle.snapshot.keys() == [f"{METADATA}fields", f"{METADATA}sites", f"{RULES}rules"]
+        assert bundle.serves(f"{METADATA}sites")
+        assert not bundle.serves("skills/eye/audit/1")
+
+        # Cópias independentes; unwrap igual ao KVManager.get_json
+        sites = bundle.get_json(f"{METADATA}sites")
+        assert sites == {"sites": [{"code": "palmas"}]}
+        sites["sites"].clear()
+        assert bundle.get_json(f"{METADATA}sites")["sites"] == [{"code": "palmas"}]
+
+        manager = ConsulManager(host="10.0.0.1")
+        with patch.object(manager, "_request", side_effect=AssertionError("sem round-trip")):
+            assert await manager.get_kv_json(f"{METADATA}fields") == {"fields": [{"name": "company"}]}
+            assert await manager.get_kv_json(f"{METADATA}missing") is None
+
+    @pytest.mark.asyncio
+    async def test_only_changed_keys_are_decoded(self, bundle):
+        version = bundle.snapshot.version
+        fields_entry = bundle.snapshot.entries[f"{METADATA}fields"]
+
+        decoded = []
+        real_decode = kv_bundle_module.decode_kv_value
+        with patch.object(kv_bundle_module, "decode_kv_value", lambda raw: decoded.append(raw) or real_decode(raw)):
+            bundle.fake.put(f"{METADATA}sites", {"data": {"sites": []}, "meta": {}})
+            await _settle()
+
+        assert len(decoded) == 1
+        assert bundle.snapshot.version == version + 1
+        assert bundle.snapshot.entries[f"{METADATA}fields"] is fields_entry
+        assert bundle.get_json(f"{METADATA}sites") == {"sites": []}
+
+        bundle.fake.delete(f"{METADATA}fields")
+        await _settle()
+        assert f"{METADATA}fields" not in bundle.snapshot.entries
+        assert bundle.get_stats()["version"] == version + 2
+
+    @pytest.mark.asyncio
+    async def test_cache_key_follows_modify_index(self, bundle):
+        before = bundle.cache_key("sites:map:all", f"{METADATA}sites")
+        bundle.fake.put(f"{METADATA}sites", {"data": {"sites": []}, "meta": {}})
+        await _settle()
+        after = bundle.cache_key("sites:map:all", f"{METADATA}sites")
+        assert before.startswith("sites:map:all@") and before != after
+        assert bundle.cache_key("x", "skills/eye/audit/1") == "x"
+
+
+class TestWrites:
+    """Read-your-writes após PUT/DELETE pelo ConsulManager"""
+
+    @pytest.mark.asyncio
+    async def test_write_pending_until_watch_confirms(self, bundle):
+        key = f"{METADATA}fields"
+
+        def handler(request):
+            return httpx.Response(200, json=True, request=request)
+
+        async def client():
+            return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        manager = ConsulManager(host="10.0.0.1")
+        with patch.object(ConsulManager, "get_shared_client", classmethod(lambda cls: client())):
+            assert await manager.put_kv_json(key, {"fields": []})
+
+        assert not bundle.serves(key)
+        assert bundle.serves(f"{METADATA}sites")
+        assert bundle.get_stats()["pending_writes"] == [key]
+
+        bundle.fake.put(key, {"fields": []})
+        await _settle()
+        assert bundle.serves(key)
+        assert bundle.get_json(key) == {"fields": []}
+
+    @pytest.mark.asyncio
+    async def test_unconfirmed_write_expires(self, bundle):
+        # DELETE de chave inexistente não altera o índice do Consul
+        bundle.mark_written(f"{METADATA}nope")
+        assert not bundle.serves(f"{METADATA}nope")
+        with patch.object(kv_bundle_module, "PENDING_MAX_SECONDS", -1):
+            assert bundle.serves(f"{METADATA}nope")
+        assert bundle.get_stats()["pending_writes"] == []
+
+    @pytest.mark.asyncio
+    async def test_reply_before_write_index_keeps_pending(self, bundle):
+        key = f"{METADATA}fields"
+        # Transação confirmada no índice atual + 2 (outra escrita no meio)
+        write_index = bundle.fake.index + 2
+        assert txn_write_index({"Results": [{"KV": {"Key": key, "ModifyIndex": write_index}}]}) == write_index
+        bundle.mark_written(key, write_index)
+
+        bundle.fake.put(f"{METADATA}sites", {"data": {"sites": []}, "meta": {}})
+        await _settle()
+        assert not bundle.serves(key)
+
+        bundle.fake.put(key, {"fields": []})
+        await _settle()
+        assert bundle.serves(key)
+
+    @pytest.mark.asyncio
+    async def test_unknown_write_index_waits_for_key_change(self, bundle):
+        key = f"{METADATA}fields"
+        bundle.mark_written(key)
+
+        # Resposta com outra chave do prefixo alterada não confirma a escrita
+        bundle.fake.put(f"{METADATA}sites", {"data": {"sites": []}, "meta": {}})
+        await _settle()
+        assert not bundle.serves(key)
+
+        bundle.fake.put(key, {"fields": []})
+        await _settle()
+        assert bundle.serves(key)
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_base_cache_key(self, bundle):
+        kv_key = f"{METADATA}sites"
+        cache = get_cache()
+        bundle.mark_written(kv_key)
+
+        # Durante a pendência a chave de cache é a base (sem versão)
+        base = bundle.cache_key("sites:map:all", kv_key)
+        assert base == "sites:map:all"
+        await cache.set(base, {"10.0.0.1": "antes"}, ttl=300)
+
+        bundle.mark_written(kv_key)
+        assert await cache.get(base) is None
+
+    @pytest.mark.asyncio
+    async def test_stopped_bundle_falls_back_to_kv(self, bundle):
+        await bundle.stop()
+        assert ConsulManager.kv_bundle is None
+        assert not bundle.serves(f"{METADATA}sites")
+        assert bundle.token(f"{METADATA}sites") is None
+
+
+class TestRuleEngine:
+    """Regras recarregadas só quando a chave muda no KV"""
+
+    @pytest.mark.asyncio
+    async def test_reload_on_token_change(self, bundle):
+        engine = CategorizationRuleEngine(ConsulKVConfigManager())
+        assert await engine.load_rules()
+        assert engine.categorize({"job_name": "icmp_palmas"})[0] == "network-probes"
+
+        rules = engine.rules
+        assert await engine.load_rules()
+        assert engine.rules is rules  # chave não mudou: sem recarga
+
+        bundle.fake.put(f"{RULES}rules", {"rules": [], "default_category": "outros"})
+        await _settle()
+        assert await engine.load_rules()
+        assert engine.rules == []
+        assert engine.categorize({"job_name": "icmp_palmas"})[0] == "outros"
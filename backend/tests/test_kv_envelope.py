@@ -0,0 +1,223 @@
+"""
+Testes Unitários: Envelope do KV (compressão + chunks via /v1/txn)
+
+OBJETIVO:
+- Validar compatibilidade com valores JSON puros (legado e abaixo do limite)
+- Validar escrita atômica (uma transação) e leitura de documentos grandes
+- Validar troca de geração: chunks antigos removidos, leitura memoizada
+- Validar escrita acima do limite da transação (chunks → manifesto → limpeza)
+- Validar chunks ocultos em get_tree/list_keys e chunks corrompidos
+"""
+
+import base64
+import json
+import random
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import unquote
+
+import httpx
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import kv_envelope
+from core.config import Config
+from core.consul_manager import ConsulManager
+from core.kv_manager import KVManager
+
+KEY = "skills/eye/metadata/fields"
+
+
+class FakeConsulKV:
+    """Consul falso: /kv (GET/PUT/DELETE, recurse, keys) e /txn"""
+
+    def __init__(self):
+        self.store = {}
+        self.requests = []
+
+    def _entries(self, prefix, recurse):
+        keys = sorted(k for k in self.store if k.startswith(prefix)) if recurse else [prefix]
+        return [
+            {"Key": k, "ModifyIndex": 1, "Value": base64.b64encode(self.store[k]).decode()}
+            for k in keys if k in self.store
+        ]
+
+    def _delete_tree(self, prefix):
+        for key in [k for k in self.store if k.startswith(prefix)]:
+            del self.store[key]
+
+    def handler(self, request):
+        path = unquote(request.url.path)[len("/v1"):]
+        self.requests.append((request.method, path))
+        params = request.url.params
+
+        if path == "/txn":
+            for op in json.loads(request.content):
+                kv = op["KV"]
+                if kv["Verb"] == "set":
+                    self.store[kv["Key"]] = base64.b64decode(kv["Value"])
+                elif kv["Verb"] == "delete":
+                    self.store.pop(kv["Key"], None)
+                elif kv["Verb"] == "delete-tree":
+                    self._delete_tree(kv["Key"])
+            return httpx.Response(200, json={"Results": [], "Errors": None}, request=request)
+
+        key = path[len("/kv/"):]
+        if request.method == "PUT":
+            self.store[key] = request.content
+            return httpx.Response(200, json=True, request=request)
+        if request.method == "DELETE":
+            if "recurse" in params:
+                self._delete_tree(key)
+            else:
+                self.store.pop(key, None)
+            return httpx.Response(200, json=True, request=request)
+        if "keys" in params:
+            keys = sorted(k for k in self.store if k.startswith(key))
+            return httpx.Response(200 if keys else 404, json=keys, request=request)
+        entries = self._entries(key, "recurse" in params)
+        if not entries:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, json=entries, request=request)
+
+
+@pytest.fixture
+def fake():
+    fake = FakeConsulKV()
+
+    async def client():
+        return httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+
+    kv_envelope._decoded.clear()
+    with patch.object(ConsulManager, "get_shared_client", classmethod(lambda cls: client())), \
+            patch.object(Config, "KV_ENVELOPE_ENABLED", True), \
+            patch.object(Config, "KV_ENVELOPE_CODEC", "gzip"):
+        yield fake
+
+
+def _large(total=3000):
+    return {"fields": [
+        {"name": f"field_{i}", "display_name": f"Campo {i}", "type": "string", "required": False,
+         "show_in_table": True, "category": "extra", "order": i}
+        for i in range(total)
+    ]}
+
+
+def _kv():
+    return KVManager(ConsulManager(host="10.1.2.3"))
+
+
+class TestCompatibility:
+    """JSON puro continua JSON puro"""
+
+    @pytest.mark.asyncio
+    async def test_small_value_stays_plain(self, fake):
+        kv = _kv()
+        assert await kv.put_json(KEY, {"fields": []})
+        assert json.loads(fake.store[KEY]) == {"fields": []}
+        # GET: verificação do layout fragmentado (core/kv_sharded.py)
+        assert fake.requests == [("GET", f"/kv/{KEY}"), ("PUT", "/txn")]
+        assert await kv.get_json(KEY) == {"fields": []}
+
+    @pytest.mark.asyncio
+    async def test_legacy_value(self, fake):
+        fake.store[KEY] = json.dumps({"data": {"fields": [1]}, "meta": {}}).encode()
+        assert await _kv().get_json(KEY) == {"fields": [1]}
+
+
+class TestEnvelope:
+    """Documentos grandes: manifesto + chunks comprimidos"""
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_in_one_transaction(self, fake):
+        kv = _kv()
+        value = _large()
+        with patch.object(Config, "KV_ENVELOPE_CHUNK_BYTES", 4096):
+            assert await kv.put_json(KEY, value)
+
+        manifest = json.loads(fake.store[KEY])
+        assert kv_envelope.is_manifest(manifest) and manifest["codec"] == "gzip"
+        assert manifest["stored"] < manifest["size"] / 5
+        assert manifest["chunks"] > 1
+        assert fake.requests == [("GET", f"/kv/{KEY}"), ("PUT", "/txn")]
+        chunk_keys = [k for k in fake.store if kv_envelope.is_chunk_key(k)]
+        assert len(chunk_keys) == manifest["chunks"]
+        assert all(k.startswith(f"{KEY}.chunks/{manifest['generation']}/") for k in chunk_keys)
+
+        fake.requests.clear()
+        assert await kv.get_json(KEY) == value
+        assert fake.requests == [("GET", f"/kv/{KEY}"), ("GET", f"/kv/{KEY}.chunks/{manifest['generation']}/")]
+
+        # Mesma geração: descompressão memoizada (só o manifesto é lido)
+        fake.requests.clear()
+        assert await kv.get_json(KEY) == value
+        assert fake.requests == [("GET", f"/kv/{KEY}")]
+
+    @pytest.mark.asyncio
+    async def test_rewrite_replaces_generation(self, fake):
+        kv = _kv()
+        assert await kv.put_json(KEY, _large())
+        first = json.loads(fake.store[KEY])["generation"]
+        assert await kv.put_json(KEY, _large(2000))
+        second = json.loads(fake.store[KEY])["generation"]
+
+        assert first != second
+        assert not any(f".chunks/{first}/" in k for k in fake.store)
+        assert len((await kv.get_json(KEY))["fields"]) == 2000
+
+        # Encolheu: volta a JSON puro e os chunks somem
+        assert await kv.put_json(KEY, {"fields": []})
+        assert list(fake.store) == [KEY]
+
+    @pytest.mark.asyncio
+    async def test_above_transaction_limit(self, fake):
+        kv = _kv()
+        rng = random.Random(7)
+        value = {"blob": [f"{rng.getrandbits(64):016x}" for _ in range(20000)]}
+        assert await kv.put_json(KEY, {"fields": ["antigo"]} | _large())
+        old = json.loads(fake.store[KEY])["generation"]
+
+        fake.requests.clear()
+        with patch.object(Config, "KV_ENVELOPE_CHUNK_BYTES", 16384), \
+                patch.object(Config, "KV_TXN_MAX_BYTES", 65536):
+            assert await kv.put_json(KEY, value)
+
+        manifest = json.loads(fake.store[KEY])
+        txns = [r for r in fake.requests if r == ("PUT", "/txn")]
+        assert len(txns) > 2
+        # Manifesto gravado depois dos chunks, geração antiga removida no fim
+        assert fake.requests.index(("PUT", f"/kv/{KEY}")) > fake.requests.index(("PUT", "/txn"))
+        assert not any(f".chunks/{old}/" in k for k in fake.store)
+        assert manifest["chunks"] == sum(1 for k in fake.store if kv_envelope.is_chunk_key(k))
+        assert await kv.get_json(KEY) == value
+
+    @pytest.mark.asyncio
+    async def test_tree_hides_chunks_and_delete_removes_them(self, fake):
+        kv = _kv()
+        value = _large()
+        assert await kv.put_json(KEY, value, metadata={"updated_by": "teste"})
+        assert await kv.put_json("skills/eye/metadata/sites", {"sites": []})
+
+        assert await kv.list_keys("skills/eye/metadata/") == [KEY, "skills/eye/metadata/sites"]
+        tree = await kv.get_tree("skills/eye/metadata/")
+        assert tree == {KEY: value, "skills/eye/metadata/sites": {"sites": []}}
+
+        assert await kv.delete_key(KEY)
+        assert list(fake.store) == ["skills/eye/metadata/sites"]
+
+    @pytest.mark.asyncio
+    async def test_corrupted_chunk_returns_default(self, fake):
+        kv = _kv()
+        assert await kv.put_json(KEY, _large())
+        chunk = next(k for k in fake.store if kv_envelope.is_chunk_key(k))
+        fake.store[chunk] = b"corrompido"
+        assert await kv.get_json(KEY, default="padrao") == "padrao"
+
+    def test_zstd_falls_back_without_library(self):
+        with patch.object(kv_envelope, "HAS_ZSTD", False):
+            assert kv_envelope.resolve_codec("zstd") == "gzip"
+            with pytest.raises(kv_envelope.EnvelopeError):
+                kv_envelope.decompress(b"x", "zstd")
@@ -0,0 +1,393 @@
+"""
+Testes Unitários: Layout fragmentado do KV (uma chave por item + índice)
+
+OBJETIVO:
+- Validar migração documento → itens → documento (rollback) sem mudar a visão dos leitores
+- Validar PATCH de um item: uma transação, só a chave do item gravada
+- Validar check-and-set: conflito relê e reaplica; esgotado → CASConflictError
+- Validar reorder só no índice e put_json gravando apenas itens alterados
+- Validar get_tree/list_keys/delete_key com as chaves de itens
+- Validar endpoints de metadata-fields e form-schema no layout fragmentado
+"""
+
+import base64
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import unquote
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import kv_sharded
+from core.circuit_breaker import reset_circuit_breakers
+from core.consul_manager import ConsulManager
+from core.kv_manager import KVManager
+
+FIELDS = "skills/eye/metadata/fields"
+TYPES = "skills/eye/monitoring-types"
+
+
+class FakeConsulKV:
+    """Consul falso com ModifyIndex: /kv (GET/PUT/DELETE) e /txn (get, get-tree, set, cas, delete*)"""
+
+    def __init__(self):
+        self.index = 100
+        self.store = {}
+        self.requests = []
+        self.txns = []
+        self.before_txn = None
+
+    def put(self, key, value):
+        self.index += 1
+        self.store[key] = (self.index, json.dumps(value).encode())
+
+    def value(self, key):
+        return json.loads(self.store[key][1])
+
+    def _entry(self, key):
+        modify, raw = self.store[key]
+        return {"Key": key, "ModifyIndex": modify, "Value": base64.b64encode(raw).decode()}
+
+    def _delete_tree(self, prefix):
+        for key in [k for k in self.store if k.startswith(prefix)]:
+            del self.store[key]
+
+    def _txn(self, request):
+        ops = [op["KV"] for op in json.loads(request.content)]
+        self.txns.append(ops)
+        if self.before_txn:
+            self.before_txn(ops)
+
+        # Validação primeiro: transação é atômica
+        for i, kv in enumerate(ops):
+            current = self.store.get(kv["Key"])
+            if kv["Verb"] == "get" and current is None:
+                return httpx.Response(409, json={"Errors": [{"OpIndex": i, "What": "key not found"}]}, request=request)
+            if kv["Verb"] in ("cas", "delete-cas") and (current[0] if current else 0) != kv["Index"]:
+                return httpx.Response(409, json={"Errors": [{"OpIndex": i, "What": "index mismatch"}]}, request=request)
+
+        results = []
+        for kv in ops:
+            verb, key = kv["Verb"], kv["Key"]
+            if verb == "get":
+                results.append({"KV": self._entry(key)})
+            elif verb == "get-tree":
+                results.extend({"KV": self._entry(k)} for k in sorted(self.store) if k.startswith(key))
+            elif verb in ("set", "cas"):
+                self.index += 1
+                self.store[key] = (self.index, base64.b64decode(kv["Value"]))
+            elif verb in ("delete", "delete-cas"):
+                self.store.pop(key, None)
+            elif verb == "delete-tree":
+                self._delete_tree(key)
+        return httpx.Response(200, json={"Results": results, "Errors": None}, request=request)
+
+    def handler(self, request):
+        path = unquote(request.url.path)[len("/v1"):]
+        self.requests.append((request.method, path))
+        params = request.url.params
+        if path == "/txn":
+            return self._txn(request)
+
+        key = path[len("/kv/"):]
+        if request.method == "PUT":
+            self.index += 1
+            self.store[key] = (self.index, request.content)
+            return httpx.Response(200, json=True, request=request)
+        if request.method == "DELETE":
+            if "recurse" in params:
+                self._delete_tree(key)
+            else:
+                self.store.pop(key, None)
+            return httpx.Response(200, json=True, request=request)
+        if "keys" in params:
+            keys = sorted(k for k in self.store if k.startswith(key))
+            return httpx.Response(200 if keys else 404, json=keys, request=request)
+        keys = sorted(k for k in self.store if k.startswith(key)) if "recurse" in params else [key]
+        entries = [self._entry(k) for k in keys if k in self.store]
+        if not entries:
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, json=entries, request=request)
+
+
+@pytest.fixture
+def fake():
+    fake = FakeConsulKV()
+
+    async def client():
+        return httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+
+    # Endpoints usam o host padrão (breaker pode ter aberto na carga da config)
+    reset_circuit_breakers()
+    with patch.object(ConsulManager, "get_shared_client", classmethod(lambda cls: client())):
+        yield fake
+    reset_circuit_breakers()
+
+
+def _fields_doc():
+    return {
+        "version": "2.0.0",
+        "last_updated": "2025-01-01T00:00:00Z",
+        "fields": [
+            {"name": "company", "display_name": "Empresa", "required": True, "order": 1},
+            {"name": "env", "display_name": "Ambiente", "required": False, "order": 2},
+            {"name": "project/x", "display_name": "Projeto", "required": False, "order": 3},
+        ],
+        "extraction_status": {"total_servers": 2},
+    }
+
+
+def _types_doc():
+    icmp = {"id": "icmp", "form_schema": {}}
+    node = {"id": "node_exporter", "form_schema": {}}
+    return {
+        "all_types": [icmp, node],
+        "categories": [{"category": "network-probes", "types": [icmp]}],
+        "servers": {
+            "10.0.0.1": {"types": [icmp, node]},
+            "10.0.0.2": {"types": [node]},
+        },
+        "last_updated": "2025-01-01T00:00:00",
+    }
+
+
+async def _migrated(fake, key=FIELDS, value=None, metadata=None):
+    kv = KVManager(ConsulManager(host="10.1.2.3"))
+    assert await kv.put_json(key, value or _fields_doc(), metadata=metadata)
+    result = await kv_sharded.migrate_to_sharded(kv.consul, key)
+    assert result["status"] == "success"
+    fake.requests.clear()
+    fake.txns.clear()
+    return kv
+
+
+class TestMigration:
+    """Documento único ↔ índice + itens, mesma visão para os leitores"""
+
+    @pytest.mark.asyncio
+    async def test_roundtrip(self, fake):
+        kv = await _migrated(fake, metadata={"updated_by": "teste"})
+
+        index = fake.value(FIELDS)
+        assert kv_sharded.is_index(index)
+        assert index["order"] == ["company", "env", "project/x"]
+        assert index["positions"] == {"company": 1, "env": 2, "project/x": 3}
+        assert index["meta"]["updated_by"] == "teste"
+        assert "order" not in fake.value(f"{FIELDS}.items/company")
+        assert f"{FIELDS}.items/project%2Fx" in fake.store
+
+        assert await kv.get_json(FIELDS) == _fields_doc()
+        # Uma transação de leitura (índice + itens)
+        assert fake.requests == [("GET", f"/kv/{FIELDS}"), ("PUT", "/txn")]
+        assert (await kv_sharded.migrate_to_sharded(kv.consul, FIELDS))["reason"] == "already_sharded"
+
+        result = await kv_sharded.migrate_to_document(kv.consul, FIELDS)
+        assert result == {"key": FIELDS, "status": "success", "items": 3}
+        assert list(fake.store) == [FIELDS]
+        assert await kv.get_json(FIELDS) == _fields_doc()
+
+    @pytest.mark.asyncio
+    async def test_dry_run_does_not_write(self, fake):
+        kv = KVManager(ConsulManager(host="10.1.2.3"))
+        assert await kv.put_json(FIELDS, _fields_doc())
+        result = await kv_sharded.migrate_to_sharded(kv.consul, FIELDS, dry_run=True)
+        assert result["status"] == "dry_run" and result["items"] == 3
+        assert not kv_sharded.is_index(fake.value(FIELDS))
+
+    @pytest.mark.asyncio
+    async def test_tree_and_keys_hide_items(self, fake):
+        kv = await _migrated(fake)
+        assert await kv.put_json("skills/eye/metadata/sites", {"sites": []})
+        assert await kv.list_keys("skills/eye/metadata/") == [FIELDS, "skills/eye/metadata/sites"]
+        assert await kv.get_tree("skills/eye/metadata/") == {
+            FIELDS: _fields_doc(), "skills/eye/metadata/sites": {"sites": []},
+        }
+
+        assert await kv.delete_key(FIELDS)
+        assert list(fake.store) == ["skills/eye/metadata/sites"]
+
+
+class TestItemUpdates:
+    """Check-and-set por item"""
+
+    @pytest.mark.asyncio
+    async def test_single_item_update(self, fake):
+        kv = await _migrated(fake)
+        before = dict(fake.store)
+
+        field = await kv_sharded.update_item(kv.consul, FIELDS, "env", lambda f: f.update(display_name="Env"))
+        assert field["display_name"] == "Env" and field["order"] == 2
+
+        # Leitura + 1 transação com CAS só na chave do item
+        assert [[op["Verb"] for op in ops] for ops in fake.txns] == [["get", "get-tree"], ["cas"]]
+        changed = [k for k in fake.store if fake.store[k] != before.get(k)]
+        assert changed == [f"{FIELDS}.items/env"]
+        assert (await kv.get_json(FIELDS))["fields"][1]["display_name"] == "Env"
+
+    @pytest.mark.asyncio
+    async def test_conflict_reapplies_on_fresh_item(self, fake):
+        kv = await _migrated(fake)
+        item = f"{FIELDS}.items/env"
+
+        def concurrent_writer(ops):
+            # Outra requisição altera o mesmo item entre a leitura e o CAS
+            if ops[0]["Verb"] == "cas" and fake.before_txn:
+                fake.before_txn = None
+                fake.put(item, {**fake.value(item), "required": True})
+
+        fake.before_txn = concurrent_writer
+        await kv_sharded.update_item(kv.consul, FIELDS, "env", lambda f: f.update(display_name="Env"))
+
+        # As duas alterações preservadas (nenhuma "última escrita vence")
+        assert fake.value(item)["display_name"] == "Env"
+        assert fake.value(item)["required"] is True
+        assert sum(1 for ops in fake.txns if ops[0]["Verb"] == "cas") == 2
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_and_missing_item(self, fake):
+        kv = await _migrated(fake)
+        item = f"{FIELDS}.items/env"
+        fake.before_txn = lambda ops: ops[0]["Verb"] == "cas" and fake.put(item, fake.value(item))
+
+        with pytest.raises(kv_sharded.CASConflictError):
+            await kv_sharded.update_item(kv.consul, FIELDS, "env", lambda f: f.update(x=1))
+        fake.before_txn = None
+        with pytest.raises(kv_sharded.ItemNotFoundError):
+            await kv_sharded.update_item(kv.consul, FIELDS, "nope", lambda f: None)
+
+    @pytest.mark.asyncio
+    async def test_reorder_touches_only_index(self, fake):
+        kv = await _migrated(fake)
+
+        def reorder(index):
+            index["positions"].update({"company": 3, "env": 1})
+
+        await kv_sharded.update_items(kv.consul, FIELDS, {}, index_mutate=reorder)
+        assert [[op["Verb"] for op in ops] for ops in fake.txns][-1] == ["cas"]
+        assert fake.txns[-1][0]["Key"] == FIELDS
+        orders = {f["name"]: f["order"] for f in (await kv.get_json(FIELDS))["fields"]}
+        assert orders == {"company": 3, "env": 1, "project/x": 3}
+
+    @pytest.mark.asyncio
+    async def test_put_json_writes_only_changed_items(self, fake):
+        kv = await _migrated(fake)
+        doc = _fields_doc()
+        doc["fields"] = [f for f in doc["fields"] if f["name"] != "project/x"]
+        doc["fields"][0]["display_name"] = "Companhia"
+        doc["fields"].append({"name": "site", "display_name": "Site", "order": 4})
+
+        assert await kv.put_json(FIELDS, doc)
+        write = fake.txns[-1]
+        assert sorted((op["Verb"], op["Key"]) for op in write) == [
+            ("cas", FIELDS),
+            ("cas", f"{FIELDS}.items/company"),
+            ("cas", f"{FIELDS}.items/site"),
+            ("delete-cas", f"{FIELDS}.items/project%2Fx"),
+        ]
+        assert await kv.get_json(FIELDS) == doc
+
+    @pytest.mark.asyncio
+    async def test_put_json_does_not_clobber_concurrent_item_edit(self, fake):
+        kv = await _migrated(fake)
+        doc = _fields_doc()
+        doc["fields"][0]["display_name"] = "Companhia"
+        item = f"{FIELDS}.items/company"
+
+        def concurrent_cas(ops):
+            # update_items grava o item entre a leitura e a escrita do documento
+            if any(op["Verb"] == "cas" for op in ops) and fake.before_txn:
+                fake.before_txn = None
+                fake.put(item, {**fake.value(item), "required": False})
+
+        fake.before_txn = concurrent_cas
+        assert await kv.put_json(FIELDS, doc) is False
+        assert fake.value(item)["required"] is False
+        assert fake.value(item)["display_name"] == "Empresa"
+
+    @pytest.mark.asyncio
+    async def test_update_beyond_one_transaction_is_chunked(self, fake):
+        servers = {f"10.0.{i // 250}.{i % 250}": {"types": [{"id": "icmp", "form_schema": {}}]} for i in range(150)}
+        kv = await _migrated(fake, key=TYPES, value={**_types_doc(), "servers": servers})
+
+        def set_schema(server):
+            server["types"][0]["form_schema"] = {"fields": [{"name": "target"}]}
+
+        def touch(index):
+            index["document"]["last_updated"] = "2025-06-01T00:00:00"
+
+        updated = await kv_sharded.update_items(kv.consul, TYPES, {host: set_schema for host in servers}, index_mutate=touch)
+        assert len(updated) == 150
+
+        writes = [ops for ops in fake.txns if ops[0]["Verb"] == "cas"]
+        assert len(writes) == 4 and all(len(ops) <= kv_sharded.TXN_MAX_OPS for ops in writes)
+        assert [op["Key"] for op in writes[-1]] == [TYPES]  # índice por último
+        doc = await kv.get_json(TYPES)
+        assert all(s["types"][0]["form_schema"] for s in doc["servers"].values())
+        assert doc["last_updated"] == "2025-06-01T00:00:00"
+
+    @pytest.mark.asyncio
+    async def test_delete_item(self, fake):
+        kv = await _migrated(fake)
+        await kv_sharded.delete_item(kv.consul, FIELDS, "env")
+        assert [f["name"] for f in (await kv.get_json(FIELDS))["fields"]] == ["company", "project/x"]
+        assert f"{FIELDS}.items/env" not in fake.store
+
+
+class TestEndpoints:
+    """metadata-fields e form-schema no layout fragmentado"""
+
+    @pytest.mark.asyncio
+    async def test_metadata_field_patch_and_reorder(self, fake):
+        from api import metadata_fields_manager as mfm
+
+        await _migrated(fake)
+        result = await mfm.partial_update_field("env", {"show_in_services": False})
+        assert result["field"]["show_in_services"] is False
+        assert sorted(op["Key"] for op in fake.txns[-1]) == [FIELDS, f"{FIELDS}.items/env"]
+        # last_updated atualizado como em save_fields_config
+        touched = fake.value(FIELDS)["document"]["last_updated"]
+        assert touched != "2025-01-01T00:00:00Z"
+
+        with pytest.raises(HTTPException) as exc:
+            await mfm.partial_update_field("nope", {"show_in_services": False})
+        assert exc.value.status_code == 404
+
+        await mfm.reorder_fields({"env": 10, "ghost": 5})
+        assert [op["Key"] for op in fake.txns[-1]] == [FIELDS]
+        assert fake.value(FIELDS)["positions"]["env"] == 10
+
+        with pytest.raises(HTTPException) as exc:
+            await mfm.delete_field("company")
+        assert exc.value.status_code == 400  # campo obrigatório
+        await mfm.delete_field("env")
+        assert f"{FIELDS}.items/env" not in fake.store
+        assert fake.value(FIELDS)["document"]["last_updated"] >= touched
+
+    @pytest.mark.asyncio
+    async def test_form_schema_update_per_server(self, fake):
+        from api import monitoring_types_dynamic as mtd
+
+        await _migrated(fake, key=TYPES, value=_types_doc(), metadata={"source": "extraction"})
+        schema = {"fields": [{"name": "target"}]}
+        with patch.object(mtd.backup_manager, "create_backup", return_value=True) as backup:
+            result = await mtd.update_type_form_schema(
+                "node_exporter", mtd.FormSchemaUpdateRequest(form_schema=schema, server="10.0.0.2")
+            )
+        assert result["servers_updated"] == 1
+        backup.assert_called_once()
+        assert sorted(op["Key"] for op in fake.txns[-1]) == [TYPES, f"{TYPES}.items/10.0.0.2"]
+
+        with patch.object(mtd.backup_manager, "create_backup", return_value=True):
+            await mtd.update_type_form_schema("icmp", mtd.FormSchemaUpdateRequest(form_schema=schema))
+        doc = await mtd.kv_manager.get_json(TYPES)
+        assert doc["all_types"][0]["form_schema"] == schema
+        assert doc["categories"][0]["types"][0]["form_schema"] == schema
+        assert doc["servers"]["10.0.0.1"]["types"][0]["form_schema"] == schema
+        assert doc["servers"]["10.0.0.2"]["types"][0]["form_schema"] == schema
+        assert fake.value(TYPES)["meta"]["type_id"] == "icmp"
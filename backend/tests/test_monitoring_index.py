@@ -0,0 +1,196 @@
+"""
+Testes Unitários: PartitionIndex (índice invertido das partições)
+
+OBJETIVO:
+- Validar que o índice produz EXATAMENTE o resultado de process_monitoring_data
+  (filtros, busca textual, filterOptions/_fieldStats, ordenação e paginação)
+- Validar os caminhos de facetas (seleção pequena vs complemento)
+- Validar memorização das seleções
+- Validar paginação por cursor (permutação fixada, O(page_size))
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.monitoring_cursor import decode_cursor, encode_cursor
+from core.monitoring_filters import apply_base_filters, process_monitoring_data
+from core.monitoring_index import PartitionIndex
+
+
+def _records(count: int = 300, seed: int = 7):
+    rng = random.Random(seed)
+    companies = ["Acme", "Globex", "Initech", "Umbrella"]
+    records = []
+    for i in range(count):
+        meta = {
+            "company": rng.choice(companies),
+            "env": rng.choice(["prod", "dev", ""]),
+            "site": rng.choice(["palmas", "rio", "sp"]),
+            "name": f"Probe {i}",
+        }
+        if i % 5 == 0:
+            meta["module"] = rng.choice(["icmp", "http_2xx"])
+        if i % 7 == 0:
+            meta["port"] = 9115  # valor não-string
+        records.append({
+            "ID": f"svc-{i}",
+            "Service": rng.choice(["blackbox", "node_exporter"]),
+            "Address": f"10.0.{i // 250}.{i % 250}",
+            "Node": rng.choice(["consul-1", "consul-2"]),
+            "node_ip": rng.choice(["172.16.1.26", "172.16.1.27"]),
+            "site_code": rng.choice(["palmas", "rio", None]),
+            "site_name": None,
+            "Meta": meta,
+        })
+    return records
+
+
+def _linear(records, node=None, filters=None, exact=None, **kwargs):
+    exact = exact or {}
+    data = apply_base_filters(records, exact.get("company"), exact.get("site"), exact.get("env"))
+    return process_monitoring_data(data, node=node, filters=filters, **kwargs)
+
+
+QUERIES = [
+    {},
+    {"node": "172.16.1.26"},
+    {"filters": {"company": "ACME"}},
+    {"filters": {"company": "acme", "env": "prod"}, "node": "172.16.1.27"},
+    {"filters": {"module": "icmp", "site": "all", "env": ""}},
+    {"filters": {"Address": "10.0.0.5"}},  # campo raiz sem índice
+    {"filters": {"company": "Nope"}},
+    {"search_query": "probe 1"},
+    {"search_query": "  BLACK ", "filters": {"site": "rio"}},
+    {"filters": {"company": "Acme", "site": "palmas"}, "exact": {"company": "Acme", "site": "palmas"}},
+    {"sort_field": "Meta.company", "sort_order": "descend", "page": 2, "page_size": 25},
+    {"sort_field": "name", "sort_order": "asc", "filters": {"env": "dev"}, "page": 1, "page_size": 10},
+    {"sort_field": "port", "sort_order": "desc", "node": "172.16.1.26"},
+]
+
+
+class TestPartitionIndexEquivalence:
+    """O índice deve reproduzir o processamento linear"""
+
+    @pytest.mark.parametrize("params", QUERIES)
+    def test_matches_linear_processing(self, params):
+        records = _records()
+        index = PartitionIndex(records)
+
+        exact = params.get("exact")
+        kwargs = {k: v for k, v in params.items() if k != "exact"}
+        expected = _linear(records, exact=exact, **kwargs)
+        result = index.query(exact_filters=exact, **kwargs)
+
+        assert [r["ID"] for r in result["data"]] == [r["ID"] for r in expected["data"]]
+        assert result["total"] == expected["total"]
+        assert result["page"] == expected["page"]
+        assert result["pageSize"] == expected["pageSize"]
+        assert result["filterOptions"] == expected["filterOptions"]
+        assert result["_fieldStats"] == expected["_fieldStats"]
+
+    def test_large_selection_uses_complement_for_facets(self):
+        records = _records()
+        index = PartitionIndex(records)
+
+        # Quase tudo selecionado → contagens globais menos o complemento
+        everything_but_one = list(range(1, len(records)))
+        expected = process_monitoring_data(records[1:])
+
+        assert index.filter_options(everything_but_one) == {
+            "options": expected["filterOptions"],
+            "_fieldStats": expected["_fieldStats"],
+        }
+
+    def test_empty_partition(self):
+        index = PartitionIndex(())
+        result = index.query(filters={"company": "Acme"}, page=1, page_size=10)
+        assert result["data"] == []
+        assert result["total"] == 0
+        assert result["filterOptions"] == {}
+
+
+class TestPartitionIndexMemo:
+    """Seleções repetidas (paginação) reaproveitam filtros e facetas"""
+
+    def test_selection_is_memoized_across_pages(self):
+        index = PartitionIndex(_records())
+        params = {"filters": {"company": "acme"}, "sort_field": "ID", "sort_order": "asc"}
+
+        page_1 = index.query(page=1, page_size=20, **params)
+        page_2 = index.query(page=2, page_size=20, **params)
+
+        assert page_1["filterOptions"] is page_2["filterOptions"]
+        assert not {r["ID"] for r in page_1["data"]} & {r["ID"] for r in page_2["data"]}
+        stats = index.get_stats()
+        assert stats["queries"] == 2
+        assert stats["selection_hits"] == 1
+
+    def test_records_are_not_copied(self):
+        records = _records(20)
+        index = PartitionIndex(records)
+        result = index.query()
+        assert all(a is b for a, b in zip(result["data"], records))
+
+
+class TestPartitionIndexCursor:
+    """Paginação por cursor sobre a permutação fixada da seleção"""
+
+    PARAMS = {"filters": {"env": "prod"}, "sort_field": "Meta.company", "sort_order": "descend"}
+
+    def test_cursor_pages_match_offset_pages(self):
+        records = _records()
+        index = PartitionIndex(records)
+        expected = _linear(records, **self.PARAMS)["data"]
+
+        pages = []
+        result = index.query(page=1, page_size=25, **self.PARAMS)
+        while True:
+            pages.extend(result["data"])
+            if result["_next"] is None:
+                break
+            result = index.query(page_size=25, cursor=result["_next"], **self.PARAMS)
+
+        assert [r["ID"] for r in pages] == [r["ID"] for r in expected]
+        assert result["page"] == (len(expected) + 24) // 25
+        stats = index.get_stats()
+        assert stats["pinned_selections"] == 1
+        assert stats["cursor_pages"] == (len(expected) - 1) // 25
+
+    def test_pinned_selection_survives_lru(self):
+        index = PartitionIndex(_records())
+        first = index.query(page=1, page_size=10, **self.PARAMS)
+        for i in range(PartitionIndex.SELECTION_MEMO_SIZE + 5):
+            index.query(filters={"name": f"Probe {i}"})
+
+        hits = index.get_stats()["selection_hits"]
+        index.query(page_size=10, cursor=first["_next"], **self.PARAMS)
+        assert index.get_stats()["selection_hits"] == hits + 1
+
+    def test_cursor_must_match_query(self):
+        index = PartitionIndex(_records())
+        cursor = index.query(page=1, page_size=10, **self.PARAMS)["_next"]
+
+        with pytest.raises(ValueError):
+            index.query(page_size=10, cursor=cursor, filters={"env": "dev"})
+        with pytest.raises(ValueError):
+            index.query(page_size=10, cursor={**cursor, "last": ["x", "y"]}, **self.PARAMS)
+        with pytest.raises(ValueError):
+            index.query(page_size=10, cursor={**cursor, "position": 10_000}, **self.PARAMS)
+
+    def test_unpaged_query_has_no_cursor(self):
+        assert "_next" not in PartitionIndex(_records(20)).query()
+
+    def test_cursor_codec(self):
+        position = {"selection": "abc", "position": 50, "last": ["consul-1", "svc-ã"]}
+        token = encode_cursor(7, "network-probes", position)
+        assert decode_cursor(token) == {"v": 7, "c": "network-probes", **position}
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(7, "x", {"selection": "abc"}))
@@ -0,0 +1,178 @@
+"""
+Testes Unitários: Endpoints otimizados async (pool compartilhado)
+
+OBJETIVO:
+- Validar que /optimized/*, /dashboard/metrics e /services-optimized/list
+  servem do snapshot da réplica sem requisições ao Consul
+- Validar o fan-out paralelo limitado quando não há réplica
+- Validar o mapeamento de erros de conexão para 503
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import HTTPException, Request, Response
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from api import dashboard, optimized_endpoints, services_optimized
+from core.consul_manager import ConsulManager, gather_bounded
+
+from conftest import catalog_instance, catalog_snapshot
+
+
+def _snapshot():
+    services = {
+        "consul": (catalog_instance("consul", "consul", "consul-1", address="172.16.1.26"),),
+        "blackbox": (
+            catalog_instance("blackbox", "bb-1", "consul-1", address="172.16.1.26", module="icmp", env="prod"),
+            catalog_instance("blackbox", "bb-2", "consul-2", address="172.16.1.27", module="http_2xx", env="dev"),
+        ),
+        "selfnode_exporter": (
+            catalog_instance(
+                "selfnode_exporter", "sn-1", "consul-2", address="172.16.1.27", tags=["linux"], env="prod"
+            ),
+        ),
+    }
+    return catalog_snapshot(services)
+
+
+def _response(payload):
+    response = MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+def _replica(snapshot):
+    """Patch dos pontos que consultam a réplica"""
+    return (
+        patch("core.catalog_replica.get_ready_snapshot", return_value=snapshot),
+        patch.object(optimized_endpoints, "get_ready_snapshot", return_value=snapshot),
+        patch.object(services_optimized, "get_ready_snapshot", return_value=snapshot),
+    )
+
+
+def _request(path="/api/v1/dashboard/metrics", headers=()):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": list(headers)})
+
+
+class TestGatherBounded:
+    """Fan-out com semáforo"""
+
+    @pytest.mark.asyncio
+    async def test_limit_and_order(self):
+        running = 0
+        peak = 0
+
+        async def fetch(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return item * 2
+
+        assert await gather_bounded(range(20), fetch, limit=3) == [i * 2 for i in range(20)]
+        assert peak == 3
+
+
+class TestFromSnapshot:
+    """Réplica pronta: 0 requisições ao Consul"""
+
+    @pytest.mark.asyncio
+    async def test_blackbox_and_exporters(self):
+        request = AsyncMock()
+        a, b, c = _replica(_snapshot())
+        with a, b, c, patch.object(ConsulManager, "_request", request):
+            targets = await optimized_endpoints.get_blackbox_targets_optimized(force_refresh=False)
+            exporters = await optimized_endpoints.get_exporters_optimized(force_refresh=False)
+            instances = await optimized_endpoints.get_services_instances_optimized(
+                force_refresh=False, node_addr="172.16.1.27"
+            )
+
+        request.assert_not_awaited()
+        assert [t["key"] for t in targets["data"]] == ["consul-1_bb-1", "consul-2_bb-2"]
+        assert targets["data"][1]["nodeAddr"] == "172.16.1.27"
+        assert targets["summary"]["by_module"] == {"icmp": 1, "http_2xx": 1}
+        assert [e["exporterType"] for e in exporters["data"]] == ["Node Exporter"]
+        assert [i["id"] for i in instances["data"]] == ["bb-2", "sn-1"]
+
+    @pytest.mark.asyncio
+    async def test_service_groups_node_from_snapshot(self):
+        ui_services = [
+            {"Name": "consul", "InstanceCount": 1},
+            {"Name": "selfnode_exporter", "InstanceCount": 1, "ChecksPassing": 1},
+            {"Name": "blackbox", "InstanceCount": 2},
+        ]
+        request = AsyncMock(return_value=_response(ui_services))
+        a, b, c = _replica(_snapshot())
+        with a, b, c, patch.object(ConsulManager, "_request", request):
+            result = await optimized_endpoints.get_service_groups_optimized(force_refresh=False)
+
+        assert request.await_count == 1
+        assert [s["Name"] for s in result["data"]] == ["selfnode_exporter", "blackbox"]
+        assert result["data"][0]["NodeAddress"] == "172.16.1.27"
+        assert "NodeAddress" not in result["data"][1]
+
+    @pytest.mark.asyncio
+    async def test_services_list(self):
+        request = AsyncMock()
+        a, b, c = _replica(_snapshot())
+        with a, b, c, patch.object(ConsulManager, "_request", request):
+            result = await services_optimized.get_services_optimized(
+                node="consul-2", search=None, force_refresh=False
+            )
+
+        request.assert_not_awaited()
+        assert [s["key"] for s in result["data"]] == ["consul-2_bb-2", "consul-2_sn-1"]
+        assert result["data"][0]["node_addr"] == "172.16.1.27"
+
+
+class TestWithoutReplica:
+    """Sem réplica: fan-out paralelo no pool compartilhado"""
+
+    @pytest.mark.asyncio
+    async def test_services_list_fans_out_nodes(self):
+        async def fake_request(method, path, **kwargs):
+            if path == "/catalog/nodes":
+                return _response([{"Node": "n1", "Address": "10.1"}, {"Node": "n2", "Address": "10.2"}])
+            if path == "/catalog/node/n2":
+                raise httpx.ConnectError("down")
+            return _response({"Services": {
+                "consul": {"ID": "consul", "Service": "consul"},
+                "web-1": {"ID": "web-1", "Service": "web", "Tags": [], "Meta": {"env": "prod"}},
+            }})
+
+        a, b, c = _replica(None)
+        with a, b, c, patch.object(ConsulManager, "_request", side_effect=fake_request):
+            result = await services_optimized.get_services_optimized(
+                node=None, search=None, force_refresh=False
+            )
+
+        assert [(s["key"], s["node_addr"]) for s in result["data"]] == [("n1_web-1", "10.1")]
+
+    @pytest.mark.asyncio
+    async def test_dashboard_parallel_calls_and_503(self):
+        async def fake_request(method, path, **kwargs):
+            if path == "/catalog/nodes":
+                return _response([{"Node": "n1"}])
+            return _response([
+                {"Name": "consul", "InstanceCount": 1},
+                {"Name": "node_exporter", "InstanceCount": 3, "Tags": ["env=prod"], "ChecksPassing": 3},
+            ])
+
+        with patch.object(ConsulManager, "_request", side_effect=fake_request):
+            metrics = await dashboard.get_dashboard_metrics_fast(_request(), Response())
+        assert metrics["exporters"] == 3
+        assert metrics["by_env"] == {"prod": 3}
+        assert metrics["total_nodes"] == 1
+
+        with patch.object(ConsulManager, "_request", AsyncMock(side_effect=httpx.ConnectError("down"))):
+            with pytest.raises(HTTPException) as exc:
+                await dashboard.get_dashboard_metrics_fast(_request(), Response())
+        assert exc.value.status_code == 503
@@ -0,0 +1,139 @@
+"""
+Testes Unitários: Índice de uso dos reference values
+
+OBJETIVO:
+- Validar contagem por (campo, valor normalizado) a partir do snapshot do catálogo
+- Validar aplicação por deltas (serviço alterado, removido, adicionado)
+- Validar que serviços com a mesma tupla não são reaplicados
+- Validar instância que migra entre serviços no mesmo delta
+- Validar _check_usage/list_values lendo do índice e increment_usage sem gravar no KV
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core import reference_usage_index as usage_module
+from core.reference_usage_index import ReferenceUsageIndex, reset_reference_usage_index
+from core.reference_values_manager import ReferenceValuesManager
+
+from conftest import catalog_instance, catalog_snapshot
+
+
+@pytest.fixture(autouse=True)
+def _reset_index():
+    reset_reference_usage_index()
+    yield
+    reset_reference_usage_index()
+
+
+class TestIndex:
+    """Sincronização por deltas do catálogo"""
+
+    def test_initial_sync_counts_instances(self):
+        index = ReferenceUsageIndex()
+        index.sync_catalog(catalog_snapshot({
+            "node_exporter": (
+                catalog_instance("node_exporter", "node_1", "n1", company="ramada", env="prod"),
+                catalog_instance("node_exporter", "node_1", "n2", company="Ramada"),
+            ),
+            "blackbox": (catalog_instance("blackbox", "bb_1", "n1", company="EMPRESA  ACME", env=""),),
+        }, 1))
+
+        assert index.usage("company", "Ramada") == 2  # mesmo ID em nodes diferentes
+        assert index.usage("company", "Empresa Acme") == 1
+        assert index.counts("env") == {"Prod": 1}
+        assert index.service_ids("company", "Ramada") == ["node_1"]
+
+    def test_deltas_reapply_only_changed_services(self):
+        index = ReferenceUsageIndex()
+        unchanged = (catalog_instance("blackbox", "bb_1", "n1", company="Ramada"),)
+        index.sync_catalog(catalog_snapshot({
+            "node_exporter": (catalog_instance("node_exporter", "node_1", "n1", company="Ramada"),),
+            "blackbox": unchanged,
+            "snmp": (catalog_instance("snmp", "snmp_1", "n1", company="Acme"),),
+        }, 1))
+
+        index.sync_catalog(catalog_snapshot({
+            "node_exporter": (catalog_instance("node_exporter", "node_1", "n1", company="Acme"),),
+            "blackbox": unchanged,
+            "windows": (catalog_instance("windows", "win_1", "n3", company="Acme"),),
+        }, 2))
+
+        assert index.counts("company") == {"Ramada": 1, "Acme": 2}
+        stats = index.get_stats()
+        assert stats["services_applied"] == 3 + 3  # alterado, removido, adicionado
+        assert stats["catalog_version"] == 2 and stats["services"] == 3
+
+        # Versão antiga não regride o índice
+        assert index.sync_catalog(catalog_snapshot({}, 1)) is False
+        assert index.usage("company", "Acme") == 2
+
+    @pytest.mark.parametrize("source,target", [("a_svc", "z_svc"), ("z_svc", "a_svc")])
+    def test_instance_moving_between_services_keeps_usage(self, source, target):
+        index = ReferenceUsageIndex()
+        index.sync_catalog(catalog_snapshot({source: (catalog_instance(source, "node_1", "n1", company="Ramada"),)}, 1))
+
+        # Mesma instância (Node, ID) passa para outro serviço no mesmo delta
+        index.sync_catalog(catalog_snapshot({target: (catalog_instance(target, "node_1", "n1", company="Ramada"),)}, 2))
+
+        assert index.usage("company", "Ramada") == 1
+        assert index.service_ids("company", "Ramada") == ["node_1"]
+
+
+class TestManagerIntegration:
+    """ReferenceValuesManager lendo do índice"""
+
+    @pytest.mark.asyncio
+    async def test_check_usage_and_list_values_use_index(self):
+        snapshot = catalog_snapshot({
+            "node_exporter": (
+                catalog_instance("node_exporter", "node_1", "n1", company="Ramada"),
+                catalog_instance("node_exporter", "node_2", "n1", company="Acme"),
+                catalog_instance("node_exporter", "node_3", "n2", company="acme"),
+            ),
+        }, 7)
+        manager = ReferenceValuesManager()
+        stored = [
+            {"value": "Ramada", "usage_count": 40},
+            {"value": "Acme", "usage_count": 0},
+            {"value": "Sem Uso", "usage_count": 9},
+        ]
+
+        with patch.object(usage_module, "get_ready_snapshot", return_value=snapshot), \
+                patch.object(manager.consul, "get_services_snapshot", AsyncMock()) as scan, \
+                patch.object(manager.kv, "get_json", AsyncMock(return_value=stored)):
+            assert await manager._check_usage("company", "Acme") == 2
+            values = await manager.list_values("company", include_stats=True, sort_by="usage_count")
+            plain = await manager.list_values("company", sort_by="usage_count")
+
+        scan.assert_not_called()
+        assert [(v["value"], v["usage_count"]) for v in values] == [("Acme", 2), ("Ramada", 1), ("Sem Uso", 0)]
+        assert [v["value"] for v in plain] == ["Acme", "Ramada", "Sem Uso"]
+        assert stored[0]["usage_count"] == 40  # dados do KV não são alterados
+
+    @pytest.mark.asyncio
+    async def test_without_replica_falls_back_to_scan(self):
+        manager = ReferenceValuesManager()
+        services = [{"ID": "node_1", "Meta": {"company": "ramada"}}, {"ID": "node_2", "Meta": {"company": "Acme"}}]
+
+        with patch.object(usage_module, "get_ready_snapshot", return_value=None), \
+                patch.object(manager.consul, "get_services_snapshot", AsyncMock(return_value=services)) as scan:
+            assert await manager._check_usage("company", "Ramada") == 1
+
+        scan.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_increment_usage_does_not_write_kv(self):
+        manager = ReferenceValuesManager()
+        with patch.object(manager, "get_value", AsyncMock(side_effect=[{"value": "Ramada"}, None])), \
+                patch.object(manager, "_put_value", AsyncMock()) as put_value:
+            assert await manager.increment_usage("company", "ramada") is True
+            assert await manager.increment_usage("company", "nova") is False
+
+        put_value.assert_not_called()
@@ -0,0 +1,147 @@
+"""
+Testes Unitários: Cache de respostas pré-serializadas (JSON + gzip/brotli)
+
+OBJETIVO:
+- Validar codificação idêntica ao CodecJSONResponse e variantes comprimidas
+- Validar negociação de Accept-Encoding
+- Validar invalidação por nova versão e pelo MonitoringDataCache
+- Validar a integração com o ConditionalGetMiddleware (ETag/304)
+"""
+
+import gzip
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.cache_manager import LocalCache
+from core.http_cache import (
+    ConditionalGetMiddleware,
+    NotModified,
+    check_not_modified,
+    conditional_get,
+    not_modified_handler,
+)
+from core.json_codec import CodecJSONResponse
+from core.monitoring_cache import MonitoringDataCache
+from core.response_cache import EncodedResponse, ResponseCache, encode_response, negotiate_encoding
+
+PAYLOAD = {
+    "data": [{"ID": f"svc-{i}", "Meta": {"site": "palmas", "name": "Ção"}} for i in range(200)],
+    "at": datetime(2025, 11, 22, 10, 30),
+}
+
+
+def _cache(min_size=0):
+    cache = ResponseCache(ttl_seconds=60, min_size=min_size)
+    cache._cache = LocalCache(default_ttl_seconds=60)
+    return cache
+
+
+class TestEncoding:
+    """Bytes e negociação"""
+
+    def test_same_bytes_as_json_response(self):
+        entry = encode_response('"e"', PAYLOAD)
+        # Mesmo corpo que o FastAPI geraria (jsonable_encoder + CodecJSONResponse)
+        assert entry.body == CodecJSONResponse(jsonable_encoder(PAYLOAD)).body
+        assert gzip.decompress(entry.gzip) == entry.body
+
+        small = encode_response('"e"', {"ok": True}, min_size=1024)
+        assert small.gzip is None and small.br is None
+
+    def test_negotiate(self):
+        both = EncodedResponse('"e"', b"{}", b"gz", b"br")
+        only_gzip = EncodedResponse('"e"', b"{}", b"gz", None)
+        assert negotiate_encoding("gzip, deflate, br", both) == "br"
+        assert negotiate_encoding("gzip, br;q=0", both) == "gzip"
+        assert negotiate_encoding("br", only_gzip) is None
+        assert negotiate_encoding("*", only_gzip) == "gzip"
+        assert negotiate_encoding("identity", both) is None
+        assert negotiate_encoding(None, both) is None
+
+
+class TestInvalidation:
+    """Versão nova e MonitoringDataCache.invalidate()"""
+
+    @pytest.mark.asyncio
+    async def test_new_version_drops_previous(self):
+        cache = _cache()
+        await cache.store("monitoring:data:web-probes", '"v1a"', 1, {"page": 1})
+        await cache.store("monitoring:data:web-probes", '"v1b"', 1, {"page": 2})
+        await cache.store("monitoring:data:network-probes", '"n1"', 1, {"page": 1})
+        assert await cache.get("monitoring:data:web-probes", '"v1b"') is not None
+
+        await cache.store("monitoring:data:web-probes", '"v2a"', 2, {"page": 1})
+        assert await cache.get("monitoring:data:web-probes", '"v1a"') is None
+        assert await cache.get("monitoring:data:web-probes", '"v1b"') is None
+        assert await cache.get("monitoring:data:network-probes", '"n1"') is not None
+
+    @pytest.mark.asyncio
+    async def test_monitoring_cache_invalidation_drops_responses(self):
+        cache = _cache()
+        monitoring = MonitoringDataCache()
+        monitoring._cache = cache._cache
+
+        await cache.store("monitoring:data:web-probes", '"w"', 1, {"page": 1})
+        await cache.store("monitoring:data:network-probes", '"n"', 1, {"page": 1})
+
+        assert await monitoring.invalidate("web-probes") == 1
+        assert await cache.get("monitoring:data:web-probes", '"w"') is None
+        assert await monitoring.invalidate() == 1
+
+
+class TestServing:
+    """Rota com ETag por versão + cache de respostas atrás do middleware"""
+
+    def test_compressed_variants_and_304(self):
+        cache = _cache(min_size=100)
+        state = {"version": 1, "built": 0}
+        router = APIRouter(prefix="/cached")
+
+        @router.get("/data")
+        async def data(request: Request, response: Response, category: str):
+            etag = check_not_modified(request, response, state["version"])
+            cached = await cache.get(f"data:{category}", etag)
+            if cached is None:
+                state["built"] += 1
+                cached = await cache.store(f"data:{category}", etag, state["version"], PAYLOAD)
+            return cache.respond(request, cached)
+
+        app = FastAPI()
+        app.add_middleware(ConditionalGetMiddleware)
+        app.add_exception_handler(NotModified, not_modified_handler)
+        app.include_router(router, dependencies=[Depends(conditional_get("private, no-cache"))])
+        client = TestClient(app)
+
+        plain = client.get("/cached/data", params={"category": "a"}, headers={"Accept-Encoding": "identity"})
+        assert plain.headers.get("content-encoding") is None
+        assert plain.json()["data"][0]["Meta"]["name"] == "Ção"
+        assert plain.headers["cache-control"] == "private, no-cache"
+
+        # httpx descomprime o gzip de forma transparente
+        zipped = client.get("/cached/data", params={"category": "a"}, headers={"Accept-Encoding": "gzip"})
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.headers["etag"] == f"W/{plain.headers['etag']}"
+        assert zipped.headers["vary"] == "Accept-Encoding"
+        assert zipped.json() == plain.json()
+        assert state["built"] == 1
+
+        # ETag fraco da variante comprimida também revalida
+        again = client.get(
+            "/cached/data", params={"category": "a"},
+            headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["etag"]},
+        )
+        assert again.status_code == 304
+
+        state["version"] = 2
+        client.get("/cached/data", params={"category": "a"})
+        assert state["built"] == 2
+        assert cache.get_stats()["version_invalidations"] == 1
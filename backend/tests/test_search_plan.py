@@ -0,0 +1,206 @@
+"""
+Testes Unitários: Planos compilados do AdvancedSearch
+
+OBJETIVO:
+- Validar equivalência exata com SearchQuery/SearchCondition (todos os operadores)
+- Validar cache de planos por query normalizada
+- Validar pushdown para o índice de trigramas (AND/OR) e o modo explain
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.advanced_search import SearchCondition, SearchQuery
+from core.search_plan import QueryPlanCache, field_accessor, normalize_query
+from core.text_index import CatalogTextIndex
+
+from conftest import catalog_instance, catalog_snapshot
+
+
+def _random_snapshot(count=200, seed=11):
+    rng = random.Random(seed)
+    services = {}
+    for i in range(count):
+        name = rng.choice(["blackbox", "node_exporter", "windows_exporter"])
+        sid = f"{name}-{i}"
+        services.setdefault(name, []).append(catalog_instance(
+            name, sid, rng.choice(["consul-1", "consul-2"]),
+            tags=["t1", "web"] if len(sid) % 2 else ["t2"],
+            port=9100 + len(sid), service_address=f"10.0.0.{len(sid)}",
+            company=rng.choice(["Empresa Ramada", "Acme Corp", "Globex", "acme"]),
+            name=f"web-{i} {rng.choice(['Palmas', 'Rio', 'SP'])}",
+            env=rng.choice(["prod", "dev", "staging"]),
+            retries=str(rng.randint(0, 5)),
+        ))
+    return catalog_snapshot(services)
+
+
+def _reference(items, conditions, logical):
+    query = SearchQuery([SearchCondition(c["field"], c["operator"], c["value"]) for c in conditions], logical)
+    return [item for item in items if query.matches(item)]
+
+
+CONDITIONS = [
+    [{"field": "Meta.company", "operator": "eq", "value": "Acme Corp"}],
+    [{"field": "Meta.company", "operator": "ne", "value": "acme"}],
+    [{"field": "Meta.name", "operator": "contains", "value": "PALMAS"}],
+    [{"field": "Meta.name", "operator": "regex", "value": r"web-1\d "}],
+    [{"field": "Meta.name", "operator": "regex", "value": "web-("}],  # regex inválida
+    [{"field": "Meta.env", "operator": "in", "value": ["prod", "staging"]}],
+    [{"field": "Meta.env", "operator": "in", "value": "prod"}],  # não-lista
+    [{"field": "Meta.env", "operator": "not_in", "value": ["prod"]}],
+    [{"field": "Tags", "operator": "in", "value": [["t2"], "x"]}],  # membros não-hasheáveis
+    [{"field": "Meta.name", "operator": "starts_with", "value": "WEB-1"}],
+    [{"field": "Service", "operator": "ends_with", "value": "exporter"}],
+    [{"field": "Port", "operator": "gt", "value": "9110"}],
+    [{"field": "Meta.retries", "operator": "lte", "value": 2}],
+    [{"field": "Meta.retries", "operator": "gte", "value": "abc"}],
+    [{"field": "Meta.missing", "operator": "ne", "value": "x"}],
+    [{"field": "Meta.company.deep", "operator": "eq", "value": "x"}],
+    [],
+    [
+        {"field": "Meta.company", "operator": "contains", "value": "acme"},
+        {"field": "Meta.env", "operator": "eq", "value": "prod"},
+        {"field": "Meta.name", "operator": "regex", "value": "palmas|rio"},
+    ],
+    [
+        {"field": "Meta.company", "operator": "eq", "value": "Globex"},
+        {"field": "Meta.name", "operator": "contains", "value": "sp"},
+    ],
+    [
+        {"field": "Meta.company", "operator": "contains", "value": "ramada"},
+        {"field": "Port", "operator": "lt", "value": 9115},
+    ],
+]
+
+
+class TestPlanEquivalence:
+    """O plano compilado deve reproduzir SearchQuery"""
+
+    @pytest.mark.parametrize("logical", ["and", "or"])
+    @pytest.mark.parametrize("conditions", CONDITIONS)
+    def test_scan_matches_reference(self, conditions, logical):
+        items = _random_snapshot().to_flat_list()
+        plan = QueryPlanCache().get_or_compile(conditions, logical)[0]
+        trace = {}
+        assert plan.execute(items, trace=trace) == _reference(items, conditions, logical)
+        assert trace["strategy"] == "scan"
+
+    @pytest.mark.parametrize("logical", ["and", "or"])
+    @pytest.mark.parametrize("conditions", CONDITIONS)
+    def test_index_pushdown_matches_reference(self, conditions, logical):
+        snapshot = _random_snapshot()
+        text_index = CatalogTextIndex()
+        text_index.sync(snapshot)
+        items = snapshot.to_flat_list()
+
+        plan = QueryPlanCache().get_or_compile(conditions, logical)[0]
+        result = plan.execute(items, text_index=text_index)
+        assert [i["ID"] for i in result] == [i["ID"] for i in _reference(items, conditions, logical)]
+
+    def test_and_pushdown_uses_index(self):
+        snapshot = _random_snapshot()
+        text_index = CatalogTextIndex()
+        text_index.sync(snapshot)
+        conditions = [
+            {"field": "Port", "operator": "gt", "value": 0},
+            {"field": "Meta.company", "operator": "contains", "value": "ramada"},
+        ]
+        trace = {}
+        plan = QueryPlanCache().get_or_compile(conditions, "and")[0]
+        plan.execute(snapshot.to_flat_list(), text_index=text_index, trace=trace)
+
+        assert trace["strategy"] == "index"
+        assert trace["pushed_down"] == ["Meta.company:contains"]
+        assert trace["candidates"] == trace["matches"]
+
+        # OR com um ramo não indexável (Port é numérico) → varredura
+        trace = {}
+        plan = QueryPlanCache().get_or_compile(conditions, "or")[0]
+        plan.execute(snapshot.to_flat_list(), text_index=text_index, trace=trace)
+        assert trace["strategy"] == "scan"
+
+
+class TestPlanCompilation:
+    """Ordenação, cache e explain"""
+
+    def test_field_accessor(self):
+        item = {"Meta": {"a": {"b": 1}, "c": "x"}, "ID": "s1"}
+        assert field_accessor("ID")(item) == "s1"
+        assert field_accessor("Meta.c")(item) == "x"
+        assert field_accessor("Meta.a.b")(item) == 1
+        assert field_accessor("ID.x")(item) is None
+
+    def test_selective_conditions_first(self):
+        plan = QueryPlanCache().get_or_compile([
+            {"field": "Meta.name", "operator": "regex", "value": "x"},
+            {"field": "Meta.env", "operator": "ne", "value": "dev"},
+            {"field": "Meta.company", "operator": "eq", "value": "Acme"},
+        ])[0]
+        steps = plan.explain()["steps"]
+        assert [s["operator"] for s in steps] == ["eq", "ne", "regex"]
+        assert steps[0]["index"] == "candidates"
+        assert steps[2]["index"] is None
+
+    def test_cache_by_normalized_query(self):
+        cache = QueryPlanCache(max_size=2)
+        a = {"field": "Meta.env", "operator": "eq", "value": "prod"}
+        b = {"field": "Meta.company", "operator": "in", "value": ["x", "y"]}
+
+        plan, hit = cache.get_or_compile([a, b], "and")
+        assert not hit
+        assert cache.get_or_compile([b, a], "and") == (plan, True)
+        assert cache.get_or_compile([a, b], "or")[1] is False
+        cache.get_or_compile([a], "and")
+        assert cache.get_stats() == {"hits": 1, "misses": 3, "evictions": 1, "size": 2, "max_size": 2}
+
+    def test_invalid_operator(self):
+        with pytest.raises(ValueError):
+            normalize_query([{"field": "x", "operator": "like", "value": 1}])
+        with pytest.raises(ValueError):
+            normalize_query([], "xor")
+
+
+class TestAdvancedEndpoint:
+    """POST /search/advanced com plano compilado e explain"""
+
+    @pytest.mark.asyncio
+    async def test_explain_with_replica(self):
+        from unittest.mock import patch
+
+        from api import search as search_api
+        from core import search_plan as search_plan_module
+        from core import text_index as text_index_module
+
+        snapshot = _random_snapshot()
+        conditions = [{"field": "Meta.company", "operator": "contains", "value": "acme"}]
+        request = search_api.AdvancedSearchRequest(
+            conditions=conditions, sort_by="ID", page_size=100, explain=True
+        )
+        text_index_module.reset_catalog_text_index()
+        search_plan_module.reset_query_plan_cache()
+        try:
+            with patch.object(search_api, "get_ready_snapshot", return_value=snapshot):
+                first = await search_api.advanced_search(request)
+                second = await search_api.advanced_search(request)
+                plain = await search_api.advanced_search(
+                    search_api.AdvancedSearchRequest(conditions=conditions)
+                )
+        finally:
+            text_index_module.reset_catalog_text_index()
+            search_plan_module.reset_query_plan_cache()
+
+        items = snapshot.to_flat_list()
+        expected = sorted(_reference(items, conditions, "and"), key=lambda i: i["ID"])
+        assert first["data"] == expected[:100]
+        assert first["explain"]["plan_cached"] is False
+        assert second["explain"]["plan_cached"] is True
+        assert second["explain"]["execution"]["strategy"] == "index"
+        assert second["data"] == first["data"]
+        assert "explain" not in plain
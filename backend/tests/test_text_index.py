@@ -0,0 +1,211 @@
+"""
+Testes Unitários: Índice de trigramas (busca textual q= e /search/text)
+
+OBJETIVO:
+- Validar busca por substring via interseção de postings + verificação
+- Validar sincronização incremental com os snapshots da réplica
+- Validar equivalência com AdvancedSearch.search_text e apply_text_search
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from core.advanced_search import AdvancedSearch
+from core.monitoring_filters import apply_text_search
+from core.monitoring_index import PartitionIndex
+from core.text_index import CatalogTextIndex, TrigramIndex, trigrams
+
+from conftest import catalog_instance, catalog_snapshot
+
+
+def _services(count=200, seed=3):
+    rng = random.Random(seed)
+    services = {}
+    for i in range(count):
+        name = rng.choice(["blackbox", "node_exporter", "windows_exporter"])
+        services.setdefault(name, []).append(catalog_instance(
+            name, f"{name}-{i}", node=rng.choice(["consul-1", "consul-2"]),
+            company=rng.choice(["Empresa Ramada", "Acme Corp", "Globex"]),
+            name=f"Gateway {i} {rng.choice(['Palmas', 'Rio', 'SP'])}",
+            env=rng.choice(["prod", "dev"]),
+        ))
+    return {name: tuple(instances) for name, instances in services.items()}
+
+
+class TestTrigramIndex:
+    """Testes do índice genérico"""
+
+    def test_trigrams(self):
+        assert trigrams("abcd") == {"abc", "bcd"}
+        assert trigrams("ab") == set()
+
+    def test_search_add_remove(self):
+        index = TrigramIndex()
+        index.add("a", [("Meta.name", "gateway principal"), ("Service", "blackbox")])
+        index.add("b", [("Meta.name", "gateway backup")])
+
+        assert index.search("GATEWAY") == {"a", "b"}
+        assert index.search("princ") == {"a"}
+        assert index.search("ck") == {"a", "b"}  # query curta → varredura dos termos
+        assert index.search("gateway", field_filter=lambda f: f == "Service") == set()
+
+        # Reindexação remove termos antigos e trigramas órfãos
+        index.add("a", [("Meta.name", "roteador")])
+        assert index.search("princ") == set()
+        index.remove("b")
+        assert index.search("gateway") == set()
+        stats = index.get_stats()
+        assert stats["documents"] == 1
+        assert stats["terms"] == 1
+        assert stats["queries"] == 6
+        assert stats["trigram_queries"] == 5
+
+
+class TestCatalogTextIndex:
+    """Testes da sincronização com a réplica"""
+
+    def test_incremental_sync(self):
+        services = _services()
+        text_index = CatalogTextIndex()
+        assert text_index.sync(catalog_snapshot(services))
+        reindexed = text_index.get_stats()["services_reindexed"]
+        assert reindexed == len(services)
+
+        # Apenas o serviço alterado é reindexado (copy-on-write)
+        changed = dict(services)
+        changed["blackbox"] = (catalog_instance("blackbox", "blackbox-new", company="Nova Empresa"),)
+        assert text_index.sync(catalog_snapshot(changed, 2))
+        assert text_index.get_stats()["services_reindexed"] == reindexed + 1
+        assert text_index.search("nova empresa") == {("node-1", "blackbox-new")}
+        assert not any(sid.startswith("blackbox-") and sid != "blackbox-new"
+                       for _, sid in text_index.search("gateway"))
+
+        # Serviço removido do catálogo
+        del changed["node_exporter"]
+        text_index.sync(catalog_snapshot(changed, 3))
+        assert not any(sid.startswith("node_exporter") for _, sid in text_index.search("gateway"))
+
+        # Snapshot mais antigo que o índice → indisponível
+        assert text_index.sync(catalog_snapshot(services, 2)) is False
+
+    @pytest.mark.parametrize("order", [("old_name", "new_name"), ("new_name", "old_name")])
+    def test_instance_moves_between_services(self, order):
+        moving = catalog_instance("old_name", "svc-1", company="Empresa Ramada")
+        text_index = CatalogTextIndex()
+        text_index.sync(catalog_snapshot({"old_name": (moving,), "other": ()}))
+
+        # Mesmo (Node, ID) passa para outro nome de serviço no mesmo delta
+        moved = catalog_instance("new_name", "svc-1", company="Empresa Ramada")
+        services = {name: (moved,) if name == "new_name" else () for name in order}
+        text_index.sync(catalog_snapshot(services, 2))
+
+        assert text_index.search("ramada") == {("node-1", "svc-1")}
+        assert text_index.search("new_name", fields=["Service"]) == {("node-1", "svc-1")}
+
+    @pytest.mark.parametrize("text", ["ramada", "Gateway 1", "pal", "xyz", "corp"])
+    def test_matches_advanced_search(self, text):
+        snapshot = catalog_snapshot(_services())
+        text_index = CatalogTextIndex()
+        text_index.sync(snapshot)
+
+        items = snapshot.to_flat_list()
+        expected = {svc["ID"] for svc in AdvancedSearch.search_text(items, text)}
+        docs = text_index.search(text, fields=AdvancedSearch.TEXT_SEARCH_FIELDS)
+        assert {sid for _, sid in docs} == expected
+
+    def test_non_string_fields_fall_back(self):
+        text_index = CatalogTextIndex()
+        text_index.sync(catalog_snapshot(_services(10)))
+
+        assert text_index.search("9115", fields=["Port"]) is None
+        assert text_index.search("10.0", fields=["Address"]) is not None
+
+
+class TestPartitionTextSearch:
+    """q= da /monitoring/data via índice de trigramas"""
+
+    @pytest.mark.parametrize("query", ["ramada", "gateway 1", "172.16", "palmas", "rio", "zz"])
+    def test_matches_linear_text_search(self, query):
+        snapshot = catalog_snapshot(_services())
+        text_index = CatalogTextIndex()
+        text_index.sync(snapshot)
+
+        records = []
+        for node, services in snapshot.to_nodes_dict().items():
+            for svc in services.values():
+                # Campos anexados na categorização (não estão no índice de trigramas)
+                svc["node_ip"] = "172.16.1.26" if node == "consul-1" else "172.16.1.27"
+                svc["site_code"] = "palmas" if node == "consul-1" else None
+                svc["site_name"] = "Palmas" if node == "consul-1" else None
+                records.append(svc)
+
+        calls = []
+
+        def text_search(q, field_filter):
+            calls.append(q)
+            return text_index.search(q, field_filter=field_filter)
+
+        index = PartitionIndex(records, text_search=text_search)
+        result = index.query(search_query=f"  {query.upper()} ")
+
+        expected = apply_text_search(records, query)
+        assert [r["ID"] for r in result["data"]] == [r["ID"] for r in expected]
+        assert calls == [query]
+        assert index.get_stats()["text_indexed"] == 1
+
+
+class TestSearchTextEndpoint:
+    """/search/text servido pelo índice quando a réplica está pronta"""
+
+    def test_indexed_text_search_matches_scan(self):
+        from unittest.mock import patch
+
+        from api import search as search_api
+        from core import text_index as text_index_module
+
+        snapshot = catalog_snapshot(_services())
+        text_index_module.reset_catalog_text_index()
+        try:
+            with patch.object(search_api, "get_ready_snapshot", return_value=snapshot):
+                result = search_api._indexed_text_search("ramada", None)
+                assert search_api._indexed_text_search("9115", ["Port"]) is None
+
+            expected = AdvancedSearch.search_text(snapshot.to_flat_list(), "ramada")
+            assert result == expected
+        finally:
+            text_index_module.reset_catalog_text_index()
+
+    @pytest.mark.asyncio
+    async def test_same_service_id_on_two_nodes(self):
+        from unittest.mock import patch
+
+        from api import search as search_api
+        from core import search_plan as search_plan_module
+        from core import text_index as text_index_module
+
+        snapshot = catalog_snapshot({"blackbox": (
+            catalog_instance("blackbox", "icmp-1", node="consul-1", company="Empresa Ramada"),
+            catalog_instance("blackbox", "icmp-1", node="consul-2", company="Ramada Filial"),
+        )})
+        conditions = [{"field": "Meta.company", "operator": "contains", "value": "ramada"}]
+        text_index_module.reset_catalog_text_index()
+        search_plan_module.reset_query_plan_cache()
+        try:
+            with patch.object(search_api, "get_ready_snapshot", return_value=snapshot):
+                text = search_api._indexed_text_search("ramada", None)
+                advanced = await search_api.advanced_search(
+                    search_api.AdvancedSearchRequest(conditions=conditions)
+                )
+        finally:
+            text_index_module.reset_catalog_text_index()
+            search_plan_module.reset_query_plan_cache()
+
+        # Nenhuma instância é descartada por compartilhar o service ID
+        assert [s["Node"] for s in text] == ["consul-1", "consul-2"]
+        assert [s["Node"] for s in advanced["data"]] == ["consul-1", "consul-2"]